@@ -30,12 +30,101 @@ class Settings:
         if not self.DASHSCOPE_API_KEY:
             self._migrate_from_env_file()
         
-        self.DASHSCOPE_BASE_URL = 'https://dashscope.aliyuncs.com/api/v1'
+        # 可通过环境变量或 QSettings 指向其他服务（如本地模拟服务 tests/fake_dashscope.py）
+        self.DASHSCOPE_BASE_URL = (
+            os.environ.get('DASHSCOPE_BASE_URL')
+            or self.qsettings.value('base_url', 'https://dashscope.aliyuncs.com/api/v1')
+        ).rstrip('/')
+        
+        # HTTP 连接池配置
+        self.HTTP_POOL_SIZE = self.qsettings.value('http_pool_size', 16, type=int)
+        # 各端点超时时间: (连接超时, 读取超时)，单位秒
+        self.HTTP_TIMEOUTS = {
+            'default': (10, 60),
+            'submit': (10, 60),
+            'generation': (10, 120),  # 同步生成接口耗时较长
+            'query': (10, 30),
+            'upload': (10, 300),
+            'download': (10, 60)
+        }
+        
+        # 请求限流: 端点类型 -> (每秒请求数, 突发容量)，未列出的端点不限流
+        self.API_RATE_LIMITS = {
+            'submit': (2, 5),
+            'generation': (2, 5),
+            'query': (10, 20),
+            'upload': (5, 10)
+        }
+        # 每个模型的提交限流 (每秒请求数, 突发容量)
+        self.API_MODEL_RATE_LIMIT = (2, 4)
+        self.API_RATE_MAX_WAIT = 120  # 单个请求最长排队时间（秒）
+        # 限流/临时错误重试
+        self.API_MAX_RETRIES = self.qsettings.value('api_max_retries', 4, type=int)
+        self.API_RETRY_BASE_DELAY = 1.0  # 秒
+        self.API_RETRY_MAX_DELAY = 30.0  # 秒
+        
+        # 视频下载配置（断点续传，大文件分段并行）
+        self.DOWNLOAD_CHUNK_SIZE = self.qsettings.value('download_chunk_size', 256 * 1024, type=int)
+        self.DOWNLOAD_PARALLELISM = self.qsettings.value('download_parallelism', 4, type=int)
+        self.DOWNLOAD_PARALLEL_MIN_SIZE = 16 * 1024 * 1024  # 剩余超过 16MB 才分段并行
+        self.DOWNLOAD_MAX_ATTEMPTS = 5
+        
+        # 文件上传配置（oss:// 临时地址有效期 48 小时，有效期内同一文件不重复上传）
+        self.UPLOAD_URL_TTL = 48 * 3600  # 秒
+        self.UPLOAD_WORKERS = self.qsettings.value('upload_workers', 3, type=int)
+        
+        # 任务轮询配置（实际间隔按历史耗时自适应，见 core/poll_cadence.py）
+        self.TASK_POLL_MIN_INTERVAL = 2  # 秒
+        self.TASK_POLL_MAX_INTERVAL = 60  # 秒
+        self.TASK_POLL_WORKERS = self.qsettings.value('task_poll_workers', 4, type=int)
+        # 同时到期的任务达到该数量时改用批量查询接口
+        self.TASK_BULK_QUERY_THRESHOLD = self.qsettings.value('task_bulk_query_threshold', 10, type=int)
+        # 没有历史数据时的预计耗时（秒）
+        self.TASK_EXPECTED_SECONDS = {
+            'video': 300,
+            'image': 20
+        }
+        # 最短超时时间（秒），历史耗时较长时自动放宽
+        self.TASK_POLL_TIMEOUTS = {
+            'video': 900,
+            'image': 120
+        }
+        # 估算耗时分布时每个模型最多使用的最近样本数
+        self.TASK_DURATION_SAMPLES = 500
+        
+        # 任务存储配置：多次更新在该时间窗口（秒）内合并为一次写入
+        self.TASK_FLUSH_INTERVAL = 0.5
+        # 创建超过该天数的已结束任务移入压缩归档（0 表示不归档）
+        self.TASK_ARCHIVE_DAYS = self.qsettings.value('task_archive_days', 30, type=int)
+        # 任务列表每页显示的任务数
+        self.TASK_PAGE_SIZE = 100
+        # 图片画廊每页显示的图片数
+        self.GALLERY_PAGE_SIZE = 30
+        # 缩略图磁盘缓存上限（MB），超过后淘汰最久未使用的缩略图
+        self.THUMBNAIL_CACHE_MAX_MB = self.qsettings.value('thumbnail_cache_max_mb', 256, type=int)
+        # 后台生成缩略图的线程数
+        self.THUMBNAIL_WORKERS = self.qsettings.value('thumbnail_workers', 2, type=int)
+        # 上传区域、首尾帧等预览保留的图片最长边（像素），超过时按该尺寸解码
+        self.PREVIEW_MAX_SIZE = self.qsettings.value('preview_max_size', 1280, type=int)
+        # 资源管理器监视素材目录，合并连续变化的等待时间（毫秒）
+        self.EXPLORER_WATCH_DEBOUNCE_MS = self.qsettings.value('explorer_watch_debounce_ms', 200, type=int)
+        # 资源管理器每次滚动到底部时取出的文件行数
+        self.EXPLORER_FETCH_CHUNK = 200
         
         # 文件路径配置(默认放在用户数据目录下)
         self.UPLOAD_FOLDER = os.path.join(app_data_dir, 'uploads')
         self.OUTPUT_FOLDER = os.path.join(app_data_dir, 'downloads')
         self.TASKS_FILE = os.path.join(app_data_dir, 'tasks.json')
+        # 各工程在途任务的索引，启动时据此恢复监控
+        self.TASKS_INDEX_FILE = os.path.join(app_data_dir, 'inflight_tasks.json')
+        # 各工程成功任务的耗时样本，用于估算轮询节奏和剩余时间
+        self.TASK_DURATIONS_FILE = os.path.join(app_data_dir, 'task_durations.db')
+        self.UPLOAD_CACHE_FILE = os.path.join(app_data_dir, 'upload_cache.json')
+        # 导入工程的输入文件按内容只保存一份，工程内通过 reflink 或硬链接引用
+        self.INPUT_STORE_DIR = os.path.join(app_data_dir, 'input_store')
+        # 最近工程摘要索引，欢迎页只读取这里
+        self.RECENT_PROJECTS_FILE = os.path.join(app_data_dir, 'recent_projects.json')
+        self.THUMBNAIL_CACHE_DIR = os.path.join(app_data_dir, 'thumbnails')
         
         # 文件限制
         self.ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
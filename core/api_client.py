@@ -8,16 +8,61 @@ DashScope API 客户端
 import base64
 import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
 import requests
-from typing import Dict, Optional
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
 from config.settings import settings
+from .downloader import DownloadEngine
+from .http_transport import MultipartFileBody, get_transport
+from .rate_limiter import RetryPolicy, get_rate_limiter
+from .upload_cache import get_upload_cache
+
+
+# 图片扩展名 -> MIME 类型
+IMAGE_MIME_TYPES = {
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+    'bmp': 'image/bmp',
+    'tiff': 'image/tiff',
+    'webp': 'image/webp',
+    'gif': 'image/gif'
+}
+
+
+def _connection_not_established(error: Exception) -> bool:
+    """
+    请求异常是否发生在连接建立之前（连接超时、连接被拒绝、域名解析失败）
+    
+    这类失败时请求一定没有发出，非幂等请求也可以安全重试；连接建立后被重置或读取超时，
+    服务端可能已受理请求。
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.ConnectionError) or isinstance(error, requests.exceptions.SSLError):
+        return False
+    # requests 把 urllib3 的 MaxRetryError 包装为 ConnectionError，失败原因在 reason 中
+    reason = error.args[0] if error.args else None
+    reason = getattr(reason, 'reason', reason)
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
 
 
-class DashScopeClient:
-    """DashScope API 客户端"""
+class DashScopeRequestBuilder:
+    """
+    DashScope 请求构造器
+    
+    负责拼装各接口的 URL、请求头和请求体，不执行任何网络请求。
+    同步客户端 DashScopeClient 与异步客户端 AsyncDashScopeClient 共用。
+    """
     
     def __init__(self):
-        """初始化客户端"""
+        """初始化构造器"""
         self.api_key = settings.get_api_key()
         self.base_url = settings.DASHSCOPE_BASE_URL
     
@@ -33,36 +78,61 @@ class DashScopeClient:
             headers['X-DashScope-OssResourceResolve'] = 'enable'
         return headers
     
-    def submit_task(self, image_path: str, prompt: str, model: str, 
-                   resolution: str, negative_prompt: str = "",
-                   prompt_extend: bool = True, duration: int = 5,
-                   shot_type: str = None) -> Dict:
-        """
-        提交图生视频任务
-        
-        Args:
-            image_path: 图片文件路径
-            prompt: 提示词
-            model: 模型名称
-            resolution: 分辨率
-            negative_prompt: 反向提示词
-            prompt_extend: 是否启用智能改写
-            duration: 视频时长（秒）
-            shot_type: 镜头类型（仅2.6模型支持，multi/single）
-            
-        Returns:
-            API 响应数据
-        """
-        # 读取图片并转换为 base64
+    @staticmethod
+    def _image_to_data_uri(image_path: str) -> str:
+        """读取图片并转换为 base64 Data URI"""
         with open(image_path, 'rb') as f:
             image_data = base64.b64encode(f.read()).decode('utf-8')
-        
-        # 准备请求数据
+        ext = image_path.lower().split('.')[-1]
+        mime_type = IMAGE_MIME_TYPES.get(ext, 'image/jpeg')
+        return f"data:{mime_type};base64,{image_data}"
+    
+    def _image_ref(self, image_path: str, uploaded: Optional[Dict[str, str]] = None) -> str:
+        """图片引用：已上传的使用 oss:// 地址，否则回退为 base64 Data URI"""
+        if uploaded and image_path in uploaded:
+            return uploaded[image_path]
+        return self._image_to_data_uri(image_path)
+    
+    @staticmethod
+    def _uses_oss(*refs: str) -> bool:
+        """引用中是否包含 oss:// 地址（需要启用 OSS 资源解析）"""
+        return any(isinstance(ref, str) and ref.startswith('oss://') for ref in refs)
+    
+    @staticmethod
+    def _api_error(status_code: int, error_data: Dict) -> Exception:
+        """构造提交类接口的异常"""
+        return Exception(
+            f"API 调用失败: {error_data.get('message', '未知错误')} "
+            f"(状态码: {status_code})"
+        )
+    
+    @staticmethod
+    def _query_error(status_code: int) -> Exception:
+        """构造查询接口的异常"""
+        if status_code == 404:
+            return Exception('任务不存在')
+        return Exception(f'查询失败 (状态码: {status_code})')
+    
+    @staticmethod
+    def _resolve_video_path(output_path: str) -> str:
+        """output_path 为文件夹时生成视频文件名，否则原样返回"""
+        if os.path.isdir(output_path):
+            timestamp = int(time.time() * 1000)
+            return os.path.join(output_path, f"video_{timestamp}.mp4")
+        return output_path
+    
+    def _build_video_synthesis_request(self, image_path: str, prompt: str, model: str,
+                                       resolution: str, negative_prompt: str = "",
+                                       prompt_extend: bool = True, duration: int = 5,
+                                       shot_type: str = None,
+                                       uploaded: Optional[Dict[str, str]] = None) -> Tuple[str, Dict, Dict]:
+        """构造图生视频请求，返回 (url, headers, payload)；uploaded 为 本地路径 -> oss:// 地址"""
+        img_url = self._image_ref(image_path, uploaded)
         payload = {
             "model": model,
             "input": {
                 "prompt": prompt,
-                "img_url": f"data:image/jpeg;base64,{image_data}"
+                "img_url": img_url
             },
             "parameters": {
                 "resolution": resolution,
@@ -79,139 +149,49 @@ class DashScopeClient:
         if shot_type and prompt_extend:
             payload["parameters"]["shot_type"] = shot_type
         
-        # 发送请求
-        response = requests.post(
-            f'{self.base_url}/services/aigc/video-generation/video-synthesis',
-            headers=self._get_headers(async_mode=True),
-            data=json.dumps(payload)
-        )
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            error_data = response.json() if response.content else {}
-            raise Exception(
-                f"API 调用失败: {error_data.get('message', '未知错误')} "
-                f"(状态码: {response.status_code})"
-            )
+        url = f'{self.base_url}/services/aigc/video-generation/video-synthesis'
+        headers = self._get_headers(async_mode=True, oss_resource_resolve=self._uses_oss(img_url))
+        return url, headers, payload
     
-    def query_task(self, async_task_id: str) -> Dict:
+    def _build_image_edit_request(self, images: list, prompt: str, model: str, n: int,
+                                  negative_prompt: str, prompt_extend: bool, size: str = "",
+                                  enable_interleave: bool = False, max_images: int = 5,
+                                  uploaded: Optional[Dict[str, str]] = None) -> Tuple[str, Dict, Dict, str]:
         """
-        查询任务状态
+        构造图像编辑请求
         
         Args:
-            async_task_id: 异步任务 ID
-            
-        Returns:
-            任务状态数据
-        """
-        response = requests.get(
-            f'{self.base_url}/tasks/{async_task_id}',
-            headers=self._get_headers()
-        )
+            uploaded: 本地路径 -> oss:// 地址，未上传的图片以 base64 内联
         
-        if response.status_code == 200:
-            return response.json()
-        elif response.status_code == 404:
-            raise Exception('任务不存在')
-        else:
-            raise Exception(f'查询失败 (状态码: {response.status_code})')
-    
-    def download_video(self, video_url: str, output_path: str) -> str:
-        """
-        下载视频文件
-        
-        Args:
-            video_url: 视频 URL
-            output_path: 输出路径(文件夹或完整文件路径)
-            
         Returns:
-            下载后的文件路径
+            (url, headers, payload, endpoint)，endpoint 为传输层端点类型
         """
-        try:
-            # 判断 output_path 是文件夹还是文件
-            if os.path.isdir(output_path):
-                # 如果是文件夹,生成文件名
-                import time
-                timestamp = int(time.time() * 1000)
-                filename = f"video_{timestamp}.mp4"
-                full_path = os.path.join(output_path, filename)
-            else:
-                # 如果是完整路径,直接使用
-                full_path = output_path
-            
-            # 下载视频
-            response = requests.get(video_url, stream=True, timeout=30)
-            if response.status_code == 200:
-                with open(full_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        f.write(chunk)
-                return full_path
-            else:
-                raise Exception(f"下载失败: HTTP {response.status_code}")
-        except Exception as e:
-            raise Exception(f"下载视频失败: {str(e)}")
-    
-    def submit_image_edit(self, images: list, prompt: str, model: str = 'qwen-image-edit-plus',
-                         n: int = 2, negative_prompt: str = "", prompt_extend: bool = True, size: str = "",
-                         enable_interleave: bool = False, max_images: int = 5) -> Dict:
-        """
-        提交图像编辑任务（单图编辑或多图融合）
+        image_refs = [self._image_ref(image_path, uploaded) for image_path in images]
+        oss_resource_resolve = self._uses_oss(*image_refs)
         
-        Args:
-            images: 图片路径列表（单图或多图）
-            prompt: 编辑提示词
-            model: 模型名称
-            n: 生成图片数量（1-6）
-            negative_prompt: 反向提示词
-            prompt_extend: 是否启用智能改写
-            
-        Returns:
-            API 响应数据
-        """
         # 判断是否为万相模型（使用异步API）
         is_wanxiang = model.startswith('wan2.') or model == 'wan2.6-image'
         
         if is_wanxiang:
-            # 万相2.5/2.6使用异步API
-            return self._submit_wanxiang_image_edit(images, prompt, model, n, prompt_extend, size, enable_interleave, max_images)
-        else:
-            # 其他模型使用同步API
-            return self._submit_qwen_image_edit(images, prompt, model, n, negative_prompt, prompt_extend, size)
-    
-    def _submit_qwen_image_edit(self, images: list, prompt: str, model: str,
-                               n: int, negative_prompt: str, prompt_extend: bool, size: str = "") -> Dict:
-        """提交通义千问图像编辑任务（同步）"""
-        # 准备消息内容
-        content = []
-        
-        # 添加所有图片
-        for image_path in images:
-            with open(image_path, 'rb') as f:
-                image_data = base64.b64encode(f.read()).decode('utf-8')
-            
-            ext = image_path.lower().split('.')[-1]
-            mime_types = {
-                'jpg': 'image/jpeg',
-                'jpeg': 'image/jpeg',
-                'png': 'image/png',
-                'bmp': 'image/bmp',
-                'tiff': 'image/tiff',
-                'webp': 'image/webp',
-                'gif': 'image/gif'
-            }
-            mime_type = mime_types.get(ext, 'image/jpeg')
-            
-            content.append({
-                "image": f"data:{mime_type};base64,{image_data}"
-            })
+            url, payload = self._build_wanxiang_image_edit_payload(
+                image_refs, prompt, model, n, prompt_extend, size, enable_interleave, max_images
+            )
+            headers = self._get_headers(async_mode=True, oss_resource_resolve=oss_resource_resolve)
+            return url, headers, payload, 'submit'
         
-        # 添加提示词
-        content.append({
-            "text": prompt
-        })
+        url, payload = self._build_qwen_image_edit_payload(
+            image_refs, prompt, model, n, negative_prompt, prompt_extend, size
+        )
+        return url, self._get_headers(oss_resource_resolve=oss_resource_resolve), payload, 'generation'
+    
+    def _build_qwen_image_edit_payload(self, image_refs: list, prompt: str, model: str,
+                                       n: int, negative_prompt: str, prompt_extend: bool,
+                                       size: str = "") -> Tuple[str, Dict]:
+        """构造通义千问图像编辑请求体（同步接口）"""
+        # 添加所有图片，最后添加提示词
+        content = [{"image": image_ref} for image_ref in image_refs]
+        content.append({"text": prompt})
         
-        # 准备请求数据
         payload = {
             "model": model,
             "input": {
@@ -234,45 +214,13 @@ class DashScopeClient:
         if model == "qwen-image-edit-plus" and size:
             payload["parameters"]["size"] = size
         
-        # 发送请求
-        response = requests.post(
-            f'{self.base_url}/services/aigc/multimodal-generation/generation',
-            headers=self._get_headers(),
-            data=json.dumps(payload),
-            timeout=60
-        )
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            error_data = response.json() if response.content else {}
-            raise Exception(
-                f"API 调用失败: {error_data.get('message', '未知错误')} "
-                f"(状态码: {response.status_code})"
-            )
+        return f'{self.base_url}/services/aigc/multimodal-generation/generation', payload
     
-    def _submit_wanxiang_image_edit(self, images: list, prompt: str, model: str,
-                                   n: int, prompt_extend: bool, size: str = "",
-                                   enable_interleave: bool = False, max_images: int = 5) -> Dict:
-        """提交万相图像编辑任务（异步，支持2.5和2.6）"""
-        # 准备图片URL列表
-        image_urls = []
-        for image_path in images:
-            with open(image_path, 'rb') as f:
-                image_data = base64.b64encode(f.read()).decode('utf-8')
-            
-            ext = image_path.lower().split('.')[-1]
-            mime_types = {
-                'jpg': 'image/jpeg',
-                'jpeg': 'image/jpeg',
-                'png': 'image/png',
-                'bmp': 'image/bmp',
-                'tiff': 'image/tiff',
-                'webp': 'image/webp',
-                'gif': 'image/gif'
-            }
-            mime_type = mime_types.get(ext, 'image/jpeg')
-            image_urls.append(f"data:{mime_type};base64,{image_data}")
+    def _build_wanxiang_image_edit_payload(self, image_urls: list, prompt: str, model: str,
+                                           n: int, prompt_extend: bool, size: str = "",
+                                           enable_interleave: bool = False,
+                                           max_images: int = 5) -> Tuple[str, Dict]:
+        """构造万相图像编辑请求体（异步接口，支持2.5和2.6）"""
         
         # 判断是否为万相2.6
         is_wan26 = model == 'wan2.6-image'
@@ -338,22 +286,356 @@ class DashScopeClient:
             # 万相2.5使用旧接口
             url = f'{self.base_url}/services/aigc/image2image/image-synthesis'
         
-        # 发送异步请求
-        response = requests.post(
+        return url, payload
+    
+    def _build_reference_video_request(self, reference_video_urls: list, prompt: str,
+                                       negative_prompt: str = "", size: str = "1920*1080",
+                                       duration: int = 5, shot_type: str = "single",
+                                       audio: bool = True,
+                                       seed: int = None) -> Tuple[str, Dict, Dict]:
+        """构造参考生视频请求，返回 (url, headers, payload)"""
+        payload = {
+            "model": "wan2.6-r2v",
+            "input": {
+                "prompt": prompt,
+                "reference_video_urls": reference_video_urls
+            },
+            "parameters": {
+                "size": size,
+                "duration": duration,
+                "audio": audio,
+                "shot_type": shot_type
+            }
+        }
+        
+        # 添加反向提示词
+        if negative_prompt:
+            payload["input"]["negative_prompt"] = negative_prompt
+        
+        # 添加随机种子
+        if seed is not None:
+            payload["parameters"]["seed"] = seed
+        
+        # 使用oss://格式的URL时，需要启用OSS资源解析
+        url = f'{self.base_url}/services/aigc/video-generation/video-synthesis'
+        return url, self._get_headers(async_mode=True, oss_resource_resolve=True), payload
+    
+    def _build_keyframe_request(self, first_frame_url: str, last_frame_url: str,
+                                prompt: str, model: str = 'wan2.2-kf2v-flash',
+                                resolution: str = '720P',
+                                prompt_extend: bool = True) -> Tuple[str, Dict, Dict]:
+        """构造首尾帧生视频请求，返回 (url, headers, payload)"""
+        payload = {
+            "model": model,
+            "input": {
+                "first_frame_url": first_frame_url,
+                "last_frame_url": last_frame_url,
+                "prompt": prompt
+            },
+            "parameters": {
+                "resolution": resolution,
+                "prompt_extend": prompt_extend
+            }
+        }
+        url = f'{self.base_url}/services/aigc/image2video/video-synthesis'
+        headers = self._get_headers(
+            async_mode=True,
+            oss_resource_resolve=self._uses_oss(first_frame_url, last_frame_url)
+        )
+        return url, headers, payload
+    
+    def _build_task_list_request(self, start_time: datetime, end_time: datetime,
+                                 status: Optional[str] = None, model_name: Optional[str] = None,
+                                 page_no: int = 1, page_size: int = 100) -> Tuple[str, Dict, Dict]:
+        """构造批量查询任务请求，返回 (url, headers, params)"""
+        params = {
+            'start_time': start_time.strftime('%Y%m%d%H%M%S'),
+            'end_time': end_time.strftime('%Y%m%d%H%M%S'),
+            'page_no': page_no,
+            'page_size': page_size
+        }
+        if status:
+            params['status'] = status
+        if model_name:
+            params['model_name'] = model_name
+        return f'{self.base_url}/tasks', self._get_headers(), params
+    
+    def _build_policy_request(self, model_name: str) -> Tuple[str, Dict, Dict]:
+        """构造获取上传凭证请求，返回 (url, headers, params)"""
+        params = {
+            "action": "getPolicy",
+            "model": model_name
+        }
+        return f"{self.base_url}/uploads", self._get_headers(), params
+    
+    @staticmethod
+    def _build_upload_fields(policy_data: Dict, file_name: str) -> Tuple[str, Dict]:
+        """构造 OSS 表单上传字段，返回 (object key, 表单字段)"""
+        key = f"{policy_data['upload_dir']}/{file_name}"
+        fields = {
+            'OSSAccessKeyId': policy_data['oss_access_key_id'],
+            'Signature': policy_data['signature'],
+            'policy': policy_data['policy'],
+            'x-oss-object-acl': policy_data['x_oss_object_acl'],
+            'x-oss-forbid-overwrite': policy_data['x_oss_forbid_overwrite'],
+            'key': key,
+            'success_action_status': '200'
+        }
+        return key, fields
+
+
+class DashScopeClient(DashScopeRequestBuilder):
+    """DashScope API 客户端（同步）"""
+    
+    def __init__(self):
+        """初始化客户端"""
+        super().__init__()
+        # 共享连接池，所有提交/轮询/上传/下载请求复用连接
+        self.transport = get_transport()
+        # 全局共享限流器，多个客户端实例共同遵守配额
+        self.rate_limiter = get_rate_limiter()
+        self.retry_policy = RetryPolicy()
+        # 下载先写 .part 文件，中断后断点续传，完成后原子重命名
+        self.downloader = DownloadEngine(self.request)
+        # 已上传文件的 oss:// 地址缓存，有效期内不重复上传
+        self.upload_cache = get_upload_cache()
+    
+    def request(self, method: str, url: str, endpoint: str = 'default',
+                model: Optional[str] = None, max_retries: Optional[int] = None,
+                **kwargs) -> requests.Response:
+        """
+        发送请求（限流 + 重试）
+        
+        先从端点和模型令牌桶获取许可；遇到限流或临时性错误时
+        按带抖动的指数退避重试，服务端返回 Retry-After 时至少等待该时间。
+        
+        Args:
+            method: HTTP 方法
+            url: 请求地址
+            endpoint: 端点类型（submit/generation/query/upload/download）
+            model: 模型名称，提交类请求按模型限流
+            max_retries: 最大重试次数，默认取 settings.API_MAX_RETRIES
+            **kwargs: 透传给 requests 的参数
+        
+        Returns:
+            响应对象（重试耗尽时返回最后一次响应）
+        """
+        stats = self.rate_limiter.stats
+        retries = self.retry_policy.max_retries if max_retries is None else max_retries
+        attempt = 0
+        
+        while True:
+            if not self.rate_limiter.acquire(endpoint, model):
+                raise Exception(f"请求排队超时，已放弃 ({endpoint})")
+            
+            body = kwargs.get('data')
+            if attempt and hasattr(body, 'seek'):
+                # 可重放的请求体（如上传文件流）重试前回到起点
+                body.seek(0)
+            
+            try:
+                response = self.transport.request(method, url, endpoint=endpoint, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                # 连接建立后中断或读取超时时提交请求可能已被受理，
+                # 只有 GET 可以安全重试，其他方法只在连接未建立时重试
+                retryable = method.upper() == 'GET' or _connection_not_established(e)
+                if not retryable or attempt >= retries:
+                    stats.record('dropped')
+                    raise
+                delay = self.retry_policy.get_delay(attempt)
+            else:
+                error_code = self._get_error_code(response)
+                if RetryPolicy.is_throttled(response.status_code, error_code):
+                    stats.record('throttled')
+                if not RetryPolicy.is_retryable(method, response.status_code, error_code):
+                    return response
+                if attempt >= retries:
+                    stats.record('dropped')
+                    return response
+                delay = self.retry_policy.get_delay(
+                    attempt, RetryPolicy.parse_retry_after(response.headers.get('Retry-After'))
+                )
+                response.close()
+            
+            stats.record('retried')
+            attempt += 1
+            time.sleep(delay)
+    
+    @staticmethod
+    def _get_error_code(response: requests.Response) -> str:
+        """读取错误响应中的 code 字段"""
+        if response.status_code < 400:
+            return ''
+        try:
+            return str(response.json().get('code', ''))
+        except ValueError:
+            return ''
+    
+    def get_request_stats(self) -> Dict:
+        """获取限流与重试计数"""
+        return self.rate_limiter.stats.snapshot()
+    
+    def _post_json(self, url: str, headers: Dict, payload: Dict, endpoint: str,
+                   model: Optional[str] = None) -> Dict:
+        """发送 JSON 请求并处理错误"""
+        response = self.request(
+            'POST',
             url,
-            headers=self._get_headers(async_mode=True),
-            data=json.dumps(payload),
-            timeout=60
+            endpoint=endpoint,
+            model=model,
+            headers=headers,
+            data=json.dumps(payload)
         )
         
         if response.status_code == 200:
             return response.json()
-        else:
-            error_data = response.json() if response.content else {}
-            raise Exception(
-                f"API 调用失败: {error_data.get('message', '未知错误')} "
-                f"(状态码: {response.status_code})"
+        error_data = response.json() if response.content else {}
+        raise self._api_error(response.status_code, error_data)
+    
+    def submit_task(self, image_path: str, prompt: str, model: str,
+                   resolution: str, negative_prompt: str = "",
+                   prompt_extend: bool = True, duration: int = 5,
+                   shot_type: str = None) -> Dict:
+        """
+        提交图生视频任务
+        
+        Args:
+            image_path: 图片文件路径
+            prompt: 提示词
+            model: 模型名称
+            resolution: 分辨率
+            negative_prompt: 反向提示词
+            prompt_extend: 是否启用智能改写
+            duration: 视频时长（秒）
+            shot_type: 镜头类型（仅2.6模型支持，multi/single）
+        
+        Returns:
+            API 响应数据
+        """
+        # 图片先上传到 OSS，请求体只携带 oss:// 引用
+        uploaded = self.upload_images([image_path], model)
+        url, headers, payload = self._build_video_synthesis_request(
+            image_path, prompt, model, resolution, negative_prompt,
+            prompt_extend, duration, shot_type, uploaded
+        )
+        return self._post_json(url, headers, payload, 'submit', model=model)
+    
+    def query_task(self, async_task_id: str) -> Dict:
+        """
+        查询任务状态
+        
+        Args:
+            async_task_id: 异步任务 ID
+        
+        Returns:
+            任务状态数据
+        """
+        response = self.request(
+            'GET',
+            f'{self.base_url}/tasks/{async_task_id}',
+            endpoint='query',
+            headers=self._get_headers()
+        )
+        
+        if response.status_code == 200:
+            return response.json()
+        raise self._query_error(response.status_code)
+    
+    def list_tasks(self, start_time: datetime, end_time: datetime,
+                   status: Optional[str] = None, model_name: Optional[str] = None,
+                   page_size: int = 100) -> List[Dict]:
+        """
+        批量查询任务（自动翻页）
+        
+        一次请求返回一页任务的状态，但不包含视频地址等结果，
+        成功的任务仍需通过 query_task 获取结果。
+        
+        Args:
+            start_time: 时间窗口起点（按任务提交时间）
+            end_time: 时间窗口终点
+            status: 只返回该状态的任务（PENDING/RUNNING/SUCCEEDED/FAILED等）
+            model_name: 只返回该模型的任务
+            page_size: 每页数量
+        
+        Returns:
+            任务列表，每项包含 task_id、status、model_name 等字段
+        """
+        tasks = []
+        page_no = 1
+        while True:
+            url, headers, params = self._build_task_list_request(
+                start_time, end_time, status, model_name, page_no, page_size
             )
+            response = self.request('GET', url, endpoint='query', headers=headers, params=params)
+            if response.status_code != 200:
+                raise self._query_error(response.status_code)
+            
+            result = response.json()
+            tasks.extend(result.get('data') or [])
+            if page_no >= result.get('total_page', 1):
+                return tasks
+            page_no += 1
+    
+    def download_video(self, video_url: str, output_path: str) -> str:
+        """
+        下载视频文件
+        
+        Args:
+            video_url: 视频 URL
+            output_path: 输出路径(文件夹或完整文件路径)
+        
+        Returns:
+            下载后的文件路径
+        """
+        try:
+            full_path = self._resolve_video_path(output_path)
+            return self.downloader.download(video_url, full_path)
+        except Exception as e:
+            raise Exception(f"下载视频失败: {str(e)}")
+    
+    def submit_image_edit(self, images: list, prompt: str, model: str = 'qwen-image-edit-plus',
+                         n: int = 2, negative_prompt: str = "", prompt_extend: bool = True, size: str = "",
+                         enable_interleave: bool = False, max_images: int = 5) -> Dict:
+        """
+        提交图像编辑任务（单图编辑或多图融合）
+        
+        万相2.5/2.6使用异步API，其他模型使用同步API
+        
+        Args:
+            images: 图片路径列表（单图或多图）
+            prompt: 编辑提示词
+            model: 模型名称
+            n: 生成图片数量（1-6）
+            negative_prompt: 反向提示词
+            prompt_extend: 是否启用智能改写
+        
+        Returns:
+            API 响应数据
+        """
+        # 图片先上传到 OSS，请求体只携带 oss:// 引用
+        uploaded = self.upload_images(images, model)
+        url, headers, payload, endpoint = self._build_image_edit_request(
+            images, prompt, model, n, negative_prompt, prompt_extend,
+            size, enable_interleave, max_images, uploaded
+        )
+        return self._post_json(url, headers, payload, endpoint, model=model)
+    
+    def download_file(self, url: str, output_path: str) -> str:
+        """
+        下载生成结果（图片等小文件）到指定路径
+        
+        Args:
+            url: 文件 URL
+            output_path: 完整输出路径
+        
+        Returns:
+            下载后的文件路径
+        """
+        return self.downloader.download(url, output_path)
+    
+    def get_transport_stats(self) -> Dict:
+        """获取连接复用统计（请求数、新建连接数、复用次数）"""
+        return self.transport.get_stats()
     
     def query_image_edit_task(self, task_id: str) -> Dict:
         """查询图像编辑任务状态"""
@@ -366,42 +648,122 @@ class DashScopeClient:
         Args:
             video_path: 视频文件路径
             model_name: 模型名称
-            
+        
         Returns:
-            临时HTTP URL
+            oss:// 格式的 URL
+        """
+        return self.upload_file_and_get_url(video_path, model_name)
+    
+    def upload_images(self, images: list, model_name: str) -> Dict[str, str]:
         """
-        from pathlib import Path
+        上传本地图片到 OSS
         
-        # 1. 获取上传凭证
-        url = f"{self.base_url}/uploads"
-        headers = self._get_headers()
-        params = {
-            "action": "getPolicy",
-            "model": model_name
-        }
+        Args:
+            images: 图片路径列表
+            model_name: 使用这些图片的模型名称（上传凭证按模型签发）
         
-        response = requests.get(url, headers=headers, params=params)
+        Returns:
+            本地路径 -> oss:// 地址；上传失败的图片不在结果中，提交时回退为 base64 内联
+        """
+        paths = [image_path for image_path in images if os.path.isfile(image_path)]
+        uploaded = {}
+        for image_path, result in self._upload_concurrently(paths, model_name).items():
+            if isinstance(result, Exception):
+                print(f"上传图片失败，改用 base64 内联: {result}")
+            else:
+                uploaded[image_path] = result
+        return uploaded
+    
+    def upload_files(self, file_paths: list, model_name: str,
+                     progress_callback: Optional[Callable[[str, int, int], None]] = None) -> List[str]:
+        """
+        并发上传多个文件（有效期内上传过的文件直接复用缓存地址）
+        
+        Args:
+            file_paths: 文件路径列表
+            model_name: 模型名称
+            progress_callback: 进度回调 progress_callback(文件路径, 已发送字节数, 文件大小)
+        
+        Returns:
+            与 file_paths 一一对应的 oss:// 地址；任一文件上传失败时抛出异常
+        """
+        results = self._upload_concurrently(file_paths, model_name, progress_callback)
+        for file_path in file_paths:
+            if isinstance(results[file_path], Exception):
+                raise results[file_path]
+        return [results[file_path] for file_path in file_paths]
+    
+    def _upload_concurrently(self, file_paths: list, model_name: str,
+                             progress_callback: Optional[Callable[[str, int, int], None]] = None) -> Dict:
+        """并发上传，返回 文件路径 -> oss:// 地址或异常"""
+        unique_paths = list(dict.fromkeys(file_paths))
+        if not unique_paths:
+            return {}
+        
+        def upload(file_path):
+            callback = None
+            if progress_callback is not None:
+                callback = lambda sent, total: progress_callback(file_path, sent, total)
+            try:
+                return self.upload_file_and_get_url(file_path, model_name, callback)
+            except Exception as e:
+                return e
+        
+        if len(unique_paths) == 1:
+            return {unique_paths[0]: upload(unique_paths[0])}
+        workers = min(len(unique_paths), settings.UPLOAD_WORKERS)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='Upload') as executor:
+            return dict(zip(unique_paths, executor.map(upload, unique_paths)))
+    
+    def get_image_refs(self, images: list, model_name: str) -> list:
+        """
+        上传图片并返回可直接放入请求体的引用
+        
+        Returns:
+            与 images 一一对应的 oss:// 地址（上传失败时为 base64 Data URI）
+        """
+        uploaded = self.upload_images(images, model_name)
+        return [self._image_ref(image_path, uploaded) for image_path in images]
+    
+    def upload_file_and_get_url(self, file_path: str, model_name: str,
+                                progress_callback: Optional[Callable[[int, int], None]] = None) -> str:
+        """
+        上传本地文件（图片或视频）到 DashScope 临时存储
+        
+        文件从磁盘流式发送，不整体载入内存。
+        相同内容的文件在地址有效期内再次上传时直接返回缓存的地址。
+        
+        Args:
+            file_path: 文件路径
+            model_name: 模型名称
+            progress_callback: 进度回调 progress_callback(已发送字节数, 文件大小)
+        
+        Returns:
+            oss:// 格式的 URL，提交请求时需启用 X-DashScope-OssResourceResolve
+        """
+        cached_url = self.upload_cache.get(file_path, model_name)
+        if cached_url:
+            if progress_callback is not None:
+                size = os.path.getsize(file_path)
+                progress_callback(size, size)
+            return cached_url
+        
+        # 1. 获取上传凭证
+        url, headers, params = self._build_policy_request(model_name)
+        response = self.request('GET', url, endpoint='query', headers=headers, params=params)
         if response.status_code != 200:
             raise Exception(f"获取上传凭证失败: {response.text}")
         
         policy_data = response.json()['data']
         
-        # 2. 上传文件到OSS
-        file_name = Path(video_path).name
-        key = f"{policy_data['upload_dir']}/{file_name}"
+        # 2. 上传文件到OSS（multipart 请求体按块读取文件）
+        file_name = Path(file_path).name
+        key, fields = self._build_upload_fields(policy_data, file_name)
         
-        with open(video_path, 'rb') as file:
-            files = {
-                'OSSAccessKeyId': (None, policy_data['oss_access_key_id']),
-                'Signature': (None, policy_data['signature']),
-                'policy': (None, policy_data['policy']),
-                'x-oss-object-acl': (None, policy_data['x_oss_object_acl']),
-                'x-oss-forbid-overwrite': (None, policy_data['x_oss_forbid_overwrite']),
-                'key': (None, key),
-                'success_action_status': (None, '200'),
-                'file': (file_name, file)
-            }
-            response = requests.post(policy_data['upload_host'], files=files)
+        with MultipartFileBody(fields, 'file', file_name, file_path,
+                               progress_callback=progress_callback) as body:
+            response = self.request('POST', policy_data['upload_host'], endpoint='upload',
+                                    headers={'Content-Type': body.content_type}, data=body)
             if response.status_code != 200:
                 raise Exception(f"上传文件失败: {response.text}")
         
@@ -409,7 +771,7 @@ class DashScopeClient:
         # API服务端会自己处理OSS访问权限
         # 不需要转换为HTTP URL，因为HTTP URL可能没有访问权限
         oss_url = f"oss://{key}"
-        
+        self.upload_cache.put(file_path, model_name, oss_url)
         return oss_url
     
     def submit_reference_video_to_video(self, reference_video_urls: list, prompt: str,
@@ -428,50 +790,15 @@ class DashScopeClient:
             shot_type: 镜头类型（single/multi）
             audio: 是否包含音频
             seed: 随机种子
-            
+        
         Returns:
             API 响应数据
         """
-        # 准备请求数据
-        payload = {
-            "model": "wan2.6-r2v",
-            "input": {
-                "prompt": prompt,
-                "reference_video_urls": reference_video_urls
-            },
-            "parameters": {
-                "size": size,
-                "duration": duration,
-                "audio": audio,
-                "shot_type": shot_type
-            }
-        }
-        
-        # 添加反向提示词
-        if negative_prompt:
-            payload["input"]["negative_prompt"] = negative_prompt
-        
-        # 添加随机种子
-        if seed is not None:
-            payload["parameters"]["seed"] = seed
-        
-        # 发送异步请求
-        # 使用oss://格式的URL时，需要启用OSS资源解析
-        response = requests.post(
-            f'{self.base_url}/services/aigc/video-generation/video-synthesis',
-            headers=self._get_headers(async_mode=True, oss_resource_resolve=True),
-            data=json.dumps(payload),
-            timeout=60
+        url, headers, payload = self._build_reference_video_request(
+            reference_video_urls, prompt, negative_prompt, size,
+            duration, shot_type, audio, seed
         )
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            error_data = response.json() if response.content else {}
-            raise Exception(
-                f"API 调用失败: {error_data.get('message', '未知错误')} "
-                f"(状态码: {response.status_code})"
-            )
+        return self._post_json(url, headers, payload, 'submit', model='wan2.6-r2v')
     
     def submit_keyframe_to_video(self, first_frame_url: str, last_frame_url: str,
                                 prompt: str, model: str = 'wan2.2-kf2v-flash',
@@ -480,43 +807,17 @@ class DashScopeClient:
         提交首尾帧生成视频任务
         
         Args:
-            first_frame_url: 首帧图片URL(Base64编码)
-            last_frame_url: 尾帧图片URL(Base64编码)
+            first_frame_url: 首帧图片引用(oss:// 地址或 Base64 Data URI，见 get_image_refs)
+            last_frame_url: 尾帧图片引用
             prompt: 视频描述
             model: 模型名称
             resolution: 分辨率(480P/720P/1080P)
             prompt_extend: 是否启用智能改写
-            
+        
         Returns:
             API 响应数据
         """
-        # 准备请求数据
-        payload = {
-            "model": model,
-            "input": {
-                "first_frame_url": first_frame_url,
-                "last_frame_url": last_frame_url,
-                "prompt": prompt
-            },
-            "parameters": {
-                "resolution": resolution,
-                "prompt_extend": prompt_extend
-            }
-        }
-        
-        # 发送异步请求
-        response = requests.post(
-            f'{self.base_url}/services/aigc/image2video/video-synthesis',
-            headers=self._get_headers(async_mode=True),
-            data=json.dumps(payload),
-            timeout=60
+        url, headers, payload = self._build_keyframe_request(
+            first_frame_url, last_frame_url, prompt, model, resolution, prompt_extend
         )
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            error_data = response.json() if response.content else {}
-            raise Exception(
-                f"API 调用失败: {error_data.get('message', '未知错误')} "
-                f"(状态码: {response.status_code})"
-            )
+        return self._post_json(url, headers, payload, 'submit', model=model)
@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工程素材目录
+为工程 pictures/ 和 videos/ 中的每个文件记录生成参数（模型、尺寸、种子、
+原始/改写后的提示词、来源任务）和内容哈希，保存在工程目录下的 catalog.db，
+支持按提示词全文搜索。
+
+- 生成任务完成时由工作线程直接写入（catalog_asset）
+- 已有工程在后台从元数据文件（*_metadata.json）、画廊历史和任务记录重建
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv')
+
+# 目录中单独成列的字段，其余元数据保存在 metadata 列
+FIELDS = ('model', 'size', 'seed', 'orig_prompt', 'actual_prompt', 'negative_prompt', 'task_id')
+# 各来源中含义相同、名称不同的字段
+FIELD_ALIASES = {
+    'resolution': 'size',
+    'prompt': 'orig_prompt',
+    'async_task_id': 'task_id'
+}
+PROMPT_FIELDS = ('orig_prompt', 'actual_prompt', 'negative_prompt')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assets (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    file_size INTEGER,
+    mtime REAL,
+    content_hash TEXT,
+    model TEXT,
+    size TEXT,
+    seed TEXT,
+    orig_prompt TEXT,
+    actual_prompt TEXT,
+    negative_prompt TEXT,
+    task_id TEXT,
+    created_at TEXT,
+    metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_assets_model ON assets(model);
+CREATE INDEX IF NOT EXISTS idx_assets_hash ON assets(content_hash);
+CREATE INDEX IF NOT EXISTS idx_assets_task ON assets(task_id);
+"""
+
+
+def asset_kind(file_path: str) -> Optional[str]:
+    """按扩展名判断素材类型（image / video），不是素材时返回 None"""
+    lower = file_path.lower()
+    if lower.endswith(IMAGE_EXTENSIONS):
+        return 'image'
+    if lower.endswith(VIDEO_EXTENSIONS):
+        return 'video'
+    return None
+
+
+def normalize_metadata(metadata: Optional[Dict]) -> Dict:
+    """统一各来源的字段名（resolution -> size、prompt -> orig_prompt 等）"""
+    result = {}
+    for key, value in (metadata or {}).items():
+        if value is None or value == '':
+            continue
+        if key in FIELD_ALIASES:
+            # 同时存在时以标准字段名为准
+            result.setdefault(FIELD_ALIASES[key], value)
+        else:
+            result[key] = value
+    return result
+
+
+def find_project_root(file_path: str) -> Optional[str]:
+    """向上查找文件所属的工程目录（包含 project.json 的目录）"""
+    folder = os.path.dirname(os.path.abspath(file_path))
+    for _ in range(4):
+        if os.path.exists(os.path.join(folder, 'project.json')):
+            return folder
+        parent = os.path.dirname(folder)
+        if parent == folder:
+            break
+        folder = parent
+    return None
+
+
+class AssetCatalog:
+    """工程素材目录（线程安全）"""
+    
+    DB_NAME = 'catalog.db'
+    
+    def __init__(self, project_path: str):
+        """
+        打开（必要时创建）工程的素材目录
+        
+        Args:
+            project_path: 工程目录
+        """
+        self.project_path = os.path.abspath(project_path)
+        self.db_path = os.path.join(self.project_path, self.DB_NAME)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self.fts_available = self._create_fts()
+        self._conn.commit()
+    
+    def _create_fts(self) -> bool:
+        """创建提示词全文索引（trigram 分词支持中文子串搜索，SQLite 不支持时退回 LIKE）"""
+        for tokenize in ('trigram', 'unicode61'):
+            try:
+                self._conn.execute(
+                    'CREATE VIRTUAL TABLE IF NOT EXISTS assets_fts USING fts5('
+                    f"orig_prompt, actual_prompt, negative_prompt, tokenize='{tokenize}')"
+                )
+                self.fts_tokenize = tokenize
+                return True
+            except sqlite3.OperationalError:
+                continue
+        print("SQLite 不支持 FTS5，提示词搜索改用 LIKE")
+        return False
+    
+    # ========== 路径 ==========
+    
+    def relative_path(self, file_path: str) -> str:
+        """工程内的相对路径（统一使用 / 分隔）"""
+        return os.path.relpath(os.path.abspath(file_path), self.project_path).replace(os.sep, '/')
+    
+    def absolute_path(self, relative_path: str) -> str:
+        """相对路径转为绝对路径"""
+        return os.path.join(self.project_path, *relative_path.split('/'))
+    
+    # ========== 写入 ==========
+    
+    def add_asset(self, file_path: str, metadata: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        记录素材（已有记录时合并元数据，文件未变化时不重新计算哈希）
+        
+        Args:
+            file_path: 素材文件路径
+            metadata: 生成参数，空值不会覆盖已有的值
+        
+        Returns:
+            合并后的记录；不是素材文件或文件不存在时返回 None
+        """
+        kind = asset_kind(file_path)
+        if kind is None or not os.path.isfile(file_path):
+            return None
+        path = self.relative_path(file_path)
+        stat = os.stat(file_path)
+        existing = self.get(file_path)
+        
+        content_hash = None
+        if existing and existing['file_size'] == stat.st_size and existing['mtime'] == stat.st_mtime:
+            content_hash = existing['content_hash']
+        if not content_hash:
+            content_hash = _file_hash(file_path)
+        
+        values = {field: (existing or {}).get(field) for field in FIELDS}
+        extra = dict((existing or {}).get('metadata') or {})
+        for key, value in normalize_metadata(metadata).items():
+            if key in FIELDS:
+                values[key] = str(value)
+            else:
+                extra[key] = value
+        
+        row = dict(values, path=path, kind=kind, file_size=stat.st_size, mtime=stat.st_mtime,
+                   content_hash=content_hash,
+                   created_at=(existing or {}).get('created_at')
+                   or datetime.fromtimestamp(stat.st_mtime).isoformat())
+        if existing and extra == existing['metadata'] and all(
+                existing[key] == value for key, value in row.items()):
+            # 没有任何变化（重建时的常见情况），不写入
+            return existing
+        row['metadata'] = json.dumps(extra, ensure_ascii=False)
+        
+        columns = ', '.join(row)
+        updates = ', '.join(f'{column} = excluded.{column}' for column in row if column != 'path')
+        with self._lock:
+            with self._conn:
+                # 使用 ON CONFLICT 更新而不是 REPLACE，保持 id 不变（全文索引按 id 关联）
+                self._conn.execute(
+                    f'INSERT INTO assets ({columns}) VALUES ({", ".join("?" * len(row))}) '
+                    f'ON CONFLICT(path) DO UPDATE SET {updates}',
+                    list(row.values())
+                )
+                asset_id = self._conn.execute('SELECT id FROM assets WHERE path = ?',
+                                              (path,)).fetchone()[0]
+                self._index_prompts(asset_id, values)
+        return self.get(file_path)
+    
+    def _index_prompts(self, asset_id: int, values: Dict):
+        """更新全文索引（需持有锁并处于事务中）"""
+        if not self.fts_available:
+            return
+        self._conn.execute('DELETE FROM assets_fts WHERE rowid = ?', (asset_id,))
+        if any(values.get(field) for field in PROMPT_FIELDS):
+            self._conn.execute(
+                'INSERT INTO assets_fts (rowid, orig_prompt, actual_prompt, negative_prompt) '
+                'VALUES (?, ?, ?, ?)',
+                (asset_id, *(values.get(field) or '' for field in PROMPT_FIELDS))
+            )
+    
+    def remove_asset(self, file_path: str):
+        """删除素材记录"""
+        self._remove_paths([self.relative_path(file_path)])
+    
+    def _remove_paths(self, paths: List[str]):
+        if not paths:
+            return
+        with self._lock:
+            with self._conn:
+                for path in paths:
+                    row = self._conn.execute('SELECT id FROM assets WHERE path = ?', (path,)).fetchone()
+                    if row is None:
+                        continue
+                    self._conn.execute('DELETE FROM assets WHERE id = ?', (row[0],))
+                    if self.fts_available:
+                        self._conn.execute('DELETE FROM assets_fts WHERE rowid = ?', (row[0],))
+    
+    # ========== 查询 ==========
+    
+    def _to_dict(self, row) -> Dict:
+        record = dict(row)
+        record['file_path'] = self.absolute_path(record['path'])
+        try:
+            record['metadata'] = json.loads(record.get('metadata') or '{}')
+        except ValueError:
+            record['metadata'] = {}
+        return record
+    
+    def get(self, file_path: str) -> Optional[Dict]:
+        """获取素材记录"""
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM assets WHERE path = ?',
+                                     (self.relative_path(file_path),)).fetchone()
+        return self._to_dict(row) if row else None
+    
+    def count(self) -> int:
+        """素材数量"""
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM assets').fetchone()[0]
+    
+    def models(self) -> Dict[str, str]:
+        """所有素材的生成模型（文件路径 -> 模型），资源管理器按模型排序时使用"""
+        with self._lock:
+            rows = self._conn.execute("SELECT path, model FROM assets WHERE model IS NOT NULL AND model != ''").fetchall()
+        return {self.absolute_path(row['path']): row['model'] for row in rows}
+    
+    def find_by_hash(self, content_hash: str) -> List[Dict]:
+        """查找内容相同的素材"""
+        with self._lock:
+            rows = self._conn.execute('SELECT * FROM assets WHERE content_hash = ?',
+                                      (content_hash,)).fetchall()
+        return [self._to_dict(row) for row in rows]
+    
+    def search(self, query: str = '', kind: Optional[str] = None, model: Optional[str] = None,
+               limit: int = 50) -> List[Dict]:
+        """
+        按提示词搜索素材
+        
+        Args:
+            query: 搜索词（多个词用空格分隔，需全部出现），为空时按时间返回最新的素材
+            kind: 只返回 image 或 video
+            model: 只返回该模型生成的素材
+            limit: 最多返回的数量
+        
+        Returns:
+            素材记录（有搜索词时按相关度排序）
+        """
+        terms = query.split()
+        conditions, params = [], []
+        if kind:
+            conditions.append('a.kind = ?')
+            params.append(kind)
+        if model:
+            conditions.append('a.model = ?')
+            params.append(model)
+        
+        # trigram 分词至少需要 3 个字符，较短的词改用 LIKE
+        use_fts = self.fts_available and terms and (
+            self.fts_tokenize != 'trigram' or all(len(term) >= 3 for term in terms)
+        )
+        if use_fts:
+            match = ' '.join('"' + term.replace('"', '""') + '"' for term in terms)
+            sql = ('SELECT a.* FROM assets_fts f JOIN assets a ON a.id = f.rowid '
+                   'WHERE assets_fts MATCH ?')
+            params.insert(0, match)
+            order = 'ORDER BY bm25(assets_fts)'
+        else:
+            sql = 'SELECT a.* FROM assets a WHERE 1 = 1'
+            for term in terms:
+                like = '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+                conditions.append('(' + ' OR '.join(
+                    f"a.{field} LIKE ? ESCAPE '\\'" for field in PROMPT_FIELDS) + ')')
+                params.extend([like] * len(PROMPT_FIELDS))
+            order = 'ORDER BY a.created_at DESC'
+        
+        for condition in conditions:
+            sql += ' AND ' + condition
+        sql += f' {order} LIMIT ?'
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._to_dict(row) for row in rows]
+    
+    # ========== 重建 ==========
+    
+    def rebuild(self, is_cancelled: Optional[Callable[[], bool]] = None) -> int:
+        """
+        扫描 pictures/ 和 videos/，用已有的元数据补全目录（增量：文件未变化时不重新计算哈希）
+        
+        元数据来源：视频旁的 *_metadata.json、文生图/图像编辑的画廊历史、任务记录。
+        已不存在的文件会从目录中删除。
+        
+        Args:
+            is_cancelled: 返回 True 时停止重建
+        
+        Returns:
+            扫描到的素材数量
+        """
+        known = self._collect_metadata()
+        seen = set()
+        for folder in ('pictures', 'videos'):
+            folder_path = os.path.join(self.project_path, folder)
+            if not os.path.isdir(folder_path):
+                continue
+            for name in sorted(os.listdir(folder_path)):
+                if is_cancelled and is_cancelled():
+                    return len(seen)
+                file_path = os.path.join(folder_path, name)
+                if asset_kind(name) is None or not os.path.isfile(file_path):
+                    continue
+                metadata = dict(known.get(os.path.abspath(file_path), {}))
+                metadata.update(self._read_sidecar(file_path))
+                try:
+                    self.add_asset(file_path, metadata)
+                    seen.add(self.relative_path(file_path))
+                except Exception as e:
+                    print(f"索引素材 {name} 失败: {e}")
+        
+        with self._lock:
+            stored = [row[0] for row in self._conn.execute('SELECT path FROM assets').fetchall()]
+        self._remove_paths([path for path in stored if path not in seen
+                            and not os.path.exists(self.absolute_path(path))])
+        return len(seen)
+    
+    def _read_sidecar(self, file_path: str) -> Dict:
+        """读取视频旁的元数据文件（xxx.mp4 -> xxx_metadata.json）"""
+        sidecar = os.path.splitext(file_path)[0] + '_metadata.json'
+        if not os.path.exists(sidecar):
+            return {}
+        try:
+            with open(sidecar, 'r', encoding='utf-8') as f:
+                return normalize_metadata(json.load(f))
+        except Exception as e:
+            print(f"读取元数据文件失败: {e}")
+            return {}
+    
+    def _collect_metadata(self) -> Dict[str, Dict]:
+        """从任务记录和画廊历史收集 文件绝对路径 -> 元数据（后者优先）"""
+        known: Dict[str, Dict] = {}
+        
+        def merge(file_path, metadata):
+            if file_path:
+                known.setdefault(os.path.abspath(file_path), {}).update(normalize_metadata(metadata))
+        
+        tasks_db = os.path.join(self.project_path, 'tasks.db')
+        if os.path.exists(tasks_db):
+            from .task_store import TaskStore
+            store = TaskStore(tasks_db)
+            try:
+                for task in store.load_all().values():
+                    if task.output_path:
+                        merge(task.output_path, {
+                            'model': task.model, 'size': task.resolution, 'prompt': task.prompt,
+                            'negative_prompt': task.negative_prompt, 'task_id': task.async_task_id
+                        })
+            finally:
+                store.close()
+        
+        from .history_store import HistoryStore
+        for name in ('text2image_history', 'image_edit_history'):
+            history_file = os.path.join(self.project_path, name + '.jsonl')
+            if not os.path.exists(history_file):
+                continue
+            # 只读取，不整理文件（画廊可能正在追加）
+            for record in HistoryStore(history_file, compact=False).page():
+                record = {key: value for key, value in record.items() if key not in ('id', 'created_at')}
+                merge(record.pop('path', None), record)
+        return known
+    
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+def _file_hash(file_path: str) -> str:
+    """文件内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+_catalogs: Dict[str, AssetCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_asset_catalog(project_path: str) -> AssetCatalog:
+    """获取工程的素材目录（每个工程共用一个实例）"""
+    key = os.path.abspath(project_path)
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = AssetCatalog(key)
+            _catalogs[key] = catalog
+        return catalog
+
+
+def catalog_asset(file_path: str, metadata: Optional[Dict] = None):
+    """
+    生成完成后记录素材（在工作线程中调用；文件不在工程内时忽略）
+    
+    Args:
+        file_path: 素材文件路径
+        metadata: 生成参数
+    """
+    project_path = find_project_root(file_path)
+    if not project_path:
+        return
+    try:
+        get_asset_catalog(project_path).add_asset(file_path, metadata)
+    except Exception as e:
+        print(f"记录素材失败: {e}")
+
+
+def catalog_assets(file_paths: Iterable[str], metadata: Optional[Dict] = None):
+    """批量记录同一次生成的多个素材"""
+    for file_path in file_paths:
+        catalog_asset(file_path, metadata)
+
+
+class CatalogRebuildWorker(QThread):
+    """在后台重建工程的素材目录"""
+    
+    # 重建完成: 素材数量
+    rebuilt = pyqtSignal(int)
+    
+    def __init__(self, project_path: str, parent=None):
+        super().__init__(parent)
+        self.project_path = project_path
+        self._cancelled = False
+    
+    def cancel(self):
+        """取消重建（切换工程时使用）"""
+        self._cancelled = True
+    
+    def run(self):
+        try:
+            count = get_asset_catalog(self.project_path).rebuild(lambda: self._cancelled)
+        except Exception as e:
+            print(f"重建素材目录失败: {e}")
+            return
+        if not self._cancelled:
+            self.rebuilt.emit(count)
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DashScope 异步 API 客户端
+基于 asyncio + aiohttp，与 DashScopeClient 提供相同的操作，
+大量并发任务只占用协程而不占用系统线程。
+
+与同步客户端共用限流器（令牌桶）和重试策略；文件读取、哈希计算和
+视频下载（复用同步客户端的断点续传下载引擎）在线程池中执行，不阻塞事件循环。
+"""
+
+import asyncio
+import functools
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+from config.settings import settings
+from .api_client import DashScopeClient, DashScopeRequestBuilder
+from .rate_limiter import RetryPolicy, get_rate_limiter
+from .upload_cache import get_upload_cache
+
+
+def _connection_not_established(error: Exception) -> bool:
+    """
+    请求异常是否发生在连接建立之前（连接超时、连接被拒绝、域名解析失败）
+    
+    与同步客户端一致：只有这类失败可以安全重试非幂等请求。
+    """
+    if isinstance(error, aiohttp.ClientSSLError):
+        return False
+    return isinstance(error, (aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError))
+
+
+class AsyncDashScopeClient(DashScopeRequestBuilder):
+    """
+    DashScope API 客户端（异步）
+    
+    所有方法都是协程，需在 asyncio 事件循环中调用。
+    在 Qt 界面中使用时，通过 core.async_bridge 提交到后台事件循环。
+    """
+    
+    def __init__(self, pool_size: Optional[int] = None,
+                 sync_client: Optional[DashScopeClient] = None):
+        """
+        初始化客户端
+        
+        Args:
+            pool_size: 最大并发连接数，默认取 settings.HTTP_POOL_SIZE
+            sync_client: 执行下载的同步客户端，默认首次下载时新建
+        """
+        if not AIOHTTP_AVAILABLE:
+            raise Exception("异步客户端需要安装 aiohttp: pip install aiohttp")
+        super().__init__()
+        self.pool_size = pool_size or settings.HTTP_POOL_SIZE
+        self.timeouts = settings.HTTP_TIMEOUTS
+        self._session = None
+        # 与同步客户端共用全局限流器，共同遵守配额
+        self.rate_limiter = get_rate_limiter()
+        self.retry_policy = RetryPolicy()
+        self.upload_cache = get_upload_cache()
+        self._sync_client = sync_client
+    
+    @property
+    def sync_client(self) -> DashScopeClient:
+        """执行下载的同步客户端（下载引擎负责断点续传和分段并行）"""
+        if self._sync_client is None:
+            self._sync_client = DashScopeClient()
+            self._sync_client.api_key = self.api_key
+            self._sync_client.base_url = self.base_url
+        return self._sync_client
+    
+    def _get_session(self) -> 'aiohttp.ClientSession':
+        """获取（必要时创建）连接池会话，必须在事件循环内调用"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit_per_host=self.pool_size)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+    
+    def _get_timeout(self, endpoint: str) -> 'aiohttp.ClientTimeout':
+        """获取端点的超时设置"""
+        connect, read = self.timeouts.get(endpoint, self.timeouts['default'])
+        return aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+    
+    @staticmethod
+    async def _run_blocking(func: Callable, *args, **kwargs):
+        """在线程池中执行文件读取、哈希等阻塞操作"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+    
+    async def request(self, method: str, url: str, endpoint: str = 'default',
+                      model: Optional[str] = None, max_retries: Optional[int] = None,
+                      **kwargs) -> Tuple[int, Dict, bytes]:
+        """
+        发送请求（限流 + 重试），规则同 DashScopeClient.request
+        
+        Args:
+            method: HTTP 方法
+            url: 请求地址
+            endpoint: 端点类型（submit/generation/query/upload/download）
+            model: 模型名称，提交类请求按模型限流
+            max_retries: 最大重试次数，默认取 settings.API_MAX_RETRIES
+            **kwargs: 透传给 aiohttp 的参数；data 为可调用对象时每次尝试重新生成请求体
+        
+        Returns:
+            (状态码, 响应头, 响应体)，重试耗尽时返回最后一次响应
+        """
+        stats = self.rate_limiter.stats
+        retries = self.retry_policy.max_retries if max_retries is None else max_retries
+        make_data = kwargs.pop('data', None)
+        attempt = 0
+        
+        while True:
+            wait = self.rate_limiter.reserve(endpoint, model)
+            if wait is None:
+                raise Exception(f"请求排队超时，已放弃 ({endpoint})")
+            if wait > 0:
+                await asyncio.sleep(wait)
+            
+            data = make_data() if callable(make_data) else make_data
+            try:
+                async with self._get_session().request(
+                        method, url, data=data, timeout=self._get_timeout(endpoint), **kwargs
+                ) as response:
+                    status, headers, body = response.status, dict(response.headers), await response.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # 连接建立后中断或读取超时时提交请求可能已被受理，只有 GET 可以安全重试
+                retryable = method.upper() == 'GET' or _connection_not_established(e)
+                if not retryable or attempt >= retries:
+                    stats.record('dropped')
+                    raise
+                delay = self.retry_policy.get_delay(attempt)
+            else:
+                error_code = self._get_error_code(status, body)
+                if RetryPolicy.is_throttled(status, error_code):
+                    stats.record('throttled')
+                if not RetryPolicy.is_retryable(method, status, error_code):
+                    return status, headers, body
+                if attempt >= retries:
+                    stats.record('dropped')
+                    return status, headers, body
+                delay = self.retry_policy.get_delay(
+                    attempt, RetryPolicy.parse_retry_after(headers.get('Retry-After'))
+                )
+            
+            stats.record('retried')
+            attempt += 1
+            await asyncio.sleep(delay)
+    
+    @staticmethod
+    def _get_error_code(status: int, body: bytes) -> str:
+        """读取错误响应中的 code 字段"""
+        if status < 400:
+            return ''
+        try:
+            return str(json.loads(body).get('code', ''))
+        except (ValueError, AttributeError):
+            return ''
+    
+    def get_request_stats(self) -> Dict:
+        """获取限流与重试计数"""
+        return self.rate_limiter.stats.snapshot()
+    
+    async def _post_json(self, url: str, headers: Dict, payload: Dict, endpoint: str,
+                         model: Optional[str] = None) -> Dict:
+        """发送 JSON 请求并处理错误"""
+        status, _, body = await self.request('POST', url, endpoint=endpoint, model=model,
+                                             headers=headers, data=json.dumps(payload))
+        if status == 200:
+            return json.loads(body)
+        error_data = json.loads(body) if body else {}
+        raise self._api_error(status, error_data)
+    
+    async def submit_task(self, image_path: str, prompt: str, model: str,
+                          resolution: str, negative_prompt: str = "",
+                          prompt_extend: bool = True, duration: int = 5,
+                          shot_type: str = None) -> Dict:
+        """提交图生视频任务，参数同 DashScopeClient.submit_task"""
+        uploaded = await self.upload_images([image_path], model)
+        # 上传失败时会把图片读入请求体，在线程池中构造
+        url, headers, payload = await self._run_blocking(
+            self._build_video_synthesis_request, image_path, prompt, model, resolution,
+            negative_prompt, prompt_extend, duration, shot_type, uploaded
+        )
+        return await self._post_json(url, headers, payload, 'submit', model=model)
+    
+    async def query_task(self, async_task_id: str) -> Dict:
+        """查询任务状态"""
+        status, _, body = await self.request('GET', f'{self.base_url}/tasks/{async_task_id}',
+                                             endpoint='query', headers=self._get_headers())
+        if status == 200:
+            return json.loads(body)
+        raise self._query_error(status)
+    
+    async def list_tasks(self, start_time: datetime, end_time: datetime,
+                         status: Optional[str] = None, model_name: Optional[str] = None,
+                         page_size: int = 100) -> List[Dict]:
+        """批量查询任务（自动翻页），参数同 DashScopeClient.list_tasks"""
+        tasks = []
+        page_no = 1
+        while True:
+            url, headers, params = self._build_task_list_request(
+                start_time, end_time, status, model_name, page_no, page_size
+            )
+            code, _, body = await self.request('GET', url, endpoint='query',
+                                               headers=headers, params=params)
+            if code != 200:
+                raise self._query_error(code)
+            result = json.loads(body)
+            
+            tasks.extend(result.get('data') or [])
+            if page_no >= result.get('total_page', 1):
+                return tasks
+            page_no += 1
+    
+    async def query_image_edit_task(self, task_id: str) -> Dict:
+        """查询图像编辑任务状态"""
+        return await self.query_task(task_id)
+    
+    async def submit_image_edit(self, images: list, prompt: str, model: str = 'qwen-image-edit-plus',
+                                n: int = 2, negative_prompt: str = "", prompt_extend: bool = True,
+                                size: str = "", enable_interleave: bool = False,
+                                max_images: int = 5) -> Dict:
+        """提交图像编辑任务，参数同 DashScopeClient.submit_image_edit"""
+        uploaded = await self.upload_images(images, model)
+        url, headers, payload, endpoint = await self._run_blocking(
+            self._build_image_edit_request, images, prompt, model, n, negative_prompt,
+            prompt_extend, size, enable_interleave, max_images, uploaded
+        )
+        return await self._post_json(url, headers, payload, endpoint, model=model)
+    
+    async def submit_reference_video_to_video(self, reference_video_urls: list, prompt: str,
+                                              negative_prompt: str = "", size: str = "1920*1080",
+                                              duration: int = 5, shot_type: str = "single",
+                                              audio: bool = True, seed: int = None) -> Dict:
+        """提交参考生视频任务，参数同 DashScopeClient.submit_reference_video_to_video"""
+        url, headers, payload = self._build_reference_video_request(
+            reference_video_urls, prompt, negative_prompt, size,
+            duration, shot_type, audio, seed
+        )
+        return await self._post_json(url, headers, payload, 'submit', model='wan2.6-r2v')
+    
+    async def submit_keyframe_to_video(self, first_frame_url: str, last_frame_url: str,
+                                       prompt: str, model: str = 'wan2.2-kf2v-flash',
+                                       resolution: str = '720P', prompt_extend: bool = True) -> Dict:
+        """提交首尾帧生成视频任务，参数同 DashScopeClient.submit_keyframe_to_video"""
+        url, headers, payload = self._build_keyframe_request(
+            first_frame_url, last_frame_url, prompt, model, resolution, prompt_extend
+        )
+        return await self._post_json(url, headers, payload, 'submit', model=model)
+    
+    async def upload_video_and_get_url(self, video_path: str, model_name: str) -> str:
+        """上传视频文件并获取 oss:// URL"""
+        return await self.upload_file_and_get_url(video_path, model_name)
+    
+    async def upload_images(self, images: list, model_name: str) -> Dict[str, str]:
+        """上传本地图片，参数与返回值同 DashScopeClient.upload_images"""
+        paths = list(dict.fromkeys(p for p in images if os.path.isfile(p)))
+        results = await asyncio.gather(
+            *(self.upload_file_and_get_url(image_path, model_name) for image_path in paths),
+            return_exceptions=True
+        )
+        uploaded = {}
+        for image_path, result in zip(paths, results):
+            if isinstance(result, Exception):
+                print(f"上传图片失败，改用 base64 内联: {result}")
+            else:
+                uploaded[image_path] = result
+        return uploaded
+    
+    async def upload_file_and_get_url(self, file_path: str, model_name: str) -> str:
+        """
+        上传本地文件（图片或视频）并获取 oss:// URL
+        
+        Args:
+            file_path: 文件路径
+            model_name: 模型名称
+        
+        Returns:
+            oss:// 格式的 URL
+        """
+        # 查询缓存需要计算文件哈希
+        cached_url = await self._run_blocking(self.upload_cache.get, file_path, model_name)
+        if cached_url:
+            return cached_url
+        
+        # 1. 获取上传凭证
+        url, headers, params = self._build_policy_request(model_name)
+        status, _, body = await self.request('GET', url, endpoint='query',
+                                             headers=headers, params=params)
+        if status != 200:
+            raise Exception(f"获取上传凭证失败: {body.decode('utf-8', 'replace')}")
+        policy_data = json.loads(body)['data']
+        
+        # 2. 上传文件到OSS（文件对象由 aiohttp 在线程池中分块读取，不整体载入内存）
+        file_name = Path(file_path).name
+        key, fields = self._build_upload_fields(policy_data, file_name)
+        files = []
+        
+        def make_form():
+            # 表单只能发送一次，重试时重新打开文件
+            form = aiohttp.FormData()
+            for name, value in fields.items():
+                form.add_field(name, value)
+            files.append(open(file_path, 'rb'))
+            form.add_field('file', files[-1], filename=file_name)
+            return form
+        
+        try:
+            status, _, body = await self.request('POST', policy_data['upload_host'],
+                                                 endpoint='upload', data=make_form)
+        finally:
+            for file in files:
+                file.close()
+        if status != 200:
+            raise Exception(f"上传文件失败: {body.decode('utf-8', 'replace')}")
+        
+        oss_url = f"oss://{key}"
+        await self._run_blocking(self.upload_cache.put, file_path, model_name, oss_url)
+        return oss_url
+    
+    async def download_video(self, video_url: str, output_path: str) -> str:
+        """
+        下载视频文件（在线程池中使用同步客户端的下载引擎：断点续传、分段并行、原子重命名）
+        
+        Args:
+            video_url: 视频 URL
+            output_path: 输出路径(文件夹或完整文件路径)
+        
+        Returns:
+            下载后的文件路径
+        """
+        return await self._run_blocking(self.sync_client.download_video, video_url, output_path)
+    
+    async def download_file(self, url: str, output_path: str) -> str:
+        """下载生成结果（图片等小文件）到指定路径"""
+        return await self._run_blocking(self.sync_client.download_file, url, output_path)
+    
+    async def close(self):
+        """关闭连接池"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+asyncio 与 Qt 事件循环桥接
+在单个后台线程中运行 asyncio 事件循环，协程结果通过 Qt 信号
+回到 GUI 线程，成千上万个并发任务只消耗协程而不消耗线程
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Callable, Coroutine, Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class QtAsyncBridge(QObject):
+    """
+    Qt 与 asyncio 桥接器
+    
+    用法:
+        bridge = get_async_bridge()
+        bridge.submit(client.query_task(task_id), on_result, on_error)
+    
+    回调总是在创建桥接器的线程（通常是 GUI 线程）中执行。
+    """
+    
+    # 内部信号：callback, result
+    _deliver = pyqtSignal(object, object)
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run_loop, name='DashScopeAsyncLoop', daemon=True
+        )
+        self._deliver.connect(self._on_deliver)
+        self._thread.start()
+        self._ready.wait()
+    
+    def _run_loop(self):
+        """后台线程：运行事件循环"""
+        asyncio.set_event_loop(self._loop)
+        self._loop.call_soon(self._ready.set)
+        self._loop.run_forever()
+    
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """后台事件循环"""
+        return self._loop
+    
+    def submit(self, coro: Coroutine, on_result: Optional[Callable] = None,
+               on_error: Optional[Callable] = None) -> Future:
+        """
+        提交协程到后台事件循环
+        
+        Args:
+            coro: 要执行的协程
+            on_result: 成功回调 on_result(result)，在 GUI 线程执行
+            on_error: 失败回调 on_error(exception)，在 GUI 线程执行
+        
+        Returns:
+            concurrent.futures.Future，可用于取消或等待
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        
+        def _done(fut: Future):
+            if fut.cancelled():
+                return
+            error = fut.exception()
+            if error is not None:
+                if on_error:
+                    self._deliver.emit(on_error, error)
+                else:
+                    print(f"异步任务出错: {error}")
+            elif on_result:
+                self._deliver.emit(on_result, fut.result())
+        
+        future.add_done_callback(_done)
+        return future
+    
+    def run_sync(self, coro: Coroutine, timeout: Optional[float] = None):
+        """
+        在后台事件循环中执行协程并阻塞等待结果
+        
+        供工作线程调用，不能在事件循环线程内调用。
+        """
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("不能在事件循环线程中调用 run_sync")
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+    
+    def _on_deliver(self, callback, value):
+        """GUI 线程：执行回调"""
+        try:
+            callback(value)
+        except Exception as e:
+            print(f"异步回调出错: {e}")
+    
+    def shutdown(self):
+        """停止事件循环"""
+        if self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+
+
+_bridge = None
+
+
+def get_async_bridge() -> QtAsyncBridge:
+    """获取全局桥接器（须在 GUI 线程首次调用）"""
+    global _bridge
+    if _bridge is None:
+        _bridge = QtAsyncBridge()
+    return _bridge
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+断点续传下载引擎
+下载内容先写入 .part 文件，连接中断后用 HTTP Range 从断点继续；
+大文件按区间并行下载，校验长度后原子重命名为最终文件，
+因此最终路径上的文件总是完整的
+"""
+
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+import requests
+
+from config.settings import settings
+
+
+# 可通过续传恢复的网络异常
+RESUMABLE_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError
+)
+
+
+class DownloadError(Exception):
+    """下载失败"""
+
+
+def parse_total_size(status_code: int, headers) -> Optional[int]:
+    """从 Content-Range（bytes a-b/total 或 bytes */total）或 Content-Length 获取文件总大小"""
+    content_range = headers.get('Content-Range', '')
+    match = re.search(r'/(\d+)\s*$', content_range)
+    if match:
+        return int(match.group(1))
+    if status_code == 200 and headers.get('Content-Length'):
+        return int(headers['Content-Length'])
+    return None
+
+
+class DownloadEngine:
+    """
+    断点续传下载引擎
+    
+    request_fn 与 DashScopeClient.request 签名相同，
+    下载请求因此同样经过连接池、限流与重试。
+    """
+    
+    def __init__(self, request_fn: Callable, chunk_size: Optional[int] = None,
+                 parallelism: Optional[int] = None, parallel_min_size: Optional[int] = None,
+                 max_attempts: Optional[int] = None):
+        """
+        初始化下载引擎
+        
+        Args:
+            request_fn: 发送请求的函数 request_fn(method, url, endpoint=..., **kwargs)
+            chunk_size: 读取分块大小（字节）
+            parallelism: 大文件并行下载的区间数
+            parallel_min_size: 剩余大小超过该值（字节）才并行下载
+            max_attempts: 每个区间因网络异常中断后的最大尝试次数
+        """
+        self.request_fn = request_fn
+        self.chunk_size = chunk_size or settings.DOWNLOAD_CHUNK_SIZE
+        self.parallelism = parallelism or settings.DOWNLOAD_PARALLELISM
+        self.parallel_min_size = parallel_min_size or settings.DOWNLOAD_PARALLEL_MIN_SIZE
+        self.max_attempts = max_attempts or settings.DOWNLOAD_MAX_ATTEMPTS
+    
+    # ========== 对外接口 ==========
+    
+    def download(self, url: str, output_path: str) -> str:
+        """
+        下载文件到 output_path
+        
+        Args:
+            url: 文件 URL
+            output_path: 最终文件路径
+        
+        Returns:
+            最终文件路径
+        """
+        part_path = output_path + '.part'
+        state_path = part_path + '.json'
+        
+        ranges = self._load_ranges(state_path)
+        if ranges is not None and os.path.exists(part_path):
+            # 上次是并行下载，按记录的区间进度继续
+            total = ranges[-1][1]
+            # 记录区间后、预分配前中断时 .part 可能还未预分配
+            self._ensure_size(part_path, total)
+            self._download_ranges(url, part_path, state_path, ranges)
+        else:
+            total = self._download_sequential(url, part_path, state_path)
+        
+        self._finalize(part_path, output_path, total)
+        if os.path.exists(state_path):
+            os.remove(state_path)
+        return output_path
+    
+    # ========== 顺序下载 ==========
+    
+    def _download_sequential(self, url: str, part_path: str, state_path: str) -> Optional[int]:
+        """从 .part 文件末尾开始顺序下载，剩余部分较大时转为并行下载，返回文件总大小"""
+        total = None
+        for attempt in range(self.max_attempts):
+            offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            if total is not None and offset >= total:
+                return total
+            
+            headers = {'Range': f'bytes={offset}-'}
+            try:
+                with self.request_fn('GET', url, endpoint='download', stream=True,
+                                     headers=headers) as response:
+                    if response.status_code == 416:
+                        # 请求的起点已超出文件末尾：.part 已完整或已失效
+                        total = parse_total_size(response.status_code, response.headers)
+                        if total is not None and offset == total:
+                            return total
+                        if os.path.exists(part_path):
+                            os.remove(part_path)
+                        continue
+                    if response.status_code not in (200, 206):
+                        raise DownloadError(f"下载失败: HTTP {response.status_code}")
+                    
+                    total = parse_total_size(response.status_code, response.headers)
+                    if response.status_code == 200:
+                        # 服务端不支持 Range，只能从头下载
+                        offset = 0
+                    
+                    if (response.status_code == 206 and total is not None
+                            and self.parallelism > 1
+                            and total - offset >= self.parallel_min_size):
+                        response.close()
+                        ranges = self._split_ranges(offset, total)
+                        # 先记录区间再预分配：预分配后的 .part 长度已等于文件大小，
+                        # 没有区间记录时续传会误认为下载完成，把补零的文件当作结果
+                        self._save_ranges(state_path, ranges)
+                        self._ensure_size(part_path, total)
+                        self._download_ranges(url, part_path, state_path, ranges)
+                        return total
+                    
+                    mode = 'ab' if offset else 'wb'
+                    with open(part_path, mode) as f:
+                        for chunk in response.iter_content(chunk_size=self.chunk_size):
+                            if chunk:
+                                f.write(chunk)
+                    return total
+            except RESUMABLE_ERRORS as e:
+                if attempt == self.max_attempts - 1:
+                    raise DownloadError(f"下载中断且重试耗尽: {e}")
+                print(f"下载中断，将从断点继续: {e}")
+        raise DownloadError("下载失败: 重试耗尽")
+    
+    # ========== 并行区间下载 ==========
+    
+    def _split_ranges(self, start: int, total: int) -> List[List[int]]:
+        """把 [start, total) 均分为多个区间，每项为 [起点, 终点(不含), 已下载字节数]"""
+        size = total - start
+        count = max(1, min(self.parallelism, size // self.chunk_size or 1))
+        step = size // count
+        ranges = []
+        for i in range(count):
+            range_start = start + i * step
+            range_end = total if i == count - 1 else range_start + step
+            ranges.append([range_start, range_end, 0])
+        return ranges
+    
+    def _download_ranges(self, url: str, part_path: str, state_path: str,
+                         ranges: List[List[int]]):
+        """并行下载各区间，写入 .part 文件的对应位置"""
+        lock = threading.Lock()
+        pending = [r for r in ranges if r[0] + r[2] < r[1]]
+        with ThreadPoolExecutor(max_workers=len(pending) or 1,
+                                thread_name_prefix='Download') as executor:
+            futures = [
+                executor.submit(self._download_range, url, part_path, state_path,
+                                ranges, item, lock)
+                for item in pending
+            ]
+            errors = [f.exception() for f in futures if f.exception() is not None]
+        if errors:
+            raise DownloadError(f"分段下载失败: {errors[0]}")
+    
+    def _download_range(self, url: str, part_path: str, state_path: str,
+                        ranges: List[List[int]], item: List[int], lock: threading.Lock):
+        """下载单个区间，中断后从该区间的断点继续"""
+        for attempt in range(self.max_attempts):
+            position = item[0] + item[2]
+            if position >= item[1]:
+                return
+            headers = {'Range': f'bytes={position}-{item[1] - 1}'}
+            try:
+                with self.request_fn('GET', url, endpoint='download', stream=True,
+                                     headers=headers) as response:
+                    if response.status_code != 206:
+                        raise DownloadError(f"分段下载失败: HTTP {response.status_code}")
+                    with open(part_path, 'r+b') as f:
+                        f.seek(position)
+                        for chunk in response.iter_content(chunk_size=self.chunk_size):
+                            if not chunk:
+                                continue
+                            chunk = chunk[:item[1] - item[0] - item[2]]
+                            f.write(chunk)
+                            item[2] += len(chunk)
+                return
+            except RESUMABLE_ERRORS as e:
+                if attempt == self.max_attempts - 1:
+                    raise
+                print(f"分段下载中断，将从断点继续: {e}")
+            finally:
+                with lock:
+                    self._save_ranges(state_path, ranges)
+    
+    # ========== 辅助方法 ==========
+    
+    @staticmethod
+    def _ensure_size(part_path: str, total: int):
+        """预分配 .part 文件，保留已有内容"""
+        mode = 'r+b' if os.path.exists(part_path) else 'wb'
+        with open(part_path, mode) as f:
+            f.truncate(total)
+    
+    @staticmethod
+    def _load_ranges(state_path: str) -> Optional[List[List[int]]]:
+        """读取并行下载的区间进度"""
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                ranges = json.load(f)
+            if ranges and all(len(r) == 3 for r in ranges):
+                return ranges
+        except (OSError, ValueError):
+            pass
+        return None
+    
+    @staticmethod
+    def _save_ranges(state_path: str, ranges: List[List[int]]):
+        """保存并行下载的区间进度"""
+        tmp_path = state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(ranges, f)
+        os.replace(tmp_path, state_path)
+    
+    @staticmethod
+    def _finalize(part_path: str, output_path: str, total: Optional[int]):
+        """校验长度并原子重命名"""
+        size = os.path.getsize(part_path)
+        if total is not None and size != total:
+            raise DownloadError(f"下载文件不完整: {size}/{total} 字节")
+        os.replace(part_path, output_path)
+
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+素材文件夹列表
+资源管理器的数据来源：由文件夹监视的快照（os.scandir 得到的大小和修改时间）构建，
+不再逐个 os.path.isfile / stat。列表按名称、修改时间、大小或模型排序，
+文件变化时按当前排序二分查找插入/删除位置，不重新排序整个列表。
+"""
+
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv')
+
+
+SORT_NAME = 'name'
+SORT_MTIME = 'mtime'
+SORT_SIZE = 'size'
+SORT_MODEL = 'model'
+SORT_KEYS = (SORT_NAME, SORT_MTIME, SORT_SIZE, SORT_MODEL)
+
+
+class FileEntry:
+    """列表中的一个文件"""
+    
+    __slots__ = ('name', 'path', 'size', 'mtime', 'model', 'tooltip')
+    
+    def __init__(self, path: str, size: int = 0, mtime: int = 0, model: str = '', tooltip: str = ''):
+        self.name = os.path.basename(path)
+        self.path = path
+        self.size = size
+        self.mtime = mtime  # 纳秒
+        self.model = model or ''
+        self.tooltip = tooltip
+    
+    @property
+    def is_video(self) -> bool:
+        return self.path.lower().endswith(VIDEO_EXTENSIONS)
+
+
+def _sort_value(entry: FileEntry, key: str):
+    """排序键，相同时按文件名区分（保证键唯一，二分查找能定位到具体文件）"""
+    if key == SORT_MTIME:
+        return entry.mtime, entry.name
+    if key == SORT_SIZE:
+        return entry.size, entry.name
+    if key == SORT_MODEL:
+        # 没有模型信息的文件排在最后
+        return entry.model == '', entry.model, entry.name
+    return entry.name
+
+
+class FolderListing:
+    """
+    一个文件夹（或一组搜索结果）的有序文件列表
+    
+    sort_key 为 None 时保持添加顺序（搜索结果按相关度排列）。
+    """
+    
+    def __init__(self, folder: Optional[str] = None, extensions: Tuple[str, ...] = (),
+                 sort_key: Optional[str] = SORT_NAME, descending: bool = False):
+        """
+        Args:
+            folder: 文件夹路径（搜索结果为 None）
+            extensions: 显示的文件扩展名
+            sort_key: 排序方式（SORT_KEYS 之一）
+            descending: 是否倒序
+        """
+        self.folder = os.path.normpath(folder) if folder else None
+        self.extensions = extensions
+        self.sort_key = sort_key
+        self.descending = descending
+        self.entries: List[FileEntry] = []
+        self._by_path: Dict[str, FileEntry] = {}
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def accepts(self, name: str) -> bool:
+        """文件是否显示在该列表中"""
+        return name.lower().endswith(self.extensions)
+    
+    def load(self, snapshot: Dict[str, Tuple[int, int, int]], models: Optional[Dict[str, str]] = None):
+        """
+        从文件夹快照构建列表
+        
+        Args:
+            snapshot: 文件名 -> (inode, 大小, 修改时间)，见 core.folder_watcher
+            models: 文件路径 -> 生成该文件的模型
+        """
+        models = models or {}
+        entries = []
+        for name, info in snapshot.items():
+            if self.accepts(name):
+                path = os.path.join(self.folder, name)
+                entries.append(FileEntry(path, info[1], info[2], models.get(path, '')))
+        self._set_entries(entries)
+    
+    def load_entries(self, entries: Iterable[FileEntry]):
+        """直接设置文件（搜索结果）"""
+        self._set_entries(list(entries))
+    
+    def _set_entries(self, entries: List[FileEntry]):
+        self.entries = entries
+        self._by_path = {entry.path: entry for entry in entries}
+        if self.sort_key:
+            self.entries.sort(key=lambda entry: _sort_value(entry, self.sort_key), reverse=self.descending)
+    
+    # ========== 查找 ==========
+    
+    def get(self, path: str) -> Optional[FileEntry]:
+        return self._by_path.get(path)
+    
+    def index_of(self, path: str) -> int:
+        """文件在列表中的位置，不存在时返回 -1"""
+        entry = self._by_path.get(path)
+        if entry is None:
+            return -1
+        if not self.sort_key:
+            return self.entries.index(entry)
+        return self._bisect(entry)
+    
+    def _bisect(self, entry: FileEntry) -> int:
+        """按当前排序查找文件应在的位置"""
+        target = _sort_value(entry, self.sort_key)
+        low, high = 0, len(self.entries)
+        while low < high:
+            middle = (low + high) // 2
+            value = _sort_value(self.entries[middle], self.sort_key)
+            if (value > target) if self.descending else (value < target):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+    
+    # ========== 修改 ==========
+    
+    def sort(self, sort_key: Optional[str], descending: bool = False):
+        """按新的方式排序"""
+        self.sort_key = sort_key
+        self.descending = descending
+        if sort_key:
+            self.entries.sort(key=lambda entry: _sort_value(entry, sort_key), reverse=descending)
+    
+    def set_models(self, models: Dict[str, str]):
+        """更新各文件的模型信息（需要重新排序时由调用方调用 sort）"""
+        for entry in self.entries:
+            entry.model = models.get(entry.path, entry.model)
+    
+    def insert(self, entry: FileEntry) -> int:
+        """
+        按当前排序插入文件
+        
+        Returns:
+            插入的位置
+        """
+        index = self._bisect(entry) if self.sort_key else len(self.entries)
+        self.entries.insert(index, entry)
+        self._by_path[entry.path] = entry
+        return index
+    
+    def remove(self, path: str) -> int:
+        """
+        移除文件
+        
+        Returns:
+            移除前的位置，不存在时返回 -1
+        """
+        index = self.index_of(path)
+        if index >= 0:
+            del self.entries[index]
+            del self._by_path[path]
+        return index
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件夹变化监视
+用 QFileSystemWatcher 监视工程的素材目录，目录变化后（合并短时间内的连续变化）
+重新扫描并与上次的快照比较，只通知新增、删除、重命名和修改的文件，
+资源管理器据此增量更新文件树，不再清空重建。
+"""
+
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+from config.settings import settings
+
+
+# 文件名 -> (inode, 大小, 修改时间)
+Snapshot = Dict[str, Tuple[int, int, int]]
+
+
+@dataclass
+class FolderChanges:
+    """一次扫描得到的文件变化（文件名，不含目录）"""
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    renamed: List[Tuple[str, str]] = field(default_factory=list)  # (旧文件名, 新文件名)
+    modified: List[str] = field(default_factory=list)
+    
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.renamed or self.modified)
+
+
+def scan_folder(folder: str) -> Snapshot:
+    """列出文件夹中的普通文件，文件夹不存在时返回空快照"""
+    snapshot = {}
+    try:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        snapshot[entry.name] = (entry.inode(), stat.st_size, stat.st_mtime_ns)
+                except OSError:
+                    # 扫描期间被删除
+                    continue
+    except OSError:
+        pass
+    return snapshot
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> FolderChanges:
+    """
+    比较两次快照
+    
+    消失的文件与新出现的文件 inode、大小和修改时间都相同时视为重命名
+    （删除后新建的文件可能复用同一个 inode，修改时间不同）。
+    """
+    changes = FolderChanges()
+    removed = {name: info for name, info in old.items() if name not in new}
+    added = {name: info for name, info in new.items() if name not in old}
+    
+    by_info = {info: name for name, info in removed.items()}
+    for name in sorted(added):
+        old_name = by_info.pop(added[name], None)
+        if old_name is not None:
+            changes.renamed.append((old_name, name))
+            del removed[old_name]
+        else:
+            changes.added.append(name)
+    changes.removed = sorted(removed)
+    changes.modified = sorted(name for name, info in new.items()
+                              if name in old and old[name][1:] != info[1:])
+    return changes
+
+
+class FolderWatcher(QObject):
+    """
+    监视若干文件夹，合并连续变化后通知差异
+    
+    连续写入（如批量生成的 4 张图片陆续落盘）在最后一次变化后 debounce_ms 再扫描；
+    变化持续不断时最迟 max_delay_ms 扫描一次。
+    """
+    
+    # 文件夹变化: 文件夹路径, FolderChanges
+    folder_changed = pyqtSignal(str, object)
+    
+    def __init__(self, debounce_ms: int = None, max_delay_ms: int = None, parent=None):
+        """
+        Args:
+            debounce_ms: 最后一次变化后等待的时间，默认 settings.EXPLORER_WATCH_DEBOUNCE_MS
+            max_delay_ms: 第一次变化后最长等待时间，默认 debounce_ms 的 5 倍
+        """
+        super().__init__(parent)
+        self.debounce_ms = debounce_ms or settings.EXPLORER_WATCH_DEBOUNCE_MS
+        self.max_delay_ms = max_delay_ms or self.debounce_ms * 5
+        self._snapshots: Dict[str, Snapshot] = {}
+        self._dirty = set()
+        self._first_change = None
+        
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+    
+    def watch(self, folder: str) -> Snapshot:
+        """
+        开始监视文件夹
+        
+        Returns:
+            当前快照（调用方据此构建初始列表，避免重复扫描）
+        """
+        folder = os.path.normpath(folder)
+        snapshot = scan_folder(folder)
+        self._snapshots[folder] = snapshot
+        if os.path.isdir(folder) and folder not in self._watcher.directories():
+            self._watcher.addPath(folder)
+        return dict(snapshot)
+    
+    def clear(self):
+        """停止监视所有文件夹，丢弃未处理的变化"""
+        self._timer.stop()
+        directories = self._watcher.directories()
+        if directories:
+            self._watcher.removePaths(directories)
+        self._snapshots.clear()
+        self._dirty.clear()
+        self._first_change = None
+    
+    def snapshot(self, folder: str) -> Snapshot:
+        """文件夹最近一次扫描的快照（不重新扫描）"""
+        return self._snapshots.get(os.path.normpath(folder), {})
+    
+    def folders(self) -> List[str]:
+        """正在监视的文件夹"""
+        return list(self._snapshots)
+    
+    def _on_directory_changed(self, path: str):
+        folder = os.path.normpath(path)
+        if folder not in self._snapshots:
+            return
+        self._dirty.add(folder)
+        now = time.monotonic()
+        if self._first_change is None:
+            self._first_change = now
+        # 每次变化都推迟扫描，但不超过第一次变化后 max_delay_ms
+        remaining = self.max_delay_ms - (now - self._first_change) * 1000
+        self._timer.start(int(max(0, min(self.debounce_ms, remaining))))
+    
+    def rescan(self, folder: str):
+        """立即扫描指定文件夹（本程序自己修改文件后调用，不等待变化通知）"""
+        folder = os.path.normpath(folder)
+        if folder in self._snapshots:
+            self._dirty.add(folder)
+            self.flush()
+    
+    def flush(self):
+        """立即扫描有变化的文件夹并通知差异"""
+        self._timer.stop()
+        dirty, self._dirty = self._dirty, set()
+        self._first_change = None
+        for folder in sorted(dirty):
+            if folder not in self._snapshots:
+                continue
+            snapshot = scan_folder(folder)
+            changes = diff_snapshots(self._snapshots[folder], snapshot)
+            self._snapshots[folder] = snapshot
+            # 文件夹被删除后重建时重新加入监视
+            if os.path.isdir(folder) and folder not in self._watcher.directories():
+                self._watcher.addPath(folder)
+            if not changes.is_empty():
+                self.folder_changed.emit(folder, changes)
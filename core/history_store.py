@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生成历史存储
+文生图、图像编辑的生成结果按 JSON Lines 追加写入历史文件：
+新增一条记录只追加一行，删除记录追加一行删除标记，
+删除标记积累较多时在加载时整理一次文件。
+文件是否仍然存在由后台线程检查，不阻塞界面线程。
+"""
+
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class HistoryStore:
+    """只追加的生成历史（线程安全）"""
+    
+    # 删除标记超过该数量且多于有效记录时整理文件
+    COMPACT_MIN_REMOVED = 100
+    
+    def __init__(self, history_file: str, legacy_file: Optional[str] = None, compact: bool = True):
+        """
+        Args:
+            history_file: 历史文件路径（.jsonl）
+            legacy_file: 旧版 JSON 数组格式的历史文件，首次加载时导入
+            compact: 加载时是否整理文件（其他组件只读取时传 False）
+        """
+        self.history_file = history_file
+        self.legacy_file = legacy_file
+        self.compact = compact
+        self._lock = threading.Lock()
+        # 按追加顺序（从旧到新）保存，分页时倒序读取
+        self._records: List[Dict] = []
+        self._positions: Dict[str, int] = {}
+        self._removed = 0
+        self.load()
+    
+    # ========== 读取 ==========
+    
+    def load(self):
+        """读取历史文件（不检查图片文件是否存在）"""
+        with self._lock:
+            self._records = []
+            self._positions = {}
+            self._removed = 0
+            if not os.path.exists(self.history_file):
+                self._migrate_legacy()
+                return
+            try:
+                with open(self.history_file, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            # 写入中断时最后一行可能不完整
+                            continue
+                        if 'removed' in record:
+                            self._drop(record['removed'])
+                            self._removed += 1
+                        elif record.get('id'):
+                            self._add(record)
+            except Exception as e:
+                print(f"加载历史记录失败: {e}")
+            
+            if (self.compact and self._removed >= self.COMPACT_MIN_REMOVED
+                    and self._removed > len(self._positions)):
+                self._compact()
+    
+    def count(self) -> int:
+        """有效记录数量"""
+        with self._lock:
+            return len(self._positions)
+    
+    def page(self, offset: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        """
+        分页读取（从新到旧）
+        
+        Args:
+            offset: 跳过的记录数
+            limit: 最多返回的记录数，None 表示不限
+        """
+        result = []
+        with self._lock:
+            skipped = 0
+            for record in reversed(self._records):
+                if record is None:
+                    continue
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                if limit is not None and len(result) >= limit:
+                    break
+                result.append(dict(record))
+        return result
+    
+    # ========== 写入 ==========
+    
+    def append(self, entries: Iterable[Dict]) -> List[Dict]:
+        """
+        追加记录（每条记录补充 id 和 created_at）
+        
+        Returns:
+            追加的记录
+        """
+        now = datetime.now().isoformat()
+        records = [dict(entry, id=uuid.uuid4().hex, created_at=now) for entry in entries]
+        if not records:
+            return []
+        with self._lock:
+            self._write_lines(records)
+            for record in records:
+                self._add(record)
+        return records
+    
+    def remove(self, record_ids: Iterable[str]) -> int:
+        """
+        删除记录（追加一行删除标记）
+        
+        Returns:
+            实际删除的记录数量
+        """
+        with self._lock:
+            record_ids = [record_id for record_id in record_ids if record_id in self._positions]
+            if record_ids:
+                self._write_lines([{'removed': record_ids}])
+                self._drop(record_ids)
+                self._removed += 1
+        return len(record_ids)
+    
+    def clear(self):
+        """清空历史"""
+        with self._lock:
+            self._records = []
+            self._positions = {}
+            self._removed = 0
+            self._rewrite()
+    
+    # ========== 内部方法（需持有锁） ==========
+    
+    def _add(self, record: Dict):
+        if record['id'] in self._positions:
+            return
+        self._positions[record['id']] = len(self._records)
+        self._records.append(record)
+    
+    def _drop(self, record_ids: Iterable[str]):
+        for record_id in record_ids:
+            position = self._positions.pop(record_id, None)
+            if position is not None:
+                self._records[position] = None
+    
+    def _write_lines(self, records: List[Dict]):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.history_file)), exist_ok=True)
+            with open(self.history_file, 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records))
+        except Exception as e:
+            print(f"保存历史记录失败: {e}")
+    
+    def _rewrite(self):
+        """整体重写历史文件（只在整理和清空时使用）"""
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.history_file)), exist_ok=True)
+            tmp_path = self.history_file + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for record in self._records:
+                    if record is not None:
+                        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            os.replace(tmp_path, self.history_file)
+        except Exception as e:
+            print(f"保存历史记录失败: {e}")
+    
+    def _compact(self):
+        """去掉删除标记和已删除的记录"""
+        self._records = [record for record in self._records if record is not None]
+        self._positions = {record['id']: i for i, record in enumerate(self._records)}
+        self._removed = 0
+        self._rewrite()
+    
+    def _migrate_legacy(self):
+        """导入旧版历史文件（JSON 数组，从新到旧排列），原文件保留不动"""
+        if not self.legacy_file or not os.path.exists(self.legacy_file):
+            return
+        try:
+            with open(self.legacy_file, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+        except Exception as e:
+            print(f"导入旧版历史记录失败: {e}")
+            return
+        for entry in reversed(legacy):
+            if isinstance(entry, dict) and entry.get('path'):
+                self._add(dict(entry, id=uuid.uuid4().hex))
+        self._rewrite()
+
+
+class MissingFileChecker(QThread):
+    """在后台检查历史记录中的图片是否仍然存在"""
+    
+    # 图片已不存在的记录 ID 列表
+    missing_found = pyqtSignal(list)
+    
+    def __init__(self, records: List[Dict], parent=None):
+        """
+        Args:
+            records: 要检查的记录（需包含 id 和 path）
+        """
+        super().__init__(parent)
+        self.records = [(record['id'], record.get('path', '')) for record in records]
+        self._cancelled = False
+    
+    def cancel(self):
+        """取消检查（切换工程时使用）"""
+        self._cancelled = True
+    
+    def run(self):
+        missing = []
+        for record_id, path in self.records:
+            if self._cancelled:
+                return
+            if not path or not os.path.exists(path):
+                missing.append(record_id)
+        if missing and not self._cancelled:
+            self.missing_found.emit(missing)
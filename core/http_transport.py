@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP 传输层
+为所有 DashScope 请求（提交、轮询、上传、下载）提供共享的连接池会话，
+复用 TCP/TLS 连接，并统计连接复用情况
+"""
+
+import mimetypes
+import os
+import threading
+import uuid
+from typing import Callable, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.settings import settings
+
+
+class TransportStats:
+    """连接复用统计（线程安全）"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+    
+    def reset(self):
+        """清空统计"""
+        with self._lock:
+            self.requests = 0
+            self.connections = 0
+            self.endpoints = {}
+    
+    def set_current_endpoint(self, endpoint: str):
+        """记录当前线程正在请求的端点（用于归类新建连接）"""
+        self._local.endpoint = endpoint
+    
+    def record_request(self, endpoint: str):
+        """记录一次请求"""
+        with self._lock:
+            self.requests += 1
+            entry = self.endpoints.setdefault(endpoint, {'requests': 0, 'connections': 0})
+            entry['requests'] += 1
+    
+    def record_connect(self):
+        """记录一次新建连接（TCP + TLS 握手）"""
+        endpoint = getattr(self._local, 'endpoint', 'default')
+        with self._lock:
+            self.connections += 1
+            entry = self.endpoints.setdefault(endpoint, {'requests': 0, 'connections': 0})
+            entry['connections'] += 1
+    
+    def snapshot(self) -> Dict:
+        """
+        获取统计快照
+        
+        Returns:
+            包含请求数、新建连接数、复用次数和复用率的字典
+        """
+        with self._lock:
+            endpoints = {}
+            for name, entry in self.endpoints.items():
+                reused = max(entry['requests'] - entry['connections'], 0)
+                endpoints[name] = {
+                    'requests': entry['requests'],
+                    'connections': entry['connections'],
+                    'reused': reused
+                }
+            reused = max(self.requests - self.connections, 0)
+            return {
+                'requests': self.requests,
+                'connections': self.connections,
+                'reused': reused,
+                'reuse_rate': reused / self.requests if self.requests else 0.0,
+                'endpoints': endpoints
+            }
+
+
+def _counting_pool_class(pool_cls, stats: TransportStats):
+    """生成在建立连接时计数的连接池类"""
+    
+    class CountingConnection(pool_cls.ConnectionCls):
+        def connect(self):
+            stats.record_connect()
+            return super().connect()
+    
+    class CountingPool(pool_cls):
+        ConnectionCls = CountingConnection
+    
+    return CountingPool
+
+
+class _CountingHTTPAdapter(HTTPAdapter):
+    """带连接计数的 HTTPAdapter"""
+    
+    def __init__(self, stats: TransportStats, **kwargs):
+        self._stats = stats
+        super().__init__(**kwargs)
+    
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: _counting_pool_class(pool_cls, self._stats)
+            for scheme, pool_cls in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+
+class MultipartFileBody:
+    """
+    流式 multipart/form-data 请求体
+    
+    文件内容在发送时按块从磁盘读取，不整体载入内存。
+    实现 __len__ 以便 requests 设置 Content-Length（OSS 表单上传不支持分块编码），
+    实现 seek/tell 以便重试时从头重放。
+    """
+    
+    def __init__(self, fields: Dict[str, str], file_field: str, file_name: str,
+                 file_path: str, content_type: Optional[str] = None,
+                 progress_callback: Optional[Callable[[int, int], None]] = None):
+        """
+        初始化请求体
+        
+        Args:
+            fields: 普通表单字段（按顺序写在文件之前）
+            file_field: 文件字段名
+            file_name: 上传的文件名
+            file_path: 本地文件路径
+            content_type: 文件 MIME 类型，默认按扩展名推断
+            progress_callback: 进度回调 progress_callback(已发送文件字节数, 文件大小)
+        """
+        self.boundary = uuid.uuid4().hex
+        content_type = content_type or mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+        
+        head = ''.join(
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+            f'{value}\r\n'
+            for name, value in fields.items()
+        )
+        head += (
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{file_field}"; filename="{file_name}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'
+        )
+        self._head = head.encode('utf-8')
+        self._tail = f'\r\n--{self.boundary}--\r\n'.encode('utf-8')
+        self._file_path = file_path
+        self._file_size = os.path.getsize(file_path)
+        self._file = None
+        self._position = 0
+        self._progress_callback = progress_callback
+    
+    @property
+    def content_type(self) -> str:
+        """请求的 Content-Type 头"""
+        return f'multipart/form-data; boundary={self.boundary}'
+    
+    def __len__(self) -> int:
+        return len(self._head) + self._file_size + len(self._tail)
+    
+    def __iter__(self):
+        while True:
+            chunk = self.read(64 * 1024)
+            if not chunk:
+                break
+            yield chunk
+    
+    def read(self, size: int = -1) -> bytes:
+        """读取最多 size 字节"""
+        if size is None or size < 0:
+            size = len(self) - self._position
+        chunks = []
+        while size > 0 and self._position < len(self):
+            chunk = self._read_segment(size)
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b''.join(chunks)
+    
+    def _read_segment(self, size: int) -> bytes:
+        """从当前位置所在的段（表单头/文件/结尾）读取数据"""
+        position = self._position
+        file_start = len(self._head)
+        file_end = file_start + self._file_size
+        if position < file_start:
+            data = self._head[position:position + size]
+        elif position < file_end:
+            if self._file is None:
+                self._file = open(self._file_path, 'rb')
+            self._file.seek(position - file_start)
+            data = self._file.read(min(size, file_end - position))
+            if not data:
+                raise IOError(f"文件在上传过程中被截断: {self._file_path}")
+            if self._progress_callback is not None:
+                self._progress_callback(position - file_start + len(data), self._file_size)
+        else:
+            offset = position - file_end
+            data = self._tail[offset:offset + size]
+        self._position += len(data)
+        return data
+    
+    def seek(self, offset: int, whence: int = 0) -> int:
+        """移动读取位置（支持 whence=0/1/2）"""
+        if whence == 1:
+            offset += self._position
+        elif whence == 2:
+            offset += len(self)
+        self._position = max(0, min(offset, len(self)))
+        return self._position
+    
+    def tell(self) -> int:
+        """当前读取位置"""
+        return self._position
+    
+    def close(self):
+        """关闭文件"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        self.close()
+
+
+class HttpTransport:
+    """
+    共享的 HTTP 传输层
+    
+    内部持有一个带连接池的 requests.Session，可被多个线程同时使用。
+    每个请求需指明端点类型（submit/query/upload/download 等），
+    用于选择超时时间以及分类统计连接复用。
+    """
+    
+    def __init__(self, pool_size: Optional[int] = None,
+                 timeouts: Optional[Dict[str, Tuple[float, float]]] = None):
+        """
+        初始化传输层
+        
+        Args:
+            pool_size: 每个主机的最大连接数
+            timeouts: 端点类型 -> (连接超时, 读取超时)
+        """
+        self.pool_size = pool_size or settings.HTTP_POOL_SIZE
+        self.timeouts = dict(settings.HTTP_TIMEOUTS)
+        if timeouts:
+            self.timeouts.update(timeouts)
+        
+        self.stats = TransportStats()
+        self.session = requests.Session()
+        adapter = _CountingHTTPAdapter(
+            self.stats,
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+    
+    def get_timeout(self, endpoint: str) -> Tuple[float, float]:
+        """获取端点的超时设置"""
+        return self.timeouts.get(endpoint, self.timeouts['default'])
+    
+    def request(self, method: str, url: str, endpoint: str = 'default', **kwargs) -> requests.Response:
+        """
+        发送请求
+        
+        Args:
+            method: HTTP 方法
+            url: 请求地址
+            endpoint: 端点类型，决定超时时间与统计分类
+            **kwargs: 透传给 requests 的参数
+        
+        Returns:
+            响应对象
+        """
+        kwargs.setdefault('timeout', self.get_timeout(endpoint))
+        self.stats.set_current_endpoint(endpoint)
+        self.stats.record_request(endpoint)
+        return self.session.request(method, url, **kwargs)
+    
+    def get(self, url: str, endpoint: str = 'default', **kwargs) -> requests.Response:
+        """发送 GET 请求"""
+        return self.request('GET', url, endpoint=endpoint, **kwargs)
+    
+    def post(self, url: str, endpoint: str = 'default', **kwargs) -> requests.Response:
+        """发送 POST 请求"""
+        return self.request('POST', url, endpoint=endpoint, **kwargs)
+    
+    def get_stats(self) -> Dict:
+        """获取连接复用统计"""
+        return self.stats.snapshot()
+    
+    def close(self):
+        """关闭所有连接"""
+        self.session.close()
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> HttpTransport:
+    """获取全局共享的传输层实例"""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = HttpTransport()
+        return _transport
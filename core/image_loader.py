@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图片加载
+所有预览统一从这里按目标尺寸解码：QImageReader 在解码时缩小（JPEG 直接按 1/2、1/4、1/8
+解码，不生成完整分辨率的图像），不再先解码原图再 scaled()。
+上传区域、首尾帧等需要随窗口缩放的预览只保留不超过 PREVIEW_MAX_SIZE 的图像。
+"""
+
+from typing import Optional, Tuple
+
+from PyQt5.QtCore import QSize, Qt
+from PyQt5.QtGui import QImage, QImageReader, QPixmap
+
+from config.settings import settings
+
+
+def load_scaled_image(file_path: str, size: Tuple[int, int]) -> QImage:
+    """
+    按目标尺寸解码图片（保持比例、不放大；JPEG 等格式解码时即缩小，不生成完整分辨率的图像）
+    
+    Returns:
+        QImage，失败时 isNull()
+    """
+    reader = QImageReader(file_path)
+    reader.setAutoTransform(True)
+    original = reader.size()
+    box = QSize(*size)
+    if original.isValid() and (original.width() > box.width() or original.height() > box.height()):
+        reader.setScaledSize(original.scaled(box, Qt.KeepAspectRatio))
+    return reader.read()
+
+
+def load_preview_pixmap(file_path: str, max_size: Optional[int] = None) -> QPixmap:
+    """
+    加载用于预览的图片（只能在界面线程调用）
+    
+    Args:
+        file_path: 图片路径
+        max_size: 最长边上限，默认 settings.PREVIEW_MAX_SIZE
+    
+    Returns:
+        QPixmap，失败时 isNull()
+    """
+    limit = max_size or settings.PREVIEW_MAX_SIZE
+    image = load_scaled_image(file_path, (limit, limit))
+    return QPixmap.fromImage(image) if not image.isNull() else QPixmap()
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+输入文件存储（按内容寻址）
+导入工程的图片、视频按内容哈希在工作区中只保存一份（objects/ab/abcdef....png），
+工程内的文件优先通过写时复制（reflink）共享数据，不支持时使用硬链接，都不支持时才复制。
+
+- 每个源文件只计算一次哈希：按 路径/大小/修改时间 缓存在 index.db，
+  再次导入同一文件不再读取内容
+- 工程中已有相同内容的文件时直接跳过；同名但内容不同时自动改名，不需要逐个确认
+- 工程与存储不在同一文件系统时无法共享数据，直接复制一次，不在存储中另存一份
+- 工程文件对存储文件的引用记录在 index.db，不再被任何工程引用的存储文件由 collect_garbage() 清理
+
+注意：硬链接的文件与存储及其他工程中的同一文件是同一份数据，用外部程序原地修改
+工程中的输入文件会同时改变所有链接到它的工程（reflink 和复制得到的文件不受影响）。
+"""
+
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+from config.settings import settings
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS refs (
+    path TEXT PRIMARY KEY,
+    object TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_refs_object ON refs(object);
+"""
+
+# Linux 的 FICLONE ioctl（btrfs、xfs 等支持写时复制的文件系统）
+FICLONE = 0x40049409
+
+
+def reflink(src: str, dst: str) -> bool:
+    """
+    以写时复制方式克隆文件（不复制数据块）
+    
+    Returns:
+        是否成功；不支持时返回 False，且不会留下目标文件
+    """
+    if not FCNTL_AVAILABLE:
+        return False
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        shutil.copystat(src, dst)
+        return True
+    except OSError:
+        if os.path.exists(dst):
+            os.remove(dst)
+        return False
+
+
+def link_or_copy(src: str, dst: str) -> str:
+    """
+    按 reflink -> 硬链接 -> 复制 的顺序创建 dst
+    
+    reflink 得到的是独立文件，原地修改不会影响其他链接；硬链接共享同一个 inode，
+    只在文件系统不支持 reflink 时使用。
+    
+    Returns:
+        使用的方式: 'reflink' / 'hardlink' / 'copy'
+    """
+    if reflink(src, dst):
+        return 'reflink'
+    try:
+        os.link(src, dst)
+        return 'hardlink'
+    except OSError:
+        # 跨文件系统、文件系统不支持或没有权限
+        pass
+    shutil.copy2(src, dst)
+    return 'copy'
+
+
+class InputStore:
+    """工作区级别的按内容寻址存储（线程安全）"""
+    
+    def __init__(self, store_dir: str):
+        """
+        Args:
+            store_dir: 存储目录（与工程位于同一文件系统时才能使用硬链接）
+        """
+        self.store_dir = store_dir
+        self.objects_dir = os.path.join(store_dir, 'objects')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        # 导入（存入并链接）与清理互斥，避免刚被复用的文件在链接前被清理
+        self._objects_lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(store_dir, 'index.db'), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+    
+    # ========== 哈希 ==========
+    
+    def hash_file(self, file_path: str) -> str:
+        """
+        文件内容的 SHA-256（文件大小和修改时间未变时使用缓存）
+        """
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT digest FROM sources WHERE path = ? AND size = ? AND mtime_ns = ?',
+                (path, stat.st_size, stat.st_mtime_ns)
+            ).fetchone()
+        if row:
+            return row[0]
+        
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        digest = digest.hexdigest()
+        self._remember(path, stat, digest)
+        return digest
+    
+    def _remember(self, path: str, stat: os.stat_result, digest: str):
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO sources (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)',
+                    (path, stat.st_size, stat.st_mtime_ns, digest)
+                )
+    
+    # ========== 存储 ==========
+    
+    def object_path(self, digest: str, ext: str) -> str:
+        """内容对应的存储路径"""
+        return os.path.join(self.objects_dir, digest[:2], digest + ext.lower())
+    
+    def add(self, file_path: str) -> Tuple[str, str]:
+        """
+        将文件放入存储（内容已存在时不再复制）
+        
+        Returns:
+            (内容哈希, 存储路径)
+        """
+        digest = self.hash_file(file_path)
+        object_path = self.object_path(digest, os.path.splitext(file_path)[1])
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            tmp_path = f"{object_path}.{threading.get_ident()}.tmp"
+            # 存储中的数据会被多个工程共享，这里不链接源文件，避免源文件被修改后影响工程
+            if not reflink(file_path, tmp_path):
+                shutil.copy2(file_path, tmp_path)
+            os.replace(tmp_path, object_path)
+        return digest, object_path
+    
+    def import_file(self, file_path: str, dest_folder: str) -> Tuple[str, str]:
+        """
+        导入文件到工程文件夹
+        
+        以硬链接导入的文件与其他工程共享数据，不要原地修改（见模块说明）。
+        
+        Args:
+            file_path: 源文件路径
+            dest_folder: 工程内的目标文件夹
+        
+        Returns:
+            (工程内的文件路径, 方式)，方式为 'reflink' / 'hardlink' / 'copy'，
+            工程中已有相同内容的文件时为 'exists'
+        """
+        dest_path = os.path.join(dest_folder, os.path.basename(file_path))
+        if os.path.abspath(file_path) == os.path.abspath(dest_path):
+            return dest_path, 'exists'
+        
+        digest = self.hash_file(file_path)
+        os.makedirs(dest_folder, exist_ok=True)
+        base, ext = os.path.splitext(os.path.basename(file_path))
+        counter = 1
+        while os.path.exists(dest_path):
+            if self._same_content(dest_path, file_path, digest):
+                return dest_path, 'exists'
+            # 同名但内容不同：自动改名
+            dest_path = os.path.join(dest_folder, f"{base} ({counter}){ext}")
+            counter += 1
+        
+        if self._same_device(dest_folder):
+            with self._objects_lock:
+                _, object_path = self.add(file_path)
+                method = link_or_copy(object_path, dest_path)
+                self._add_ref(dest_path, object_path)
+        else:
+            # 跨文件系统既不能硬链接也不能 reflink，存入存储只会多复制一份
+            shutil.copy2(file_path, dest_path)
+            method = 'copy'
+        stat = os.stat(dest_path)
+        self._remember(os.path.abspath(dest_path), stat, digest)
+        return dest_path, method
+    
+    def _add_ref(self, dest_path: str, object_path: str):
+        """记录工程文件引用的存储文件（reflink 和复制得到的文件无法通过链接数看出引用关系）"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO refs (path, object) VALUES (?, ?)',
+                    (os.path.abspath(dest_path), os.path.abspath(object_path))
+                )
+    
+    def _same_device(self, folder: str) -> bool:
+        """文件夹与存储是否位于同一文件系统"""
+        try:
+            return os.stat(folder).st_dev == os.stat(self.objects_dir).st_dev
+        except OSError:
+            return False
+    
+    def _same_content(self, path: str, source: str, digest: str) -> bool:
+        try:
+            if os.path.samefile(path, source):
+                return True
+            return os.path.getsize(path) == os.path.getsize(source) and self.hash_file(path) == digest
+        except OSError:
+            return False
+    
+    # ========== 清理 ==========
+    
+    def collect_garbage(self, min_age: float = 3600) -> int:
+        """
+        清理不再被引用的存储文件
+        
+        导入时在 refs 表中记录 工程文件 -> 存储文件 的引用，工程文件已不存在的引用先被移除；
+        没有剩余引用且没有其他硬链接（记录引用之前导入的文件）的存储文件才会删除。
+        同时清理中断导入留下的临时文件，以及已不存在的文件的哈希缓存。
+        
+        Args:
+            min_age: 只清理状态变化（ctime）早于该秒数的文件，避免与正在进行的导入冲突
+        
+        Returns:
+            删除的文件数
+        """
+        cutoff = time.time() - min_age
+        removed = 0
+        with self._objects_lock:
+            referenced = self._live_refs()
+            for folder, _, files in os.walk(self.objects_dir):
+                for name in files:
+                    path = os.path.join(folder, name)
+                    try:
+                        stat = os.stat(path)
+                        if name.endswith('.tmp'):
+                            unused = True
+                        else:
+                            unused = os.path.abspath(path) not in referenced and stat.st_nlink <= 1
+                        if stat.st_ctime < cutoff and unused:
+                            os.remove(path)
+                            removed += 1
+                    except OSError:
+                        continue
+        
+        with self._lock:
+            paths = [row[0] for row in self._conn.execute('SELECT path FROM sources')]
+        missing = [(path,) for path in paths if not os.path.exists(path)]
+        if missing:
+            with self._lock:
+                with self._conn:
+                    self._conn.executemany('DELETE FROM sources WHERE path = ?', missing)
+        if removed:
+            print(f"已清理 {removed} 个不再使用的输入文件")
+        return removed
+    
+    def _live_refs(self) -> set:
+        """仍被工程文件引用的存储文件路径（同时移除工程文件已不存在的引用）"""
+        with self._lock:
+            refs = self._conn.execute('SELECT path, object FROM refs').fetchall()
+        live, dead = set(), []
+        for path, obj in refs:
+            if os.path.exists(path):
+                live.add(obj)
+            else:
+                dead.append((path,))
+        if dead:
+            with self._lock:
+                with self._conn:
+                    self._conn.executemany('DELETE FROM refs WHERE path = ?', dead)
+        return live
+    
+    def close(self):
+        """关闭索引数据库"""
+        with self._lock:
+            self._conn.close()
+
+
+_store: Optional[InputStore] = None
+_store_lock = threading.Lock()
+
+
+def get_input_store() -> InputStore:
+    """获取工作区的输入文件存储（全局共用一个实例）"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = InputStore(settings.INPUT_STORE_DIR)
+            # 启动时在后台清理已删除工程留下的存储文件
+            threading.Thread(target=_store.collect_garbage, name='InputStoreGC', daemon=True).start()
+        return _store
@@ -4,9 +4,11 @@
 数据模型定义
 """
 
+import sys
 from enum import Enum
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, fields
 from datetime import datetime
+from operator import attrgetter
 from typing import Optional
 
 
@@ -18,6 +20,22 @@ class TaskStatus(Enum):
     FAILED = "FAILED"
 
 
+def _slotted(cls):
+    """
+    为 dataclass 生成使用 __slots__ 的版本（等同于 Python 3.10 的 dataclass(slots=True)）
+    
+    实例不再带 __dict__，十万级任务常驻内存时减少每个任务的固定开销。
+    """
+    names = tuple(f.name for f in fields(cls))
+    namespace = dict(cls.__dict__)
+    namespace['__slots__'] = names
+    # 默认值已写入生成的 __init__，类属性需要移除以免与 slots 冲突
+    for name in names + ('__dict__', '__weakref__'):
+        namespace.pop(name, None)
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+@_slotted
 @dataclass
 class Task:
     """任务数据模型"""
@@ -37,14 +55,25 @@ class Task:
     error: Optional[str] = None
     error_code: Optional[str] = None
     completed_at: Optional[str] = None
+    duration: Optional[int] = None  # 视频时长（秒）
+    submitted_at: Optional[str] = None  # 提交到服务端的时间
+    elapsed_seconds: Optional[float] = None  # 从提交到成功的耗时（秒）
+    
+    def __post_init__(self):
+        # 模型、分辨率、状态消息等只有少数几种取值，驻留后所有任务共用同一个字符串对象
+        for name in _INTERNED_FIELDS:
+            value = getattr(self, name)
+            if value.__class__ is str:
+                setattr(self, name, sys.intern(value))
+        # 状态统一保存为枚举成员（全局单例，不占用额外内存）
+        if isinstance(self.status, str):
+            self.status = TaskStatus(self.status)
     
     def to_dict(self):
-        """转换为字典"""
-        data = asdict(self)
+        """转换为字典（字段都是不可变值，直接读取，不经过 asdict 的深拷贝）"""
+        data = dict(zip(_TASK_FIELDS, _get_task_fields(self)))
         # 支持字符串和枚举两种类型
-        if isinstance(self.status, str):
-            data['status'] = self.status
-        else:
+        if isinstance(self.status, TaskStatus):
             data['status'] = self.status.value
         return data
     
@@ -59,8 +88,16 @@ class Task:
     
     def is_completed(self):
         """判断任务是否完成"""
-        return self.status in [TaskStatus.SUCCEEDED, TaskStatus.FAILED, 'SUCCEEDED', 'FAILED']
+        status = self.status
+        if status.__class__ is TaskStatus:
+            return status is TaskStatus.SUCCEEDED or status is TaskStatus.FAILED
+        return status == 'SUCCEEDED' or status == 'FAILED'
     
     def is_success(self):
         """判断任务是否成功"""
-        return self.status in [TaskStatus.SUCCEEDED, 'SUCCEEDED']
+        return self.status is TaskStatus.SUCCEEDED or self.status == 'SUCCEEDED'
+
+
+_TASK_FIELDS = Task.__slots__
+_INTERNED_FIELDS = ('model', 'resolution', 'message', 'error_code')
+_get_task_fields = attrgetter(*_TASK_FIELDS)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自适应轮询节奏
+根据同类任务（模型/分辨率/时长）的历史耗时安排查询时间：
+预计完成前稀疏查询，预计完成区间内密集查询，超出预期后指数退避
+"""
+
+from typing import Dict, List, Optional
+
+from config.settings import settings
+
+
+class DurationStats:
+    """某类任务从提交到成功的历史耗时分布（秒）"""
+    
+    # 样本数达到该值才使用历史数据，否则使用先验值
+    MIN_SAMPLES = 3
+    
+    def __init__(self, samples: Optional[List[float]] = None):
+        self.samples = sorted(samples or [])
+    
+    @property
+    def count(self) -> int:
+        """样本数量"""
+        return len(self.samples)
+    
+    def is_reliable(self) -> bool:
+        """样本是否足够"""
+        return self.count >= self.MIN_SAMPLES
+    
+    def mean(self) -> Optional[float]:
+        """平均耗时"""
+        if not self.samples:
+            return None
+        return sum(self.samples) / len(self.samples)
+    
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        百分位耗时（线性插值）
+        
+        Args:
+            q: 0-100 之间的百分位
+        """
+        if not self.samples:
+            return None
+        position = (len(self.samples) - 1) * q / 100.0
+        lower = int(position)
+        upper = min(lower + 1, len(self.samples) - 1)
+        fraction = position - lower
+        return self.samples[lower] + (self.samples[upper] - self.samples[lower]) * fraction
+    
+    def to_dict(self) -> Dict:
+        """转换为字典，供界面显示"""
+        return {
+            'count': self.count,
+            'mean': self.mean(),
+            'p10': self.percentile(10),
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'min': self.samples[0] if self.samples else None,
+            'max': self.samples[-1] if self.samples else None
+        }
+
+
+class PollCadence:
+    """
+    轮询节奏
+    
+    以任务提交后经过的秒数 elapsed 计算下一次查询前的等待时间：
+    - elapsed 早于预计完成区间：等待剩余时间的一半，逐步逼近区间起点
+    - elapsed 位于预计完成区间内：按区间宽度的 1/20 密集查询
+    - elapsed 超过预计完成区间：等待超出时间的一半，即指数退避
+    所有等待时间都限制在 [TASK_POLL_MIN_INTERVAL, TASK_POLL_MAX_INTERVAL] 内。
+    """
+    
+    def __init__(self, kind: str = 'video', stats: Optional[DurationStats] = None):
+        """
+        初始化轮询节奏
+        
+        Args:
+            kind: 任务类型（'video' 或 'image'），决定没有历史数据时的先验值
+            stats: 同类任务的历史耗时分布
+        """
+        self.kind = kind
+        self.stats = stats
+        self.min_interval = settings.TASK_POLL_MIN_INTERVAL
+        self.max_interval = settings.TASK_POLL_MAX_INTERVAL
+        
+        if stats is not None and stats.is_reliable():
+            self.window_start = stats.percentile(10)
+            self.window_end = stats.percentile(90)
+            self.expected = stats.percentile(50)
+            self.timeout = max(settings.TASK_POLL_TIMEOUTS[kind], self.window_end * 3)
+        else:
+            self.expected = settings.TASK_EXPECTED_SECONDS[kind]
+            self.window_start = self.expected * 0.5
+            self.window_end = self.expected * 1.5
+            self.timeout = settings.TASK_POLL_TIMEOUTS[kind]
+        
+        self.dense_interval = max(self.min_interval, (self.window_end - self.window_start) / 20)
+    
+    def next_delay(self, elapsed: float) -> float:
+        """下一次查询前的等待时间（秒）"""
+        if elapsed < self.window_start:
+            delay = (self.window_start - elapsed) / 2
+        elif elapsed <= self.window_end:
+            delay = self.dense_interval
+        else:
+            delay = (elapsed - self.window_end) / 2
+        
+        delay = min(max(delay, self.min_interval), self.max_interval)
+        # 不越过超时时间
+        return max(0.0, min(delay, self.timeout - elapsed))
+    
+    def is_expired(self, elapsed: float) -> bool:
+        """是否已超时"""
+        return elapsed >= self.timeout
+    
+    def eta(self, elapsed: float) -> float:
+        """预计剩余时间（秒），超出预期后为 0"""
+        return max(0.0, self.expected - elapsed)
+    
+    def progress_text(self, elapsed: float) -> str:
+        """进度提示文字"""
+        text = f"已等待 {format_seconds(elapsed)}"
+        remaining = self.eta(elapsed)
+        if remaining > 0:
+            text += f"，预计还需 {format_seconds(remaining)}"
+        return text
+
+
+def format_seconds(seconds: float) -> str:
+    """格式化秒数，如 '45秒'、'3分20秒'"""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}秒"
+    minutes, seconds = divmod(seconds, 60)
+    if seconds == 0:
+        return f"{minutes}分"
+    return f"{minutes}分{seconds}秒"
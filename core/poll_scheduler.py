@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+任务轮询调度器
+集中管理所有进行中任务的状态轮询：
+按下一次轮询时间维护最小堆，由有界线程池执行查询（配置异步客户端时单个查询
+在 asyncio 事件循环中等待，不占用线程），
+轮询间隔按同类任务的历史耗时自适应（见 poll_cadence），
+同时到期的任务较多时改用批量查询接口，
+状态变化统一通过一个信号通道发送回 GUI
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from config.settings import settings
+from .api_client import DashScopeClient
+from .async_api_client import AIOHTTP_AVAILABLE, AsyncDashScopeClient
+from .async_bridge import get_async_bridge
+from .asset_catalog import catalog_asset
+from .models import TaskStatus
+from .poll_cadence import PollCadence
+
+
+class TaskPollScheduler(QObject):
+    """
+    任务轮询调度器
+    
+    无论监控多少个任务，线程数固定为 1 个调度线程 + max_workers 个查询线程。
+    配置异步客户端后，逐个查询在事件循环中并发等待响应，
+    查询线程只负责下载结果和写入任务存储。
+    """
+    
+    # 任务状态变化: task_id, 更新的字段
+    task_updated = pyqtSignal(str, dict)
+    # 任务结束监控（完成、失败或无法继续轮询）: task_id
+    task_finished = pyqtSignal(str)
+    
+    # 在该时间（秒）内到期的任务提前合并到同一轮查询
+    COALESCE_WINDOW = 1.0
+    # 批量查询时间窗口的最大跨度，更早提交的任务逐个查询
+    BULK_WINDOW = timedelta(hours=24)
+    
+    def __init__(self, task_manager, api_client: Optional[DashScopeClient] = None,
+                 max_workers: Optional[int] = None, poll_interval: Optional[float] = None,
+                 async_client: Optional[AsyncDashScopeClient] = None, bridge=None,
+                 parent=None):
+        """
+        初始化调度器
+        
+        Args:
+            task_manager: 任务管理器
+            api_client: API 客户端，默认新建
+            max_workers: 查询线程数上限
+            poll_interval: 固定轮询间隔（秒），默认按历史耗时自适应
+            async_client: 异步 API 客户端，设置后逐个查询在事件循环中执行
+            bridge: 运行异步客户端的事件循环桥接器，默认取全局桥接器
+        """
+        super().__init__(parent)
+        self.task_manager = task_manager
+        self.api_client = api_client or DashScopeClient()
+        self.poll_interval = poll_interval
+        self.async_client = async_client
+        self.bridge = (bridge or get_async_bridge()) if async_client is not None else None
+        
+        self._heap = []  # (deadline, seq, task_id)
+        # task_id -> {'seq', 'output_folder', 'cadence', 'started'}
+        self._entries: Dict[str, Dict] = {}
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._running = True
+        
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.TASK_POLL_WORKERS,
+            thread_name_prefix='TaskPoll'
+        )
+        self._dispatcher = threading.Thread(
+            target=self._dispatch_loop, name='TaskPollScheduler', daemon=True
+        )
+        self._dispatcher.start()
+    
+    # ========== 对外接口 ==========
+    
+    def add_task(self, task_id: str, output_folder: Optional[str] = None,
+                 delay: Optional[float] = None):
+        """
+        开始监控任务
+        
+        Args:
+            task_id: 任务 ID
+            output_folder: 视频下载目录
+            delay: 首次轮询前的等待时间（秒），默认按轮询节奏计算
+        """
+        cadence, started = self._create_cadence(task_id)
+        with self._cond:
+            if task_id in self._entries:
+                return
+            self._entries[task_id] = {
+                'output_folder': output_folder or settings.OUTPUT_FOLDER,
+                'cadence': cadence,
+                'started': started
+            }
+            if delay is None:
+                delay = self._next_delay(self._entries[task_id])
+            self._schedule(task_id, time.monotonic() + delay)
+    
+    def remove_task(self, task_id: str):
+        """停止监控任务"""
+        with self._cond:
+            self._entries.pop(task_id, None)
+    
+    def is_monitoring(self, task_id: str) -> bool:
+        """任务是否正在监控"""
+        with self._cond:
+            return task_id in self._entries
+    
+    def monitored_count(self) -> int:
+        """正在监控的任务数量"""
+        with self._cond:
+            return len(self._entries)
+    
+    def shutdown(self):
+        """停止调度器"""
+        with self._cond:
+            self._running = False
+            self._entries.clear()
+            self._cond.notify_all()
+        self._executor.shutdown(wait=False)
+        if self.async_client is not None:
+            try:
+                self.bridge.run_sync(self.async_client.close(), timeout=1)
+            except Exception as e:
+                print(f"关闭异步客户端失败: {e}")
+    
+    # ========== 调度 ==========
+    
+    def _create_cadence(self, task_id: str):
+        """按同类任务的历史耗时创建轮询节奏，返回 (节奏, 提交时刻的 monotonic 时间)"""
+        task = self.task_manager.get_task(task_id)
+        if task is None:
+            return PollCadence('video'), time.monotonic()
+        stats = self.task_manager.get_duration_stats(task.model, task.resolution, task.duration)
+        started = time.monotonic() - self.task_manager.get_task_elapsed(task)
+        return PollCadence('video', stats), started
+    
+    def _next_delay(self, entry: Dict) -> float:
+        """下一次轮询前的等待时间"""
+        if self.poll_interval is not None:
+            return self.poll_interval
+        cadence = entry['cadence']
+        elapsed = time.monotonic() - entry['started']
+        # 超过预计超时时间后任务仍可能在服务端完成，按最长间隔继续查询，
+        # 否则 next_delay 返回 0 会反复立即查询，耗尽共享的查询配额
+        if cadence.is_expired(elapsed):
+            return cadence.max_interval
+        return cadence.next_delay(elapsed)
+    
+    def _schedule(self, task_id: str, deadline: float):
+        """安排下一次轮询（需持有锁）"""
+        seq = next(self._counter)
+        self._entries[task_id]['seq'] = seq
+        heapq.heappush(self._heap, (deadline, seq, task_id))
+        self._cond.notify()
+    
+    def _reschedule(self, task_id: str):
+        """轮询结束后按节奏重新排队"""
+        with self._cond:
+            entry = self._entries.get(task_id)
+            if entry is not None and self._running:
+                self._schedule(task_id, time.monotonic() + self._next_delay(entry))
+    
+    def _dispatch_loop(self):
+        """调度线程：取出到期任务交给线程池"""
+        while True:
+            with self._cond:
+                due = []
+                while self._running and not due:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    deadline, seq, task_id = self._heap[0]
+                    entry = self._entries.get(task_id)
+                    if entry is None or entry.get('seq') != seq:
+                        # 已移除或已被重新安排，丢弃旧记录
+                        heapq.heappop(self._heap)
+                        continue
+                    wait_time = deadline - time.monotonic()
+                    if wait_time > 0:
+                        self._cond.wait(wait_time)
+                        continue
+                    due = self._pop_due()
+                if not self._running:
+                    return
+            
+            # 同时到期的任务较多时，一次批量查询比逐个查询更省请求
+            try:
+                if len(due) >= settings.TASK_BULK_QUERY_THRESHOLD:
+                    self._executor.submit(self._bulk_poll, due)
+                else:
+                    for task_id, output_folder in due:
+                        self._submit_poll(task_id, output_folder)
+            except RuntimeError:
+                return
+    
+    def _pop_due(self):
+        """取出到期及即将到期的任务（需持有锁），返回 [(task_id, output_folder)]"""
+        horizon = time.monotonic() + self.COALESCE_WINDOW
+        due = []
+        while self._heap and self._heap[0][0] <= horizon:
+            deadline, seq, task_id = heapq.heappop(self._heap)
+            entry = self._entries.get(task_id)
+            if entry is None or entry.get('seq') != seq:
+                continue
+            # 轮询期间不在堆中，避免重复查询
+            entry['seq'] = None
+            due.append((task_id, entry['output_folder']))
+        return due
+    
+    def _finish(self, task_id: str):
+        """结束监控并通知"""
+        with self._cond:
+            self._entries.pop(task_id, None)
+        self.task_finished.emit(task_id)
+    
+    # ========== 查询 ==========
+    
+    def _submit_poll(self, task_id: str, output_folder: str):
+        """提交一次单任务查询"""
+        if self.async_client is not None:
+            self.bridge.submit(self._poll_task_async(task_id, output_folder))
+        else:
+            self._executor.submit(self._poll_task, task_id, output_folder)
+    
+    def _poll_task(self, task_id: str, output_folder: str):
+        """线程池：查询一次任务状态"""
+        try:
+            task = self.task_manager.get_task(task_id)
+            if not task or task.is_completed() or not task.async_task_id:
+                self._finish(task_id)
+                return
+            
+            result = self.api_client.query_task(task.async_task_id)
+            self._apply_result(task_id, task, result['output'], output_folder)
+        
+        except Exception as e:
+            print(f"监控任务 {task_id} 时出错: {e}")
+            self._reschedule(task_id)
+    
+    async def _poll_task_async(self, task_id: str, output_folder: str):
+        """事件循环：查询一次任务状态，等待响应期间不占用线程"""
+        try:
+            task = self.task_manager.get_task(task_id)
+            if not task or task.is_completed() or not task.async_task_id:
+                self._finish(task_id)
+                return
+            
+            result = await self.async_client.query_task(task.async_task_id)
+            # 下载结果和写入任务存储是阻塞操作，交给查询线程池
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                self._executor, self._apply_result, task_id, task, result['output'], output_folder
+            )
+        
+        except Exception as e:
+            print(f"监控任务 {task_id} 时出错: {e}")
+            self._reschedule(task_id)
+    
+    def _apply_result(self, task_id: str, task, task_data: Dict, output_folder: str):
+        """处理查询结果：更新任务、通知界面，并结束监控或安排下一次轮询"""
+        status = task_data['task_status']
+        updates = self._build_updates(task, task_id, task_data, output_folder)
+        
+        # 状态未变化时不写入任务存储，也不通知界面
+        changed = {
+            key: value for key, value in updates.items()
+            if getattr(task, key, None) != value
+        }
+        if changed:
+            # 通知实际写入的字段（包括任务管理器补充的耗时记录）
+            applied = self.task_manager.update_task(task_id, **changed)
+            self.task_updated.emit(task_id, applied or changed)
+        
+        if status in ['SUCCEEDED', 'FAILED']:
+            self._finish(task_id)
+        elif status == 'UNKNOWN':
+            # 任务已过期，无法继续查询
+            self._finish(task_id)
+        else:
+            self._reschedule(task_id)
+    
+    def _bulk_poll(self, due):
+        """线程池：一次批量查询刷新多个任务，列表中查不到的任务再逐个查询"""
+        tasks = {}
+        for task_id, output_folder in due:
+            task = self.task_manager.get_task(task_id)
+            if task and task.async_task_id and not task.is_completed():
+                tasks[task_id] = task
+        
+        try:
+            statuses = self._list_active_statuses(list(tasks.values()))
+        except Exception as e:
+            print(f"批量查询任务失败，改为逐个查询: {e}")
+            statuses = {}
+        
+        changes = self.task_manager.reconcile_statuses(statuses)
+        
+        for task_id, output_folder in due:
+            task = tasks.get(task_id)
+            if task is not None and task.async_task_id in statuses:
+                # 仍在排队或运行中
+                if task_id in changes:
+                    self.task_updated.emit(task_id, changes[task_id])
+                self._reschedule(task_id)
+                continue
+            
+            # 已结束（需要获取结果）、超出时间窗口或批量查询失败：逐个查询
+            try:
+                self._submit_poll(task_id, output_folder)
+            except RuntimeError:
+                return
+    
+    def _list_active_statuses(self, tasks) -> Dict[str, str]:
+        """批量查询排队中和运行中的任务，返回 异步任务 ID -> 状态"""
+        if not tasks:
+            return {}
+        
+        now = datetime.now()
+        earliest = min(
+            now - timedelta(seconds=self.task_manager.get_task_elapsed(task))
+            for task in tasks
+        )
+        # 留出余量，避免本地与服务端时钟差异漏掉任务
+        start_time = max(earliest - timedelta(minutes=5), now - self.BULK_WINDOW)
+        end_time = now + timedelta(minutes=1)
+        
+        statuses = {}
+        for status in ('PENDING', 'RUNNING'):
+            for item in self.api_client.list_tasks(start_time, end_time, status=status):
+                statuses[item['task_id']] = item.get('status', status)
+        return statuses
+    
+    def _build_updates(self, task, task_id: str, task_data: Dict, output_folder: str) -> Dict:
+        """根据查询结果构造任务更新字段"""
+        status = task_data['task_status']
+        message = task_data.get('message', '')
+        updates = {'message': message}
+        if status in [member.value for member in TaskStatus]:
+            updates['status'] = TaskStatus(status)
+        
+        # 如果任务成功
+        if status == 'SUCCEEDED':
+            elapsed = self._server_elapsed(task_data)
+            if elapsed is not None:
+                updates['elapsed_seconds'] = elapsed
+            video_url = task_data.get('video_url')
+            if video_url:
+                # 检查任务是否已经有输出路径（说明已被其他地方下载）
+                if task.output_path and os.path.exists(task.output_path):
+                    # 已经下载过，只更新状态
+                    updates['video_url'] = video_url
+                    updates['completed_at'] = datetime.now().isoformat()
+                else:
+                    # 下载视频到指定输出文件夹
+                    output_path = os.path.join(output_folder, f"{task_id}.mp4")
+                    try:
+                        downloaded_path = self.api_client.download_video(video_url, output_path)
+                        updates['output_path'] = downloaded_path
+                        catalog_asset(downloaded_path, {
+                            'model': task.model, 'resolution': task.resolution,
+                            'prompt': task.prompt, 'negative_prompt': task.negative_prompt,
+                            'task_id': task.async_task_id
+                        })
+                        updates['video_url'] = video_url
+                        updates['completed_at'] = datetime.now().isoformat()
+                    except Exception as e:
+                        print(f"下载视频失败: {e}")
+                        updates['error'] = str(e)
+        
+        elif status == 'FAILED':
+            updates['error'] = message
+            updates['error_code'] = task_data.get('code', 'UnknownError')
+        
+        return updates
+    
+    @staticmethod
+    def _server_elapsed(task_data: Dict) -> Optional[float]:
+        """根据服务端返回的提交/结束时间计算耗时，比本地检测到完成的时间更准确"""
+        try:
+            submit_time = datetime.strptime(task_data['submit_time'], '%Y-%m-%d %H:%M:%S.%f')
+            end_time = datetime.strptime(task_data['end_time'], '%Y-%m-%d %H:%M:%S.%f')
+        except (KeyError, TypeError, ValueError):
+            return None
+        return round((end_time - submit_time).total_seconds(), 1)
+
+
+_scheduler = None
+
+
+def get_poll_scheduler(task_manager) -> TaskPollScheduler:
+    """获取全局轮询调度器（须在 GUI 线程首次调用）"""
+    global _scheduler
+    if _scheduler is None:
+        if AIOHTTP_AVAILABLE:
+            # 逐个查询走异步客户端，下载和批量查询仍由同步客户端完成
+            api_client = DashScopeClient()
+            _scheduler = TaskPollScheduler(
+                task_manager, api_client=api_client,
+                async_client=AsyncDashScopeClient(sync_client=api_client)
+            )
+        else:
+            _scheduler = TaskPollScheduler(task_manager)
+    return _scheduler
@@ -11,6 +11,10 @@ from datetime import datetime
 from typing import Optional, List, Dict
 from PyQt5.QtCore import QSettings, pyqtSignal, QObject
 
+from config.settings import settings
+from .recent_projects import RecentProjectsIndex, RecentProjectsValidator
+from .thumbnail_cache import get_thumbnail_cache
+
 
 class Project:
     """工程类"""
@@ -53,17 +57,18 @@ class Project:
             json.dump({}, f, ensure_ascii=False, indent=2)
     
     def load(self):
-        """加载工程配置"""
+        """加载工程配置（只读，不修改 project.json）"""
         if os.path.exists(self.config_file):
             with open(self.config_file, 'r', encoding='utf-8') as f:
                 self.config = json.load(f)
-            
-            # 更新最后打开时间
-            self.config['last_opened'] = datetime.now().isoformat()
-            self.save_config()
             return True
         return False
     
+    def mark_opened(self):
+        """记录最后打开时间（仅在真正打开工程时调用）"""
+        self.config['last_opened'] = datetime.now().isoformat()
+        self.save_config()
+    
     def save_config(self):
         """保存工程配置"""
         with open(self.config_file, 'w', encoding='utf-8') as f:
@@ -91,11 +96,17 @@ class ProjectManager(QObject):
     # 工程变化信号
     project_changed = pyqtSignal()
     
-    def __init__(self):
-        """初始化工程管理器"""
+    def __init__(self, recent_index_file: Optional[str] = None):
+        """
+        初始化工程管理器
+        
+        Args:
+            recent_index_file: 最近工程索引文件，默认 settings.RECENT_PROJECTS_FILE
+        """
         super().__init__()
         self.current_project: Optional[Project] = None
         self.settings = QSettings('WanX', 'ImageToVideo')
+        self.recent_index = RecentProjectsIndex(recent_index_file or settings.RECENT_PROJECTS_FILE)
         self.recent_projects = self.load_recent_projects()
     
     def create_project(self, name: str, location: str, description: str = '') -> Project:
@@ -130,6 +141,7 @@ class ProjectManager(QObject):
         
         if not project.load():
             raise Exception(f"无效的工程: {project_path}")
+        project.mark_opened()
         
         # 设置为当前工程
         self.current_project = project
@@ -167,19 +179,28 @@ class ProjectManager(QObject):
         self.recent_projects.insert(0, project_path)
         
         # 限制数量
-        self.recent_projects = self.recent_projects[:10]
+        self.recent_projects = self.recent_projects[:RecentProjectsIndex.MAX_PROJECTS]
+        
+        # 更新摘要索引（当前工程的配置已在内存中，不需要再读取）
+        summary = {}
+        if self.current_project and self.current_project.path == project_path:
+            summary = self.current_project.get_info()
+            summary.pop('path')
+        self.recent_index.touch(project_path, **summary)
         
         # 保存
         self.save_recent_projects()
     
     def load_recent_projects(self) -> List[str]:
-        """加载最近工程列表"""
-        recent = self.settings.value('recent_projects', [])
-        if not isinstance(recent, list):
-            recent = []
-        
-        # 过滤不存在的工程
-        return [p for p in recent if os.path.exists(p)]
+        """加载最近工程列表（不检查工程是否存在，由后台校验）"""
+        if not self.recent_index.loaded:
+            # 首次使用索引：从旧版路径列表迁移，摘要留待后台校验补全
+            recent = self.settings.value('recent_projects', [])
+            if not isinstance(recent, list):
+                recent = []
+            for path in reversed(recent[:RecentProjectsIndex.MAX_PROJECTS]):
+                self.recent_index.touch(path)
+        return self.recent_index.paths()
     
     def save_recent_projects(self):
         """保存最近工程列表"""
@@ -187,14 +208,21 @@ class ProjectManager(QObject):
         self.settings.sync()
     
     def get_recent_projects(self) -> List[Dict]:
-        """获取最近工程信息"""
-        projects = []
-        for path in self.recent_projects:
-            try:
-                name = os.path.basename(path)
-                project = Project(name, path)
-                if project.load():
-                    projects.append(project.get_info())
-            except:
-                continue
-        return projects
\ No newline at end of file
+        """获取最近工程摘要（只读取索引，不访问工程目录）"""
+        return self.recent_index.entries()
+    
+    def validate_recent_projects(self, parent=None) -> RecentProjectsValidator:
+        """
+        创建后台校验线程（调用方连接 validated 信号后启动，结果交给 apply_recent_validation）
+        """
+        return RecentProjectsValidator(self.recent_index.entries(include_missing=True),
+                                       get_thumbnail_cache(), parent)
+    
+    def apply_recent_validation(self, summaries: List[Dict]) -> bool:
+        """
+        写入后台校验结果
+        
+        Returns:
+            摘要是否有变化（需要刷新界面）
+        """
+        return self.recent_index.update(summaries)
\ No newline at end of file
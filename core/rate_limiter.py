@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+请求限流与重试
+按端点和模型维护令牌桶，平滑批量请求，避免触发服务端 QPS 限制；
+遇到限流（429 / Throttling）或临时性服务端错误时，
+按带抖动的指数退避重试，并优先遵循服务端返回的 Retry-After
+"""
+
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from config.settings import settings
+
+
+# 可重试的 HTTP 状态码
+THROTTLE_STATUS_CODES = {429}
+TRANSIENT_STATUS_CODES = {500, 502, 503, 504}
+# 提交类请求（POST）在 500 时可能已被服务端受理，重试会产生重复任务
+NON_IDEMPOTENT_SAFE_CODES = {429, 502, 503, 504}
+
+
+class TokenBucket:
+    """令牌桶（线程安全）"""
+    
+    def __init__(self, rate: float, capacity: float):
+        """
+        初始化令牌桶
+        
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 桶容量（允许的突发请求数）
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self, now: float):
+        """按经过的时间补充令牌（需持有锁）"""
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def reserve(self) -> float:
+        """
+        预占一个令牌
+        
+        Returns:
+            需要等待的秒数（令牌不足时提前透支，等待后即可使用）
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+    
+    def cancel(self):
+        """归还一个预占的令牌"""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + 1)
+
+
+class RequestStats:
+    """限流与重试计数（线程安全）"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        """清空计数"""
+        with self._lock:
+            self.delayed = 0     # 被本地令牌桶延后发送的请求
+            self.throttled = 0   # 服务端返回限流的请求
+            self.retried = 0     # 重试次数
+            self.dropped = 0     # 放弃的请求（重试耗尽或等待超时）
+    
+    def record(self, name: str):
+        """计数加一"""
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+    
+    def snapshot(self) -> Dict:
+        """获取计数快照"""
+        with self._lock:
+            return {
+                'delayed': self.delayed,
+                'throttled': self.throttled,
+                'retried': self.retried,
+                'dropped': self.dropped
+            }
+
+
+class RateLimiter:
+    """
+    按端点和模型限流
+    
+    每个请求需同时从端点令牌桶和（如指定）模型令牌桶中各取一个令牌。
+    """
+    
+    def __init__(self, endpoint_limits: Optional[Dict[str, Tuple[float, float]]] = None,
+                 model_limit: Optional[Tuple[float, float]] = None,
+                 max_wait: Optional[float] = None):
+        """
+        初始化限流器
+        
+        Args:
+            endpoint_limits: 端点类型 -> (每秒请求数, 突发容量)，未配置的端点不限流
+            model_limit: 每个模型的 (每秒提交数, 突发容量)
+            max_wait: 单个请求最长排队时间（秒），超过则放弃
+        """
+        self.endpoint_limits = endpoint_limits if endpoint_limits is not None else settings.API_RATE_LIMITS
+        self.model_limit = model_limit if model_limit is not None else settings.API_MODEL_RATE_LIMIT
+        self.max_wait = max_wait if max_wait is not None else settings.API_RATE_MAX_WAIT
+        self.stats = RequestStats()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+    
+    def _get_bucket(self, key: str, limit: Tuple[float, float]) -> TokenBucket:
+        """获取（必要时创建）令牌桶"""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(*limit)
+                self._buckets[key] = bucket
+            return bucket
+    
+    def reserve(self, endpoint: str, model: Optional[str] = None) -> Optional[float]:
+        """
+        预占发送许可，不阻塞（异步客户端用 asyncio.sleep 等待返回的时间）
+        
+        Args:
+            endpoint: 端点类型
+            model: 模型名称（仅提交类请求需要）
+        
+        Returns:
+            发送前需要等待的秒数；排队时间超过 max_wait 时返回 None
+        """
+        buckets = []
+        if endpoint in self.endpoint_limits:
+            buckets.append(self._get_bucket(f'endpoint:{endpoint}', self.endpoint_limits[endpoint]))
+        if model and self.model_limit:
+            buckets.append(self._get_bucket(f'model:{model}', self.model_limit))
+        
+        waits = [bucket.reserve() for bucket in buckets]
+        wait = max(waits, default=0.0)
+        if wait > self.max_wait:
+            for bucket in buckets:
+                bucket.cancel()
+            self.stats.record('dropped')
+            return None
+        if wait > 0:
+            self.stats.record('delayed')
+        return wait
+    
+    def acquire(self, endpoint: str, model: Optional[str] = None) -> bool:
+        """
+        获取发送许可，必要时阻塞等待
+        
+        Args:
+            endpoint: 端点类型
+            model: 模型名称（仅提交类请求需要）
+        
+        Returns:
+            是否获得许可；排队时间超过 max_wait 时返回 False
+        """
+        wait = self.reserve(endpoint, model)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+
+class RetryPolicy:
+    """带抖动的指数退避重试策略"""
+    
+    def __init__(self, max_retries: Optional[int] = None, base_delay: Optional[float] = None,
+                 max_delay: Optional[float] = None):
+        self.max_retries = max_retries if max_retries is not None else settings.API_MAX_RETRIES
+        self.base_delay = base_delay if base_delay is not None else settings.API_RETRY_BASE_DELAY
+        self.max_delay = max_delay if max_delay is not None else settings.API_RETRY_MAX_DELAY
+    
+    def get_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        第 attempt 次重试前的等待时间（full jitter）
+        
+        Args:
+            attempt: 重试序号，从 0 开始
+            retry_after: 服务端要求的最短等待时间
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+    
+    @staticmethod
+    def is_throttled(status_code: int, error_code: str = '') -> bool:
+        """是否为限流响应"""
+        return status_code in THROTTLE_STATUS_CODES or error_code.startswith('Throttling')
+    
+    @staticmethod
+    def is_retryable(method: str, status_code: int, error_code: str = '') -> bool:
+        """响应是否可以重试"""
+        if RetryPolicy.is_throttled(status_code, error_code):
+            return True
+        if method.upper() == 'GET':
+            return status_code in TRANSIENT_STATUS_CODES
+        return status_code in NON_IDEMPOTENT_SAFE_CODES
+    
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """解析 Retry-After 头（只支持秒数格式）"""
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return None
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """获取全局共享的限流器"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+最近工程索引
+缓存最近打开的工程摘要（名称、描述、时间、素材数量、封面缩略图），
+欢迎页和打开工程对话框只读取这个索引，不访问各个工程目录（可能位于较慢的网络磁盘）。
+工程是否仍然存在、素材数量和封面由后台线程校验后再更新。
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from .thumbnail_cache import ThumbnailCache
+
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv')
+
+# 封面缩略图尺寸
+COVER_SIZE = 96
+
+
+class RecentProjectsIndex:
+    """最近工程摘要索引（线程安全）"""
+    
+    MAX_PROJECTS = 10
+    
+    def __init__(self, index_file: str):
+        """
+        Args:
+            index_file: 索引文件路径（JSON，按最近打开排序的摘要列表）
+        """
+        self.index_file = index_file
+        self._lock = threading.Lock()
+        self._entries: List[Dict] = []
+        self.loaded = False  # 索引文件是否已存在（否则需要从旧版列表迁移）
+        try:
+            if os.path.exists(index_file):
+                with open(index_file, 'r', encoding='utf-8') as f:
+                    self._entries = [entry for entry in json.load(f) if entry.get('path')]
+                self.loaded = True
+        except Exception as e:
+            print(f"加载最近工程索引失败: {e}")
+    
+    def entries(self, include_missing: bool = False) -> List[Dict]:
+        """
+        最近工程摘要（从新到旧）
+        
+        Args:
+            include_missing: 是否包含上次校验时不存在的工程
+        """
+        with self._lock:
+            return [dict(entry) for entry in self._entries
+                    if include_missing or not entry.get('missing')]
+    
+    def paths(self) -> List[str]:
+        """最近工程路径（包含暂时不可用的工程）"""
+        with self._lock:
+            return [entry['path'] for entry in self._entries]
+    
+    def touch(self, path: str, **summary):
+        """
+        将工程移到最前面并更新摘要（打开或创建工程时调用）
+        
+        Args:
+            path: 工程路径
+            summary: 要更新的摘要字段
+        """
+        with self._lock:
+            entry = next((e for e in self._entries if e['path'] == path), None) or {
+                'path': path, 'name': os.path.basename(path)
+            }
+            entry.update(summary, missing=False)
+            self._entries = [entry] + [e for e in self._entries if e['path'] != path]
+            self._entries = self._entries[:self.MAX_PROJECTS]
+            self._save()
+    
+    def update(self, summaries: Iterable[Dict]) -> bool:
+        """
+        写入后台校验的结果（只更新仍在列表中的工程）
+        
+        Returns:
+            是否有变化
+        """
+        changed = False
+        with self._lock:
+            positions = {entry['path']: i for i, entry in enumerate(self._entries)}
+            for summary in summaries:
+                position = positions.get(summary.get('path'))
+                if position is None:
+                    continue
+                entry = dict(self._entries[position], **summary)
+                if entry != self._entries[position]:
+                    self._entries[position] = entry
+                    changed = True
+            if changed:
+                self._save()
+        return changed
+    
+    def remove(self, path: str):
+        """从最近工程中移除"""
+        with self._lock:
+            entries = [entry for entry in self._entries if entry['path'] != path]
+            if len(entries) != len(self._entries):
+                self._entries = entries
+                self._save()
+    
+    def _save(self):
+        """保存索引（需持有锁）"""
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.index_file)), exist_ok=True)
+            tmp_path = self.index_file + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.index_file)
+        except Exception as e:
+            print(f"保存最近工程索引失败: {e}")
+
+
+def summarize_project(path: str, thumbnails: Optional[ThumbnailCache] = None) -> Dict:
+    """
+    读取工程摘要（只读，不修改 project.json）
+    
+    Args:
+        path: 工程路径
+        thumbnails: 缩略图缓存，用最新的图片生成封面；为 None 时不生成封面
+    
+    Returns:
+        摘要字典；工程不存在时只包含 path 和 missing=True
+    """
+    config_file = os.path.join(path, 'project.json')
+    try:
+        with open(config_file, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        return {'path': path, 'missing': True}
+    
+    summary = {
+        'path': path,
+        'name': os.path.basename(path),
+        'description': config.get('description', ''),
+        'created_at': config.get('created_at', ''),
+        'last_opened': config.get('last_opened', ''),
+        'missing': False
+    }
+    
+    newest_image = None
+    newest_mtime = 0.0
+    counts = {}
+    for key, folder, extensions in (('image_count', 'pictures', IMAGE_EXTENSIONS),
+                                    ('video_count', 'videos', VIDEO_EXTENSIONS)):
+        count = 0
+        try:
+            with os.scandir(os.path.join(path, folder)) as it:
+                for entry in it:
+                    if not entry.name.lower().endswith(extensions) or not entry.is_file():
+                        continue
+                    count += 1
+                    if folder == 'pictures':
+                        mtime = entry.stat().st_mtime
+                        if mtime > newest_mtime:
+                            newest_image, newest_mtime = entry.path, mtime
+        except OSError:
+            pass
+        counts[key] = count
+    summary.update(counts)
+    
+    summary['cover'] = ''
+    if thumbnails is not None and newest_image:
+        # 最新图片未变化时直接命中缓存
+        summary['cover'] = thumbnails.thumbnail_path(newest_image, (COVER_SIZE, COVER_SIZE)) or ''
+    return summary
+
+
+class RecentProjectsValidator(QThread):
+    """在后台校验最近工程并刷新摘要"""
+    
+    # 校验结果: 摘要列表
+    validated = pyqtSignal(list)
+    
+    def __init__(self, entries: List[Dict], thumbnails: Optional[ThumbnailCache] = None, parent=None):
+        """
+        Args:
+            entries: 索引中的摘要
+            thumbnails: 生成封面使用的缩略图缓存
+        """
+        super().__init__(parent)
+        self.entries = entries
+        self.thumbnails = thumbnails
+        self._cancelled = False
+    
+    def cancel(self):
+        """取消校验"""
+        self._cancelled = True
+    
+    def run(self):
+        summaries = []
+        for entry in self.entries:
+            if self._cancelled:
+                return
+            try:
+                summaries.append(summarize_project(entry['path'], self.thumbnails))
+            except Exception as e:
+                print(f"校验工程 {entry['path']} 失败: {e}")
+        if not self._cancelled:
+            self.validated.emit(summaries)
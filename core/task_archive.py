@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+任务归档
+已结束的旧任务按创建月份追加写入 gzip 压缩的 JSON Lines 文件
+（tasks_archive/2025-01.jsonl.gz），只追加不修改，
+按日期范围查询时只读取相关月份的文件
+"""
+
+import gzip
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .models import Task
+
+
+def archive_dir_for(tasks_file: str) -> str:
+    """任务文件对应的归档目录（tasks.json -> tasks_archive/）"""
+    return os.path.splitext(tasks_file)[0] + '_archive'
+
+
+def _month_of(created_at: str) -> str:
+    """创建时间所属月份（YYYY-MM），无法解析时归入 unknown"""
+    try:
+        return datetime.fromisoformat(created_at).strftime('%Y-%m')
+    except (TypeError, ValueError):
+        return 'unknown'
+
+
+class TaskArchive:
+    """压缩的只追加任务归档（线程安全）"""
+    
+    SUFFIX = '.jsonl.gz'
+    
+    def __init__(self, archive_dir: str):
+        """
+        Args:
+            archive_dir: 归档目录
+        """
+        self.archive_dir = archive_dir
+        self._lock = threading.Lock()
+        # 月份列表缓存，写入新月份的文件时失效（任务列表定时刷新时不必每次列目录）
+        self._months: Optional[List[str]] = None
+    
+    def _segment_path(self, month: str) -> str:
+        return os.path.join(self.archive_dir, month + self.SUFFIX)
+    
+    def months(self) -> List[str]:
+        """已有归档的月份（从新到旧，unknown 排在最后）"""
+        with self._lock:
+            if self._months is None:
+                self._months = self._list_months()
+            return list(self._months)
+    
+    def _list_months(self) -> List[str]:
+        """列出归档目录中的月份文件"""
+        if not os.path.isdir(self.archive_dir):
+            return []
+        months = [name[:-len(self.SUFFIX)] for name in os.listdir(self.archive_dir)
+                  if name.endswith(self.SUFFIX)]
+        return sorted(months, key=lambda month: (month != 'unknown', month), reverse=True)
+    
+    # ========== 写入 ==========
+    
+    def append(self, tasks: Iterable[Task]) -> int:
+        """
+        追加任务到对应月份的归档文件
+        
+        每次追加写入一个新的 gzip 成员，已有内容不会被重写。
+        
+        Returns:
+            追加的任务数量
+        """
+        segments: Dict[str, List[str]] = {}
+        for task in tasks:
+            line = json.dumps(task.to_dict(), ensure_ascii=False)
+            segments.setdefault(_month_of(task.created_at), []).append(line)
+        if not segments:
+            return 0
+        
+        with self._lock:
+            os.makedirs(self.archive_dir, exist_ok=True)
+            for month, lines in segments.items():
+                with gzip.open(self._segment_path(month), 'at', encoding='utf-8') as f:
+                    f.write('\n'.join(lines) + '\n')
+            if self._months is not None and not set(segments) <= set(self._months):
+                self._months = None
+        return sum(len(lines) for lines in segments.values())
+    
+    # ========== 查询 ==========
+    
+    def _read_segment(self, month: str) -> List[Task]:
+        """读取一个月份的归档（同一任务重复归档时保留最后一条）"""
+        tasks: Dict[str, Task] = {}
+        try:
+            with gzip.open(self._segment_path(month), 'rt', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        task = Task.from_dict(json.loads(line))
+                    except Exception as e:
+                        print(f"跳过无法解析的归档记录: {e}")
+                        continue
+                    tasks[task.id] = task
+        except (OSError, EOFError) as e:
+            # 写入中断时文件末尾可能不完整，已读出的记录仍然有效
+            print(f"读取归档 {month} 失败: {e}")
+        return list(tasks.values())
+    
+    def iter_tasks(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                   model: Optional[str] = None) -> Iterator[Task]:
+        """
+        按创建时间从新到旧遍历归档任务
+        
+        Args:
+            start: 创建时间下限（含）
+            end: 创建时间上限（不含）
+            model: 只返回该模型的任务
+        """
+        start_month = start.strftime('%Y-%m') if start else None
+        end_month = end.strftime('%Y-%m') if end else None
+        start_text = start.isoformat() if start else None
+        end_text = end.isoformat() if end else None
+        
+        for month in self.months():
+            if month != 'unknown':
+                if start_month and month < start_month:
+                    continue
+                if end_month and month > end_month:
+                    continue
+            elif start or end:
+                continue
+            
+            tasks = self._read_segment(month)
+            tasks.sort(key=lambda t: t.created_at or '', reverse=True)
+            for task in tasks:
+                if model and task.model != model:
+                    continue
+                if start_text and (task.created_at or '') < start_text:
+                    continue
+                if end_text and (task.created_at or '') >= end_text:
+                    continue
+                yield task
+    
+    def query(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+              model: Optional[str] = None, offset: int = 0,
+              limit: Optional[int] = None) -> List[Task]:
+        """
+        分页查询归档任务（按创建时间从新到旧）
+        
+        Returns:
+            第 offset 条起最多 limit 个任务
+        """
+        result = []
+        for index, task in enumerate(self.iter_tasks(start, end, model)):
+            if index < offset:
+                continue
+            if limit is not None and len(result) >= limit:
+                break
+            result.append(task)
+        return result
+    
+    def count(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+              model: Optional[str] = None) -> int:
+        """符合条件的归档任务数量"""
+        return sum(1 for _ in self.iter_tasks(start, end, model))
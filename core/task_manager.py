@@ -5,27 +5,216 @@
 负责任务的创建、存储、查询和状态更新
 """
 
-import json
+import atexit
 import os
+import threading
 import uuid
-from typing import List, Optional
-from datetime import datetime
+import weakref
+from dataclasses import replace
+from typing import Callable, Dict, List, Optional
+from datetime import datetime, timedelta
 from .models import Task, TaskStatus
+from .poll_cadence import DurationStats
+from .task_archive import TaskArchive, archive_dir_for
+from .task_store import DurationStore, InFlightIndex, TaskStore, WriteBehindFlusher, db_path_for
 from config.settings import settings
 
 
 class TaskManager:
-    """任务管理器"""
+    """
+    任务管理器（线程安全）
     
-    def __init__(self):
-        """初始化任务管理器"""
-        self.tasks = {}
+    任务保存在 tasks_file 旁的 SQLite 数据库中（tasks.json -> tasks.db），
+    旧版 tasks.json 在首次打开时自动导入。
+    
+    - 读取不加锁：tasks 字典和任务对象都写时复制，更新任务时用 dataclasses.replace
+      生成新对象并整体替换字典，已取得的任务对象和字典不会再被修改，
+      界面线程遍历时不会遇到字典在迭代中被修改或读到更新了一半的任务
+    - 写入合并：更新只标记任务，由后台线程每 TASK_FLUSH_INTERVAL 秒
+      把期间所有变化的任务在一个事务中写入
+    - 变化通知：subscribe() 注册的回调只收到实际变化的字段
+    - 按工程分区：内存中只保留当前 tasks_file 的任务，且首次访问时才加载；
+      其他工程的在途任务记录在一个小索引文件中，切换工程后仍可按 ID
+      查询和更新（直接写入所属工程的数据库）
+    - 归档：创建超过 TASK_ARCHIVE_DAYS 天的已结束任务在加载时移入压缩归档，
+      列表通过 query_tasks() 在数据库中按创建时间分页查询，翻到末尾时才读取归档
+    - 耗时样本：成功任务的耗时记入全局的耗时数据库，按模型统计，
+      不随工程切换或归档而丢失
+    """
+    
+    def __init__(self, index_file: Optional[str] = None, durations_file: Optional[str] = None):
+        """
+        初始化任务管理器（不加载任何任务，首次访问 tasks 时才读取数据库）
+        
+        Args:
+            index_file: 在途任务索引文件，默认 settings.TASKS_INDEX_FILE
+            durations_file: 耗时样本数据库，默认放在在途任务索引所在的目录
+        """
+        self._lock = threading.RLock()
+        # 保证同一时刻只有一次写入，且写入期间不会切换数据库
+        self._flush_lock = threading.Lock()
+        self._dirty = set()
+        self._listeners: List[Callable[[str, Dict], None]] = []
+        self._store = None
+        self._archive = None
+        self._tasks_file = None
+        self._tasks: Dict[str, Task] = {}
+        self._loaded = False
+        # 其他工程的在途任务：task_id -> (tasks_file, Task)，以及对应的数据库
+        self._foreign: Dict[str, tuple] = {}
+        self._foreign_stores: Dict[str, TaskStore] = {}
+        index_file = index_file or settings.TASKS_INDEX_FILE
+        self._index = InFlightIndex(index_file)
+        self._durations = DurationStore(durations_file or os.path.join(
+            os.path.dirname(os.path.abspath(index_file)),
+            os.path.basename(settings.TASK_DURATIONS_FILE)
+        ))
+        # 模型 -> 最近的耗时样本 [(分辨率, 时长, 耗时)]，记录新样本时失效
+        self._duration_cache: Dict[str, list] = {}
         self.tasks_file = settings.TASKS_FILE
-        self.load_tasks()
+        self._flusher = WriteBehindFlusher(self.flush, settings.TASK_FLUSH_INTERVAL)
+        # 退出时写入尚未保存的更新
+        manager_ref = weakref.ref(self)
+        atexit.register(lambda: manager_ref() and manager_ref().flush())
+    
+    @property
+    def tasks(self) -> Dict[str, Task]:
+        """当前分区的任务（首次访问时加载）"""
+        self._ensure_loaded()
+        return self._tasks
+    
+    @tasks.setter
+    def tasks(self, tasks: Dict[str, Task]):
+        with self._lock:
+            self._tasks = tasks
+            self._loaded = True
+    
+    @property
+    def tasks_file(self) -> str:
+        """当前任务文件路径（切换工程时修改）"""
+        return self._tasks_file
+    
+    @tasks_file.setter
+    def tasks_file(self, path: str):
+        if path == self._tasks_file:
+            return
+        # 写入和切换在同一个 _flush_lock 临界区内完成：后台写入不会把原分区的任务
+        # 写进新数据库，切换前最后一刻标记的更新也保存到原来的数据库
+        with self._flush_lock:
+            with self._lock:
+                old_file = self._tasks_file
+                tasks = [self._tasks[task_id] for task_id in self._dirty if task_id in self._tasks]
+                self._dirty = set()
+                self._tasks_file = path
+                self._tasks = {}
+                self._loaded = False
+            if old_file is not None and tasks:
+                try:
+                    self._get_store(old_file).save_many(tasks)
+                except Exception as e:
+                    print(f"保存任务失败: {e}")
+    
+    # ========== 变化通知 ==========
+    
+    def subscribe(self, callback: Callable[[str, Dict], None]):
+        """
+        订阅任务变化
+        
+        callback(task_id, changes) 在修改任务的线程中调用，
+        changes 只包含实际变化的字段（新建任务时为完整字段）；
+        界面需要自行切换到主线程（如通过 Qt 信号）。
+        """
+        with self._lock:
+            if callback not in self._listeners:
+                self._listeners = self._listeners + [callback]
+    
+    def unsubscribe(self, callback: Callable[[str, Dict], None]):
+        """取消订阅"""
+        with self._lock:
+            self._listeners = [cb for cb in self._listeners if cb != callback]
+    
+    def _notify(self, changes: Dict[str, Dict]):
+        """通知订阅者（不持有锁）"""
+        for task_id, fields in changes.items():
+            for callback in self._listeners:
+                try:
+                    callback(task_id, fields)
+                except Exception as e:
+                    print(f"任务变化通知失败: {e}")
+    
+    # ========== 存储 ==========
+    
+    @staticmethod
+    def _project_for(tasks_file: str) -> Optional[str]:
+        """工程内的任务记录所属工程路径，全局任务不记录"""
+        if os.path.abspath(tasks_file) == os.path.abspath(settings.TASKS_FILE):
+            return None
+        return os.path.dirname(os.path.abspath(tasks_file))
+    
+    def _get_store(self, tasks_file: Optional[str] = None) -> TaskStore:
+        """获取 tasks_file（默认当前任务文件）对应的任务存储（切换工程后自动重新打开，需持有 _flush_lock）"""
+        tasks_file = tasks_file or self.tasks_file
+        db_path = db_path_for(tasks_file)
+        if self._store is None or self._store.db_path != db_path:
+            if self._store is not None:
+                self._store.close()
+            self._store = TaskStore(db_path, self._project_for(tasks_file))
+            self._store.migrate_from_json(tasks_file)
+        return self._store
+    
+    def _get_foreign_store(self, tasks_file: str) -> Optional[TaskStore]:
+        """获取其他工程的任务存储（数据库不存在时返回 None，需持有 _lock）"""
+        db_path = db_path_for(tasks_file)
+        store = self._foreign_stores.get(db_path)
+        if store is None:
+            if not os.path.exists(db_path):
+                return None
+            store = TaskStore(db_path, self._project_for(tasks_file))
+            self._foreign_stores[db_path] = store
+        return store
+    
+    def _get_foreign_task(self, task_id: str) -> Optional[Task]:
+        """按在途任务索引加载其他工程的单个任务"""
+        entry = self._index.get(task_id)
+        if not entry or entry['tasks_file'] == self.tasks_file:
+            return None
+        with self._lock:
+            cached = self._foreign.get(task_id)
+            if cached is not None:
+                return cached[1]
+            try:
+                store = self._get_foreign_store(entry['tasks_file'])
+                task = store.load(task_id) if store else None
+            except Exception as e:
+                print(f"加载任务 {task_id} 失败: {e}")
+                return None
+            if task is None:
+                # 工程已被删除或移动
+                self._index.remove([task_id])
+                return None
+            self._foreign[task_id] = (entry['tasks_file'], task)
+            return task
+    
+    def _update_index(self, task: Task, tasks_file: str):
+        """已提交未结束的任务记入在途索引，结束后移除（需持有 _lock）"""
+        if task.async_task_id and not task.is_completed():
+            self._index.add(task.id, tasks_file, task.async_task_id)
+        else:
+            self._index.remove([task.id])
+            self._foreign.pop(task.id, None)
+    
+    def get_inflight_entries(self) -> Dict[str, Dict]:
+        """
+        所有工程的在途任务（启动时据此恢复监控，无需加载任何工程）
+        
+        Returns:
+            task_id -> {'tasks_file', 'async_task_id'}
+        """
+        return self._index.entries()
     
     def create_task(self, prompt: str, model: str, resolution: str,
                    negative_prompt: str = "", prompt_extend: bool = True,
-                   input_file: str = "") -> Task:
+                   input_file: str = "", duration: Optional[int] = None) -> Task:
         """
         创建新任务
         
@@ -36,7 +225,8 @@ class TaskManager:
             negative_prompt: 反向提示词
             prompt_extend: 是否启用智能改写
             input_file: 输入文件路径
-            
+            duration: 视频时长（秒）
+        
         Returns:
             创建的任务对象
         """
@@ -49,63 +239,456 @@ class TaskManager:
             negative_prompt=negative_prompt,
             prompt_extend=prompt_extend,
             input_file=input_file,
+            duration=duration,
             created_at=datetime.now().isoformat()
         )
         
-        self.tasks[task_id] = task
-        self.save_tasks()
+        self._ensure_loaded()
+        with self._lock:
+            tasks = dict(self._tasks)
+            tasks[task_id] = task
+            self._tasks = tasks
+            self._mark_dirty([task_id])
+        self._notify({task_id: task.to_dict()})
         return task
     
     def get_task(self, task_id: str) -> Optional[Task]:
-        """获取任务"""
-        return self.tasks.get(task_id)
+        """获取任务（当前分区没有时查找其他工程的在途任务）"""
+        task = self.tasks.get(task_id)
+        if task is None:
+            task = self._get_foreign_task(task_id)
+        return task
     
     def get_all_tasks(self) -> List[Task]:
-        """获取所有任务"""
+        """获取所有任务（不含归档）"""
         return list(self.tasks.values())
     
-    def update_task(self, task_id: str, **kwargs):
+    def get_archive(self) -> TaskArchive:
+        """当前工程的任务归档（切换工程前复用同一实例，月份列表只在归档写入后重新读取）"""
+        archive_dir = archive_dir_for(self.tasks_file)
+        archive = self._archive
+        if archive is None or archive.archive_dir != archive_dir:
+            archive = self._archive = TaskArchive(archive_dir)
+        return archive
+    
+    def query_tasks(self, offset: int = 0, limit: Optional[int] = None,
+                    status: Optional[str] = None, model: Optional[str] = None,
+                    start: Optional[datetime] = None, end: Optional[datetime] = None,
+                    include_archive: bool = False) -> List[Task]:
+        """
+        分页查询任务（按创建时间从新到旧，未归档的任务在前）
+        
+        Args:
+            offset: 跳过的任务数
+            limit: 最多返回的任务数，None 表示不限
+            status: 只返回该状态的任务（如 'RUNNING'）
+            model: 只返回该模型的任务
+            start: 创建时间下限（含）
+            end: 创建时间上限（不含）
+            include_archive: 是否继续查询归档（只读取到本页填满为止）
+        
+        Returns:
+            本页任务
+        """
+        tasks, ids = self._query_recent(offset, limit, status, model, start, end)
+        page = [tasks[task_id] for task_id in ids if task_id in tasks]
+        if include_archive and (limit is None or len(page) < limit):
+            if ids or not offset:
+                archived_offset = 0
+            else:
+                archived_offset = max(0, offset - self._count_recent(status, model, start, end))
+            for index, task in enumerate(self._iter_archive(status, model, start, end)):
+                if limit is not None and len(page) >= limit:
+                    break
+                if index >= archived_offset:
+                    page.append(task)
+        return page
+    
+    def count_tasks(self, status: Optional[str] = None, model: Optional[str] = None,
+                    start: Optional[datetime] = None, end: Optional[datetime] = None,
+                    include_archive: bool = False) -> int:
+        """符合条件的任务数量（参数同 query_tasks）"""
+        count = self._count_recent(status, model, start, end)
+        if include_archive:
+            count += sum(1 for _ in self._iter_archive(status, model, start, end))
+        return count
+    
+    def _query_recent(self, offset, limit, status, model, start, end):
+        """
+        在数据库中分页查询未归档的任务（先写入待保存的更新，保证筛选和排序使用最新状态）
+        
+        Returns:
+            (当前分区的任务字典, 本页任务 ID)
+        """
+        self._ensure_loaded()
+        with self._flush_lock:
+            self._flush_locked()
+            ids = self._get_store().query_ids(
+                offset, limit, status, model,
+                start.isoformat() if start else None, end.isoformat() if end else None
+            )
+            return self._tasks, ids
+    
+    def _count_recent(self, status, model, start, end) -> int:
+        """未归档的任务数量"""
+        self._ensure_loaded()
+        with self._flush_lock:
+            self._flush_locked()
+            return self._get_store().count(
+                status, model, start.isoformat() if start else None, end.isoformat() if end else None
+            )
+    
+    def _iter_archive(self, status, model, start, end):
+        """按条件遍历归档任务（归档中只有已结束的任务）"""
+        for task in self.get_archive().iter_tasks(start, end, model):
+            if not status or _status_value(task.status) == status:
+                yield task
+    
+    def update_task(self, task_id: str, **kwargs) -> Dict:
         """
         更新任务信息
         
         Args:
             task_id: 任务 ID
             **kwargs: 要更新的字段
+        
+        Returns:
+            实际变化的字段（值未变化的字段不写入也不通知）
         """
-        task = self.tasks.get(task_id)
-        if task:
-            for key, value in kwargs.items():
-                if hasattr(task, key):
-                    setattr(task, key, value)
-            self.save_tasks()
+        self._ensure_loaded()
+        with self._lock:
+            tasks_file = self.tasks_file
+            task = self._tasks.get(task_id)
+            foreign = task is None
+            if foreign:
+                task = self._get_foreign_task(task_id)
+                if task is None:
+                    return {}
+                tasks_file = self._foreign[task_id][0]
+            # 状态统一保存为枚举，字符串状态与已有状态相同时不算变化
+            if isinstance(kwargs.get('status'), str) and kwargs['status'] in TaskStatus.__members__:
+                kwargs['status'] = TaskStatus(kwargs['status'])
+            changes = {
+                key: value for key, value in kwargs.items()
+                if hasattr(task, key) and getattr(task, key) != value
+            }
+            if changes:
+                task = replace(task, **changes)
+                timing = self._timing_changes(task, kwargs)
+                if timing:
+                    task = replace(task, **timing)
+                    changes.update(timing)
+                self._swap_tasks({task_id: task}, tasks_file)
+                if foreign:
+                    self._save_foreign(task, tasks_file)
+                else:
+                    self._mark_dirty([task_id])
+                if 'status' in changes or 'async_task_id' in changes:
+                    self._update_index(task, tasks_file)
+        if 'elapsed_seconds' in changes:
+            self._record_durations([task])
+        if changes:
+            self._notify({task_id: changes})
+        return changes
     
-    def save_tasks(self):
-        """保存任务到文件"""
+    def _swap_tasks(self, tasks: Dict[str, Task], tasks_file: str):
+        """用更新后的任务对象替换原对象（需持有 _lock）"""
+        if tasks_file == self.tasks_file:
+            current = dict(self._tasks)
+            current.update(tasks)
+            self._tasks = current
+        else:
+            for task_id, task in tasks.items():
+                self._foreign[task_id] = (tasks_file, task)
+    
+    def _save_foreign(self, task: Task, tasks_file: str):
+        """其他工程的任务更新很少，直接写入所属数据库（需持有 _lock）"""
         try:
-            serializable_tasks = {
-                task_id: task.to_dict() 
-                for task_id, task in self.tasks.items()
-            }
-            with open(self.tasks_file, 'w', encoding='utf-8') as f:
-                json.dump(serializable_tasks, f, ensure_ascii=False, indent=2)
+            self._get_foreign_store(tasks_file).save(task)
+        except Exception as e:
+            print(f"保存任务 {task.id} 失败: {e}")
+    
+    def reconcile_statuses(self, statuses: dict) -> dict:
+        """
+        按批量查询结果一次性更新任务状态（合并为一次写入）
+        
+        Args:
+            statuses: 异步任务 ID -> 服务端状态字符串
+        
+        Returns:
+            任务 ID -> 实际变化的字段
+        """
+        changes = {}
+        finished = []
+        if not statuses:
+            return changes
+        
+        self._ensure_loaded()
+        with self._lock:
+            updated = {}
+            partitions = {task_id: self.tasks_file for task_id in self._tasks}
+            partitions.update({task_id: entry[0] for task_id, entry in self._foreign.items()})
+            for task_id, tasks_file in partitions.items():
+                task = self._tasks.get(task_id) or self._foreign[task_id][1]
+                remote_status = statuses.get(task.async_task_id) if task.async_task_id else None
+                if remote_status is None:
+                    continue
+                try:
+                    new_status = TaskStatus(remote_status)
+                except ValueError:
+                    continue
+                if _status_value(task.status) != remote_status:
+                    task = replace(task, status=new_status)
+                    changes[task.id] = {'status': new_status}
+                    timing = self._timing_changes(task, {'status': new_status})
+                    if timing:
+                        task = replace(task, **timing)
+                        changes[task.id].update(timing)
+                    if 'elapsed_seconds' in timing:
+                        finished.append(task)
+                    if tasks_file != self.tasks_file:
+                        self._swap_tasks({task.id: task}, tasks_file)
+                        self._save_foreign(task, tasks_file)
+                    else:
+                        updated[task.id] = task
+                        self._mark_dirty([task.id])
+                    self._update_index(task, tasks_file)
+            # 当前分区的变化合并为一次字典替换
+            if updated:
+                self._swap_tasks(updated, self.tasks_file)
+        
+        self._record_durations(finished)
+        self._notify(changes)
+        return changes
+    
+    def _timing_changes(self, task: Task, updates: dict) -> dict:
+        """
+        需要补充记录的提交时间和成功耗时，用于估算同类任务的轮询节奏和剩余时间
+        
+        Args:
+            task: 已应用 updates 的任务
+            updates: 本次更新的字段
+        
+        Returns:
+            submitted_at / elapsed_seconds 的新值
+        """
+        timing = {}
+        now = datetime.now()
+        submitted_at = task.submitted_at
+        if updates.get('async_task_id') and not submitted_at:
+            submitted_at = timing['submitted_at'] = now.isoformat()
+        
+        if (task.is_success() and task.elapsed_seconds is None
+                and submitted_at and 'status' in updates):
+            try:
+                submitted = datetime.fromisoformat(submitted_at)
+                timing['elapsed_seconds'] = round((now - submitted).total_seconds(), 1)
+            except ValueError:
+                pass
+        return timing
+    
+    def _record_durations(self, tasks: List[Task]):
+        """把任务耗时记入全局样本（不持有 _lock 调用）"""
+        try:
+            if self._durations.record_many(tasks):
+                for task in tasks:
+                    self._duration_cache.pop(task.model, None)
+        except Exception as e:
+            print(f"记录任务耗时失败: {e}")
+    
+    def _duration_samples(self, model: str) -> list:
+        """模型最近的耗时样本（各工程共用，按模型缓存）"""
+        samples = self._duration_cache.get(model)
+        if samples is None:
+            try:
+                samples = self._durations.samples(model, settings.TASK_DURATION_SAMPLES)
+            except Exception as e:
+                print(f"读取任务耗时失败: {e}")
+                samples = []
+            self._duration_cache[model] = samples
+        return samples
+    
+    def get_duration_stats(self, model: str, resolution: str,
+                           duration: Optional[int] = None) -> DurationStats:
+        """
+        获取同类任务的历史耗时分布（统计所有工程的任务，包括已归档的）
+        
+        优先按 模型+分辨率+时长 统计，样本不足时依次放宽到
+        模型+分辨率、模型。
+        
+        Args:
+            model: 模型名称
+            resolution: 分辨率
+            duration: 视频时长（秒）
+        
+        Returns:
+            耗时分布
+        """
+        finished = self._duration_samples(model)
+        
+        stats = DurationStats()
+        for matches in (
+            lambda s: s[0] == resolution and s[1] == duration,
+            lambda s: s[0] == resolution,
+            lambda s: True
+        ):
+            stats = DurationStats([s[2] for s in finished if matches(s)])
+            if stats.is_reliable():
+                break
+        return stats
+    
+    def get_task_elapsed(self, task: Task) -> float:
+        """任务提交后经过的秒数（未记录提交时间时按创建时间计算）"""
+        try:
+            started = datetime.fromisoformat(task.submitted_at or task.created_at)
+            return max(0.0, (datetime.now() - started).total_seconds())
+        except (TypeError, ValueError):
+            return 0.0
+    
+    def estimate_remaining(self, task: Task, stats: Optional[DurationStats] = None) -> Optional[float]:
+        """
+        估算未完成任务的剩余时间
+        
+        Args:
+            task: 任务
+            stats: 同类任务的耗时分布，默认按任务的模型、分辨率和时长获取
+                  （列表中多个同类任务可共用一次统计结果）
+        
+        Returns:
+            剩余秒数；历史样本不足或任务已完成时返回 None
+        """
+        if task.is_completed():
+            return None
+        if stats is None:
+            stats = self.get_duration_stats(task.model, task.resolution, task.duration)
+        if not stats.is_reliable():
+            return None
+        return max(0.0, stats.percentile(50) - self.get_task_elapsed(task))
+    
+    def _mark_dirty(self, task_ids):
+        """标记待写入的任务，由后台线程合并写入（需持有 _lock）"""
+        if task_ids:
+            self._dirty.update(task_ids)
+            self._flusher.schedule()
+    
+    def flush(self):
+        """立即写入所有待保存的更新"""
+        with self._flush_lock:
+            self._flush_locked()
+    
+    def _flush_locked(self):
+        """写入待保存的更新（需持有 _flush_lock）"""
+        with self._lock:
+            if not self._dirty:
+                return
+            tasks = [self._tasks[task_id] for task_id in self._dirty if task_id in self._tasks]
+            self._dirty = set()
+        try:
+            self._get_store().save_many(tasks)
         except Exception as e:
             print(f"保存任务失败: {e}")
+            with self._lock:
+                self._dirty.update(task.id for task in tasks)
+    
+    def save_tasks(self):
+        """立即保存全部任务"""
+        self._ensure_loaded()
+        with self._lock:
+            self._dirty.update(self._tasks)
+        self.flush()
+    
+    def _ensure_loaded(self):
+        """首次访问时加载当前分区（调用方不能持有 _lock，避免与写入线程死锁）"""
+        if self._loaded:
+            return
+        with self._flush_lock:
+            if not self._loaded:
+                self._load_locked()
     
     def load_tasks(self):
-        """从文件加载任务"""
+        """从 tasks_file 对应的数据库重新加载任务"""
+        with self._flush_lock:
+            self._load_locked()
+    
+    def _load_locked(self):
+        """加载当前分区并用完整数据校正在途索引（需持有 _flush_lock）"""
+        self._flush_locked()
         try:
-            if os.path.exists(self.tasks_file):
-                with open(self.tasks_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.tasks = {
-                        task_id: Task.from_dict(task_data)
-                        for task_id, task_data in data.items()
-                    }
-            else:
-                self.tasks = {}
+            tasks = self._get_store().load_all()
         except Exception as e:
             print(f"加载任务失败: {e}")
-            self.tasks = {}
+            tasks = {}
+        with self._lock:
+            self.tasks = tasks
+            self._dirty = set()
+            # 该分区的任务改由内存中的副本更新
+            for task_id in [task_id for task_id, entry in self._foreign.items()
+                            if entry[0] == self.tasks_file]:
+                del self._foreign[task_id]
+            store = self._foreign_stores.pop(db_path_for(self.tasks_file), None)
+            if store is not None:
+                store.close()
+        self._index.sync_partition(self.tasks_file, {
+            task.id: task.async_task_id for task in tasks.values()
+            if task.async_task_id and not task.is_completed()
+        })
+        # 补录记录耗时样本之前完成的任务，归档后样本仍然保留
+        self._record_durations([task for task in tasks.values() if task.elapsed_seconds is not None])
+        if settings.TASK_ARCHIVE_DAYS > 0:
+            self._archive_locked(settings.TASK_ARCHIVE_DAYS)
+    
+    def archive_tasks(self, max_age_days: Optional[float] = None) -> int:
+        """
+        把创建超过 max_age_days 天的已结束任务移入归档
+        
+        Args:
+            max_age_days: 天数，默认 settings.TASK_ARCHIVE_DAYS
+        
+        Returns:
+            归档的任务数量
+        """
+        self._ensure_loaded()
+        with self._flush_lock:
+            self._flush_locked()
+            days = settings.TASK_ARCHIVE_DAYS if max_age_days is None else max_age_days
+            return self._archive_locked(days)
+    
+    def _archive_locked(self, max_age_days: float) -> int:
+        """归档旧任务（需持有 _flush_lock，且待写入的更新已保存）"""
+        cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat()
+        with self._lock:
+            old = [task for task in self._tasks.values()
+                   if task.is_completed() and (task.created_at or '') < cutoff]
+        if not old:
+            return 0
+        
+        try:
+            # 先写归档再删除，中途退出时最多在归档中留下重复记录
+            self.get_archive().append(old)
+            self._get_store().delete_many(task.id for task in old)
+        except Exception as e:
+            print(f"归档任务失败: {e}")
+            return 0
+        
+        with self._lock:
+            tasks = dict(self._tasks)
+            for task in old:
+                tasks.pop(task.id, None)
+                self._dirty.discard(task.id)
+            self._tasks = tasks
+        print(f"已归档 {len(old)} 个任务")
+        return len(old)
+    
+    def close(self):
+        """停止后台写入线程并保存剩余更新"""
+        self._flusher.stop()
+        self.flush()
+        with self._lock:
+            for store in self._foreign_stores.values():
+                store.close()
+            self._foreign_stores = {}
+            self._foreign = {}
+        self._durations.close()
     
     def get_pending_tasks(self) -> List[Task]:
         """获取未完成的任务"""
@@ -113,3 +696,8 @@ class TaskManager:
             task for task in self.tasks.values()
             if not task.is_completed()
         ]
+
+
+def _status_value(status) -> str:
+    """状态字符串（支持字符串和枚举两种类型）"""
+    return status.value if isinstance(status, TaskStatus) else status
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+任务存储
+基于 SQLite（WAL 模式）按行保存任务，更新单个任务只写一行，
+不再在每次轮询时重写整个 tasks.json
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .models import Task
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    created_at TEXT,
+    model TEXT,
+    project TEXT,
+    async_task_id TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
+CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks(created_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_model ON tasks(model);
+CREATE INDEX IF NOT EXISTS idx_tasks_project ON tasks(project);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def db_path_for(tasks_file: str) -> str:
+    """旧版 JSON 任务文件对应的数据库路径（tasks.json -> tasks.db）"""
+    return os.path.splitext(tasks_file)[0] + '.db'
+
+
+class TaskStore:
+    """SQLite 任务存储（线程安全）"""
+    
+    def __init__(self, db_path: str, project: Optional[str] = None):
+        """
+        打开（必要时创建）任务数据库
+        
+        Args:
+            db_path: 数据库文件路径
+            project: 写入各行的工程路径，全局任务为 None
+        """
+        self.db_path = db_path
+        self.project = project
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        # WAL 模式下 NORMAL 已能保证崩溃后数据库一致
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+    
+    # ========== 读取 ==========
+    
+    def load_all(self) -> Dict[str, Task]:
+        """加载全部任务（按创建时间排序）"""
+        with self._lock:
+            rows = self._conn.execute('SELECT data FROM tasks ORDER BY created_at').fetchall()
+        tasks = {}
+        for (data,) in rows:
+            try:
+                task = Task.from_dict(json.loads(data))
+            except Exception as e:
+                print(f"跳过无法解析的任务记录: {e}")
+                continue
+            tasks[task.id] = task
+        return tasks
+    
+    def load(self, task_id: str) -> Optional[Task]:
+        """只加载单个任务"""
+        with self._lock:
+            row = self._conn.execute('SELECT data FROM tasks WHERE id = ?', (task_id,)).fetchone()
+        if row is None:
+            return None
+        return Task.from_dict(json.loads(row[0]))
+    
+    def count(self, status: Optional[str] = None, model: Optional[str] = None,
+              start: Optional[str] = None, end: Optional[str] = None) -> int:
+        """符合条件的任务数量（参数同 query_ids）"""
+        where, params = self._filters(status, model, start, end)
+        with self._lock:
+            return self._conn.execute(f'SELECT COUNT(*) FROM tasks{where}', params).fetchone()[0]
+    
+    def query_ids(self, offset: int = 0, limit: Optional[int] = None,
+                  status: Optional[str] = None, model: Optional[str] = None,
+                  start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+        """
+        分页查询任务 ID（按创建时间从新到旧，使用 created_at 索引，不读取任务数据）
+        
+        Args:
+            offset: 跳过的任务数
+            limit: 最多返回的任务数，None 表示不限
+            status: 状态字符串
+            model: 模型名称
+            start: 创建时间下限（含，ISO 格式）
+            end: 创建时间上限（不含，ISO 格式）
+        """
+        where, params = self._filters(status, model, start, end)
+        params += [-1 if limit is None else limit, offset]
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT id FROM tasks{where} ORDER BY created_at DESC LIMIT ? OFFSET ?', params
+            ).fetchall()
+        return [row[0] for row in rows]
+    
+    @staticmethod
+    def _filters(status, model, start, end) -> Tuple[str, list]:
+        """拼装 WHERE 子句"""
+        clauses, params = [], []
+        for clause, value in (('status = ?', status), ('model = ?', model),
+                              ('created_at >= ?', start), ('created_at < ?', end)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+    
+    # ========== 写入 ==========
+    
+    def _row(self, task: Task) -> tuple:
+        data = task.to_dict()
+        return (task.id, data['status'], task.created_at, task.model, self.project,
+                task.async_task_id, json.dumps(data, ensure_ascii=False))
+    
+    def save(self, task: Task):
+        """写入（插入或更新）单个任务"""
+        self.save_many([task])
+    
+    def save_many(self, tasks: Iterable[Task]):
+        """在一个事务中写入多个任务"""
+        rows = [self._row(task) for task in tasks]
+        if not rows:
+            return
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO tasks '
+                    '(id, status, created_at, model, project, async_task_id, data) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    rows
+                )
+    
+    def delete(self, task_id: str):
+        """删除任务"""
+        self.delete_many([task_id])
+    
+    def delete_many(self, task_ids: Iterable[str]):
+        """在一个事务中删除多个任务"""
+        rows = [(task_id,) for task_id in task_ids]
+        if not rows:
+            return
+        with self._lock:
+            with self._conn:
+                self._conn.executemany('DELETE FROM tasks WHERE id = ?', rows)
+    
+    # ========== 迁移 ==========
+    
+    def _get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+    
+    def _set_meta(self, key: str, value: str):
+        with self._lock:
+            with self._conn:
+                self._conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                                   (key, value))
+    
+    def migrate_from_json(self, json_path: str) -> int:
+        """
+        首次打开时导入旧版 tasks.json（只导入一次，原文件保留不动）
+        
+        Returns:
+            导入的任务数量
+        """
+        if self._get_meta('json_migrated') or not os.path.exists(json_path):
+            return 0
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            tasks = [Task.from_dict(task_data) for task_data in data.values()]
+        except Exception as e:
+            print(f"迁移任务文件失败: {e}")
+            return 0
+        
+        self.save_many(tasks)
+        self._set_meta('json_migrated', json_path)
+        if tasks:
+            print(f"已从 {json_path} 迁移 {len(tasks)} 个任务")
+        return len(tasks)
+    
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+class InFlightIndex:
+    """
+    跨工程的在途任务索引
+    
+    记录已提交但未结束的任务属于哪个任务文件（工程），启动时只需读取这个小文件
+    即可恢复所有工程的任务监控，而不必加载任何工程的任务数据。
+    """
+    
+    def __init__(self, index_file: str):
+        """
+        Args:
+            index_file: 索引文件路径（JSON）
+        """
+        self.index_file = index_file
+        self._lock = threading.Lock()
+        # task_id -> {'tasks_file', 'async_task_id'}
+        self._entries: Dict[str, Dict] = {}
+        try:
+            if os.path.exists(index_file):
+                with open(index_file, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+        except Exception as e:
+            print(f"加载在途任务索引失败: {e}")
+    
+    def get(self, task_id: str) -> Optional[Dict]:
+        """获取任务的索引记录"""
+        with self._lock:
+            entry = self._entries.get(task_id)
+            return dict(entry) if entry else None
+    
+    def entries(self) -> Dict[str, Dict]:
+        """全部在途任务"""
+        with self._lock:
+            return {task_id: dict(entry) for task_id, entry in self._entries.items()}
+    
+    def add(self, task_id: str, tasks_file: str, async_task_id: str):
+        """记录在途任务"""
+        entry = {'tasks_file': tasks_file, 'async_task_id': async_task_id}
+        with self._lock:
+            if self._entries.get(task_id) == entry:
+                return
+            self._entries[task_id] = entry
+            self._save()
+    
+    def remove(self, task_ids: Iterable[str]):
+        """移除已结束的任务"""
+        with self._lock:
+            removed = [task_id for task_id in task_ids if self._entries.pop(task_id, None)]
+            if removed:
+                self._save()
+    
+    def sync_partition(self, tasks_file: str, inflight: Dict[str, str]):
+        """
+        用某个任务文件的完整数据校正索引
+        
+        Args:
+            tasks_file: 任务文件路径
+            inflight: 该文件中的在途任务 task_id -> async_task_id
+        """
+        with self._lock:
+            entries = {
+                task_id: entry for task_id, entry in self._entries.items()
+                if entry.get('tasks_file') != tasks_file
+            }
+            for task_id, async_task_id in inflight.items():
+                entries[task_id] = {'tasks_file': tasks_file, 'async_task_id': async_task_id}
+            if entries != self._entries:
+                self._entries = entries
+                self._save()
+    
+    def _save(self):
+        """保存索引（需持有锁）"""
+        try:
+            tmp_path = self.index_file + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.index_file)
+        except Exception as e:
+            print(f"保存在途任务索引失败: {e}")
+
+
+class DurationStore:
+    """
+    跨工程的任务耗时样本
+    
+    成功任务的耗时按模型记录在一个全局数据库中，轮询节奏和剩余时间估算
+    不会因切换工程而从零开始，也不会因任务被归档而失去样本。
+    """
+    
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path: 数据库文件路径
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS durations (
+                task_id TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                resolution TEXT,
+                duration INTEGER,
+                elapsed_seconds REAL NOT NULL,
+                submitted_at TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_durations_model ON durations(model, submitted_at);
+        """)
+        self._conn.commit()
+    
+    def record_many(self, tasks: Iterable[Task]) -> int:
+        """
+        记录任务耗时（已记录的任务不重复写入）
+        
+        Returns:
+            新增的样本数
+        """
+        rows = [(task.id, task.model, task.resolution, task.duration,
+                 task.elapsed_seconds, task.submitted_at)
+                for task in tasks if task.elapsed_seconds is not None and task.model]
+        if not rows:
+            return 0
+        with self._lock:
+            with self._conn:
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    'INSERT OR IGNORE INTO durations '
+                    '(task_id, model, resolution, duration, elapsed_seconds, submitted_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    rows
+                )
+                return self._conn.total_changes - before
+    
+    def samples(self, model: str, limit: int) -> List[Tuple[str, Optional[int], float]]:
+        """
+        某个模型最近的耗时样本
+        
+        Returns:
+            [(分辨率, 时长, 耗时秒数)]，从新到旧
+        """
+        with self._lock:
+            return self._conn.execute(
+                'SELECT resolution, duration, elapsed_seconds FROM durations '
+                'WHERE model = ? ORDER BY submitted_at DESC LIMIT ?',
+                (model, limit)
+            ).fetchall()
+    
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+class WriteBehindFlusher:
+    """
+    合并写入
+    
+    schedule() 只做标记；后台线程在 interval 秒后调用一次 flush_fn，
+    期间的多次标记合并为一次写入。线程在首次标记时才启动。
+    """
+    
+    def __init__(self, flush_fn: Callable[[], None], interval: float):
+        """
+        Args:
+            flush_fn: 执行实际写入的函数
+            interval: 合并写入的时间窗口（秒）
+        """
+        self.flush_fn = flush_fn
+        self.interval = interval
+        self._pending = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+    
+    def schedule(self):
+        """标记有待写入的数据"""
+        with self._lock:
+            if self._thread is None and not self._stopped.is_set():
+                self._thread = threading.Thread(target=self._run, name='TaskWriter', daemon=True)
+                self._thread.start()
+        self._pending.set()
+    
+    def _run(self):
+        while True:
+            self._pending.wait()
+            # 等待一个时间窗口，收集更多更新后一起写入
+            self._stopped.wait(self.interval)
+            self._pending.clear()
+            try:
+                self.flush_fn()
+            except Exception as e:
+                print(f"写入任务失败: {e}")
+            if self._stopped.is_set():
+                return
+    
+    def stop(self):
+        """停止后台线程（调用方负责最后一次 flush）"""
+        self._stopped.set()
+        self._pending.set()
+        with self._lock:
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=5)
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+缩略图磁盘缓存
+资源管理器、图片画廊、视频预览和欢迎页共用。缩略图按
+（文件路径, 文件大小, 修改时间, 请求尺寸）缓存在 ~/.drawloong/thumbnails，
+再次打开工程时直接读取缓存的小图，不再解码原图或打开视频。
+缓存总大小超过上限时按最近使用时间淘汰。
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage, QPixmap
+
+from config.settings import settings
+from .image_loader import load_scaled_image
+
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS thumbnails (
+    key TEXT PRIMARY KEY,
+    file TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_thumbnails_access ON thumbnails(last_access);
+"""
+
+
+def load_video_frame(video_path: str, size: Tuple[int, int]) -> QImage:
+    """
+    读取视频第一帧并缩小（需要 OpenCV）
+    
+    Returns:
+        QImage，失败时 isNull()
+    """
+    try:
+        import cv2
+    except ImportError:
+        return QImage()
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            return QImage()
+        ret, frame = cap.read()
+    finally:
+        cap.release()
+    if not ret or frame is None:
+        return QImage()
+    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    height, width, _ = frame_rgb.shape
+    image = QImage(frame_rgb.data, width, height, 3 * width, QImage.Format_RGB888)
+    if width > size[0] or height > size[1]:
+        return image.scaled(size[0], size[1], Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    # QImage 引用 numpy 的内存，返回副本
+    return image.copy()
+
+
+class ThumbnailCache:
+    """缩略图磁盘缓存（线程安全）"""
+    
+    # 访问时间积累到该数量时写入数据库
+    ACCESS_FLUSH_COUNT = 64
+    
+    def __init__(self, cache_dir: str, max_bytes: int):
+        """
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 缓存总大小上限（字节）
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(cache_dir, 'index.db'), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._total_bytes = self._conn.execute('SELECT COALESCE(SUM(bytes), 0) FROM thumbnails').fetchone()[0]
+        # 命中缓存时只在内存中记录访问时间，批量写入
+        self._accessed: Dict[str, float] = {}
+    
+    @staticmethod
+    def cache_key(file_path: str, size: Tuple[int, int]) -> Optional[str]:
+        """缓存键（文件不存在时返回 None）"""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        raw = f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}|{size[0]}x{size[1]}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+    
+    @property
+    def total_bytes(self) -> int:
+        """缓存占用的字节数"""
+        with self._lock:
+            return self._total_bytes
+    
+    # ========== 读取 ==========
+    
+    def lookup(self, file_path: str, size: Tuple[int, int]) -> Optional[str]:
+        """
+        只查询缓存，不生成缩略图
+        
+        Returns:
+            缓存的缩略图文件路径，未缓存时返回 None
+        """
+        key = self.cache_key(file_path, size)
+        if key is None:
+            return None
+        with self._lock:
+            row = self._conn.execute('SELECT file FROM thumbnails WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            cached = os.path.join(self.cache_dir, row[0])
+            if not os.path.exists(cached):
+                self._forget(key)
+                return None
+            self._accessed[key] = time.time()
+            if len(self._accessed) >= self.ACCESS_FLUSH_COUNT:
+                self._flush_access()
+        return cached
+    
+    def thumbnail_path(self, file_path: str, size: Tuple[int, int]) -> Optional[str]:
+        """
+        获取缩略图文件路径（未缓存时生成，可在后台线程调用）
+        
+        Args:
+            file_path: 图片或视频路径
+            size: 缩略图最大宽高
+        
+        Returns:
+            缩略图文件路径，无法生成时返回 None
+        """
+        cached = self.lookup(file_path, size)
+        if cached:
+            return cached
+        key = self.cache_key(file_path, size)
+        if key is None:
+            return None
+        
+        if file_path.lower().endswith(VIDEO_EXTENSIONS):
+            image = load_video_frame(file_path, size)
+        else:
+            image = load_scaled_image(file_path, size)
+        if image.isNull():
+            return None
+        return self._store(key, image)
+    
+    def image(self, file_path: str, size: Tuple[int, int]) -> Optional[QImage]:
+        """获取缩略图 QImage（可在后台线程调用）"""
+        path = self.thumbnail_path(file_path, size)
+        if not path:
+            return None
+        image = QImage(path)
+        return None if image.isNull() else image
+    
+    def pixmap(self, file_path: str, size: Tuple[int, int]) -> Optional[QPixmap]:
+        """获取缩略图 QPixmap（只能在界面线程调用）"""
+        image = self.image(file_path, size)
+        return QPixmap.fromImage(image) if image is not None else None
+    
+    # ========== 写入 ==========
+    
+    def _store(self, key: str, image: QImage) -> Optional[str]:
+        # 有透明通道的保存为 PNG，其余保存为体积更小的 JPEG
+        ext, fmt, quality = ('.png', 'PNG', -1) if image.hasAlphaChannel() else ('.jpg', 'JPG', 85)
+        relative = os.path.join(key[:2], key + ext)
+        target = os.path.join(self.cache_dir, relative)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = f"{target}.{threading.get_ident()}.tmp"
+        if not image.save(tmp_path, fmt, quality):
+            return None
+        os.replace(tmp_path, target)
+        size = os.path.getsize(target)
+        
+        with self._lock:
+            with self._conn:
+                old = self._conn.execute('SELECT bytes FROM thumbnails WHERE key = ?', (key,)).fetchone()
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO thumbnails (key, file, bytes, last_access) VALUES (?, ?, ?, ?)',
+                    (key, relative, size, time.time())
+                )
+            self._total_bytes += size - (old[0] if old else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+        return target
+    
+    def _forget(self, key: str):
+        """删除一条记录（需持有锁）"""
+        row = self._conn.execute('SELECT bytes FROM thumbnails WHERE key = ?', (key,)).fetchone()
+        if row:
+            with self._conn:
+                self._conn.execute('DELETE FROM thumbnails WHERE key = ?', (key,))
+            self._total_bytes -= row[0]
+        self._accessed.pop(key, None)
+    
+    def _flush_access(self):
+        """写入积累的访问时间（需持有锁）"""
+        if not self._accessed:
+            return
+        with self._conn:
+            self._conn.executemany('UPDATE thumbnails SET last_access = ? WHERE key = ?',
+                                   [(accessed, key) for key, accessed in self._accessed.items()])
+        self._accessed.clear()
+    
+    def _evict(self):
+        """按最近使用时间淘汰，降到上限的 90%（需持有锁）"""
+        self._flush_access()
+        target = int(self.max_bytes * 0.9)
+        removed = []
+        for key, relative, size in self._conn.execute(
+                'SELECT key, file, bytes FROM thumbnails ORDER BY last_access'):
+            if self._total_bytes <= target:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, relative))
+            except OSError:
+                pass
+            removed.append((key,))
+            self._total_bytes -= size
+        with self._conn:
+            self._conn.executemany('DELETE FROM thumbnails WHERE key = ?', removed)
+    
+    def close(self):
+        """写入访问时间并关闭数据库"""
+        with self._lock:
+            self._flush_access()
+            self._conn.close()
+
+
+_cache: Optional[ThumbnailCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_thumbnail_cache() -> ThumbnailCache:
+    """获取全局缩略图缓存"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ThumbnailCache(settings.THUMBNAIL_CACHE_DIR,
+                                    settings.THUMBNAIL_CACHE_MAX_MB * 1024 * 1024)
+        return _cache
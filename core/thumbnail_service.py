@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后台缩略图服务
+在工作线程中生成（或从磁盘缓存读取）缩略图，完成后通过信号逐个通知界面，
+界面线程不再解码图片或打开视频。可见行的请求优先处理，切换工程时取消未完成的请求。
+"""
+
+import heapq
+import itertools
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtGui import QImage
+
+from config.settings import settings
+from .thumbnail_cache import ThumbnailCache, get_thumbnail_cache
+
+
+class ThumbnailService(QObject):
+    """
+    缩略图生成服务
+    
+    线程数固定为 max_workers 个（首次请求时才启动），OpenCV 和 Qt 的图片解码
+    在执行时会释放 GIL，多个线程可以并行解码。
+    """
+    
+    # 缩略图已生成: 文件路径, 尺寸 (宽, 高), 缩略图
+    thumbnail_ready = pyqtSignal(str, object, QImage)
+    
+    # 优先级（数值越小越先处理）
+    PRIORITY_VISIBLE = 0
+    PRIORITY_NORMAL = 1
+    
+    def __init__(self, cache: Optional[ThumbnailCache] = None, max_workers: Optional[int] = None,
+                 parent=None):
+        """
+        Args:
+            cache: 缩略图缓存，默认使用全局缓存
+            max_workers: 工作线程数，默认 settings.THUMBNAIL_WORKERS
+        """
+        super().__init__(parent)
+        self._cache = cache
+        self.max_workers = max_workers or settings.THUMBNAIL_WORKERS
+        self._heap = []  # (priority, seq, generation, path, size)
+        # (path, size) -> 当前优先级（未在该表中的堆条目已过期）
+        self._pending: Dict[Tuple[str, Tuple[int, int]], int] = {}
+        self._counter = itertools.count()
+        self._generation = 0
+        self._cond = threading.Condition()
+        self._running = True
+        self._workers = []
+    
+    @property
+    def cache(self) -> ThumbnailCache:
+        if self._cache is None:
+            self._cache = get_thumbnail_cache()
+        return self._cache
+    
+    # ========== 对外接口 ==========
+    
+    def request(self, file_path: str, size: Tuple[int, int], priority: int = PRIORITY_NORMAL):
+        """
+        请求缩略图（立即返回，结果通过 thumbnail_ready 信号通知）
+        
+        Args:
+            file_path: 图片或视频路径
+            size: 缩略图最大宽高
+            priority: 优先级，已在队列中的请求只会提高优先级
+        """
+        key = (file_path, tuple(size))
+        with self._cond:
+            if not self._running:
+                return
+            current = self._pending.get(key)
+            if current is not None and current <= priority:
+                return
+            self._pending[key] = priority
+            heapq.heappush(self._heap, (priority, next(self._counter), self._generation) + key)
+            self._ensure_workers()
+            self._cond.notify()
+    
+    def prioritize(self, file_paths: Iterable[str], size: Tuple[int, int]):
+        """提高可见行的优先级（只影响仍在队列中的请求）"""
+        size = tuple(size)
+        with self._cond:
+            for file_path in file_paths:
+                key = (file_path, size)
+                if self._pending.get(key, self.PRIORITY_VISIBLE) > self.PRIORITY_VISIBLE:
+                    self._pending[key] = self.PRIORITY_VISIBLE
+                    heapq.heappush(self._heap, (self.PRIORITY_VISIBLE, next(self._counter),
+                                                self._generation) + key)
+            self._cond.notify_all()
+    
+    def cancel_all(self):
+        """取消所有未完成的请求（切换工程时使用），正在生成的结果也不再通知"""
+        with self._cond:
+            self._generation += 1
+            self._heap.clear()
+            self._pending.clear()
+    
+    def pending_count(self) -> int:
+        """队列中的请求数量"""
+        with self._cond:
+            return len(self._pending)
+    
+    def shutdown(self):
+        """停止服务"""
+        with self._cond:
+            self._running = False
+            self._heap.clear()
+            self._pending.clear()
+            self._cond.notify_all()
+    
+    # ========== 工作线程 ==========
+    
+    def _ensure_workers(self):
+        """按需启动工作线程（需持有锁）"""
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(target=self._work_loop, name=f'Thumbnail-{len(self._workers)}',
+                                      daemon=True)
+            self._workers.append(worker)
+            worker.start()
+    
+    def _next_request(self):
+        """取出下一个有效请求，服务停止时返回 None（需持有锁）"""
+        while self._running:
+            while self._heap:
+                priority, _, generation, file_path, size = heapq.heappop(self._heap)
+                key = (file_path, size)
+                # 跳过已取消的请求和提高优先级后留下的旧条目
+                if generation != self._generation or self._pending.get(key) != priority:
+                    continue
+                del self._pending[key]
+                return generation, file_path, size
+            self._cond.wait()
+        return None
+    
+    def _work_loop(self):
+        while True:
+            with self._cond:
+                item = self._next_request()
+            if item is None:
+                return
+            generation, file_path, size = item
+            try:
+                image = self.cache.image(file_path, size)
+            except Exception as e:
+                print(f"生成缩略图失败 {file_path}: {e}")
+                image = None
+            if image is None:
+                continue
+            with self._cond:
+                if generation != self._generation or not self._running:
+                    continue
+            try:
+                self.thumbnail_ready.emit(file_path, size, image)
+            except RuntimeError:
+                # 接收方已销毁
+                return
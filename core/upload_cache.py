@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+上传缓存
+按 文件内容哈希 + 模型 记录已上传文件的 oss:// 地址及过期时间，
+同一文件在有效期内再次使用时直接复用，不再重复上传
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+from config.settings import settings
+
+
+class UploadCache:
+    """持久化上传缓存（线程安全）"""
+    
+    # 剩余有效期不足该值（秒）的地址不再复用，避免任务排队期间过期
+    MIN_REMAINING = 3600
+    
+    def __init__(self, cache_file: Optional[str] = None):
+        """
+        初始化缓存
+        
+        Args:
+            cache_file: 缓存文件路径，默认取 settings.UPLOAD_CACHE_FILE
+        """
+        self.cache_file = cache_file or settings.UPLOAD_CACHE_FILE
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        # '哈希:模型' -> {'url', 'expires_at', 'file_name', 'size'}
+        self.entries: Dict[str, Dict] = {}
+        # 文件路径 -> [大小, 修改时间, 哈希]，避免每次都重新计算大文件哈希
+        self.hashes: Dict[str, list] = {}
+        self.load()
+    
+    def load(self):
+        """从文件加载缓存"""
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.entries = data.get('entries', {})
+                self.hashes = data.get('hashes', {})
+        except Exception as e:
+            print(f"加载上传缓存失败: {e}")
+            self.entries = {}
+            self.hashes = {}
+    
+    def save(self):
+        """
+        保存缓存（丢弃已过期的记录）
+        
+        多个上传线程会同时调用 put()/save()：在锁内生成快照，写入同目录下的独立临时文件后替换，
+        整个保存过程由 _save_lock 串行化，较早的快照不会覆盖较新的快照。
+        """
+        with self._save_lock:
+            with self._lock:
+                self._prune()
+                content = json.dumps({'entries': self.entries, 'hashes': self.hashes},
+                                     ensure_ascii=False)
+            tmp_path = None
+            try:
+                folder = os.path.dirname(os.path.abspath(self.cache_file))
+                os.makedirs(folder, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(prefix='.upload_cache.', suffix='.tmp', dir=folder)
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                os.replace(tmp_path, self.cache_file)
+            except Exception as e:
+                print(f"保存上传缓存失败: {e}")
+                if tmp_path and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+    
+    def _prune(self):
+        """丢弃已过期的地址，以及不再对应任何有效地址的文件哈希记录（需持有锁）"""
+        now = time.time()
+        self.entries = {
+            key: entry for key, entry in self.entries.items()
+            if entry.get('expires_at', 0) > now
+        }
+        live_hashes = {key.split(':', 1)[0] for key in self.entries}
+        self.hashes = {
+            path: record for path, record in self.hashes.items()
+            if record[2] in live_hashes
+        }
+    
+    def file_hash(self, file_path: str) -> str:
+        """文件内容的 SHA-256（文件大小和修改时间未变时使用记录的结果）"""
+        stat = os.stat(file_path)
+        path = os.path.abspath(file_path)
+        with self._lock:
+            record = self.hashes.get(path)
+        if record and record[0] == stat.st_size and record[1] == stat.st_mtime:
+            return record[2]
+        
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        file_hash = digest.hexdigest()
+        with self._lock:
+            self.hashes[path] = [stat.st_size, stat.st_mtime, file_hash]
+        return file_hash
+    
+    def get(self, file_path: str, model_name: str) -> Optional[str]:
+        """
+        获取仍然有效的 oss:// 地址
+        
+        Returns:
+            oss:// 地址；未上传过或即将过期时返回 None
+        """
+        key = f'{self.file_hash(file_path)}:{model_name}'
+        with self._lock:
+            entry = self.entries.get(key)
+        if entry and entry.get('expires_at', 0) - time.time() > self.MIN_REMAINING:
+            return entry['url']
+        return None
+    
+    def put(self, file_path: str, model_name: str, url: str, ttl: Optional[float] = None):
+        """
+        记录上传结果并保存
+        
+        Args:
+            file_path: 本地文件路径
+            model_name: 模型名称（上传凭证按模型签发）
+            url: oss:// 地址
+            ttl: 有效期（秒），默认取 settings.UPLOAD_URL_TTL
+        """
+        key = f'{self.file_hash(file_path)}:{model_name}'
+        with self._lock:
+            self.entries[key] = {
+                'url': url,
+                'expires_at': time.time() + (ttl or settings.UPLOAD_URL_TTL),
+                'file_name': os.path.basename(file_path),
+                'size': os.path.getsize(file_path)
+            }
+        self.save()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_upload_cache() -> UploadCache:
+    """获取全局上传缓存"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = UploadCache()
+        return _cache
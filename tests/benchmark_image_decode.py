@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图片预览解码基准
+对比旧的预览方式（QImage/QPixmap 解码完整原图后 scaled()）与按目标尺寸解码
+（core.image_loader.load_scaled_image）：
+
+- 解码过程中同时存在的像素缓冲区峰值（读取器内部的中间图像 + 缩放结果）
+- 预览控件保留的像素（旧方式保留原图用于窗口缩放时重新缩放）
+- 解码耗时
+
+尺寸对应各预览位置：资源管理器图标 24px、图片画廊 250px、图片编辑 500px、
+上传区域/首尾帧预览 PREVIEW_MAX_SIZE。
+
+用法:
+    python -m tests.benchmark_image_decode --width 3840 --height 2160 --output bench_decode.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# 添加项目根目录到路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from PyQt5.QtCore import QCoreApplication, Qt
+from PyQt5.QtGui import QImage, QImageReader
+
+from config.settings import settings
+from core.image_loader import load_scaled_image
+from tests.benchmark_pipeline import _app_version
+
+
+def make_source(folder: str, width: int, height: int, fmt: str) -> str:
+    """生成测试图片（随机噪声叠加渐变，接近照片的压缩率）"""
+    import random
+    rng = random.Random(1)
+    row = bytearray()
+    for x in range(width):
+        shade = x * 255 // max(width - 1, 1)
+        row += bytes((shade, rng.randrange(256), 255 - shade, 255))
+    data = bytearray()
+    for y in range(height):
+        offset = (y * 4 * 7) % len(row)
+        data += row[offset:] + row[:offset]
+    image = QImage(bytes(data), width, height, 4 * width, QImage.Format_RGB32).copy()
+    path = os.path.join(folder, f'source.{fmt.lower()}')
+    image.save(path, fmt, 90)
+    return path
+
+
+def measure_full(path: str, size: int, repeat: int) -> dict:
+    """旧方式：解码完整原图，再缩放到目标尺寸"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        original = QImage(path)
+        scaled = original.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    elapsed = (time.perf_counter() - started) / repeat
+    return {
+        'peak_mb': round((original.sizeInBytes() + scaled.sizeInBytes()) / 1024 / 1024, 3),
+        'retained_mb': round(original.sizeInBytes() / 1024 / 1024, 3),
+        'decode_ms': round(elapsed * 1000, 1),
+        'result': [scaled.width(), scaled.height()]
+    }
+
+
+def decoder_peak_bytes(path: str, result: QImage) -> int:
+    """
+    估算按目标尺寸解码时读取器内部的中间图像大小
+    
+    JPEG 由 libjpeg 直接按 1/2、1/4、1/8 解码后再缩小到目标尺寸；
+    PNG 等格式的读取器内部仍会解码原图后缩小，只有保留的像素减少。
+    """
+    reader = QImageReader(path)
+    width, height = reader.size().width(), reader.size().height()
+    if (width, height) == (result.width(), result.height()):
+        return 0
+    if bytes(reader.format()).lower() in (b'jpeg', b'jpg'):
+        denom = 1
+        while denom < 8 and width // (denom * 2) >= result.width() and height // (denom * 2) >= result.height():
+            denom *= 2
+        width, height = -(-width // denom), -(-height // denom)
+    return width * height * 4
+
+
+def measure_scaled(path: str, size: int, repeat: int) -> dict:
+    """当前方式：解码时即缩小到目标尺寸"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        image = load_scaled_image(path, (size, size))
+    elapsed = (time.perf_counter() - started) / repeat
+    return {
+        'peak_mb': round((decoder_peak_bytes(path, image) + image.sizeInBytes()) / 1024 / 1024, 3),
+        'retained_mb': round(image.sizeInBytes() / 1024 / 1024, 3),
+        'decode_ms': round(elapsed * 1000, 1),
+        'result': [image.width(), image.height()]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='图片预览解码基准')
+    parser.add_argument('--width', type=int, default=3840, help='原图宽度')
+    parser.add_argument('--height', type=int, default=2160, help='原图高度')
+    parser.add_argument('--repeat', type=int, default=5, help='每项重复次数')
+    parser.add_argument('--output', default='benchmark_image_decode.json', help='结果文件')
+    args = parser.parse_args()
+    
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+    sizes = [24, 250, 500, settings.PREVIEW_MAX_SIZE]
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        for fmt in ('JPG', 'PNG'):
+            print(f"生成 {args.width}x{args.height} {fmt} 图片...")
+            path = make_source(folder, args.width, args.height, fmt)
+            results[fmt] = {'file_mb': round(os.path.getsize(path) / 1024 / 1024, 2)}
+            for size in sizes:
+                full = measure_full(path, size, args.repeat)
+                scaled = measure_scaled(path, size, args.repeat)
+                results[fmt][str(size)] = {'full': full, 'scaled': scaled}
+                print(f"  {fmt} {size}px: 峰值 {full['peak_mb']} MB -> {scaled['peak_mb']} MB，"
+                      f"保留 {full['retained_mb']} MB -> {scaled['retained_mb']} MB，"
+                      f"耗时 {full['decode_ms']}ms -> {scaled['decode_ms']}ms")
+    
+    report = {
+        'benchmark': 'image_decode',
+        'version': _app_version(),
+        'timestamp': datetime.now().isoformat(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'config': vars(args),
+        'results': results
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已保存: {args.output}")
+    del app
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生成流水线吞吐量基准
+在本地模拟服务（tests/fake_dashscope.py，独立进程）上运行真实的
+提交 -> 轮询 -> 下载 流程：DashScopeClient 提交任务，TaskManager 记录，
+TaskPollScheduler 轮询并下载结果。
+
+每个并发级别报告:
+- 吞吐量（任务/分钟）
+- 完成检测延迟：服务端任务结束到客户端检测到结束的时间
+- CPU 时间、峰值线程数、峰值内存（RSS）
+
+用法:
+    python -m tests.benchmark_pipeline --levels 1 10 100 1000 --output bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# 添加项目根目录到路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+
+MODEL = 'wan2.5-i2v-preview'
+RESOLUTION = '720P'
+DURATION = 5
+
+
+def _app_version() -> str:
+    """读取 main.py 中的版本号"""
+    try:
+        with open(os.path.join(ROOT_DIR, 'main.py'), 'r', encoding='utf-8') as f:
+            match = re.search(r'__version__\s*=\s*["\']([^"\']+)', f.read())
+        return match.group(1) if match else 'unknown'
+    except OSError:
+        return 'unknown'
+
+
+def _current_rss_mb():
+    """当前进程 RSS（MB），无法获取时返回 None"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    if RESOURCE_AVAILABLE:
+        # 不支持 /proc 时退化为进程生命周期内的峰值（macOS 单位为字节，Linux 为 KB）
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    return None
+
+
+def _percentile(values, q):
+    """百分位（线性插值）"""
+    from core.poll_cadence import DurationStats
+    return DurationStats(values).percentile(q)
+
+
+class ResourceSampler:
+    """后台采样峰值线程数和 RSS"""
+    
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.peak_threads = 0
+        self.peak_rss_mb = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='BenchSampler', daemon=True)
+    
+    def _run(self):
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+    
+    def sample(self):
+        """采样一次（不计入采样线程自身）"""
+        self.peak_threads = max(self.peak_threads, threading.active_count() - 1)
+        rss = _current_rss_mb()
+        if rss is not None:
+            self.peak_rss_mb = max(self.peak_rss_mb or 0, rss)
+    
+    def __enter__(self):
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *args):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+
+
+class _TimingTaskManager:
+    """记录每个任务被检测到结束的时刻"""
+    
+    def __init__(self, task_manager):
+        self.task_manager = task_manager
+        self.finished_at = {}
+        self._lock = threading.Lock()
+    
+    def update_task(self, task_id, **kwargs):
+        from core.models import TaskStatus
+        status = kwargs.get('status')
+        if status in (TaskStatus.SUCCEEDED, TaskStatus.FAILED):
+            with self._lock:
+                self.finished_at.setdefault(task_id, time.time())
+        return self.task_manager.update_task(task_id, **kwargs)
+    
+    def __getattr__(self, name):
+        return getattr(self.task_manager, name)
+
+
+class FakeServerProcess:
+    """在独立进程中运行模拟服务，避免服务端开销计入客户端的 CPU 和线程统计"""
+    
+    def __init__(self, args):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            self.port = sock.getsockname()[1]
+        self.base_url = f'http://127.0.0.1:{self.port}/api/v1'
+        command = [
+            sys.executable, '-m', 'tests.fake_dashscope',
+            '--port', str(self.port),
+            '--video-seconds', str(args.video_seconds),
+            '--sigma', str(args.sigma),
+            '--latency', str(args.latency),
+            '--failure-rate', str(args.failure_rate),
+            '--throttle-rate', str(args.throttle_rate),
+            '--video-mb', str(args.video_mb)
+        ]
+        if args.seed is not None:
+            command += ['--seed', str(args.seed)]
+        self.process = subprocess.Popen(command, cwd=ROOT_DIR, stdout=subprocess.DEVNULL)
+        self._wait_ready()
+    
+    def _wait_ready(self, timeout: float = 10.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                with socket.create_connection(('127.0.0.1', self.port), timeout=0.5):
+                    return
+            except OSError:
+                time.sleep(0.05)
+        self.stop()
+        raise Exception("模拟服务启动超时")
+    
+    def stop(self):
+        self.process.terminate()
+        self.process.wait(timeout=5)
+
+
+def _seed_history(task_manager, args, count: int = 20):
+    """写入同类任务的历史耗时，使自适应轮询节奏与模拟服务的耗时分布一致"""
+    import random
+    from core.models import TaskStatus
+    rng = random.Random(args.seed)
+    for i in range(count):
+        task = task_manager.create_task('history', MODEL, RESOLUTION, duration=DURATION)
+        elapsed = rng.lognormvariate(0, args.sigma) * args.video_seconds
+        task_manager.update_task(task.id, async_task_id=f'history-{i}',
+                                 status=TaskStatus.SUCCEEDED, elapsed_seconds=round(elapsed, 1))
+
+
+def run_level(server, args, concurrency: int) -> dict:
+    """以指定并发数运行一轮，返回统计结果"""
+    from core.api_client import DashScopeClient
+    from core.poll_scheduler import TaskPollScheduler
+    from core.rate_limiter import RateLimiter
+    from core.task_manager import TaskManager
+    from core.upload_cache import UploadCache
+    
+    work_dir = tempfile.mkdtemp(prefix=f'bench_{concurrency}_')
+    output_dir = os.path.join(work_dir, 'downloads')
+    os.makedirs(output_dir)
+    image_path = os.path.join(work_dir, 'input.png')
+    with open(image_path, 'wb') as f:
+        f.write(os.urandom(64 * 1024))
+    
+    manager = TaskManager(os.path.join(work_dir, 'inflight.json'))
+    manager.tasks_file = os.path.join(work_dir, 'tasks.json')
+    _seed_history(manager, args)
+    tracked = _TimingTaskManager(manager)
+    
+    client = DashScopeClient()
+    client.api_key = 'benchmark'
+    client.base_url = server.base_url
+    client.upload_cache = UploadCache(os.path.join(work_dir, 'upload_cache.json'))
+    if not args.client_rate_limits:
+        # 模拟服务没有配额，默认关闭本地限流，测量流水线本身的开销
+        client.rate_limiter = RateLimiter(endpoint_limits={}, model_limit=())
+    
+    manager_lock = threading.Lock()
+    task_ids = []
+    submit_errors = []
+    
+    def submit(index):
+        with manager_lock:
+            task = manager.create_task(f'benchmark {index}', MODEL, RESOLUTION,
+                                       input_file=image_path, duration=DURATION)
+        try:
+            result = client.submit_task(image_path, task.prompt, MODEL, RESOLUTION,
+                                        duration=DURATION)
+        except Exception as e:
+            submit_errors.append(str(e))
+            return
+        with manager_lock:
+            manager.update_task(task.id, async_task_id=result['output']['task_id'])
+            task_ids.append(task.id)
+        scheduler.add_task(task.id, output_dir)
+    
+    threads_before = threading.active_count()
+    cpu_before = time.process_time()
+    start = time.time()
+    
+    with ResourceSampler() as sampler:
+        scheduler = TaskPollScheduler(tracked, api_client=client)
+        try:
+            with ThreadPoolExecutor(max_workers=min(concurrency, args.submit_workers),
+                                    thread_name_prefix='BenchSubmit') as executor:
+                list(executor.map(submit, range(concurrency)))
+            submitted_at = time.time()
+            
+            deadline = time.monotonic() + args.timeout
+            while scheduler.monitored_count() and time.monotonic() < deadline:
+                time.sleep(0.05)
+            timed_out = scheduler.monitored_count() > 0
+        finally:
+            scheduler.shutdown()
+    
+    end = time.time()
+    cpu_seconds = time.process_time() - cpu_before
+    
+    # 查询服务端记录的结束时间（不计入上面的统计）
+    latencies = []
+    for task_id in task_ids:
+        detected = tracked.finished_at.get(task_id)
+        if detected is None:
+            continue
+        output = client.query_task(manager.get_task(task_id).async_task_id)['output']
+        if output.get('end_time'):
+            server_end = datetime.strptime(output['end_time'], '%Y-%m-%d %H:%M:%S.%f').timestamp()
+            latencies.append(max(0.0, detected - server_end))
+    
+    completed = [t for t in task_ids if manager.get_task(t).is_completed()]
+    downloaded = [
+        t for t in task_ids
+        if manager.get_task(t).output_path and os.path.exists(manager.get_task(t).output_path)
+    ]
+    wall = end - start
+    return {
+        'concurrency': concurrency,
+        'submitted': len(task_ids),
+        'submit_errors': len(submit_errors),
+        'completed': len(completed),
+        'downloaded': len(downloaded),
+        'timed_out': timed_out,
+        'submit_seconds': round(submitted_at - start, 3),
+        'wall_seconds': round(wall, 3),
+        'tasks_per_minute': round(len(completed) / wall * 60, 2) if wall > 0 else None,
+        'detection_latency': {
+            'mean': round(sum(latencies) / len(latencies), 3) if latencies else None,
+            'p50': round(_percentile(latencies, 50), 3) if latencies else None,
+            'p90': round(_percentile(latencies, 90), 3) if latencies else None,
+            'max': round(max(latencies), 3) if latencies else None
+        },
+        'cpu_seconds': round(cpu_seconds, 3),
+        'peak_threads': sampler.peak_threads,
+        'extra_threads': sampler.peak_threads - threads_before,
+        'peak_rss_mb': round(sampler.peak_rss_mb, 1) if sampler.peak_rss_mb else None,
+        'request_stats': client.get_request_stats()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成流水线吞吐量基准')
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 10, 100, 1000],
+                        help='并发任务数')
+    parser.add_argument('--video-seconds', type=float, default=20.0, help='模拟任务耗时中位数（秒）')
+    parser.add_argument('--sigma', type=float, default=0.3, help='任务耗时分布的长尾程度')
+    parser.add_argument('--latency', type=float, default=0.0, help='模拟请求延迟中位数（秒）')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='任务失败比例')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='请求返回 429 的比例')
+    parser.add_argument('--video-mb', type=float, default=0.25, help='结果视频大小（MB）')
+    parser.add_argument('--submit-workers', type=int, default=16, help='并发提交线程数')
+    parser.add_argument('--client-rate-limits', action='store_true',
+                        help='启用客户端限流配置（默认关闭）')
+    parser.add_argument('--timeout', type=float, default=900.0, help='每个级别的超时时间（秒）')
+    parser.add_argument('--seed', type=int, default=1, help='随机种子')
+    parser.add_argument('--output', default='benchmark_pipeline.json', help='结果文件')
+    args = parser.parse_args()
+    
+    server = FakeServerProcess(args)
+    results = []
+    try:
+        for concurrency in args.levels:
+            print(f"并发 {concurrency} 个任务...")
+            result = run_level(server, args, concurrency)
+            results.append(result)
+            latency = result['detection_latency']
+            print(f"  吞吐量 {result['tasks_per_minute']} 任务/分钟，"
+                  f"检测延迟 p50 {latency['p50']}s / p90 {latency['p90']}s，"
+                  f"CPU {result['cpu_seconds']}s，峰值线程 {result['peak_threads']}，"
+                  f"峰值内存 {result['peak_rss_mb']} MB")
+    finally:
+        server.stop()
+    
+    report = {
+        'benchmark': 'pipeline',
+        'version': _app_version(),
+        'timestamp': datetime.now().isoformat(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'config': vars(args),
+        'results': results
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已保存: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
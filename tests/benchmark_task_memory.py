@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+任务内存与序列化基准
+对比旧版任务模型（普通 dataclass + asdict）与当前模型（__slots__、
+驻留的模型/分辨率字符串、枚举状态、不经过 asdict 的序列化）：
+
+- 每个任务占用的内存（tracemalloc，按从数据库读出的 JSON 构造）
+- 批量序列化（to_dict + json.dumps）耗时
+- is_completed() 调用耗时
+
+用法:
+    python -m tests.benchmark_task_memory --count 100000 --output bench_memory.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from typing import Optional
+
+# 添加项目根目录到路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from core.models import Task, TaskStatus
+from tests.benchmark_pipeline import _app_version
+
+
+MODELS = ['wan2.5-i2v-preview', 'wan2.5-t2i-preview', 'wan2.2-kf2v-flash', 'wanx2.1-vace-plus']
+RESOLUTIONS = ['480P', '720P', '1080P']
+
+
+@dataclass
+class LegacyTask:
+    """旧版任务模型（用于对比）"""
+    id: str
+    prompt: str
+    model: str
+    resolution: str
+    created_at: str
+    status: TaskStatus = TaskStatus.PENDING
+    async_task_id: Optional[str] = None
+    negative_prompt: str = ""
+    prompt_extend: bool = True
+    input_file: Optional[str] = None
+    output_path: Optional[str] = None
+    video_url: Optional[str] = None
+    message: str = ""
+    error: Optional[str] = None
+    error_code: Optional[str] = None
+    completed_at: Optional[str] = None
+    duration: Optional[int] = None
+    submitted_at: Optional[str] = None
+    elapsed_seconds: Optional[float] = None
+    
+    def to_dict(self):
+        data = asdict(self)
+        if isinstance(self.status, str):
+            data['status'] = self.status
+        else:
+            data['status'] = self.status.value
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: dict):
+        if 'status' in data:
+            if isinstance(data['status'], str):
+                data['status'] = TaskStatus(data['status'])
+        return cls(**data)
+    
+    def is_completed(self):
+        return self.status in [TaskStatus.SUCCEEDED, TaskStatus.FAILED, 'SUCCEEDED', 'FAILED']
+
+
+def make_rows(count: int, seed: int):
+    """生成与数据库中保存的任务记录相同的 JSON 文本"""
+    rng = random.Random(seed)
+    now = datetime.now()
+    statuses = ['SUCCEEDED'] * 8 + ['FAILED', 'RUNNING']
+    rows = []
+    for i in range(count):
+        created = now - timedelta(minutes=i)
+        status = rng.choice(statuses)
+        data = LegacyTask(
+            id=f'{rng.getrandbits(128):032x}',
+            prompt=f'一只猫在草地上奔跑，镜头 {i}',
+            model=rng.choice(MODELS),
+            resolution=rng.choice(RESOLUTIONS),
+            created_at=created.isoformat(),
+            status=TaskStatus(status),
+            async_task_id=f'{rng.getrandbits(128):032x}',
+            input_file=f'/projects/demo/pictures/{i}.png',
+            output_path=f'/projects/demo/videos/{i}.mp4' if status == 'SUCCEEDED' else None,
+            message='任务完成' if status == 'SUCCEEDED' else '',
+            duration=5,
+            submitted_at=created.isoformat(),
+            elapsed_seconds=round(rng.uniform(30, 300), 1) if status == 'SUCCEEDED' else None
+        ).to_dict()
+        rows.append(json.dumps(data, ensure_ascii=False))
+    return rows
+
+
+def measure(task_class, rows) -> dict:
+    """按数据库读取路径构造任务，测量内存和常用操作耗时"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tasks = {}
+    for data in rows:
+        task = task_class.from_dict(json.loads(data))
+        tasks[task.id] = task
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    
+    values = list(tasks.values())
+    started = time.perf_counter()
+    for task in values:
+        json.dumps(task.to_dict(), ensure_ascii=False)
+    serialize = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    completed = sum(1 for task in values if task.is_completed())
+    is_completed = time.perf_counter() - started
+    
+    return {
+        'bytes_per_task': round((after - before) / len(rows), 1),
+        'total_mb': round((after - before) / 1024 / 1024, 1),
+        'serialize_seconds': round(serialize, 3),
+        'is_completed_ns': round(is_completed / len(values) * 1e9, 1),
+        'completed': completed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='任务内存与序列化基准')
+    parser.add_argument('--count', type=int, default=100000, help='任务数量')
+    parser.add_argument('--seed', type=int, default=1, help='随机种子')
+    parser.add_argument('--output', default='benchmark_task_memory.json', help='结果文件')
+    args = parser.parse_args()
+    
+    print(f"生成 {args.count} 个任务记录...")
+    rows = make_rows(args.count, args.seed)
+    
+    results = {}
+    for name, task_class in (('legacy', LegacyTask), ('compact', Task)):
+        result = measure(task_class, rows)
+        results[name] = result
+        print(f"  {name}: 每个任务 {result['bytes_per_task']} 字节（共 {result['total_mb']} MB），"
+              f"批量序列化 {result['serialize_seconds']}s，"
+              f"is_completed {result['is_completed_ns']}ns/次")
+    
+    saved = 1 - results['compact']['bytes_per_task'] / results['legacy']['bytes_per_task']
+    speedup = results['legacy']['serialize_seconds'] / results['compact']['serialize_seconds']
+    print(f"内存减少 {saved:.0%}，序列化加速 {speedup:.1f} 倍")
+    
+    report = {
+        'benchmark': 'task_memory',
+        'version': _app_version(),
+        'timestamp': datetime.now().isoformat(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'config': vars(args),
+        'results': results
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已保存: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
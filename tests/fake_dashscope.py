@@ -0,0 +1,600 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地 DashScope 模拟服务
+模拟项目用到的接口（视频/图片生成、任务查询、批量查询、上传凭证、
+OSS 表单上传与结果下载），支持配置延迟分布、失败/限流注入和结果文件大小，
+用于离线测试和性能基准。
+
+命令行启动后把 DASHSCOPE_BASE_URL 指向它即可：
+    python -m tests.fake_dashscope --port 8089 --video-seconds 30
+    DASHSCOPE_BASE_URL=http://127.0.0.1:8089/api/v1 python main.py
+"""
+
+import argparse
+import email.parser
+import email.policy
+import http.server
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+
+API_PREFIX = '/api/v1'
+
+# 提交接口路径 -> 任务类型
+ASYNC_ENDPOINTS = {
+    '/services/aigc/video-generation/video-synthesis': 'video',
+    '/services/aigc/image2video/video-synthesis': 'video',
+    '/services/aigc/image2image/image-synthesis': 'image',
+    '/services/aigc/text2image/image-synthesis': 'image',
+    '/services/aigc/image-generation/generation': 'image'
+}
+# 默认同步、也可异步调用的接口
+SYNC_ENDPOINT = '/services/aigc/multimodal-generation/generation'
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+
+class Latency:
+    """
+    延迟分布（秒）
+    
+    对数正态分布：median 为中位数，sigma 控制长尾（0 表示固定值），
+    结果限制在 [minimum, maximum] 内。
+    """
+    
+    def __init__(self, median: float = 0.0, sigma: float = 0.0,
+                 minimum: float = 0.0, maximum: Optional[float] = None):
+        self.median = median
+        self.sigma = sigma
+        self.minimum = minimum
+        self.maximum = maximum
+    
+    def sample(self, rng: random.Random) -> float:
+        """抽取一个延迟值"""
+        if self.median <= 0:
+            return self.minimum
+        value = self.median
+        if self.sigma > 0:
+            value = rng.lognormvariate(math.log(self.median), self.sigma)
+        value = max(self.minimum, value)
+        if self.maximum is not None:
+            value = min(self.maximum, value)
+        return value
+
+
+class FakeDashScopeConfig:
+    """模拟服务配置"""
+    
+    def __init__(self, **overrides):
+        # 每个 HTTP 请求的响应延迟
+        self.request_latency = Latency()
+        # 任务从提交到结束的耗时（按任务类型）
+        self.task_durations = {
+            'video': Latency(2.0, 0.3),
+            'image': Latency(0.5, 0.3)
+        }
+        # 排队（PENDING）时间占任务耗时的比例
+        self.pending_fraction = 0.1
+        self.failure_rate = 0.0     # 任务以 FAILED 结束的比例
+        self.error_rate = 0.0       # API 请求返回 500 的比例
+        self.throttle_rate = 0.0    # API 请求返回 429 的比例
+        self.retry_after = 1        # 限流响应的 Retry-After（秒），None 表示不返回
+        self.download_abort_rate = 0.0  # 下载中途断开连接的比例
+        self.video_size = 2 * 1024 * 1024   # 结果视频大小（字节）
+        self.image_size = 256 * 1024        # 结果图片大小（字节）
+        self.require_api_key = True  # 缺少 Authorization 时返回 401
+        self.seed = None             # 随机种子，固定后注入结果可复现
+        
+        for name, value in overrides.items():
+            if not hasattr(self, name):
+                raise AttributeError(f"未知配置项: {name}")
+            setattr(self, name, value)
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """请求处理：按路径分发到 FakeDashScopeServer"""
+    protocol_version = 'HTTP/1.1'
+    
+    def do_GET(self):
+        self.server.owner.handle(self, 'GET')
+    
+    def do_POST(self):
+        self.server.owner.handle(self, 'POST')
+    
+    def log_message(self, *args):
+        pass
+
+
+class FakeDashScopeServer:
+    """
+    本地 DashScope 模拟服务
+    
+    在后台线程中运行，base_url 可直接赋给 settings.DASHSCOPE_BASE_URL
+    或客户端的 base_url。任务状态按提交后经过的时间推进，不需要后台线程。
+    """
+    
+    def __init__(self, config: Optional[FakeDashScopeConfig] = None,
+                 host: str = '127.0.0.1', port: int = 0):
+        """
+        初始化模拟服务
+        
+        Args:
+            config: 服务配置
+            host: 监听地址
+            port: 监听端口，0 表示自动分配
+        """
+        self.config = config or FakeDashScopeConfig()
+        self.rng = random.Random(self.config.seed)
+        self.tasks: Dict[str, Dict] = {}
+        self.uploads: Dict[str, bytes] = {}
+        self.stats: Dict[str, int] = {}
+        self._payloads: Dict[int, bytes] = {}
+        self._lock = threading.Lock()
+        self._httpd = http.server.ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.owner = self
+        self._thread = None
+    
+    # ========== 生命周期 ==========
+    
+    @property
+    def host_url(self) -> str:
+        """服务根地址"""
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+    
+    @property
+    def base_url(self) -> str:
+        """API 地址（对应 DASHSCOPE_BASE_URL）"""
+        return self.host_url + API_PREFIX
+    
+    def start(self) -> 'FakeDashScopeServer':
+        """在后台线程中启动服务"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever,
+                                        name='FakeDashScope', daemon=True)
+        self._thread.start()
+        return self
+    
+    def serve_forever(self):
+        """在当前线程中运行服务（阻塞）"""
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+    
+    def stop(self):
+        """停止服务"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *args):
+        self.stop()
+    
+    # ========== 辅助方法 ==========
+    
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+    
+    def _random(self) -> float:
+        with self._lock:
+            return self.rng.random()
+    
+    def _sample(self, latency: Latency) -> float:
+        with self._lock:
+            return latency.sample(self.rng)
+    
+    def payload(self, size: int) -> bytes:
+        """结果文件内容（同一大小的文件内容相同，便于校验下载结果）"""
+        with self._lock:
+            data = self._payloads.get(size)
+            if data is None:
+                data = random.Random(size).getrandbits(size * 8).to_bytes(size, 'little') if size else b''
+                self._payloads[size] = data
+            return data
+    
+    @staticmethod
+    def _send_json(handler, data: Dict, status: int = 200, headers: Optional[Dict] = None):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, str(value))
+        handler.end_headers()
+        handler.wfile.write(body)
+    
+    def _send_error(self, handler, status: int, code: str, message: str,
+                    headers: Optional[Dict] = None):
+        self._send_json(handler, {
+            'request_id': uuid.uuid4().hex,
+            'code': code,
+            'message': message
+        }, status, headers)
+    
+    @staticmethod
+    def _read_body(handler) -> bytes:
+        length = int(handler.headers.get('Content-Length', 0))
+        return handler.rfile.read(length) if length else b''
+    
+    # ========== 请求分发 ==========
+    
+    def handle(self, handler, method: str):
+        """处理一个请求"""
+        url = urlsplit(handler.path)
+        path = url.path
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        
+        latency = self._sample(self.config.request_latency)
+        if latency > 0:
+            time.sleep(latency)
+        
+        if path == '/oss' and method == 'POST':
+            return self._handle_oss_upload(handler)
+        if path.startswith('/files/') and method == 'GET':
+            return self._handle_download(handler, path[len('/files/'):])
+        if not path.startswith(API_PREFIX):
+            return self._send_error(handler, 404, 'NotFound', f'未知路径: {path}')
+        
+        # 请求体需要先读完，否则保持连接时会污染下一个请求
+        body = self._read_body(handler) if method == 'POST' else b''
+        if self._inject_failure(handler):
+            return
+        
+        path = path[len(API_PREFIX):]
+        if method == 'POST' and (path in ASYNC_ENDPOINTS or path == SYNC_ENDPOINT):
+            return self._handle_submit(handler, path, body)
+        if method == 'GET' and path == '/tasks':
+            return self._handle_list(handler, query)
+        if method == 'GET' and path.startswith('/tasks/'):
+            return self._handle_query(handler, path[len('/tasks/'):])
+        if method == 'GET' and path == '/uploads':
+            return self._handle_policy(handler, query)
+        self._send_error(handler, 404, 'NotFound', f'未知接口: {method} {path}')
+    
+    def _inject_failure(self, handler) -> bool:
+        """校验密钥并按配置注入限流/服务端错误，已响应时返回 True"""
+        if self.config.require_api_key:
+            auth = handler.headers.get('Authorization', '')
+            if not auth.startswith('Bearer ') or not auth[len('Bearer '):].strip():
+                self._count('unauthorized')
+                self._send_error(handler, 401, 'InvalidApiKey', 'Invalid API-key provided.')
+                return True
+        if self._random() < self.config.throttle_rate:
+            self._count('throttled')
+            headers = {}
+            if self.config.retry_after is not None:
+                headers['Retry-After'] = self.config.retry_after
+            self._send_error(handler, 429, 'Throttling.RateQuota',
+                             'Requests rate limit exceeded, please try again later.', headers)
+            return True
+        if self._random() < self.config.error_rate:
+            self._count('errors')
+            self._send_error(handler, 500, 'InternalError', 'An internal error has occured.')
+            return True
+        return False
+    
+    # ========== 任务 ==========
+    
+    def _handle_submit(self, handler, path: str, body: bytes):
+        """提交任务；同步调用时等待任务完成后直接返回结果"""
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError:
+            return self._send_error(handler, 400, 'InvalidParameter', '请求体不是合法的 JSON')
+        if not payload.get('model'):
+            return self._send_error(handler, 400, 'InvalidParameter', 'Model not exist.')
+        if b'oss://' in body and handler.headers.get('X-DashScope-OssResourceResolve') != 'enable':
+            return self._send_error(handler, 400, 'InvalidParameter',
+                                    'oss:// 资源需要设置 X-DashScope-OssResourceResolve: enable')
+        
+        is_async = handler.headers.get('X-DashScope-Async') == 'enable'
+        if path in ASYNC_ENDPOINTS and not is_async:
+            return self._send_error(handler, 403, 'AccessDenied',
+                                    'current user api does not support synchronous calls')
+        
+        task = self._create_task(path, payload)
+        if is_async:
+            self._count('submit')
+            return self._send_json(handler, {
+                'request_id': uuid.uuid4().hex,
+                'output': {'task_id': task['task_id'], 'task_status': 'PENDING'}
+            })
+        
+        # 同步调用：阻塞到任务结束
+        self._count('generation')
+        time.sleep(task['duration'])
+        if task['fail']:
+            return self._send_error(handler, 500, 'InternalError.Algo', 'Algorithm process error.')
+        self._send_json(handler, {
+            'request_id': uuid.uuid4().hex,
+            'output': {'choices': self._image_choices(task)},
+            'usage': {'image_count': task['n']}
+        })
+    
+    def _create_task(self, path: str, payload: Dict) -> Dict:
+        kind = ASYNC_ENDPOINTS.get(path, 'image')
+        parameters = payload.get('parameters') or {}
+        task = {
+            'task_id': str(uuid.uuid4()),
+            'model': payload['model'],
+            'kind': kind,
+            'path': path,
+            'prompt': (payload.get('input') or {}).get('prompt', ''),
+            'n': int(parameters.get('n', 1) or 1),
+            'submitted': time.time(),
+            'duration': self._sample(self.config.task_durations[kind]),
+            'fail': self._random() < self.config.failure_rate
+        }
+        with self._lock:
+            self.tasks[task['task_id']] = task
+        return task
+    
+    def task_status(self, task: Dict, now: Optional[float] = None) -> str:
+        """按经过的时间推算任务状态"""
+        elapsed = (now or time.time()) - task['submitted']
+        if elapsed < task['duration'] * self.config.pending_fraction:
+            return 'PENDING'
+        if elapsed < task['duration']:
+            return 'RUNNING'
+        return 'FAILED' if task['fail'] else 'SUCCEEDED'
+    
+    @staticmethod
+    def _format_time(timestamp: float) -> str:
+        return datetime.fromtimestamp(timestamp).strftime(TIME_FORMAT)[:-3]
+    
+    def _result_url(self, task: Dict, index: int) -> str:
+        ext = 'mp4' if task['kind'] == 'video' else 'png'
+        return f"{self.host_url}/files/{task['task_id']}_{index}.{ext}"
+    
+    def _image_choices(self, task: Dict):
+        return [{
+            'finish_reason': 'stop',
+            'message': {
+                'role': 'assistant',
+                'content': [{'image': self._result_url(task, i), 'type': 'image'}]
+            }
+        } for i in range(task['n'])]
+    
+    def _handle_query(self, handler, task_id: str):
+        """查询单个任务"""
+        self._count('query')
+        with self._lock:
+            task = self.tasks.get(task_id)
+        if task is None:
+            return self._send_json(handler, {
+                'request_id': uuid.uuid4().hex,
+                'output': {'task_id': task_id, 'task_status': 'UNKNOWN'}
+            })
+        
+        status = self.task_status(task)
+        output = {
+            'task_id': task_id,
+            'task_status': status,
+            'submit_time': self._format_time(task['submitted'])
+        }
+        if status != 'PENDING':
+            output['scheduled_time'] = self._format_time(
+                task['submitted'] + task['duration'] * self.config.pending_fraction
+            )
+        if status in ('SUCCEEDED', 'FAILED'):
+            output['end_time'] = self._format_time(task['submitted'] + task['duration'])
+        
+        usage = {}
+        if status == 'FAILED':
+            output['code'] = 'InternalError.Algo'
+            output['message'] = 'Algorithm process error.'
+        elif status == 'SUCCEEDED':
+            if task['kind'] == 'video':
+                output['video_url'] = self._result_url(task, 0)
+                output['orig_prompt'] = task['prompt']
+                output['actual_prompt'] = task['prompt']
+                usage = {'video_count': 1}
+            elif task['path'] == '/services/aigc/image-generation/generation':
+                output['choices'] = self._image_choices(task)
+                usage = {'image_count': task['n']}
+            else:
+                output['results'] = [
+                    {'url': self._result_url(task, i), 'orig_prompt': task['prompt'],
+                     'actual_prompt': task['prompt']}
+                    for i in range(task['n'])
+                ]
+                output['task_metrics'] = {'TOTAL': task['n'], 'SUCCEEDED': task['n'], 'FAILED': 0}
+                usage = {'image_count': task['n']}
+        
+        data = {'request_id': uuid.uuid4().hex, 'output': output}
+        if usage:
+            data['usage'] = usage
+        self._send_json(handler, data)
+    
+    def _handle_list(self, handler, query: Dict):
+        """按时间窗口、状态和模型批量查询任务（分页）"""
+        self._count('list')
+        try:
+            start = datetime.strptime(query['start_time'], '%Y%m%d%H%M%S').timestamp()
+            end = datetime.strptime(query['end_time'], '%Y%m%d%H%M%S').timestamp()
+            page_no = int(query.get('page_no', 1))
+            page_size = int(query.get('page_size', 10))
+        except (KeyError, ValueError):
+            return self._send_error(handler, 400, 'InvalidParameter', '时间窗口参数错误')
+        
+        now = time.time()
+        with self._lock:
+            tasks = list(self.tasks.values())
+        items = []
+        for task in sorted(tasks, key=lambda t: t['submitted']):
+            # 时间窗口精确到秒
+            if not start <= int(task['submitted']) <= end:
+                continue
+            if query.get('model_name') and task['model'] != query['model_name']:
+                continue
+            status = self.task_status(task, now)
+            if query.get('status') and status != query['status']:
+                continue
+            items.append({
+                'task_id': task['task_id'],
+                'status': status,
+                'model_name': task['model'],
+                'gmt_create': self._format_time(task['submitted'])
+            })
+        
+        total_page = max(1, math.ceil(len(items) / page_size))
+        page = items[(page_no - 1) * page_size:page_no * page_size]
+        self._send_json(handler, {
+            'request_id': uuid.uuid4().hex,
+            'data': page,
+            'total': len(items),
+            'total_page': total_page,
+            'page_no': page_no,
+            'page_size': page_size
+        })
+    
+    # ========== 上传 ==========
+    
+    def _handle_policy(self, handler, query: Dict):
+        """获取上传凭证"""
+        self._count('policy')
+        if query.get('action') != 'getPolicy' or not query.get('model'):
+            return self._send_error(handler, 400, 'InvalidParameter', '缺少 action 或 model 参数')
+        self._send_json(handler, {
+            'request_id': uuid.uuid4().hex,
+            'data': {
+                'policy': 'fake-policy',
+                'signature': 'fake-signature',
+                'upload_dir': f"dashscope-instant/{query['model']}/{uuid.uuid4().hex}",
+                'upload_host': f'{self.host_url}/oss',
+                'expire_in_seconds': 300,
+                'max_file_size_mb': 100,
+                'capacity_limit_mb': 999999999,
+                'oss_access_key_id': 'fake-access-key',
+                'x_oss_object_acl': 'private',
+                'x_oss_forbid_overwrite': 'true'
+            }
+        })
+    
+    def _handle_oss_upload(self, handler):
+        """OSS 表单上传"""
+        self._count('upload')
+        if 'chunked' in handler.headers.get('Transfer-Encoding', ''):
+            handler.close_connection = True
+            return self._send_error(handler, 411, 'MissingContentLength',
+                                    'You must provide the Content-Length HTTP header.')
+        body = self._read_body(handler)
+        message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+            f"Content-Type: {handler.headers.get('Content-Type', '')}\r\n\r\n".encode() + body
+        )
+        form = {}
+        if message.is_multipart():
+            form = {
+                part.get_param('name', header='content-disposition'): part.get_payload(decode=True)
+                for part in message.iter_parts()
+            }
+        if 'key' not in form or 'file' not in form:
+            return self._send_error(handler, 400, 'InvalidArgument', '表单缺少 key 或 file 字段')
+        
+        key = form['key'].decode('utf-8')
+        with self._lock:
+            exists = key in self.uploads
+            if not exists:
+                self.uploads[key] = form['file']
+        if exists:
+            return self._send_error(handler, 409, 'FileAlreadyExists', 'The object you specified already exists.')
+        handler.send_response(200)
+        handler.send_header('Content-Length', '0')
+        handler.end_headers()
+    
+    # ========== 下载 ==========
+    
+    def _handle_download(self, handler, name: str):
+        """下载结果文件，支持 Range"""
+        self._count('download')
+        size = self.config.video_size if name.endswith('.mp4') else self.config.image_size
+        data = self.payload(size)
+        
+        start, end, status = 0, size, 200
+        match = re.match(r'bytes=(\d+)-(\d*)$', handler.headers.get('Range', ''))
+        if match:
+            start = int(match.group(1))
+            if start >= size:
+                handler.send_response(416)
+                handler.send_header('Content-Range', f'bytes */{size}')
+                handler.send_header('Content-Length', '0')
+                handler.end_headers()
+                return
+            if match.group(2):
+                end = min(size, int(match.group(2)) + 1)
+            status = 206
+        
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'video/mp4' if name.endswith('.mp4') else 'image/png')
+        handler.send_header('Content-Length', str(end - start))
+        handler.send_header('Accept-Ranges', 'bytes')
+        if status == 206:
+            handler.send_header('Content-Range', f'bytes {start}-{end - 1}/{size}')
+        handler.end_headers()
+        
+        if end - start > 1 and self._random() < self.config.download_abort_rate:
+            # 只发送一半内容后断开连接，模拟网络中断
+            self._count('aborted')
+            handler.wfile.write(data[start:start + (end - start) // 2])
+            handler.wfile.flush()
+            handler.close_connection = True
+            return
+        handler.wfile.write(data[start:end])
+
+
+def main():
+    """命令行启动模拟服务"""
+    parser = argparse.ArgumentParser(description='本地 DashScope 模拟服务')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.0, help='请求延迟中位数（秒）')
+    parser.add_argument('--video-seconds', type=float, default=30.0, help='视频任务耗时中位数（秒）')
+    parser.add_argument('--image-seconds', type=float, default=5.0, help='图片任务耗时中位数（秒）')
+    parser.add_argument('--sigma', type=float, default=0.3, help='耗时分布的长尾程度')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='任务失败比例')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='请求返回 500 的比例')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='请求返回 429 的比例')
+    parser.add_argument('--abort-rate', type=float, default=0.0, help='下载中途断开的比例')
+    parser.add_argument('--video-mb', type=float, default=2.0, help='结果视频大小（MB）')
+    parser.add_argument('--seed', type=int, default=None, help='随机种子')
+    args = parser.parse_args()
+    
+    config = FakeDashScopeConfig(
+        request_latency=Latency(args.latency, args.sigma),
+        task_durations={
+            'video': Latency(args.video_seconds, args.sigma),
+            'image': Latency(args.image_seconds, args.sigma)
+        },
+        failure_rate=args.failure_rate,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        download_abort_rate=args.abort_rate,
+        video_size=int(args.video_mb * 1024 * 1024),
+        seed=args.seed
+    )
+    server = FakeDashScopeServer(config, args.host, args.port)
+    print(f"模拟服务已启动: {server.base_url}")
+    print(f"使用方法: DASHSCOPE_BASE_URL={server.base_url} python main.py")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n已停止")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工程素材目录测试脚本
+验证从元数据文件和画廊历史重建、提示词全文搜索、增量记录以及删除已不存在的文件
+"""
+
+import sys
+import os
+import json
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _make_project(tmp_path):
+    """创建包含图片、视频和元数据的工程目录"""
+    project = tmp_path / 'demo'
+    (project / 'pictures').mkdir(parents=True)
+    (project / 'videos').mkdir()
+    (project / 'project.json').write_text('{}', encoding='utf-8')
+    
+    (project / 'videos' / 'cat.mp4').write_bytes(b'video-1')
+    (project / 'videos' / 'cat_metadata.json').write_text(json.dumps({
+        'model': 'wan2.2-kf2v-flash', 'resolution': '720P',
+        'orig_prompt': '一只橘猫在雪地里奔跑', 'actual_prompt': '一只橘猫在白雪覆盖的草地上奔跑，慢镜头',
+        'task_id': 'async-1'
+    }, ensure_ascii=False), encoding='utf-8')
+    
+    (project / 'pictures' / 'dog.png').write_bytes(b'image-1')
+    (project / 'pictures' / 'copy.png').write_bytes(b'image-1')
+    history = {'id': 'h1', 'path': str(project / 'pictures' / 'dog.png'), 'model': 'wan2.5-t2i-preview',
+               'size': '1024*1024', 'seed': 42, 'orig_prompt': '海边的小狗', 'actual_prompt': '夕阳下海边奔跑的小狗'}
+    (project / 'text2image_history.jsonl').write_text(json.dumps(history, ensure_ascii=False) + '\n',
+                                                      encoding='utf-8')
+    return project
+
+
+def test_rebuild_and_search(tmp_path):
+    """测试从元数据文件和画廊历史重建后按提示词搜索"""
+    print("测试 1: 重建与搜索...")
+    from core.asset_catalog import AssetCatalog
+    
+    project = _make_project(tmp_path)
+    catalog = AssetCatalog(str(project))
+    assert catalog.rebuild() == 3
+    
+    video = catalog.get(str(project / 'videos' / 'cat.mp4'))
+    assert video['kind'] == 'video' and video['size'] == '720P' and video['task_id'] == 'async-1'
+    image = catalog.get(str(project / 'pictures' / 'dog.png'))
+    assert image['seed'] == '42' and image['model'] == 'wan2.5-t2i-preview'
+    
+    assert [a['path'] for a in catalog.search('白雪覆盖')] == ['videos/cat.mp4']
+    assert sorted(a['path'] for a in catalog.search('在雪地')) == ['videos/cat.mp4']
+    assert sorted(a['path'] for a in catalog.search('奔跑')) == ['pictures/dog.png', 'videos/cat.mp4']  # 短词使用 LIKE
+    assert [a['path'] for a in catalog.search('奔跑', kind='image')] == ['pictures/dog.png']
+    assert catalog.search('不存在的提示词') == []
+    
+    assert sorted(a['path'] for a in catalog.find_by_hash(image['content_hash'])) == \
+        ['pictures/copy.png', 'pictures/dog.png']
+    catalog.close()
+    print("  ✓ 重建与搜索测试通过")
+
+
+def test_incremental_update(tmp_path):
+    """测试生成完成时增量记录、重复重建不改写记录、删除已不存在的文件"""
+    print("\n测试 2: 增量更新...")
+    from core.asset_catalog import AssetCatalog, catalog_asset, get_asset_catalog
+    
+    project = _make_project(tmp_path)
+    catalog = get_asset_catalog(str(project))
+    catalog.rebuild()
+    
+    new_video = project / 'videos' / 'bird.mp4'
+    new_video.write_bytes(b'video-2')
+    catalog_asset(str(new_video), {'model': 'wan2.6-r2v', 'size': '1280*720', 'orig_prompt': '飞过山谷的鸟群'})
+    catalog_asset(str(tmp_path / 'outside.mp4'), {'model': 'x'})  # 不在工程内，忽略
+    assert catalog.count() == 4
+    assert [a['path'] for a in catalog.search('山谷的鸟')] == ['videos/bird.mp4']
+    
+    # 重建不会用空值覆盖已记录的提示词
+    catalog.rebuild()
+    assert catalog.get(str(new_video))['orig_prompt'] == '飞过山谷的鸟群'
+    
+    # 已删除的文件从目录和全文索引中移除
+    os.remove(project / 'videos' / 'cat.mp4')
+    assert catalog.rebuild() == 3
+    assert catalog.get(str(project / 'videos' / 'cat.mp4')) is None
+    assert catalog.search('白雪覆盖') == []
+    
+    reopened = AssetCatalog(str(project))
+    assert reopened.count() == 3
+    assert [a['path'] for a in reopened.search('鸟群')] == ['videos/bird.mp4']
+    reopened.close()
+    print("  ✓ 增量更新测试通过")
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    test_rebuild_and_search(pathlib.Path(tempfile.mkdtemp()))
+    test_incremental_update(pathlib.Path(tempfile.mkdtemp()))
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步客户端测试脚本
+验证 AsyncDashScopeClient 对本地模拟服务的完整流程与限流重试，
+QtAsyncBridge 回调回到创建线程，以及轮询调度器通过异步客户端并发查询
+"""
+
+import sys
+import os
+import threading
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _make_clients(server, tmp_path):
+    """创建共用不限速限流器的同步与异步客户端"""
+    from core.api_client import DashScopeClient
+    from core.async_api_client import AsyncDashScopeClient
+    from core.rate_limiter import RateLimiter, RetryPolicy
+    from core.upload_cache import UploadCache
+    
+    limiter = RateLimiter(endpoint_limits={}, model_limit=(1000, 1000))
+    sync_client = DashScopeClient()
+    async_client = AsyncDashScopeClient(sync_client=sync_client)
+    for client in (sync_client, async_client):
+        client.api_key = 'test-key'
+        client.base_url = server.base_url
+        client.rate_limiter = limiter
+        client.upload_cache = UploadCache(str(tmp_path / 'upload_cache.json'))
+        client.retry_policy = RetryPolicy(max_retries=20, base_delay=0.01, max_delay=0.05)
+    return sync_client, async_client
+
+
+def _wait_for(app, condition, timeout=5.0):
+    """处理事件直到条件满足（信号从事件循环线程排队到主线程）"""
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    return condition()
+
+
+async def _wait_for_result(client, task_id, timeout=10.0):
+    import asyncio
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        output = (await client.query_task(task_id))['output']
+        if output['task_status'] in ('SUCCEEDED', 'FAILED'):
+            return output
+        await asyncio.sleep(0.05)
+    raise AssertionError(f"任务未在 {timeout} 秒内结束")
+
+
+def test_async_round_trip(tmp_path):
+    """测试异步客户端完整流程：上传、提交、轮询、批量查询与下载"""
+    print("测试 1: 异步完整流程...")
+    from datetime import datetime, timedelta
+    from PyQt5.QtCore import QCoreApplication
+    from core.async_bridge import QtAsyncBridge
+    from tests.fake_dashscope import FakeDashScopeConfig, FakeDashScopeServer, Latency
+    
+    app = QCoreApplication.instance() or QCoreApplication([])
+    config = FakeDashScopeConfig(task_durations={'video': Latency(0.3), 'image': Latency(0.1)},
+                                 video_size=512 * 1024)
+    bridge = QtAsyncBridge()
+    with FakeDashScopeServer(config) as server:
+        _, client = _make_clients(server, tmp_path)
+        image_path = tmp_path / 'input.png'
+        image_path.write_bytes(os.urandom(64 * 1024))
+        
+        async def scenario():
+            result = await client.submit_task(str(image_path), 'prompt', 'wan2.5-i2v-preview', '720P')
+            task_id = result['output']['task_id']
+            now = datetime.now()
+            listed = await client.list_tasks(now - timedelta(minutes=5), now + timedelta(minutes=1))
+            output = await _wait_for_result(client, task_id)
+            video_path = await client.download_video(output['video_url'], str(tmp_path / 'out.mp4'))
+            # 再次提交同一图片命中上传缓存
+            await client.submit_task(str(image_path), 'prompt', 'wan2.5-i2v-preview', '720P')
+            await client.close()
+            return task_id, listed, output, video_path
+        
+        try:
+            task_id, listed, output, video_path = bridge.run_sync(scenario(), timeout=20)
+        finally:
+            bridge.shutdown()
+        
+        assert len(server.uploads) == 1
+        assert server.uploads[next(iter(server.uploads))] == image_path.read_bytes()
+        assert [item['task_id'] for item in listed] == [task_id]
+        assert output['task_status'] == 'SUCCEEDED'
+        with open(video_path, 'rb') as f:
+            assert f.read() == server.payload(config.video_size)
+        print("  ✓ 异步完整流程测试通过")
+
+
+def test_async_retry_under_throttling(tmp_path):
+    """测试模拟服务限流时异步客户端按重试策略完成，并记录限流计数"""
+    print("\n测试 2: 异步限流重试...")
+    from PyQt5.QtCore import QCoreApplication
+    from core.async_bridge import QtAsyncBridge
+    from tests.fake_dashscope import FakeDashScopeConfig, FakeDashScopeServer, Latency
+    
+    app = QCoreApplication.instance() or QCoreApplication([])
+    config = FakeDashScopeConfig(task_durations={'video': Latency(0.2), 'image': Latency(0.1)},
+                                 throttle_rate=0.3, retry_after=None, seed=7)
+    bridge = QtAsyncBridge()
+    with FakeDashScopeServer(config) as server:
+        _, client = _make_clients(server, tmp_path)
+        
+        async def scenario():
+            outputs = []
+            for i in range(3):
+                result = await client.submit_reference_video_to_video([], f'prompt {i}')
+                outputs.append(await _wait_for_result(client, result['output']['task_id']))
+            await client.close()
+            return outputs
+        
+        try:
+            outputs = bridge.run_sync(scenario(), timeout=20)
+        finally:
+            bridge.shutdown()
+        
+        assert [output['task_status'] for output in outputs] == ['SUCCEEDED'] * 3
+        stats = client.get_request_stats()
+        assert server.stats.get('throttled', 0) > 0
+        assert stats['throttled'] == server.stats['throttled']
+        assert stats['retried'] >= stats['throttled']
+        print("  ✓ 异步限流重试测试通过")
+
+
+def test_bridge_delivers_in_gui_thread(tmp_path):
+    """测试协程结果和异常通过信号回到创建桥接器的线程"""
+    print("\n测试 3: 桥接器回调线程...")
+    import asyncio
+    from PyQt5.QtCore import QCoreApplication
+    from core.async_bridge import QtAsyncBridge
+    
+    app = QCoreApplication.instance() or QCoreApplication([])
+    bridge = QtAsyncBridge()
+    results, errors = [], []
+    
+    async def work(value):
+        await asyncio.sleep(0.01)
+        if value is None:
+            raise ValueError('boom')
+        return value, threading.current_thread().name
+    
+    try:
+        bridge.submit(work(42), lambda value: results.append((value, threading.current_thread())))
+        bridge.submit(work(None), on_error=lambda error: errors.append(error))
+        assert _wait_for(app, lambda: results and errors)
+        (value, loop_thread), callback_thread = results[0]
+        assert value == 42
+        assert loop_thread == 'DashScopeAsyncLoop'
+        assert callback_thread is threading.main_thread()
+        assert isinstance(errors[0], ValueError)
+        print("  ✓ 桥接器回调线程测试通过")
+    finally:
+        bridge.shutdown()
+
+
+def test_scheduler_polls_through_async_client(tmp_path):
+    """测试轮询调度器通过异步客户端并发查询，慢响应不会占满查询线程"""
+    print("\n测试 4: 异步轮询...")
+    import asyncio
+    from PyQt5.QtCore import QCoreApplication
+    from core.async_bridge import QtAsyncBridge
+    from core.poll_scheduler import TaskPollScheduler
+    from core.task_manager import TaskManager
+    from tests.fake_dashscope import FakeDashScopeConfig, FakeDashScopeServer, Latency
+    
+    app = QCoreApplication.instance() or QCoreApplication([])
+    # 每个请求 0.2 秒：2 个查询线程逐个同步查询 30 个任务至少需要 3 秒
+    config = FakeDashScopeConfig(request_latency=Latency(0.2),
+                                 task_durations={'video': Latency(0.1), 'image': Latency(0.1)},
+                                 failure_rate=1.0)
+    manager = TaskManager(str(tmp_path / 'inflight.json'))
+    manager.tasks_file = str(tmp_path / 'tasks.json')
+    bridge = QtAsyncBridge()
+    with FakeDashScopeServer(config) as server:
+        sync_client, async_client = _make_clients(server, tmp_path)
+        
+        async def submit_all():
+            return await asyncio.gather(*(
+                async_client.submit_reference_video_to_video([], f'prompt {i}') for i in range(30)
+            ))
+        
+        task_ids = []
+        for result in bridge.run_sync(submit_all(), timeout=10):
+            task = manager.create_task('p', 'wan2.6-r2v', '1080P')
+            manager.update_task(task.id, async_task_id=result['output']['task_id'])
+            task_ids.append(task.id)
+        
+        scheduler = TaskPollScheduler(manager, api_client=sync_client, max_workers=2,
+                                      poll_interval=0.05, async_client=async_client, bridge=bridge)
+        try:
+            started = time.monotonic()
+            for i, task_id in enumerate(task_ids):
+                # 错开到期时间，逐个查询而不是批量查询
+                scheduler.add_task(task_id, str(tmp_path), delay=i * 0.01)
+            
+            assert _wait_for(app, lambda: scheduler.monitored_count() == 0, timeout=10)
+            elapsed = time.monotonic() - started
+            assert elapsed < 2.5, elapsed
+            poll_threads = [t for t in threading.enumerate() if t.name.startswith('TaskPoll_')]
+            assert len(poll_threads) <= 2
+            assert server.stats['query'] >= 30
+            for task_id in task_ids:
+                assert manager.get_task(task_id).status.value == 'FAILED'
+            print(f"  ✓ 异步轮询测试通过 ({elapsed:.2f}s)")
+        finally:
+            scheduler.shutdown()
+            bridge.shutdown()
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    test_async_round_trip(pathlib.Path(tempfile.mkdtemp()))
+    test_async_retry_under_throttling(pathlib.Path(tempfile.mkdtemp()))
+    test_bridge_delivers_in_gui_thread(pathlib.Path(tempfile.mkdtemp()))
+    test_scheduler_polls_through_async_client(pathlib.Path(tempfile.mkdtemp()))
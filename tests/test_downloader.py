@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+断点续传下载测试脚本
+验证中断续传、分段并行下载与原子重命名
+"""
+
+import sys
+import os
+import re
+import threading
+import http.server
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DATA = bytes(range(256)) * 4096  # 1MB
+
+
+class _RangeHandler(http.server.BaseHTTPRequestHandler):
+    """支持 Range 的文件服务，前 fail_count 个请求只发送一半内容后断开"""
+    protocol_version = 'HTTP/1.1'
+    fail_count = 0
+    range_requests = 0
+    
+    def do_GET(self):
+        start, end = 0, len(DATA) - 1
+        match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+        if match:
+            type(self).range_requests += 1
+            start = int(match.group(1))
+            if match.group(2):
+                end = int(match.group(2))
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(DATA)}')
+        else:
+            self.send_response(200)
+        body = DATA[start:end + 1]
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        
+        if type(self).fail_count > 0:
+            type(self).fail_count -= 1
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            self.connection.shutdown(2)
+            return
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+def _start_server():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _RangeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _make_engine(**kwargs):
+    from core.downloader import DownloadEngine
+    from core.http_transport import HttpTransport
+    
+    transport = HttpTransport(pool_size=8)
+    
+    def request_fn(method, url, endpoint='default', **kw):
+        return transport.request(method, url, endpoint=endpoint, **kw)
+    
+    return DownloadEngine(request_fn, chunk_size=16 * 1024, **kwargs)
+
+
+def test_resume_after_interruption(tmp_path):
+    """测试连接中断后从断点续传，最终文件完整"""
+    print("测试 1: 中断续传...")
+    server = _start_server()
+    try:
+        _RangeHandler.fail_count = 1
+        engine = _make_engine(parallelism=1)
+        output_path = str(tmp_path / 'video.mp4')
+        
+        engine.download(f'http://127.0.0.1:{server.server_port}/video.mp4', output_path)
+        with open(output_path, 'rb') as f:
+            assert f.read() == DATA
+        assert not os.path.exists(output_path + '.part')
+        print("  ✓ 中断续传测试通过")
+    finally:
+        server.shutdown()
+
+
+def test_parallel_ranges(tmp_path):
+    """测试大文件分段并行下载"""
+    print("\n测试 2: 分段并行下载...")
+    server = _start_server()
+    try:
+        _RangeHandler.fail_count = 0
+        _RangeHandler.range_requests = 0
+        engine = _make_engine(parallelism=4, parallel_min_size=256 * 1024)
+        output_path = str(tmp_path / 'video.mp4')
+        
+        engine.download(f'http://127.0.0.1:{server.server_port}/video.mp4', output_path)
+        with open(output_path, 'rb') as f:
+            assert f.read() == DATA
+        # 1 个探测请求 + 4 个分段请求
+        assert _RangeHandler.range_requests == 5, _RangeHandler.range_requests
+        assert not os.path.exists(output_path + '.part.json')
+        print("  ✓ 分段并行下载测试通过")
+    finally:
+        server.shutdown()
+
+
+def test_truncated_download_not_published(tmp_path):
+    """测试重试耗尽时不产生不完整的最终文件"""
+    print("\n测试 3: 不完整文件不落地...")
+    from core.downloader import DownloadError
+    
+    server = _start_server()
+    try:
+        _RangeHandler.fail_count = 10
+        engine = _make_engine(parallelism=1, max_attempts=2)
+        output_path = str(tmp_path / 'video.mp4')
+        try:
+            engine.download(f'http://127.0.0.1:{server.server_port}/video.mp4', output_path)
+            assert False, "应抛出异常"
+        except DownloadError:
+            pass
+        assert not os.path.exists(output_path)
+        assert os.path.exists(output_path + '.part')
+        
+        # 网络恢复后从 .part 继续
+        _RangeHandler.fail_count = 0
+        engine.download(f'http://127.0.0.1:{server.server_port}/video.mp4', output_path)
+        with open(output_path, 'rb') as f:
+            assert f.read() == DATA
+        print("  ✓ 不完整文件不落地测试通过")
+    finally:
+        server.shutdown()
+
+
+def test_interrupted_preallocation_resumes(tmp_path):
+    """测试预分配 .part 后立即中断时，续传不会把补零的文件当作下载结果"""
+    print("\n测试 4: 预分配后中断...")
+    from core.downloader import DownloadEngine
+    
+    server = _start_server()
+    original_ensure_size = DownloadEngine._ensure_size
+    
+    def interrupted_ensure_size(part_path, total):
+        original_ensure_size(part_path, total)
+        raise KeyboardInterrupt
+    
+    try:
+        _RangeHandler.fail_count = 0
+        url = f'http://127.0.0.1:{server.server_port}/video.mp4'
+        output_path = str(tmp_path / 'video.mp4')
+        engine = _make_engine(parallelism=4, parallel_min_size=256 * 1024)
+        engine._ensure_size = interrupted_ensure_size
+        try:
+            engine.download(url, output_path)
+            assert False, "应被中断"
+        except KeyboardInterrupt:
+            pass
+        assert os.path.getsize(output_path + '.part') == len(DATA)
+        assert os.path.exists(output_path + '.part.json')
+        
+        _make_engine(parallelism=4, parallel_min_size=256 * 1024).download(url, output_path)
+        with open(output_path, 'rb') as f:
+            assert f.read() == DATA
+        print("  ✓ 预分配后中断测试通过")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    test_resume_after_interruption(pathlib.Path(tempfile.mkdtemp()))
+    test_parallel_ranges(pathlib.Path(tempfile.mkdtemp()))
+    test_truncated_download_not_published(pathlib.Path(tempfile.mkdtemp()))
+    test_interrupted_preallocation_resumes(pathlib.Path(tempfile.mkdtemp()))
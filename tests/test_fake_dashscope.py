@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模拟服务测试脚本
+验证 DashScopeClient 能对模拟服务完成 上传 -> 提交 -> 轮询 -> 下载 的完整流程，
+并在限流/断线注入下依靠重试和断点续传完成
+"""
+
+import sys
+import os
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _make_client(server, tmp_path):
+    from core.api_client import DashScopeClient
+    from core.rate_limiter import RetryPolicy
+    from core.upload_cache import UploadCache
+    
+    client = DashScopeClient()
+    client.api_key = 'test-key'
+    client.base_url = server.base_url
+    client.upload_cache = UploadCache(str(tmp_path / 'upload_cache.json'))
+    client.retry_policy = RetryPolicy(max_retries=20, base_delay=0.01, max_delay=0.05)
+    return client
+
+
+def _wait_for_result(client, task_id, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        output = client.query_task(task_id)['output']
+        if output['task_status'] in ('SUCCEEDED', 'FAILED'):
+            return output
+        time.sleep(0.05)
+    raise AssertionError(f"任务未在 {timeout} 秒内结束")
+
+
+def test_video_task_round_trip(tmp_path):
+    """测试图生视频完整流程：上传、提交、轮询、批量查询与下载"""
+    print("测试 1: 完整流程...")
+    from datetime import datetime, timedelta
+    from tests.fake_dashscope import FakeDashScopeConfig, FakeDashScopeServer, Latency
+    
+    config = FakeDashScopeConfig(task_durations={'video': Latency(0.3), 'image': Latency(0.1)},
+                                 video_size=512 * 1024)
+    with FakeDashScopeServer(config) as server:
+        client = _make_client(server, tmp_path)
+        image_path = tmp_path / 'input.png'
+        image_path.write_bytes(os.urandom(64 * 1024))
+        
+        result = client.submit_task(str(image_path), 'prompt', 'wan2.5-i2v-preview', '720P')
+        task_id = result['output']['task_id']
+        assert len(server.uploads) == 1
+        
+        now = datetime.now()
+        listed = client.list_tasks(now - timedelta(minutes=5), now + timedelta(minutes=1))
+        assert [item['task_id'] for item in listed] == [task_id]
+        
+        output = _wait_for_result(client, task_id)
+        assert output['task_status'] == 'SUCCEEDED'
+        assert output['submit_time'] and output['end_time']
+        
+        video_path = client.download_video(output['video_url'], str(tmp_path / 'out.mp4'))
+        with open(video_path, 'rb') as f:
+            assert f.read() == server.payload(config.video_size)
+        print("  ✓ 完整流程测试通过")
+
+
+def test_fault_injection(tmp_path):
+    """测试限流与下载断线注入下依靠重试和断点续传仍能完成"""
+    print("\n测试 2: 故障注入...")
+    from tests.fake_dashscope import FakeDashScopeConfig, FakeDashScopeServer, Latency
+    
+    config = FakeDashScopeConfig(task_durations={'video': Latency(0.2), 'image': Latency(0.1)},
+                                 throttle_rate=0.3, retry_after=None,
+                                 download_abort_rate=0.5, video_size=256 * 1024, seed=7)
+    with FakeDashScopeServer(config) as server:
+        client = _make_client(server, tmp_path)
+        client.downloader.max_attempts = 20
+        before = client.get_request_stats()
+        
+        for i in range(3):
+            task_id = client.submit_reference_video_to_video([], f'prompt {i}')['output']['task_id']
+            output = _wait_for_result(client, task_id)
+            video_path = client.download_video(output['video_url'], str(tmp_path / f'out_{i}.mp4'))
+            assert os.path.getsize(video_path) == config.video_size
+        
+        after = client.get_request_stats()
+        assert server.stats.get('throttled', 0) > 0
+        assert after['throttled'] - before['throttled'] == server.stats['throttled']
+        assert server.stats.get('aborted', 0) > 0
+        print("  ✓ 故障注入测试通过")
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    test_video_task_round_trip(pathlib.Path(tempfile.mkdtemp()))
+    test_fault_injection(pathlib.Path(tempfile.mkdtemp()))
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+素材文件夹列表测试脚本
+验证由文件夹快照构建列表、按名称/修改时间/大小/模型排序以及按当前排序插入和删除
+"""
+
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _snapshot():
+    """文件名 -> (inode, 大小, 修改时间)"""
+    return {
+        'b.png': (1, 300, 20),
+        'a.png': (2, 100, 30),
+        'c.jpg': (3, 200, 10),
+        'note.txt': (4, 50, 40),
+    }
+
+
+def test_load_and_sort(tmp_path):
+    """测试只保留指定类型的文件，排序时不重新读取文件"""
+    print("测试 1: 构建与排序...")
+    from core.folder_listing import (
+        FolderListing, IMAGE_EXTENSIONS, SORT_MTIME, SORT_SIZE, SORT_MODEL, SORT_NAME
+    )
+    
+    folder = str(tmp_path / 'pictures')
+    listing = FolderListing(folder, IMAGE_EXTENSIONS)
+    listing.load(_snapshot(), {os.path.join(folder, 'c.jpg'): 'wan2.5-t2i-preview',
+                               os.path.join(folder, 'b.png'): 'qwen-image-edit'})
+    names = lambda: [entry.name for entry in listing.entries]
+    assert names() == ['a.png', 'b.png', 'c.jpg']
+    
+    listing.sort(SORT_MTIME, descending=True)
+    assert names() == ['a.png', 'b.png', 'c.jpg']
+    listing.sort(SORT_SIZE, descending=True)
+    assert names() == ['b.png', 'c.jpg', 'a.png']
+    listing.sort(SORT_MODEL)
+    assert names() == ['b.png', 'c.jpg', 'a.png']  # 没有模型信息的排在最后
+    
+    listing.set_models({os.path.join(folder, 'a.png'): 'flux'})
+    listing.sort(SORT_MODEL)
+    assert names() == ['a.png', 'b.png', 'c.jpg']
+    listing.sort(SORT_NAME)
+    assert listing.index_of(os.path.join(folder, 'c.jpg')) == 2
+    assert listing.index_of(os.path.join(folder, 'missing.png')) == -1
+    print("  ✓ 构建与排序测试通过")
+
+
+def test_insert_and_remove(tmp_path):
+    """测试按当前排序二分查找插入和删除位置"""
+    print("\n测试 2: 插入与删除...")
+    from core.folder_listing import FileEntry, FolderListing, IMAGE_EXTENSIONS, SORT_MTIME
+    
+    folder = str(tmp_path / 'pictures')
+    listing = FolderListing(folder, IMAGE_EXTENSIONS, SORT_MTIME, descending=True)
+    listing.load(_snapshot())
+    assert [entry.name for entry in listing.entries] == ['a.png', 'b.png', 'c.jpg']
+    
+    # 最新的文件排在最前
+    assert listing.insert(FileEntry(os.path.join(folder, 'new.png'), 10, 50)) == 0
+    assert listing.insert(FileEntry(os.path.join(folder, 'old.png'), 10, 5)) == 4
+    assert listing.insert(FileEntry(os.path.join(folder, 'mid.png'), 10, 25)) == 2
+    assert [entry.name for entry in listing.entries] == ['new.png', 'a.png', 'mid.png', 'b.png',
+                                                         'c.jpg', 'old.png']
+    assert listing.remove(os.path.join(folder, 'b.png')) == 3
+    assert listing.remove(os.path.join(folder, 'b.png')) == -1
+    assert len(listing) == 5
+    
+    # 搜索结果保持添加顺序
+    results = FolderListing(sort_key=None)
+    results.load_entries([FileEntry('/p/z.png'), FileEntry('/p/a.mp4')])
+    assert results.insert(FileEntry('/p/m.png')) == 2
+    assert results.index_of('/p/a.mp4') == 1 and results.get('/p/a.mp4').is_video
+    print("  ✓ 插入与删除测试通过")
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    test_load_and_sort(pathlib.Path(tempfile.mkdtemp()))
+    test_insert_and_remove(pathlib.Path(tempfile.mkdtemp()))
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件夹变化监视测试脚本
+验证快照比较（新增、删除、重命名、修改）以及连续写入合并为一次通知
+"""
+
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _write(path, content=b'data'):
+    with open(path, 'wb') as f:
+        f.write(content)
+
+
+def _wait_for(app, condition, timeout=5):
+    """处理事件直到条件满足"""
+    import time
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+
+
+def test_diff_snapshots(tmp_path):
+    """测试快照比较：inode 相同的文件识别为重命名"""
+    print("测试 1: 快照比较...")
+    from core.folder_watcher import scan_folder, diff_snapshots
+    
+    for name in ('a.png', 'b.png', 'c.png'):
+        _write(tmp_path / name)
+    before = scan_folder(str(tmp_path))
+    assert sorted(before) == ['a.png', 'b.png', 'c.png']
+    
+    os.remove(tmp_path / 'a.png')
+    os.rename(tmp_path / 'b.png', tmp_path / 'd.png')
+    _write(tmp_path / 'c.png', b'longer content')
+    _write(tmp_path / 'e.png')
+    changes = diff_snapshots(before, scan_folder(str(tmp_path)))
+    assert changes.added == ['e.png']
+    assert changes.removed == ['a.png']
+    assert changes.renamed == [('b.png', 'd.png')]
+    assert changes.modified == ['c.png']
+    assert diff_snapshots(before, before).is_empty()
+    assert scan_folder(str(tmp_path / 'missing')) == {}
+    print("  ✓ 快照比较测试通过")
+
+
+def test_burst_is_debounced(tmp_path):
+    """测试连续写入的多个文件合并为一次通知，rescan 立即通知"""
+    print("\n测试 2: 连续写入合并...")
+    from PyQt5.QtCore import QCoreApplication
+    from core.folder_watcher import FolderWatcher
+    
+    app = QCoreApplication.instance() or QCoreApplication([])
+    folder = tmp_path / 'pictures'
+    folder.mkdir()
+    _write(folder / 'old.png')
+    watcher = FolderWatcher(debounce_ms=200)
+    events = []
+    watcher.folder_changed.connect(lambda path, changes: events.append((path, changes)))
+    assert list(watcher.watch(str(folder))) == ['old.png']
+    
+    # 批量生成的 4 张图片陆续落盘
+    for i in range(4):
+        _write(folder / f'{i}.png')
+        app.processEvents()
+    _wait_for(app, lambda: events)
+    _wait_for(app, lambda: False, timeout=0.5)
+    assert len(events) == 1
+    path, changes = events[0]
+    assert path == os.path.normpath(str(folder))
+    assert changes.added == ['0.png', '1.png', '2.png', '3.png']
+    
+    # 本程序自己修改文件后立即扫描，之后的变化通知不再重复
+    events.clear()
+    os.rename(folder / 'old.png', folder / 'new.png')
+    watcher.rescan(str(folder))
+    assert len(events) == 1 and events[0][1].renamed == [('old.png', 'new.png')]
+    _wait_for(app, lambda: False, timeout=0.5)
+    assert len(events) == 1
+    
+    watcher.clear()
+    _write(folder / 'ignored.png')
+    _wait_for(app, lambda: False, timeout=0.5)
+    assert len(events) == 1
+    print("  ✓ 连续写入合并测试通过")
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    test_diff_snapshots(pathlib.Path(tempfile.mkdtemp()))
+    test_burst_is_debounced(pathlib.Path(tempfile.mkdtemp()))
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生成历史存储测试脚本
+验证追加写入、分页、删除标记与整理、旧版历史导入以及后台文件检查
+"""
+
+import sys
+import os
+import json
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_append_page_and_remove(tmp_path):
+    """测试追加只写一行、分页从新到旧、删除后重新加载结果一致"""
+    print("测试 1: 追加、分页与删除...")
+    from core.history_store import HistoryStore
+    
+    history_file = tmp_path / 'history.jsonl'
+    store = HistoryStore(str(history_file))
+    for i in range(10):
+        store.append([{'path': f'{i}.png', 'model': 'wan2.5-t2i-preview'}])
+    assert len(history_file.read_text(encoding='utf-8').splitlines()) == 10
+    assert [r['path'] for r in store.page(0, 3)] == ['9.png', '8.png', '7.png']
+    assert [r['path'] for r in store.page(8)] == ['1.png', '0.png']
+    
+    removed = [r['id'] for r in store.page(1, 2)]
+    assert store.remove(removed + ['unknown']) == 2
+    assert store.remove(removed) == 0
+    assert len(history_file.read_text(encoding='utf-8').splitlines()) == 11
+    
+    reloaded = HistoryStore(str(history_file))
+    assert reloaded.count() == 8
+    assert [r['path'] for r in reloaded.page(0, 3)] == ['9.png', '6.png', '5.png']
+    
+    reloaded.clear()
+    assert HistoryStore(str(history_file)).count() == 0
+    print("  ✓ 追加、分页与删除测试通过")
+
+
+def test_compact_and_legacy_import(tmp_path):
+    """测试删除标记较多时整理文件，以及首次加载时导入旧版 JSON 历史"""
+    print("\n测试 2: 整理与旧版导入...")
+    from core.history_store import HistoryStore
+    
+    legacy_file = tmp_path / 'text2image_history.json'
+    legacy = [{'path': f'{i}.png', 'seed': str(i)} for i in range(3)]  # 旧版从新到旧排列
+    legacy_file.write_text(json.dumps(legacy), encoding='utf-8')
+    history_file = tmp_path / 'text2image_history.jsonl'
+    
+    store = HistoryStore(str(history_file), str(legacy_file))
+    assert [r['path'] for r in store.page()] == ['0.png', '1.png', '2.png']
+    assert json.loads(legacy_file.read_text(encoding='utf-8')) == legacy
+    
+    records = store.append({'path': f'new{i}.png'} for i in range(HistoryStore.COMPACT_MIN_REMOVED))
+    for record in records:
+        store.remove([record['id']])
+    lines = len(history_file.read_text(encoding='utf-8').splitlines())
+    assert lines == 3 + 2 * HistoryStore.COMPACT_MIN_REMOVED
+    
+    reloaded = HistoryStore(str(history_file), str(legacy_file))
+    assert [r['path'] for r in reloaded.page()] == ['0.png', '1.png', '2.png']
+    assert len(history_file.read_text(encoding='utf-8').splitlines()) == 3
+    print("  ✓ 整理与旧版导入测试通过")
+
+
+def test_missing_file_checker(tmp_path):
+    """测试后台检查只报告已不存在的图片"""
+    print("\n测试 3: 文件检查...")
+    from core.history_store import HistoryStore, MissingFileChecker
+    
+    existing = tmp_path / 'exists.png'
+    existing.write_bytes(b'png')
+    store = HistoryStore(str(tmp_path / 'history.jsonl'))
+    kept, missing = store.append([{'path': str(existing)}, {'path': str(tmp_path / 'gone.png')}])
+    
+    found = []
+    checker = MissingFileChecker(store.page())
+    checker.missing_found.connect(found.extend)
+    checker.run()
+    assert found == [missing['id']]
+    
+    store.remove(found)
+    assert [r['id'] for r in store.page()] == [kept['id']]
+    print("  ✓ 文件检查测试通过")
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    test_append_page_and_remove(pathlib.Path(tempfile.mkdtemp()))
+    test_compact_and_legacy_import(pathlib.Path(tempfile.mkdtemp()))
+    test_missing_file_checker(pathlib.Path(tempfile.mkdtemp()))
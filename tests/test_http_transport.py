@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP 传输层测试脚本
+验证连接池复用与统计
+"""
+
+import sys
+import os
+import threading
+import http.server
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class _KeepAliveHandler(http.server.BaseHTTPRequestHandler):
+    """返回固定 JSON 的 keep-alive 服务"""
+    protocol_version = 'HTTP/1.1'
+    
+    def do_GET(self):
+        body = b'{"output": {"task_id": "t1", "task_status": "RUNNING"}}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+def _start_server():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_poll_reuses_connection():
+    """测试连续轮询复用同一个连接"""
+    print("测试 1: 轮询复用连接...")
+    from core.http_transport import HttpTransport
+    
+    server = _start_server()
+    try:
+        transport = HttpTransport(pool_size=2)
+        url = f'http://127.0.0.1:{server.server_port}/tasks/t1'
+        for _ in range(5):
+            response = transport.get(url, endpoint='query')
+            assert response.json()['output']['task_status'] == 'RUNNING'
+        
+        stats = transport.get_stats()
+        assert stats['requests'] == 5, stats
+        assert stats['connections'] == 1, stats
+        assert stats['endpoints']['query']['reused'] == 4, stats
+        transport.close()
+        print("  ✓ 轮询复用连接测试通过")
+    finally:
+        server.shutdown()
+
+
+def test_endpoint_timeouts():
+    """测试按端点选择超时"""
+    print("\n测试 2: 端点超时配置...")
+    from core.http_transport import HttpTransport
+    
+    transport = HttpTransport(timeouts={'query': (1, 2)})
+    assert transport.get_timeout('query') == (1, 2)
+    assert transport.get_timeout('unknown') == transport.timeouts['default']
+    transport.close()
+    print("  ✓ 端点超时配置测试通过")
+
+
+if __name__ == "__main__":
+    test_poll_reuses_connection()
+    test_endpoint_timeouts()
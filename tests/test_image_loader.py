@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图片加载测试脚本
+验证按目标尺寸解码（保持比例、不放大）以及预览图的最长边上限
+"""
+
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _make_image(path, width, height):
+    from PyQt5.QtGui import QImage, QColor
+    image = QImage(width, height, QImage.Format_RGB32)
+    image.fill(QColor('blue'))
+    image.save(str(path))
+
+
+def test_scaled_decode(tmp_path):
+    """测试解码结果按比例缩小到目标尺寸，小图不放大"""
+    print("测试 1: 按目标尺寸解码...")
+    from core.image_loader import load_scaled_image
+    
+    for name in ('large.jpg', 'large.png'):
+        _make_image(tmp_path / name, 1600, 900)
+        image = load_scaled_image(str(tmp_path / name), (250, 250))
+        assert (image.width(), image.height()) == (250, 140)
+    _make_image(tmp_path / 'small.png', 100, 50)
+    image = load_scaled_image(str(tmp_path / 'small.png'), (250, 250))
+    assert (image.width(), image.height()) == (100, 50)
+    assert load_scaled_image(str(tmp_path / 'missing.png'), (250, 250)).isNull()
+    print("  ✓ 按目标尺寸解码测试通过")
+
+
+def test_preview_capped(tmp_path):
+    """测试预览图只保留不超过上限的尺寸"""
+    print("\n测试 2: 预览图尺寸上限...")
+    from PyQt5.QtGui import QGuiApplication
+    from config.settings import settings
+    from core.image_loader import load_preview_pixmap
+    
+    app = QGuiApplication.instance() or QGuiApplication([])
+    _make_image(tmp_path / 'tall.jpg', 900, 1800)
+    pixmap = load_preview_pixmap(str(tmp_path / 'tall.jpg'), 600)
+    assert (pixmap.width(), pixmap.height()) == (300, 600)
+    pixmap = load_preview_pixmap(str(tmp_path / 'tall.jpg'))
+    assert max(pixmap.width(), pixmap.height()) == min(1800, settings.PREVIEW_MAX_SIZE)
+    assert load_preview_pixmap(str(tmp_path / 'missing.png')).isNull()
+    print("  ✓ 预览图尺寸上限测试通过")
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    test_scaled_decode(pathlib.Path(tempfile.mkdtemp()))
+    test_preview_capped(pathlib.Path(tempfile.mkdtemp()))
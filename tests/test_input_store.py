@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+输入文件存储测试脚本
+验证按内容去重、跨工程共享数据、同名文件自动改名、哈希缓存以及存储清理
+"""
+
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_import_dedup_and_link(tmp_path):
+    """测试同一文件导入多个工程时只保存一份，重复导入直接跳过"""
+    print("测试 1: 去重与链接...")
+    from core.input_store import InputStore
+    
+    store = InputStore(str(tmp_path / 'store'))
+    source = tmp_path / 'ref.png'
+    source.write_bytes(b'reference-image' * 1000)
+    
+    dest_a, method_a = store.import_file(str(source), str(tmp_path / 'a' / 'pictures'))
+    dest_b, method_b = store.import_file(str(source), str(tmp_path / 'b' / 'pictures'))
+    assert method_a in ('hardlink', 'reflink', 'copy') and method_a == method_b
+    assert open(dest_a, 'rb').read() == open(dest_b, 'rb').read() == source.read_bytes()
+    
+    objects = [f for _, _, files in os.walk(store.objects_dir) for f in files]
+    assert len(objects) == 1
+    if method_a == 'hardlink':
+        assert os.path.samefile(dest_a, dest_b)
+    
+    # 再次导入同一文件：工程中已有相同内容，不创建新文件
+    assert store.import_file(str(source), str(tmp_path / 'a' / 'pictures')) == (dest_a, 'exists')
+    assert os.listdir(tmp_path / 'a' / 'pictures') == ['ref.png']
+    store.close()
+    print("  ✓ 去重与链接测试通过")
+
+
+def test_name_collision_and_hash_cache(tmp_path):
+    """测试同名不同内容时自动改名，以及未变化的文件不重新计算哈希"""
+    print("\n测试 2: 同名改名与哈希缓存...")
+    from core.input_store import InputStore
+    
+    store = InputStore(str(tmp_path / 'store'))
+    pictures = tmp_path / 'project' / 'pictures'
+    first = tmp_path / 'day1' / 'shot.png'
+    second = tmp_path / 'day2' / 'shot.png'
+    first.parent.mkdir()
+    second.parent.mkdir()
+    first.write_bytes(b'first')
+    second.write_bytes(b'second')
+    
+    store.import_file(str(first), str(pictures))
+    dest, _ = store.import_file(str(second), str(pictures))
+    assert os.path.basename(dest) == 'shot (1).png'
+    assert (pictures / 'shot.png').read_bytes() == b'first'
+    assert store.import_file(str(second), str(pictures)) == (dest, 'exists')
+    
+    # 大小和修改时间未变时使用缓存，不读取文件内容
+    digest = store.hash_file(str(first))
+    stat = first.stat()
+    first.write_bytes(b'fir5t')
+    os.utime(first, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert store.hash_file(str(first)) == digest
+    
+    # 修改时间变化后重新计算
+    os.utime(first, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    assert store.hash_file(str(first)) != digest
+    store.close()
+    print("  ✓ 同名改名与哈希缓存测试通过")
+
+
+def test_cross_device_and_garbage_collection(tmp_path):
+    """测试跨文件系统时只复制一次，以及清理不再被工程引用的存储文件"""
+    print("\n测试 3: 跨文件系统与清理...")
+    from core.input_store import InputStore
+    
+    class _OtherDeviceStore(InputStore):
+        def _same_device(self, folder):
+            return False
+    
+    source = tmp_path / 'ref.png'
+    source.write_bytes(b'reference-image' * 1000)
+    
+    # 跨文件系统：直接复制到工程，不在存储中另存一份
+    remote = _OtherDeviceStore(str(tmp_path / 'remote_store'))
+    dest, method = remote.import_file(str(source), str(tmp_path / 'remote' / 'pictures'))
+    assert method == 'copy' and open(dest, 'rb').read() == source.read_bytes()
+    assert [f for _, _, files in os.walk(remote.objects_dir) for f in files] == []
+    assert remote.import_file(str(source), str(tmp_path / 'remote' / 'pictures')) == (dest, 'exists')
+    remote.close()
+    
+    store = InputStore(str(tmp_path / 'store'))
+    dest_a, _ = store.import_file(str(source), str(tmp_path / 'a' / 'pictures'))
+    objects = lambda: [f for _, _, files in os.walk(store.objects_dir) for f in files]
+    (tmp_path / 'store' / 'objects' / 'ab').mkdir(exist_ok=True)
+    (tmp_path / 'store' / 'objects' / 'ab' / 'abc.png.1.tmp').write_bytes(b'partial')
+    
+    # 刚导入的文件不清理
+    assert store.collect_garbage() == 0 and len(objects()) == 2
+    # 模拟 reflink/复制 导入：工程文件是独立的 inode，存储文件的链接数为 1
+    data = open(dest_a, 'rb').read()
+    os.remove(dest_a)
+    with open(dest_a, 'wb') as f:
+        f.write(data)
+    
+    # 工程仍引用着存储文件（无论硬链接、reflink 还是复制），只清理临时文件
+    assert store.collect_garbage(min_age=0) == 1 and len(objects()) == 1
+    assert store.collect_garbage(min_age=0) == 0
+    os.remove(dest_a)
+    assert store.collect_garbage(min_age=0) == 1
+    assert objects() == []
+    
+    # 清理后再次导入会重新存入
+    dest_b, _ = store.import_file(str(source), str(tmp_path / 'b' / 'pictures'))
+    assert open(dest_b, 'rb').read() == source.read_bytes() and len(objects()) == 1
+    store.close()
+    print("  ✓ 跨文件系统与清理测试通过")
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    test_import_dedup_and_link(pathlib.Path(tempfile.mkdtemp()))
+    test_name_collision_and_hash_cache(pathlib.Path(tempfile.mkdtemp()))
+    test_cross_device_and_garbage_collection(pathlib.Path(tempfile.mkdtemp()))
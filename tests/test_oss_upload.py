@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OSS 上传测试脚本
+验证图片以流式 multipart 上传，提交请求只携带 oss:// 引用，
+已上传的文件在有效期内不重复上传
+"""
+
+import sys
+import os
+import json
+import email.parser
+import email.policy
+import threading
+import http.server
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class _DashScopeHandler(http.server.BaseHTTPRequestHandler):
+    """模拟 getPolicy、OSS 表单上传与提交接口"""
+    protocol_version = 'HTTP/1.1'
+    uploads = []
+    submissions = []
+    
+    def _send_json(self, data, status=200):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_GET(self):
+        host = f'http://127.0.0.1:{self.server.server_port}'
+        self._send_json({'data': {
+            'upload_host': f'{host}/oss',
+            'upload_dir': 'dashscope-instant/abc',
+            'oss_access_key_id': 'id',
+            'signature': 'sig',
+            'policy': 'policy',
+            'x_oss_object_acl': 'private',
+            'x_oss_forbid_overwrite': 'true'
+        }})
+    
+    def do_POST(self):
+        if self.path == '/oss':
+            assert 'chunked' not in self.headers.get('Transfer-Encoding', '')
+            body = self.rfile.read(int(self.headers['Content-Length']))
+            message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+            )
+            form = {
+                part.get_param('name', header='content-disposition'): part.get_payload(decode=True)
+                for part in message.iter_parts()
+            }
+            type(self).uploads.append((form['key'].decode(), form['file']))
+            self.send_response(200)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length))
+        type(self).submissions.append((dict(self.headers), payload))
+        self._send_json({'output': {'task_id': 't1', 'task_status': 'PENDING'}})
+    
+    def log_message(self, *args):
+        pass
+
+
+def test_image_edit_uses_oss_references(tmp_path):
+    """测试图像编辑提交前上传图片，请求体只包含 oss:// 引用"""
+    print("测试 1: 图片 OSS 上传...")
+    from core.api_client import DashScopeClient
+    from core.upload_cache import UploadCache
+    
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _DashScopeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        image_path = tmp_path / 'input.png'
+        image_data = os.urandom(300 * 1024)
+        image_path.write_bytes(image_data)
+        
+        client = DashScopeClient()
+        client.base_url = f'http://127.0.0.1:{server.server_port}/api/v1'
+        client.upload_cache = UploadCache(str(tmp_path / 'upload_cache.json'))
+        client.submit_image_edit([str(image_path)], 'prompt', model='wan2.5-i2i-preview', n=1)
+        
+        key, uploaded = _DashScopeHandler.uploads[-1]
+        assert key == 'dashscope-instant/abc/input.png'
+        assert uploaded == image_data
+        
+        headers, payload = _DashScopeHandler.submissions[-1]
+        assert payload['input']['images'] == ['oss://dashscope-instant/abc/input.png']
+        assert headers.get('X-DashScope-OssResourceResolve') == 'enable'
+        assert len(json.dumps(payload)) < 1024
+        print("  ✓ 图片 OSS 上传测试通过")
+    finally:
+        server.shutdown()
+
+
+def test_upload_cache_skips_reupload(tmp_path):
+    """测试多个文件并发上传并报告进度，再次使用时直接复用缓存地址"""
+    print("\n测试 2: 上传缓存...")
+    from core.api_client import DashScopeClient
+    from core.upload_cache import UploadCache
+    
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _DashScopeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        videos = []
+        for name in ('a.mp4', 'b.mp4'):
+            path = tmp_path / name
+            path.write_bytes(os.urandom(200 * 1024))
+            videos.append(str(path))
+        
+        cache_file = str(tmp_path / 'upload_cache.json')
+        client = DashScopeClient()
+        client.base_url = f'http://127.0.0.1:{server.server_port}/api/v1'
+        client.upload_cache = UploadCache(cache_file)
+        
+        progress = {}
+        uploads_before = len(_DashScopeHandler.uploads)
+        urls = client.upload_files(videos, 'wan2.6-r2v',
+                                   lambda path, sent, total: progress.__setitem__(path, sent / total))
+        assert urls == ['oss://dashscope-instant/abc/a.mp4', 'oss://dashscope-instant/abc/b.mp4']
+        assert len(_DashScopeHandler.uploads) - uploads_before == 2
+        assert progress == {videos[0]: 1.0, videos[1]: 1.0}
+        
+        # 重新加载缓存文件（模拟重启），相同内容不再上传
+        client.upload_cache = UploadCache(cache_file)
+        assert client.upload_files(videos, 'wan2.6-r2v') == urls
+        assert len(_DashScopeHandler.uploads) - uploads_before == 2
+        
+        # 其他模型的上传凭证不同，需要重新上传；即将过期的地址也不复用
+        client.upload_file_and_get_url(videos[0], 'wan2.5-i2v-preview')
+        client.upload_cache.put(videos[1], 'wan2.6-r2v', urls[1], ttl=60)
+        client.upload_file_and_get_url(videos[1], 'wan2.6-r2v')
+        assert len(_DashScopeHandler.uploads) - uploads_before == 4
+        print("  ✓ 上传缓存测试通过")
+    finally:
+        server.shutdown()
+
+
+def test_upload_cache_concurrent_save(tmp_path):
+    """测试多个线程同时记录上传结果时缓存文件完整，过期地址的哈希记录被清理"""
+    print("\n测试 3: 上传缓存并发保存...")
+    from core.upload_cache import UploadCache
+    
+    files = []
+    for i in range(16):
+        path = tmp_path / f'{i}.png'
+        path.write_bytes(os.urandom(1024))
+        files.append(str(path))
+    cache_file = str(tmp_path / 'cache' / 'upload_cache.json')
+    cache = UploadCache(cache_file)
+    
+    errors = []
+    def worker(paths):
+        try:
+            for path in paths:
+                cache.put(path, 'wan2.6-r2v', f'oss://bucket/{os.path.basename(path)}')
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=worker, args=(files[i::4],)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors, errors
+    assert os.listdir(tmp_path / 'cache') == ['upload_cache.json']
+    
+    reloaded = UploadCache(cache_file)
+    assert all(reloaded.get(path, 'wan2.6-r2v') == f'oss://bucket/{os.path.basename(path)}'
+               for path in files)
+    
+    # 地址过期后，对应文件的哈希记录随之清理
+    reloaded.put(files[0], 'wan2.6-r2v', 'oss://bucket/0.png', ttl=-1)
+    assert os.path.abspath(files[0]) not in reloaded.hashes
+    assert len(UploadCache(cache_file).hashes) == 15
+    print("  ✓ 上传缓存并发保存测试通过")
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    test_image_edit_uses_oss_references(pathlib.Path(tempfile.mkdtemp()))
+    test_upload_cache_skips_reupload(pathlib.Path(tempfile.mkdtemp()))
+    test_upload_cache_concurrent_save(pathlib.Path(tempfile.mkdtemp()))
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自适应轮询节奏测试脚本
+验证历史耗时统计与轮询间隔安排
+"""
+
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_cadence_sparse_dense_backoff():
+    """测试预计完成前稀疏、区间内密集、超时后退避"""
+    print("测试 1: 轮询节奏...")
+    from core.poll_cadence import DurationStats, PollCadence
+    
+    stats = DurationStats([100, 110, 120, 130, 140, 150, 160, 170, 180, 190, 200])
+    cadence = PollCadence('video', stats)
+    assert cadence.window_start == 110 and cadence.window_end == 190
+    
+    # 早期：等待较长
+    assert cadence.next_delay(0) == 55
+    assert cadence.next_delay(80) == 15
+    # 区间内：密集
+    assert cadence.next_delay(150) == cadence.dense_interval == 4
+    # 超出区间：间隔随超出时间增长
+    delays = [cadence.next_delay(t) for t in (200, 240, 320)]
+    assert delays == sorted(delays) and delays[-1] > cadence.dense_interval
+    
+    # 直到超时的查询次数远少于固定 5 秒轮询的 180 次
+    elapsed, polls = 0.0, 0
+    while not cadence.is_expired(elapsed):
+        elapsed += cadence.next_delay(elapsed)
+        polls += 1
+    assert polls < 60, polls
+    print("  ✓ 轮询节奏测试通过")
+
+
+def test_cadence_without_history():
+    """测试样本不足时使用先验值与默认超时"""
+    print("\n测试 2: 无历史数据...")
+    from core.poll_cadence import DurationStats, PollCadence
+    from config.settings import settings
+    
+    cadence = PollCadence('image', DurationStats([5]))
+    assert cadence.expected == settings.TASK_EXPECTED_SECONDS['image']
+    assert cadence.timeout == settings.TASK_POLL_TIMEOUTS['image']
+    assert cadence.is_expired(settings.TASK_POLL_TIMEOUTS['image'])
+    assert cadence.next_delay(cadence.timeout - 1) <= 1
+    print("  ✓ 无历史数据测试通过")
+
+
+def test_task_manager_records_duration(tmp_path):
+    """测试任务管理器记录耗时并估算剩余时间"""
+    print("\n测试 3: 记录耗时...")
+    from datetime import datetime, timedelta
+    from core.task_manager import TaskManager
+    
+    manager = TaskManager(str(tmp_path / 'inflight.json'))
+    manager.tasks_file = str(tmp_path / 'tasks.json')
+    
+    for seconds in (100, 200, 300):
+        task = manager.create_task('p', 'wan2.5-i2v-preview', '720P', duration=5)
+        submitted = datetime.now() - timedelta(seconds=seconds)
+        manager.update_task(task.id, async_task_id='a', submitted_at=submitted.isoformat())
+        manager.update_task(task.id, status='SUCCEEDED')
+        assert abs(manager.get_task(task.id).elapsed_seconds - seconds) < 5
+    
+    stats = manager.get_duration_stats('wan2.5-i2v-preview', '720P', 5)
+    assert stats.count == 3 and stats.percentile(50) >= 195
+    # 时长不同时放宽到 模型+分辨率
+    assert manager.get_duration_stats('wan2.5-i2v-preview', '720P', 10).count == 3
+    
+    running = manager.create_task('p', 'wan2.5-i2v-preview', '720P', duration=5)
+    manager.update_task(running.id, async_task_id='b')
+    remaining = manager.estimate_remaining(running)
+    assert remaining is not None and remaining > 180
+    print("  ✓ 记录耗时测试通过")
+
+
+def test_duration_samples_are_global(tmp_path):
+    """测试耗时样本不随工程切换和归档丢失"""
+    print("\n测试 4: 跨工程耗时样本...")
+    from datetime import datetime, timedelta
+    from core.task_manager import TaskManager
+    
+    index_file = str(tmp_path / 'inflight.json')
+    manager = TaskManager(index_file)
+    manager.tasks_file = str(tmp_path / 'a' / 'tasks.json')
+    for seconds in (100, 200, 300):
+        task = manager.create_task('p', 'wan2.5-i2v-preview', '720P', duration=5)
+        submitted = datetime.now() - timedelta(seconds=seconds)
+        manager.update_task(task.id, async_task_id='a', submitted_at=submitted.isoformat())
+        manager.update_task(task.id, status='SUCCEEDED')
+    
+    # 切换到另一个工程后仍使用之前的样本
+    manager.tasks_file = str(tmp_path / 'b' / 'tasks.json')
+    assert manager.get_duration_stats('wan2.5-i2v-preview', '720P', 5).count == 3
+    
+    # 归档全部任务后重新打开，样本仍然保留
+    manager.tasks_file = str(tmp_path / 'a' / 'tasks.json')
+    assert manager.archive_tasks(max_age_days=-1) == 3
+    assert manager.get_all_tasks() == []
+    manager.close()
+    reopened = TaskManager(index_file)
+    reopened.tasks_file = str(tmp_path / 'b' / 'tasks.json')
+    stats = reopened.get_duration_stats('wan2.5-i2v-preview', '720P', 5)
+    assert stats.count == 3 and stats.percentile(50) >= 195
+    assert reopened.get_duration_stats('wan2.6-i2v', '720P', 5).count == 0
+    reopened.close()
+    print("  ✓ 跨工程耗时样本测试通过")
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    test_cadence_sparse_dense_backoff()
+    test_cadence_without_history()
+    test_task_manager_records_duration(pathlib.Path(tempfile.mkdtemp()))
+    test_duration_samples_are_global(pathlib.Path(tempfile.mkdtemp()))
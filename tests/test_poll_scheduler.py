@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+任务轮询调度器测试脚本
+验证集中轮询、固定线程数与只写入变化字段
+"""
+
+import sys
+import os
+import time
+import threading
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class _FakeClient:
+    """按查询次数返回 RUNNING，之后返回 FAILED 的假客户端"""
+    
+    def __init__(self, running_polls=2):
+        self.running_polls = running_polls
+        self.calls = {}
+        self.lock = threading.Lock()
+    
+    def query_task(self, async_task_id):
+        with self.lock:
+            count = self.calls.get(async_task_id, 0) + 1
+            self.calls[async_task_id] = count
+        if count <= self.running_polls:
+            return {'output': {'task_status': 'RUNNING'}}
+        return {'output': {'task_status': 'FAILED', 'message': 'boom', 'code': 'E1'}}
+
+
+class _FakeBulkClient(_FakeClient):
+    """支持批量查询的假客户端：前 running_polls 轮批量查询返回运行中"""
+    
+    def __init__(self, running_polls=2):
+        super().__init__(running_polls=0)
+        self.bulk_rounds = running_polls
+        self.list_calls = 0
+        self.async_ids = set()
+    
+    def list_tasks(self, start_time, end_time, status=None, model_name=None, page_size=100):
+        with self.lock:
+            self.list_calls += 1
+            rounds = self.list_calls
+        # 每轮查询 PENDING 和 RUNNING 两次
+        if status == 'RUNNING' and rounds <= self.bulk_rounds * 2:
+            return [{'task_id': async_id, 'status': 'RUNNING'} for async_id in self.async_ids]
+        return []
+
+
+class _CountingTaskManager:
+    """记录 update_task 调用的任务管理器"""
+    
+    def __init__(self, task_manager):
+        self.task_manager = task_manager
+        self.updates = []
+    
+    def get_task(self, task_id):
+        return self.task_manager.get_task(task_id)
+    
+    def update_task(self, task_id, **kwargs):
+        self.updates.append((task_id, kwargs))
+        return self.task_manager.update_task(task_id, **kwargs)
+    
+    def __getattr__(self, name):
+        return getattr(self.task_manager, name)
+
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_scheduler_polls_until_finished(tmp_path):
+    """测试多个任务共享固定线程轮询直到结束"""
+    print("测试 1: 集中轮询...")
+    from core.task_manager import TaskManager
+    from core.poll_scheduler import TaskPollScheduler
+    
+    manager = TaskManager(str(tmp_path / 'inflight.json'))
+    manager.tasks_file = str(tmp_path / 'tasks.json')
+    tracked = _CountingTaskManager(manager)
+    client = _FakeClient(running_polls=2)
+    
+    threads_before = threading.active_count()
+    scheduler = TaskPollScheduler(tracked, api_client=client, max_workers=2, poll_interval=0.01)
+    try:
+        task_ids = []
+        for i in range(20):
+            task = manager.create_task('p', 'wan2.5-i2v-preview', '720P')
+            manager.update_task(task.id, async_task_id=f'async-{i}', status='PENDING')
+            task_ids.append(task.id)
+            scheduler.add_task(task.id, str(tmp_path))
+        
+        assert _wait_until(lambda: scheduler.monitored_count() == 0)
+        # 1 个调度线程 + 最多 2 个查询线程 + 1 个任务写入线程
+        assert threading.active_count() - threads_before <= 4
+        
+        for task_id in task_ids:
+            task = manager.get_task(task_id)
+            assert task.error_code == 'E1'
+        
+        # 每个任务: RUNNING 状态一次 + FAILED 状态一次，重复的 RUNNING 不写入
+        assert len(tracked.updates) == 40, len(tracked.updates)
+        print("  ✓ 集中轮询测试通过")
+    finally:
+        scheduler.shutdown()
+
+
+def test_scheduler_bulk_refresh(tmp_path):
+    """测试大量任务同时到期时使用批量查询，只对已结束的任务逐个查询"""
+    print("\n测试 2: 批量查询...")
+    from core.task_manager import TaskManager
+    from core.poll_scheduler import TaskPollScheduler
+    
+    manager = TaskManager(str(tmp_path / 'inflight.json'))
+    manager.tasks_file = str(tmp_path / 'tasks.json')
+    tracked = _CountingTaskManager(manager)
+    client = _FakeBulkClient(running_polls=2)
+    
+    task_ids = []
+    for i in range(30):
+        task = manager.create_task('p', 'wan2.5-i2v-preview', '720P')
+        manager.update_task(task.id, async_task_id=f'async-{i}')
+        client.async_ids.add(f'async-{i}')
+        task_ids.append(task.id)
+    
+    scheduler = TaskPollScheduler(tracked, api_client=client, max_workers=2, poll_interval=0.05)
+    try:
+        for task_id in task_ids:
+            scheduler.add_task(task_id, str(tmp_path), delay=0.2)
+        
+        assert _wait_until(lambda: scheduler.monitored_count() == 0)
+        # 运行中的轮次只发批量请求，每个任务只在结束后单独查询一次
+        assert sum(client.calls.values()) == 30, client.calls
+        assert client.list_calls >= 4
+        for task_id in task_ids:
+            assert manager.get_task(task_id).error_code == 'E1'
+        print("  ✓ 批量查询测试通过")
+    finally:
+        scheduler.shutdown()
+
+
+def test_scheduler_backs_off_after_timeout(tmp_path):
+    """测试超过超时时间仍未结束的任务按最长间隔查询，不会反复立即查询"""
+    print("\n测试 3: 超时后退避...")
+    from datetime import datetime, timedelta
+    from config.settings import settings
+    from core.task_manager import TaskManager
+    from core.poll_scheduler import TaskPollScheduler
+    
+    manager = TaskManager(str(tmp_path / 'inflight.json'))
+    manager.tasks_file = str(tmp_path / 'tasks.json')
+    client = _FakeClient(running_polls=1000)
+    
+    task = manager.create_task('p', 'wan2.5-i2v-preview', '720P')
+    submitted = datetime.now() - timedelta(seconds=settings.TASK_POLL_TIMEOUTS['video'] + 600)
+    manager.update_task(task.id, async_task_id='async-late', submitted_at=submitted.isoformat())
+    
+    scheduler = TaskPollScheduler(manager, api_client=client, max_workers=2)
+    try:
+        scheduler.add_task(task.id, str(tmp_path), delay=0)
+        assert _wait_until(lambda: client.calls.get('async-late', 0) >= 1)
+        time.sleep(0.3)
+        # 只查询了一次，下一次安排在最长间隔之后
+        assert client.calls['async-late'] == 1, client.calls
+        assert scheduler.is_monitoring(task.id)
+        with scheduler._cond:
+            deadline = min(d for d, _, task_id in scheduler._heap if task_id == task.id)
+        assert deadline - time.monotonic() > settings.TASK_POLL_MAX_INTERVAL - 5
+        print("  ✓ 超时后退避测试通过")
+    finally:
+        scheduler.shutdown()
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    test_scheduler_polls_until_finished(pathlib.Path(tempfile.mkdtemp()))
+    test_scheduler_bulk_refresh(pathlib.Path(tempfile.mkdtemp()))
+    test_scheduler_backs_off_after_timeout(pathlib.Path(tempfile.mkdtemp()))
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+请求限流与重试测试脚本
+验证令牌桶平滑、限流重试与 Retry-After
+"""
+
+import sys
+import os
+import time
+import threading
+import http.server
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class _ThrottlingHandler(http.server.BaseHTTPRequestHandler):
+    """前 throttle_count 个请求返回 429，之后返回成功"""
+    protocol_version = 'HTTP/1.1'
+    throttle_count = 2
+    requests_seen = 0
+    
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        type(self).requests_seen += 1
+        if type(self).requests_seen <= self.throttle_count:
+            body = b'{"code": "Throttling.RateQuota", "message": "Requests rate limit exceeded"}'
+            self.send_response(429)
+            self.send_header('Retry-After', '0.1')
+        else:
+            body = b'{"output": {"task_id": "t1", "task_status": "PENDING"}}'
+            self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+class _DroppingHandler(http.server.BaseHTTPRequestHandler):
+    """读取请求后不响应直接断开（服务端可能已受理请求）"""
+    protocol_version = 'HTTP/1.1'
+    requests_seen = 0
+    
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        type(self).requests_seen += 1
+        self.close_connection = True
+    
+    def log_message(self, *args):
+        pass
+
+
+def test_token_bucket_smooths_burst():
+    """测试令牌桶把突发请求平滑到配置的速率"""
+    print("测试 1: 令牌桶平滑...")
+    from core.rate_limiter import RateLimiter
+    
+    limiter = RateLimiter(endpoint_limits={'submit': (20, 2)}, model_limit=(1000, 1000), max_wait=5)
+    start = time.monotonic()
+    for _ in range(12):
+        assert limiter.acquire('submit', model='wan2.6-t2i')
+    elapsed = time.monotonic() - start
+    # 突发 2 个，其余 10 个按每秒 20 个发送，约 0.5 秒
+    assert 0.4 <= elapsed < 1.5, elapsed
+    assert limiter.stats.snapshot()['delayed'] == 10
+    
+    # 排队时间超过上限的请求直接放弃
+    limiter = RateLimiter(endpoint_limits={'submit': (1, 1)}, model_limit=None, max_wait=0.5)
+    assert limiter.acquire('submit')
+    assert limiter.acquire('submit') is False
+    assert limiter.stats.snapshot()['dropped'] == 1
+    print("  ✓ 令牌桶平滑测试通过")
+
+
+def test_retry_on_throttling():
+    """测试 429 限流时按 Retry-After 重试直到成功"""
+    print("\n测试 2: 限流重试...")
+    from core.api_client import DashScopeClient
+    from core.rate_limiter import RateLimiter, RetryPolicy
+    
+    _ThrottlingHandler.requests_seen = 0
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _ThrottlingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = DashScopeClient()
+        client.rate_limiter = RateLimiter(endpoint_limits={}, model_limit=None)
+        client.retry_policy = RetryPolicy(max_retries=3, base_delay=0.01, max_delay=0.05)
+        
+        url = f'http://127.0.0.1:{server.server_port}/services/aigc/video-generation/video-synthesis'
+        result = client._post_json(url, {}, {'model': 'm'}, 'submit', model='m')
+        assert result['output']['task_id'] == 't1'
+        
+        stats = client.get_request_stats()
+        assert stats['throttled'] == 2 and stats['retried'] == 2 and stats['dropped'] == 0, stats
+        
+        # 重试耗尽时放弃
+        _ThrottlingHandler.requests_seen = -10
+        client.retry_policy = RetryPolicy(max_retries=1, base_delay=0.01, max_delay=0.05)
+        try:
+            client._post_json(url, {}, {'model': 'm'}, 'submit', model='m')
+            assert False, "应抛出异常"
+        except Exception as e:
+            assert '429' in str(e)
+        assert client.get_request_stats()['dropped'] == 1
+        print("  ✓ 限流重试测试通过")
+    finally:
+        server.shutdown()
+
+
+def test_retry_policy():
+    """测试退避时间与可重试判断"""
+    print("\n测试 3: 重试策略...")
+    from core.rate_limiter import RetryPolicy
+    
+    policy = RetryPolicy(max_retries=5, base_delay=1, max_delay=8)
+    for attempt in range(6):
+        assert 0 <= policy.get_delay(attempt) <= min(8, 2 ** attempt)
+    assert policy.get_delay(0, retry_after=3) >= 3
+    
+    assert RetryPolicy.is_retryable('GET', 500)
+    assert not RetryPolicy.is_retryable('POST', 500)
+    assert RetryPolicy.is_retryable('POST', 400, 'Throttling.RateQuota')
+    assert not RetryPolicy.is_retryable('POST', 400, 'InvalidParameter')
+    print("  ✓ 重试策略测试通过")
+
+
+def test_post_retry_only_before_connect():
+    """测试提交请求只在连接未建立时重试，连接建立后断开不重试"""
+    print("\n测试 4: 提交请求的连接错误重试...")
+    import socket
+    import requests
+    from core.api_client import DashScopeClient
+    from core.rate_limiter import RateLimiter, RetryPolicy
+    
+    client = DashScopeClient()
+    client.rate_limiter = RateLimiter(endpoint_limits={}, model_limit=None)
+    client.retry_policy = RetryPolicy(max_retries=2, base_delay=0.01, max_delay=0.05)
+    
+    # 连接被拒绝：请求没有发出，可以重试
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        closed_port = sock.getsockname()[1]
+    try:
+        client.request('POST', f'http://127.0.0.1:{closed_port}/submit', endpoint='submit', data='{}')
+        assert False, "应抛出异常"
+    except requests.ConnectionError:
+        pass
+    assert client.get_request_stats()['retried'] == 2
+    
+    # 服务端读取请求后断开：可能已创建任务，不能重试
+    _DroppingHandler.requests_seen = 0
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _DroppingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        try:
+            client.request('POST', f'http://127.0.0.1:{server.server_port}/submit',
+                           endpoint='submit', data='{}')
+            assert False, "应抛出异常"
+        except requests.ConnectionError:
+            pass
+        assert _DroppingHandler.requests_seen == 1
+        assert client.get_request_stats()['retried'] == 2
+        print("  ✓ 提交请求的连接错误重试测试通过")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_token_bucket_smooths_burst()
+    test_retry_on_throttling()
+    test_retry_policy()
+    test_post_retry_only_before_connect()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+最近工程索引测试脚本
+验证读取工程不再改写 project.json、索引排序与校验、摘要中的素材数量和封面
+"""
+
+import sys
+import os
+import json
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _make_project(root, name, images=0, videos=0):
+    from core.project_manager import Project
+    
+    project = Project(name, str(root / name))
+    project.create(f'{name} 描述')
+    for i in range(videos):
+        with open(os.path.join(project.outputs_folder, f'{i}.mp4'), 'wb') as f:
+            f.write(b'video')
+    if images:
+        from PyQt5.QtGui import QImage, QColor
+        image = QImage(400, 300, QImage.Format_RGB32)
+        image.fill(QColor('red'))
+        for i in range(images):
+            image.save(os.path.join(project.inputs_folder, f'{i}.png'))
+    return project
+
+
+def test_load_is_read_only(tmp_path):
+    """测试 Project.load 不再修改 project.json，只有 mark_opened 写入打开时间"""
+    print("测试 1: 读取工程不写入...")
+    from core.project_manager import Project
+    
+    created = _make_project(tmp_path, 'demo')
+    before = open(created.config_file, 'rb').read()
+    
+    project = Project('demo', created.path)
+    assert project.load()
+    assert open(created.config_file, 'rb').read() == before
+    
+    project.mark_opened()
+    assert json.load(open(created.config_file, encoding='utf-8'))['last_opened'] == project.config['last_opened']
+    print("  ✓ 读取工程不写入测试通过")
+
+
+def test_index_and_validation(tmp_path):
+    """测试索引按最近打开排序、后台校验补全摘要并标记已不存在的工程"""
+    print("\n测试 2: 索引与校验...")
+    from core.recent_projects import RecentProjectsIndex, RecentProjectsValidator
+    from core.thumbnail_cache import ThumbnailCache
+    
+    index_file = str(tmp_path / 'recent_projects.json')
+    index = RecentProjectsIndex(index_file)
+    assert not index.loaded
+    first = _make_project(tmp_path, 'first', images=2, videos=1)
+    second = _make_project(tmp_path, 'second')
+    index.touch(first.path, description='旧描述')
+    index.touch(second.path)
+    index.touch(str(tmp_path / 'gone'))
+    index.touch(first.path)
+    assert index.paths() == [first.path, str(tmp_path / 'gone'), second.path]
+    
+    thumbnails = ThumbnailCache(str(tmp_path / 'thumbnails'), 1024 * 1024)
+    results = []
+    validator = RecentProjectsValidator(index.entries(include_missing=True), thumbnails)
+    validator.validated.connect(results.extend)
+    validator.run()
+    assert index.update(results)
+    assert not index.update(results)
+    
+    reloaded = RecentProjectsIndex(index_file)
+    assert reloaded.loaded
+    entries = reloaded.entries()
+    assert [e['path'] for e in entries] == [first.path, second.path]
+    assert entries[0]['description'] == 'first 描述'
+    assert (entries[0]['image_count'], entries[0]['video_count']) == (2, 1)
+    assert os.path.exists(entries[0]['cover']) and entries[1]['cover'] == ''
+    assert reloaded.entries(include_missing=True)[1]['missing']
+    
+    # 最新图片未变化时沿用原有封面
+    cover_mtime = os.path.getmtime(entries[0]['cover'])
+    validator = RecentProjectsValidator(reloaded.entries(), thumbnails)
+    validator.validated.connect(lambda summaries: reloaded.update(summaries))
+    validator.run()
+    assert os.path.getmtime(reloaded.entries()[0]['cover']) == cover_mtime
+    print("  ✓ 索引与校验测试通过")
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    test_load_is_read_only(pathlib.Path(tempfile.mkdtemp()))
+    test_index_and_validation(pathlib.Path(tempfile.mkdtemp()))
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+任务存储测试脚本
+验证旧版 tasks.json 迁移、按行更新、并发更新的合并写入与变化通知，
+按工程分区加载和跨工程的在途任务索引，旧任务归档与分页查询，以及紧凑的任务模型
+"""
+
+import sys
+import os
+import json
+import sqlite3
+import threading
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_migrate_and_row_updates(tmp_path):
+    """测试首次打开时导入 tasks.json，之后的更新只写入对应行"""
+    print("测试 1: 迁移与按行更新...")
+    from datetime import datetime, timedelta
+    from core.models import Task, TaskStatus
+    from core.task_manager import TaskManager
+    
+    tasks_file = tmp_path / 'tasks.json'
+    now = datetime.now()
+    legacy = {
+        f'task-{i}': Task(id=f'task-{i}', prompt=f'p{i}', model='wan2.5-i2v-preview', resolution='720P',
+                          created_at=(now - timedelta(days=3 - i)).isoformat()).to_dict()
+        for i in range(3)
+    }
+    tasks_file.write_text(json.dumps(legacy), encoding='utf-8')
+    
+    manager = TaskManager(str(tmp_path / 'inflight.json'))
+    manager.tasks_file = str(tasks_file)
+    manager.load_tasks()
+    assert sorted(manager.tasks) == ['task-0', 'task-1', 'task-2']
+    
+    manager.update_task('task-1', status=TaskStatus.SUCCEEDED, video_url='http://v')
+    created = manager.create_task('new', 'wan2.5-i2v-preview', '720P')
+    # 更新由后台线程合并写入，读取数据库前先立即写入
+    manager.flush()
+    
+    db_path = tmp_path / 'tasks.db'
+    with sqlite3.connect(str(db_path)) as conn:
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        rows = dict(conn.execute('SELECT id, status FROM tasks').fetchall())
+        project = conn.execute('SELECT DISTINCT project FROM tasks').fetchall()
+    assert rows['task-1'] == 'SUCCEEDED' and rows['task-0'] == 'PENDING'
+    assert created.id in rows
+    assert project == [(str(tmp_path),)]
+    
+    # 旧文件保持不变，也不会被再次导入覆盖数据库中的新状态
+    assert json.loads(tasks_file.read_text(encoding='utf-8')) == legacy
+    reopened = TaskManager(str(tmp_path / 'inflight.json'))
+    reopened.tasks_file = str(tasks_file)
+    reopened.load_tasks()
+    assert reopened.get_task('task-1').status == TaskStatus.SUCCEEDED
+    assert reopened.get_task('task-1').video_url == 'http://v'
+    assert len(reopened.tasks) == 4
+    print("  ✓ 迁移与按行更新测试通过")
+
+
+def test_concurrent_updates_coalesce(tmp_path):
+    """测试多线程更新与遍历互不干扰，更新合并写入，变化通知只包含变化的字段"""
+    print("\n测试 2: 并发更新与变化通知...")
+    from core.models import TaskStatus
+    from core.task_manager import TaskManager
+    
+    manager = TaskManager(str(tmp_path / 'inflight.json'))
+    manager.tasks_file = str(tmp_path / 'tasks.json')
+    task_ids = [manager.create_task(f'p{i}', 'wan2.5-i2v-preview', '720P').id for i in range(50)]
+    manager.flush()
+    
+    store = manager._get_store()
+    writes = []
+    original_save_many = store.save_many
+    store.save_many = lambda tasks: (writes.append(len(list(tasks))), original_save_many(tasks))
+    
+    feed = []
+    manager.subscribe(lambda task_id, changes: feed.append((task_id, changes)))
+    # 更新前取得的字典和任务对象是不可变快照
+    snapshot = manager.tasks
+    before = manager.get_task(task_ids[0])
+    
+    errors = []
+    
+    def writer(offset):
+        try:
+            for i in range(200):
+                task_id = task_ids[(i + offset) % len(task_ids)]
+                manager.update_task(task_id, status=TaskStatus.RUNNING, message=f'{offset}')
+        except Exception as e:
+            errors.append(e)
+    
+    def reader():
+        try:
+            for _ in range(200):
+                sum(1 for task in manager.get_all_tasks() if task.is_completed())
+                manager.create_task('extra', 'wan2.5-i2v-preview', '720P')
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+    threads.append(threading.Thread(target=reader))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    manager.flush()
+    
+    assert not errors, errors
+    # 约 1800 次更新合并为少数几次写入
+    assert 0 < len(writes) < 20, writes
+    # 每个任务的状态只变化一次，之后只有 message 在变化
+    status_changes = [changes for _, changes in feed if 'status' in changes and 'id' not in changes]
+    assert len(status_changes) == len(task_ids)
+    assert all(set(changes) <= {'status', 'message'} for _, changes in feed if 'id' not in changes)
+    assert len(snapshot) == 50 and snapshot[task_ids[0]] is before
+    assert before.status == TaskStatus.PENDING and before.message == ''
+    assert manager.get_task(task_ids[0]).status == TaskStatus.RUNNING
+    
+    reopened = TaskManager(str(tmp_path / 'inflight.json'))
+    reopened.tasks_file = manager.tasks_file
+    reopened.load_tasks()
+    assert len(reopened.tasks) == 250
+    assert all(reopened.get_task(task_id).status == TaskStatus.RUNNING for task_id in task_ids)
+    manager.close()
+    print("  ✓ 并发更新与变化通知测试通过")
+
+
+def test_project_partitions(tmp_path):
+    """测试切换工程后只保留当前分区，其他工程的在途任务仍可查询和更新"""
+    print("\n测试 3: 工程分区与在途索引...")
+    from core.models import TaskStatus
+    from core.task_manager import TaskManager
+    
+    index_file = str(tmp_path / 'inflight.json')
+    project_a = tmp_path / 'a'
+    project_b = tmp_path / 'b'
+    project_a.mkdir()
+    project_b.mkdir()
+    
+    manager = TaskManager(index_file)
+    manager.tasks_file = str(project_a / 'tasks.json')
+    running = manager.create_task('a', 'wan2.5-i2v-preview', '720P')
+    manager.update_task(running.id, async_task_id='async-a', status=TaskStatus.RUNNING)
+    manager.create_task('a2', 'wan2.5-i2v-preview', '720P')
+    
+    manager.tasks_file = str(project_b / 'tasks.json')
+    manager.create_task('b', 'wan2.5-i2v-preview', '720P')
+    assert [task.prompt for task in manager.get_all_tasks()] == ['b']
+    
+    # 新启动时不加载任何分区，只读取在途索引
+    fresh = TaskManager(index_file)
+    assert not fresh._loaded
+    assert fresh.get_inflight_entries() == {
+        running.id: {'tasks_file': str(project_a / 'tasks.json'), 'async_task_id': 'async-a'}
+    }
+    
+    # 其他工程的在途任务仍可查询和更新，结束后移出索引
+    assert manager.get_task(running.id).prompt == 'a'
+    changes = manager.update_task(running.id, status=TaskStatus.SUCCEEDED, video_url='http://v')
+    assert changes['status'] == TaskStatus.SUCCEEDED
+    assert manager.get_inflight_entries() == {}
+    assert [task.prompt for task in manager.get_all_tasks()] == ['b']
+    
+    manager.tasks_file = str(project_a / 'tasks.json')
+    assert manager.get_task(running.id).video_url == 'http://v'
+    assert len(manager.get_all_tasks()) == 2
+    manager.close()
+    print("  ✓ 工程分区与在途索引测试通过")
+
+
+def test_archive_and_paginated_query(tmp_path):
+    """测试旧的已结束任务在加载时归档，分页查询可以继续读取归档"""
+    print("\n测试 4: 归档与分页查询...")
+    from datetime import datetime, timedelta
+    from core.models import TaskStatus
+    from core.task_manager import TaskManager
+    
+    tasks_file = str(tmp_path / 'tasks.json')
+    manager = TaskManager(str(tmp_path / 'inflight.json'))
+    manager.tasks_file = tasks_file
+    now = datetime.now()
+    for days in range(0, 100, 5):
+        task = manager.create_task(f'{days}', 'wan2.5-t2i' if days % 10 else 'wan2.5-i2v-preview', '720P')
+        task.created_at = (now - timedelta(days=days)).isoformat()
+        # 未结束的旧任务不归档
+        if days != 95:
+            manager.update_task(task.id, status=TaskStatus.SUCCEEDED)
+    assert manager.archive_tasks(30) == 13
+    assert manager.archive_tasks(30) == 0
+    manager.close()
+    
+    reopened = TaskManager(str(tmp_path / 'inflight.json'))
+    reopened.tasks_file = tasks_file
+    assert len(reopened.get_all_tasks()) == 7
+    assert reopened._get_store().count() == 7
+    
+    page = reopened.query_tasks(limit=5)
+    assert [t.prompt for t in page] == ['0', '5', '10', '15', '20']
+    assert reopened.count_tasks() == 7 and reopened.count_tasks(include_archive=True) == 20
+    page = reopened.query_tasks(offset=5, limit=5, include_archive=True)
+    assert [t.prompt for t in page] == ['25', '95', '30', '35', '40']
+    page = reopened.query_tasks(model='wan2.5-t2i', include_archive=True,
+                                start=now - timedelta(days=61), end=now - timedelta(days=39))
+    assert [t.prompt for t in page] == ['45', '55']
+    assert reopened.count_tasks(status='PENDING', include_archive=True) == 1
+    
+    # 分页查询在数据库中进行，尚未写入的更新也参与筛选，返回的是内存中的任务对象
+    latest = reopened.query_tasks(limit=1)[0]
+    reopened.update_task(latest.id, status=TaskStatus.FAILED)
+    failed = reopened.query_tasks(status='FAILED')
+    assert [t.id for t in failed] == [latest.id] and failed[0] is reopened.get_task(latest.id)
+    assert reopened.count_tasks(status='SUCCEEDED') == 5
+    assert reopened.query_tasks(offset=10, limit=5, include_archive=True)[0].prompt == '45'
+    
+    archive = reopened.get_archive()
+    assert archive.count() == 13
+    assert [t.prompt for t in archive.query(offset=2, limit=2)] == ['40', '45']
+    # 重复归档（如删除前中断）不会产生重复记录
+    archive.append(archive.query(limit=1))
+    assert archive.count() == 13
+    
+    # 月份列表缓存在同一归档实例中，只有写入新月份时才重新列目录
+    from dataclasses import replace
+    assert reopened.get_archive() is archive
+    months = archive.months()
+    open(os.path.join(archive.archive_dir, '1999-01' + archive.SUFFIX), 'wb').close()
+    assert archive.months() == months
+    archive.append([replace(archive.query(limit=1)[0], created_at='2000-01-15T00:00:00')])
+    assert archive.months()[-2:] == ['2000-01', '1999-01']
+    reopened.close()
+    print("  ✓ 归档与分页查询测试通过")
+
+
+def test_compact_task_model(tmp_path):
+    """测试任务不带 __dict__，字符串状态统一为枚举，序列化结果与字段一一对应"""
+    print("\n测试 5: 紧凑任务模型...")
+    from dataclasses import fields
+    from core.models import Task, TaskStatus
+    from core.task_manager import TaskManager
+    
+    data = {'id': 't', 'prompt': 'p', 'model': ''.join(['wan2.5-', 'i2v-preview']),
+            'resolution': '720P', 'created_at': '2025-01-01T00:00:00', 'status': 'FAILED'}
+    task = Task.from_dict(dict(data))
+    assert not hasattr(task, '__dict__')
+    assert task.status is TaskStatus.FAILED and task.is_completed() and not task.is_success()
+    assert task.model is Task.from_dict(dict(data)).model
+    assert list(task.to_dict()) == [f.name for f in fields(Task)]
+    assert task.to_dict()['status'] == 'FAILED'
+    assert Task.from_dict(task.to_dict()) == task
+    
+    manager = TaskManager(str(tmp_path / 'inflight.json'))
+    manager.tasks_file = str(tmp_path / 'tasks.json')
+    created = manager.create_task('p', 'wan2.5-i2v-preview', '720P')
+    assert manager.update_task(created.id, status='RUNNING') == {'status': TaskStatus.RUNNING}
+    assert manager.update_task(created.id, status='RUNNING') == {}
+    manager.close()
+    print("  ✓ 紧凑任务模型测试通过")
+
+
+def test_switch_project_while_updating(tmp_path):
+    """测试后台更新与写入进行中切换工程：原分区的更新写回原数据库，不会写进新数据库"""
+    print("\n测试 6: 更新中切换工程...")
+    from core.task_manager import TaskManager
+    from core.task_store import TaskStore, db_path_for
+    
+    project_a = tmp_path / 'a'
+    project_b = tmp_path / 'b'
+    project_a.mkdir()
+    project_b.mkdir()
+    
+    manager = TaskManager(str(tmp_path / 'inflight.json'))
+    manager.tasks_file = str(project_a / 'tasks.json')
+    task_ids = [manager.create_task(f'a{i}', 'wan2.5-i2v-preview', '720P').id for i in range(20)]
+    manager.flush()
+    
+    stop = threading.Event()
+    last = {}
+    
+    def updater():
+        count = 0
+        while not stop.is_set():
+            task_id = task_ids[count % len(task_ids)]
+            if manager.update_task(task_id, message=str(count)):
+                last[task_id] = str(count)
+            count += 1
+    
+    thread = threading.Thread(target=updater)
+    thread.start()
+    threading.Event().wait(0.05)
+    manager.tasks_file = str(project_b / 'tasks.json')
+    stop.set()
+    thread.join()
+    manager.flush()
+    
+    store_b = TaskStore(db_path_for(str(project_b / 'tasks.json')))
+    assert store_b.count() == 0
+    store_b.close()
+    
+    # 切换前标记的更新都已写入原数据库
+    manager.tasks_file = str(project_a / 'tasks.json')
+    for task_id, message in last.items():
+        assert manager.get_task(task_id).message == message, task_id
+    manager.close()
+    print("  ✓ 更新中切换工程测试通过")
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    test_migrate_and_row_updates(pathlib.Path(tempfile.mkdtemp()))
+    test_concurrent_updates_coalesce(pathlib.Path(tempfile.mkdtemp()))
+    test_project_partitions(pathlib.Path(tempfile.mkdtemp()))
+    test_archive_and_paginated_query(pathlib.Path(tempfile.mkdtemp()))
+    test_compact_task_model(pathlib.Path(tempfile.mkdtemp()))
+    test_switch_project_while_updating(pathlib.Path(tempfile.mkdtemp()))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+缩略图缓存测试脚本
+验证按目标尺寸生成、命中缓存时不解码原图、文件变化后失效以及按总大小淘汰
+"""
+
+import sys
+import os
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _make_image(path, width=800, height=600, color='blue'):
+    from PyQt5.QtGui import QImage, QColor
+    image = QImage(width, height, QImage.Format_RGB32)
+    image.fill(QColor(color))
+    image.save(str(path))
+
+
+def test_cache_hit_does_not_decode(tmp_path):
+    """测试生成的缩略图尺寸正确，再次打开缓存时不解码原图"""
+    print("测试 1: 生成与命中...")
+    from core import thumbnail_cache
+    from core.thumbnail_cache import ThumbnailCache
+    
+    source = tmp_path / 'photo.png'
+    _make_image(source)
+    cache = ThumbnailCache(str(tmp_path / 'thumbnails'), 10 * 1024 * 1024)
+    image = cache.image(str(source), (200, 200))
+    assert (image.width(), image.height()) == (200, 150)
+    small = cache.image(str(source), (24, 24))
+    assert (small.width(), small.height()) == (24, 18)
+    cache.close()
+    
+    # 重新打开缓存（相当于重新打开工程）：原图解码函数不应被调用
+    decoded = []
+    original = thumbnail_cache.load_scaled_image
+    thumbnail_cache.load_scaled_image = lambda *args: decoded.append(args) or original(*args)
+    try:
+        reopened = ThumbnailCache(str(tmp_path / 'thumbnails'), 10 * 1024 * 1024)
+        assert reopened.image(str(source), (200, 200)).width() == 200
+        assert decoded == []
+        
+        # 文件修改后重新生成
+        _make_image(source, 400, 400, 'red')
+        os.utime(source, (time.time() + 10, time.time() + 10))
+        assert reopened.image(str(source), (200, 200)).height() == 200
+        assert len(decoded) == 1
+    finally:
+        thumbnail_cache.load_scaled_image = original
+    assert reopened.image(str(tmp_path / 'missing.png'), (200, 200)) is None
+    reopened.close()
+    print("  ✓ 生成与命中测试通过")
+
+
+def test_lru_eviction(tmp_path):
+    """测试总大小超过上限时淘汰最久未使用的缩略图"""
+    print("\n测试 2: 按大小淘汰...")
+    from core.thumbnail_cache import ThumbnailCache
+    
+    sources = []
+    for i in range(5):
+        source = tmp_path / f'{i}.png'
+        _make_image(source)
+        sources.append(str(source))
+    
+    cache = ThumbnailCache(str(tmp_path / 'thumbnails'), 10 * 1024 * 1024)
+    first = cache.thumbnail_path(sources[0], (200, 200))
+    per_file = os.path.getsize(first)
+    cache.close()
+    
+    # 上限约为 3 个缩略图，超过后降到 90%（保留 3 个）
+    cache = ThumbnailCache(str(tmp_path / 'thumbnails'), int(per_file * 3.5))
+    for source in sources[1:3]:
+        time.sleep(0.01)
+        cache.thumbnail_path(source, (200, 200))
+    time.sleep(0.01)
+    assert cache.lookup(sources[0], (200, 200)) == first  # 0 变为最近使用
+    
+    time.sleep(0.01)
+    cache.thumbnail_path(sources[3], (200, 200))
+    assert cache.lookup(sources[1], (200, 200)) is None
+    assert cache.lookup(sources[0], (200, 200)) is not None
+    
+    time.sleep(0.01)
+    cache.thumbnail_path(sources[4], (200, 200))
+    assert cache.lookup(sources[2], (200, 200)) is None
+    assert all(cache.lookup(source, (200, 200)) for source in (sources[0], sources[3], sources[4]))
+    assert cache.total_bytes == 3 * per_file
+    cache.close()
+    print("  ✓ 按大小淘汰测试通过")
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    test_cache_hit_does_not_decode(pathlib.Path(tempfile.mkdtemp()))
+    test_lru_eviction(pathlib.Path(tempfile.mkdtemp()))
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后台缩略图服务测试脚本
+验证可见行优先处理、切换工程时取消未完成的请求以及结果通过信号逐个通知
+"""
+
+import sys
+import os
+import threading
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.thumbnail_cache import ThumbnailCache
+
+
+class RecordingCache(ThumbnailCache):
+    """记录处理顺序；第一个请求阻塞到 release 后才完成"""
+    
+    def __init__(self, cache_dir):
+        super().__init__(cache_dir, 10 * 1024 * 1024)
+        self.order = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+    
+    def image(self, file_path, size):
+        self.order.append(os.path.splitext(os.path.basename(file_path))[0])
+        if len(self.order) == 1:
+            self.started.set()
+            self.release.wait(5)
+        return super().image(file_path, size)
+
+
+def _make_images(tmp_path, names):
+    from PyQt5.QtGui import QImage, QColor
+    paths = {}
+    for name in names:
+        image = QImage(64, 48, QImage.Format_RGB32)
+        image.fill(QColor('green'))
+        path = str(tmp_path / f'{name}.png')
+        image.save(path)
+        paths[name] = path
+    return paths
+
+
+def _wait_for(app, condition):
+    """处理事件直到条件满足（信号从工作线程排队到主线程）"""
+    import time
+    deadline = time.time() + 5
+    while not condition() and time.time() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+
+
+def test_visible_rows_first(tmp_path):
+    """测试可见行的请求先于普通请求处理，结果通过信号通知"""
+    print("测试 1: 可见行优先...")
+    from PyQt5.QtCore import QCoreApplication
+    from core.thumbnail_service import ThumbnailService
+    
+    app = QCoreApplication.instance() or QCoreApplication([])
+    paths = _make_images(tmp_path, ['a', 'b', 'c', 'd', 'e'])
+    cache = RecordingCache(str(tmp_path / 'thumbnails'))
+    service = ThumbnailService(cache, max_workers=1)
+    ready = []
+    service.thumbnail_ready.connect(lambda path, size, image: ready.append((path, image.width())))
+    
+    service.request(paths['a'], (32, 32))
+    assert cache.started.wait(5)
+    for name in 'bcde':
+        service.request(paths[name], (32, 32))
+    service.prioritize([paths['d']], (32, 32))
+    service.request(paths['e'], (32, 32), ThumbnailService.PRIORITY_VISIBLE)
+    cache.release.set()
+    _wait_for(app, lambda: len(ready) == 5)
+    
+    assert cache.order == ['a', 'd', 'e', 'b', 'c']
+    assert sorted(ready) == sorted((paths[name], 32) for name in 'abcde')
+    service.shutdown()
+    print("  ✓ 可见行优先测试通过")
+
+
+def test_cancel_on_project_change(tmp_path):
+    """测试取消后队列中的请求不再处理，正在处理的结果也不再通知"""
+    print("\n测试 2: 切换工程时取消...")
+    from PyQt5.QtCore import QCoreApplication
+    from core.thumbnail_service import ThumbnailService
+    
+    app = QCoreApplication.instance() or QCoreApplication([])
+    paths = _make_images(tmp_path, ['old1', 'old2', 'old3', 'new'])
+    cache = RecordingCache(str(tmp_path / 'thumbnails'))
+    service = ThumbnailService(cache, max_workers=1)
+    ready = []
+    service.thumbnail_ready.connect(lambda path, size, image: ready.append(os.path.basename(path)))
+    
+    for name in ('old1', 'old2', 'old3'):
+        service.request(paths[name], (32, 32))
+    assert cache.started.wait(5)
+    service.cancel_all()
+    assert service.pending_count() == 0
+    service.request(paths['new'], (32, 32))
+    cache.release.set()
+    _wait_for(app, lambda: ready)
+    
+    assert cache.order == ['old1', 'new']
+    assert ready == ['new.png']
+    service.shutdown()
+    print("  ✓ 切换工程时取消测试通过")
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    test_visible_rows_first(pathlib.Path(tempfile.mkdtemp()))
+    test_cancel_on_project_change(pathlib.Path(tempfile.mkdtemp()))
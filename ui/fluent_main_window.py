@@ -6,12 +6,11 @@ Fluent 风格主窗口
 """
 
 import os
-import shutil
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QSplitter,
     QPushButton, QAction, QStackedWidget, QApplication, QMenuBar
 )
-from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtCore import Qt, pyqtSignal, QTimer
 from PyQt5.QtGui import QIcon, QPixmap
 import sys
 
@@ -52,6 +51,8 @@ from .fluent_status_bar import FluentStatusBar
 from core.task_manager import TaskManager
 from core.api_client import DashScopeClient
 from core.project_manager import ProjectManager
+from core.asset_catalog import CatalogRebuildWorker
+from core.input_store import get_input_store
 from config.settings import settings
 from themes.fluent_theme import fluent_theme_manager, FLUENT_AVAILABLE as THEME_AVAILABLE
 from utils.message_helper import MessageHelper
@@ -125,6 +126,8 @@ class FluentMainWindow(FluentWindow):
         # 初始化核心组件
         self.project_manager = ProjectManager()
         self.task_manager = TaskManager()
+        self._catalog_worker = None  # 素材目录后台重建线程
+        self._recent_validator = None  # 最近工程后台校验线程
         self.api_client = DashScopeClient()
         
         # 当前选择的图片路径
@@ -194,12 +197,28 @@ class FluentMainWindow(FluentWindow):
         # 添加 Fluent 风格的状态信息显示
         self.fluent_status_widget = FluentStatusBar(self)
         self.status_bar.addPermanentWidget(self.fluent_status_widget, 1)
+        
+        # 定时显示请求限流/重试计数
+        self.request_stats_timer = QTimer(self)
+        self.request_stats_timer.timeout.connect(self._update_request_stats)
+        self.request_stats_timer.start(2000)
     
     
     def _get_status_widget(self):
         """获取状态栏组件（统一使用 fluent_status_widget）"""
         return self.fluent_status_widget
     
+    def _update_request_stats(self):
+        """在状态栏右侧显示被本地延后、被限流、重试和放弃的请求数"""
+        stats = self.api_client.get_request_stats()
+        if any(stats.values()):
+            self._get_status_widget().setInfo(
+                f"延后 {stats['delayed']} · 限流 {stats['throttled']} · "
+                f"重试 {stats['retried']} · 放弃 {stats['dropped']}"
+            )
+        else:
+            self._get_status_widget().setInfo("")
+    
     
     def init_interfaces(self):
         """初始化各功能界面"""
@@ -344,6 +363,8 @@ class FluentMainWindow(FluentWindow):
         self.floating_task_list = TaskListDrawer(self.task_manager, self.project_manager, self)
         self.floating_task_list.task_updated.connect(self.on_task_updated)
         self.floating_task_list.hide()
+        # 恢复上次未结束的任务（包括未打开的工程）
+        self.floating_task_list.resume_inflight_tasks()
     
     def toggle_floating_task_list(self):
         """切换浮动任务列表显示/隐藏"""
@@ -653,17 +674,13 @@ class FluentMainWindow(FluentWindow):
         
         project = self.project_manager.get_current_project()
         
-        # 复制图片到工程 inputs 文件夹
+        # 导入图片到工程 inputs 文件夹（内容相同的图片只保存一份）
         try:
-            image_name = os.path.basename(self.current_image_path)
-            dest_path = os.path.join(project.inputs_folder, image_name)
-            
-            if os.path.abspath(self.current_image_path) != os.path.abspath(dest_path):
-                shutil.copy2(self.current_image_path, dest_path)
-                self.current_image_path = dest_path
-                self.project_explorer.refresh()
+            # 资源管理器通过文件夹监视自动显示新文件
+            dest_path, _ = get_input_store().import_file(self.current_image_path, project.inputs_folder)
+            self.current_image_path = dest_path
         except Exception as e:
-            print(f"复制图片失败: {e}")
+            print(f"导入图片失败: {e}")
         
         # 禁用生成按钮并更新文本
         self.config_panel.generate_btn.setEnabled(False)
@@ -672,6 +689,10 @@ class FluentMainWindow(FluentWindow):
         MessageHelper.info(self, "任务提交", "正在提交任务...")
         
         try:
+            # 解析时长
+            duration_str = config.get('duration', '5秒')
+            duration = int(''.join(filter(str.isdigit, duration_str))) if duration_str else 5
+            
             # 创建任务
             task = self.task_manager.create_task(
                 prompt=config['prompt'],
@@ -679,13 +700,10 @@ class FluentMainWindow(FluentWindow):
                 resolution=config['resolution'],
                 negative_prompt=config['negative_prompt'],
                 prompt_extend=config['prompt_extend'],
-                input_file=self.current_image_path
+                input_file=self.current_image_path,
+                duration=duration
             )
             
-            # 解析时长
-            duration_str = config.get('duration', '5秒')
-            duration = int(''.join(filter(str.isdigit, duration_str))) if duration_str else 5
-            
             # 提交到 API
             submit_params = {
                 'image_path': self.current_image_path,
@@ -929,6 +947,9 @@ class FluentMainWindow(FluentWindow):
         self.task_manager.load_tasks()
         self.floating_task_list.refresh_tasks()
         
+        # 在后台补全工程的素材目录
+        self._rebuild_asset_catalog(project)
+        
         # 切换到首帧生视频界面
         if FLUENT_AVAILABLE:
             self.stackedWidget.setCurrentWidget(self.first_frame_interface)
@@ -936,6 +957,13 @@ class FluentMainWindow(FluentWindow):
         # 启用关闭工程菜单
         self.close_project_action.setEnabled(True)
     
+    def _rebuild_asset_catalog(self, project):
+        """在后台重建工程的素材目录（取消上一个工程未完成的重建）"""
+        if self._catalog_worker is not None and self._catalog_worker.isRunning():
+            self._catalog_worker.cancel()
+        self._catalog_worker = CatalogRebuildWorker(project.path, self)
+        self._catalog_worker.start()
+    
     def switch_to_welcome_page(self):
         """切换到欢迎页面"""
         self._project_opened = False
@@ -966,9 +994,20 @@ class FluentMainWindow(FluentWindow):
         self.close_project_action.setEnabled(False)
     
     def _load_recent_projects_to_welcome(self):
-        """加载最近项目到欢迎页面"""
+        """加载最近项目到欢迎页面（先显示缓存的摘要，再在后台校验）"""
         recent_projects = self.project_manager.get_recent_projects()
         self.welcome_page.set_recent_projects(recent_projects)
+        
+        if self._recent_validator is not None and self._recent_validator.isRunning():
+            return
+        self._recent_validator = self.project_manager.validate_recent_projects(self)
+        self._recent_validator.validated.connect(self._on_recent_projects_validated)
+        self._recent_validator.start()
+    
+    def _on_recent_projects_validated(self, summaries):
+        """后台校验完成，摘要有变化时刷新欢迎页"""
+        if self.project_manager.apply_recent_validation(summaries) and not self._project_opened:
+            self.welcome_page.set_recent_projects(self.project_manager.get_recent_projects())
     
     def refresh_project(self):
         """刷新工程"""
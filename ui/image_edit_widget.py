@@ -14,7 +14,13 @@ from PyQt5.QtWidgets import (
     QSpinBox, QListWidget, QListWidgetItem, QFileDialog, QCheckBox
 )
 from PyQt5.QtCore import Qt, pyqtSignal, QThread
-from PyQt5.QtGui import QPixmap, QIcon, QDragEnterEvent, QDropEvent
+from PyQt5.QtGui import QIcon, QDragEnterEvent, QDropEvent
+
+from core.asset_catalog import catalog_assets
+from core.history_store import HistoryStore, MissingFileChecker
+from core.thumbnail_cache import get_thumbnail_cache
+from core.poll_cadence import PollCadence
+from config.settings import settings
 
 try:
     from qfluentwidgets import (
@@ -51,9 +57,6 @@ class ImageEditWorker(QThread):
     def run(self):
         """执行图像编辑任务"""
         try:
-            import requests
-            import time
-            
             # 判断是否为万相模型（异步模式）
             is_wanxiang = self.model.startswith('wan2.') or self.model == 'wan2.6-image'
             
@@ -69,8 +72,6 @@ class ImageEditWorker(QThread):
     
     def _run_sync_mode(self):
         """同步模式：通义千问模型"""
-        import requests
-        
         # 1. 提交编辑任务
         self.progress.emit("正在提交编辑任务...")
         result = self.api_client.submit_image_edit(
@@ -113,7 +114,6 @@ class ImageEditWorker(QThread):
     
     def _run_async_mode(self):
         """异步模式：万相2.5模型"""
-        import requests
         import time
         
         # 1. 提交异步任务
@@ -143,12 +143,12 @@ class ImageEditWorker(QThread):
         task_id = result['output']['task_id']
         self.progress.emit(f"任务已提交，ID: {task_id}\n正在处理...")
         
-        # 3. 轮询任务状态
-        max_retries = 60  # 最多等待60次（约2分钟）
-        retry_count = 0
+        # 3. 轮询任务状态（预计完成前稀疏查询，接近完成时密集查询）
+        cadence = PollCadence('image')
+        start_time = time.monotonic()
         
-        while retry_count < max_retries:
-            time.sleep(2)  # 等待2秒
+        while not cadence.is_expired(time.monotonic() - start_time):
+            time.sleep(cadence.next_delay(time.monotonic() - start_time))
             
             try:
                 task_result = self.api_client.query_image_edit_task(task_id)
@@ -199,7 +199,6 @@ class ImageEditWorker(QThread):
                     return
                 
                 elif task_status in ['PENDING', 'RUNNING']:
-                    retry_count += 1
                     continue
                 
                 else:
@@ -215,7 +214,6 @@ class ImageEditWorker(QThread):
     
     def _download_images(self, image_urls):
         """下载图片"""
-        import requests
         from datetime import datetime
         
         self.progress.emit(f"正在下载{len(image_urls)}张图片...")
@@ -231,11 +229,7 @@ class ImageEditWorker(QThread):
                 self.progress.emit(f"下载图片 {i+1}/{len(image_urls)}...")
                 print(f"正在下载图片: {url}")
                 
-                img_response = requests.get(url, timeout=30)
-                img_response.raise_for_status()  # 检查HTTP错误
-                
-                with open(output_path, 'wb') as f:
-                    f.write(img_response.content)
+                self.api_client.download_file(url, output_path)
                 
                 downloaded_paths.append(output_path)
                 print(f"图片{i+1}下载成功: {output_path}")
@@ -263,6 +257,7 @@ class ImageEditWorker(QThread):
             'output_count': len(downloaded_paths)
         }
         
+        catalog_assets(downloaded_paths, edit_info)
         self.finished.emit(downloaded_paths, edit_info)
 
 
@@ -273,8 +268,21 @@ class ImageGalleryWidget(QWidget):
     
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.images = []
+        self.images = []  # 当前显示的记录（从新到旧）：{'id', 'path', 'prompt', 'model'}
+        self.page_limit = settings.GALLERY_PAGE_SIZE  # 当前显示的数量，点击"加载更多"后增加
+        self.history = None
+        self._checker = None
+        self.history_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'image_edit_history.jsonl')  # 默认全局历史文件
         self.setup_ui()
+        self.load_history()
+    
+    def set_project_context(self, project):
+        """设置工程上下文，更新历史记录文件路径"""
+        if project and hasattr(project, 'path'):
+            self.history_file = os.path.join(project.path, 'image_edit_history.jsonl')
+        else:
+            self.history_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'image_edit_history.jsonl')
+        self.load_history()
     
     def setup_ui(self):
         """设置用户界面"""
@@ -311,21 +319,31 @@ class ImageGalleryWidget(QWidget):
         
         scroll.setWidget(self.gallery_widget)
         layout.addWidget(scroll)
+        
+        # 加载更多（历史记录分页显示）
+        self.more_btn = QPushButton("加载更多")
+        self.more_btn.clicked.connect(self.load_more)
+        self.more_btn.hide()
+        layout.addWidget(self.more_btn)
     
     def add_images(self, image_paths, prompt='', model=''):
-        """批量添加图片到画廊"""
-        for image_path in image_paths:
-            if os.path.exists(image_path):
-                image_info = {
-                    'path': image_path,
-                    'prompt': prompt,
-                    'model': model
-                }
-                self.images.insert(0, image_info)
+        """批量添加图片到画廊（一次追加写入）"""
+        self.history.append(
+            {'path': image_path, 'prompt': prompt, 'model': model}
+            for image_path in image_paths if os.path.exists(image_path)
+        )
+        self.refresh_gallery()
+    
+    def load_more(self):
+        """显示下一页历史记录"""
+        self.page_limit += settings.GALLERY_PAGE_SIZE
         self.refresh_gallery()
     
     def refresh_gallery(self):
-        """刷新画廊显示"""
+        """刷新画廊显示（新图片在前，只显示前 page_limit 张）"""
+        self.images = self.history.page(0, self.page_limit)
+        self.more_btn.setVisible(self.history.count() > len(self.images))
+        
         # 清空现有布局
         while self.gallery_layout.count():
             item = self.gallery_layout.takeAt(0)
@@ -375,9 +393,8 @@ class ImageGalleryWidget(QWidget):
         
         # 图片标签
         image_label = QLabel()
-        pixmap = QPixmap(image_path)
-        if not pixmap.isNull():
-            scaled_pixmap = pixmap.scaled(500, 500, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        scaled_pixmap = get_thumbnail_cache().pixmap(image_path, (500, 500))
+        if scaled_pixmap is not None:
             image_label.setPixmap(scaled_pixmap)
             image_label.setAlignment(Qt.AlignCenter)
             image_label.setStyleSheet("background: transparent; border: none;")
@@ -404,8 +421,29 @@ class ImageGalleryWidget(QWidget):
     
     def clear(self):
         """清空画廊"""
-        self.images.clear()
+        self.history.clear()
+        self.refresh_gallery()
+    
+    def load_history(self):
+        """加载历史记录（图片是否存在由后台线程检查）"""
+        if self._checker is not None:
+            self._checker.cancel()
+        self.history = HistoryStore(self.history_file)
+        self.page_limit = settings.GALLERY_PAGE_SIZE
         self.refresh_gallery()
+        
+        history = self.history
+        self._checker = MissingFileChecker(history.page(), self)
+        self._checker.missing_found.connect(
+            lambda record_ids: self._on_missing_found(history, record_ids)
+        )
+        self._checker.finished.connect(self._checker.deleteLater)
+        self._checker.start()
+    
+    def _on_missing_found(self, history, record_ids):
+        """移除图片已被删除的记录"""
+        if history is self.history and history.remove(record_ids):
+            self.refresh_gallery()
 
 
 class ImageEditWidget(QWidget):
@@ -419,6 +457,10 @@ class ImageEditWidget(QWidget):
         self.selected_images = []
         self.setup_ui()
         
+        # 监听工程变化事件，切换编辑结果历史
+        self.project_manager.project_changed.connect(self.on_project_changed)
+        self.on_project_changed()
+        
         # 启用拖拽
         self.setAcceptDrops(True)
     
@@ -985,9 +1027,8 @@ class ImageEditWidget(QWidget):
         
         # 图片缩略图
         image_label = QLabel()
-        pixmap = QPixmap(image_path)
-        if not pixmap.isNull():
-            scaled_pixmap = pixmap.scaled(500, 500, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        scaled_pixmap = get_thumbnail_cache().pixmap(image_path, (500, 500))
+        if scaled_pixmap is not None:
             image_label.setPixmap(scaled_pixmap)
         image_label.setAlignment(Qt.AlignCenter)
         image_label.setStyleSheet("""
@@ -1138,11 +1179,6 @@ class ImageEditWidget(QWidget):
             edit_info.get('model', '')
         )
         
-        # 刷新资源管理器
-        main_window = self.window()
-        if hasattr(main_window, 'project_explorer'):
-            main_window.project_explorer.refresh()
-        
         QMessageBox.information(
             self,
             "成功",
@@ -1161,6 +1197,11 @@ class ImageEditWidget(QWidget):
         """编辑进度更新"""
         self.status_label.setText(status_msg)
     
+    def on_project_changed(self):
+        """工程变化事件 - 更新画廊上下文"""
+        project = self.project_manager.get_current_project()
+        self.gallery.set_project_context(project)
+    
     def on_image_clicked(self, image_path):
         """图片点击事件"""
         from .image_viewer import ImageViewer
@@ -7,7 +7,6 @@
 """
 
 import os
-import base64
 import time
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
@@ -15,7 +14,7 @@ from PyQt5.QtWidgets import (
     QSplitter, QScrollArea, QGridLayout, QCheckBox, QFrame
 )
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
-from PyQt5.QtGui import QPixmap, QDragEnterEvent, QDropEvent
+from PyQt5.QtGui import QDragEnterEvent, QDropEvent
 
 try:
     from qfluentwidgets import (
@@ -28,6 +27,9 @@ except ImportError:
     FLUENT_AVAILABLE = False
 
 from .video_viewer import VideoViewerWidget
+from core.asset_catalog import catalog_asset
+from core.image_loader import load_preview_pixmap
+from core.poll_cadence import PollCadence, format_seconds
 
 
 class DragDropLabel(QLabel):
@@ -85,7 +87,7 @@ class DragDropLabel(QLabel):
         """设置图片路径并加载"""
         self.image_path = path
         if path and os.path.exists(path):
-            self.original_pixmap = QPixmap(path)
+            self.original_pixmap = load_preview_pixmap(path)
             self.updateScaledPixmap()
     
     def updateScaledPixmap(self):
@@ -123,7 +125,7 @@ class KeyframeVideoWorker(QThread):
     progress = pyqtSignal(str)
     
     def __init__(self, api_client, first_frame_path, last_frame_path, prompt, 
-                 model, resolution, prompt_extend, output_folder):
+                 model, resolution, prompt_extend, output_folder, duration_stats=None):
         super().__init__()
         self.api_client = api_client
         self.first_frame_path = first_frame_path
@@ -133,26 +135,17 @@ class KeyframeVideoWorker(QThread):
         self.resolution = resolution
         self.prompt_extend = prompt_extend
         self.output_folder = output_folder
+        self.duration_stats = duration_stats  # 同类任务历史耗时，用于安排轮询
     
     def run(self):
         """执行生成任务"""
         try:
             self.progress.emit("正在提交任务...")
             
-            # 读取并编码图片
-            with open(self.first_frame_path, 'rb') as f:
-                first_frame_data = base64.b64encode(f.read()).decode('utf-8')
-            
-            with open(self.last_frame_path, 'rb') as f:
-                last_frame_data = base64.b64encode(f.read()).decode('utf-8')
-            
-            # 获取图片MIME类型
-            ext = os.path.splitext(self.first_frame_path)[1].lower()
-            mime_types = {'.png': 'image/png', '.jpg': 'image/jpeg', '.jpeg': 'image/jpeg'}
-            mime_type = mime_types.get(ext, 'image/jpeg')
-            
-            first_frame_url = f"data:{mime_type};base64,{first_frame_data}"
-            last_frame_url = f"data:{mime_type};base64,{last_frame_data}"
+            # 上传首尾帧到 OSS，请求体只携带 oss:// 引用
+            first_frame_url, last_frame_url = self.api_client.get_image_refs(
+                [self.first_frame_path, self.last_frame_path], self.model
+            )
             
             # 提交任务
             result = self.api_client.submit_keyframe_to_video(
@@ -168,15 +161,15 @@ class KeyframeVideoWorker(QThread):
             task_id = result['output']['task_id']
             self.progress.emit(f"任务已提交 (ID: {task_id})")
             
-            # 轮询任务状态
-            max_retries = 180  # 最多轮询180次（约15分钟）
-            retry_count = 0
+            # 轮询任务状态（按同类任务的历史耗时安排查询时间）
+            cadence = PollCadence('video', self.duration_stats)
+            start_time = time.monotonic()
             
-            while retry_count < max_retries:
-                time.sleep(5)  # 每5秒查询一次
-                retry_count += 1
+            while not cadence.is_expired(time.monotonic() - start_time):
+                time.sleep(cadence.next_delay(time.monotonic() - start_time))
                 
-                self.progress.emit(f"正在生成视频... ({retry_count}/{max_retries})")
+                elapsed = time.monotonic() - start_time
+                self.progress.emit(f"正在生成视频... ({cadence.progress_text(elapsed)})")
                 
                 # 查询任务状态
                 task_result = self.api_client.query_task(task_id)
@@ -221,6 +214,7 @@ class KeyframeVideoWorker(QThread):
                     except Exception as e:
                         print(f"保存元数据失败: {e}")
                     
+                    catalog_asset(video_path, video_info)
                     self.finished.emit(video_path, video_info)
                     return
                     
@@ -237,7 +231,7 @@ class KeyframeVideoWorker(QThread):
                     return
             
             # 超时
-            self.error.emit(f"生成超时（已等待{max_retries * 5}秒）")
+            self.error.emit(f"生成超时（已等待{format_seconds(time.monotonic() - start_time)}）")
             
         except Exception as e:
             self.error.emit(f"生成失败: {str(e)}")
@@ -834,7 +828,8 @@ class KeyframeToVideoWidget(QWidget):
             model,
             resolution,
             prompt_extend,
-            output_folder
+            output_folder,
+            duration_stats=self.task_manager.get_duration_stats(model, resolution)
         )
         self.worker.finished.connect(self.on_generate_finished)
         self.worker.error.connect(self.on_generate_error)
@@ -853,12 +848,8 @@ class KeyframeToVideoWidget(QWidget):
         # 加载视频到视频查看器
         self.video_viewer.load_video(video_path)
         
-        # 刷新资源管理器
+        # 刷新浮动任务列表（资源管理器通过文件夹监视自动显示新视频）
         main_window = self.window()
-        if hasattr(main_window, 'project_explorer'):
-            main_window.project_explorer.refresh()
-        
-        # 刷新浮动任务列表
         if hasattr(main_window, 'floating_task_list'):
             main_window.floating_task_list.refresh_tasks()
         
@@ -6,7 +6,6 @@
 """
 
 import os
-import shutil
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QStatusBar, QSplitter, QPushButton, QAction, QStackedWidget, QTabWidget
@@ -32,6 +31,8 @@ from .reference_video_to_video_widget import ReferenceVideoToVideoWidget
 from core.task_manager import TaskManager
 from core.api_client import DashScopeClient
 from core.project_manager import ProjectManager
+from core.asset_catalog import CatalogRebuildWorker
+from core.input_store import get_input_store
 from config.settings import settings
 from themes.themes import Themes
 
@@ -46,6 +47,7 @@ class MainWindow(QMainWindow):
         # 初始化核心组件
         self.project_manager = ProjectManager()
         self.task_manager = TaskManager()
+        self._catalog_worker = None  # 素材目录后台重建线程
         self.api_client = DashScopeClient()
         
         # 当前选择的图片路径
@@ -279,6 +281,7 @@ class MainWindow(QMainWindow):
         
         # 下：任务列表
         self.task_list = TaskListWidget(self.task_manager, self.project_manager)
+        self.task_list.resume_inflight_tasks()
         right_splitter.addWidget(self.task_list)
         
         # 配置面板占更多空间
@@ -427,18 +430,13 @@ class MainWindow(QMainWindow):
         
         project = self.project_manager.get_current_project()
         
-        # 复制图片到工程 inputs 文件夹
+        # 导入图片到工程 inputs 文件夹（内容相同的图片只保存一份）
         try:
-            image_name = os.path.basename(self.current_image_path)
-            dest_path = os.path.join(project.inputs_folder, image_name)
-            
-            # 如果源文件不在工程文件夹中，则复制
-            if os.path.abspath(self.current_image_path) != os.path.abspath(dest_path):
-                shutil.copy2(self.current_image_path, dest_path)
-                self.current_image_path = dest_path
-                self.project_explorer.refresh()
+            # 资源管理器通过文件夹监视自动显示新文件
+            dest_path, _ = get_input_store().import_file(self.current_image_path, project.inputs_folder)
+            self.current_image_path = dest_path
         except Exception as e:
-            print(f"复制图片失败: {e}")
+            print(f"导入图片失败: {e}")
         
         # 禁用生成按钮并更新文本
         self.config_panel.generate_btn.setEnabled(False)
@@ -492,7 +490,7 @@ class MainWindow(QMainWindow):
             self.task_list.start_monitoring_task(task.id)
             
             self.status_bar.showMessage("任务已提交，正在生成视频...")
-            
+        
         except Exception as e:
             MessageHelper.error(self, "错误", f"任务提交失败：{str(e)}")
             self.status_bar.showMessage("任务提交失败")
@@ -681,12 +679,22 @@ class MainWindow(QMainWindow):
         self.task_manager.load_tasks()
         self.task_list.refresh_tasks()
         
+        # 在后台补全工程的素材目录
+        self._rebuild_asset_catalog(project)
+        
         # 切换到工作区
         self.central_stack.setCurrentWidget(self.work_area)
         
         # 启用关闭工程菜单
         self.close_project_action.setEnabled(True)
     
+    def _rebuild_asset_catalog(self, project):
+        """在后台重建工程的素材目录（取消上一个工程未完成的重建）"""
+        if self._catalog_worker is not None and self._catalog_worker.isRunning():
+            self._catalog_worker.cancel()
+        self._catalog_worker = CatalogRebuildWorker(project.path, self)
+        self._catalog_worker.start()
+    
     def switch_to_welcome_page(self):
         """切换到欢迎页面"""
         # 调整窗口大小为欢迎页尺寸
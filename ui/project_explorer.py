@@ -7,24 +7,31 @@
 """
 
 import os
-import shutil
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout,
-    QTreeWidgetItem, QFileIconProvider, QInputDialog, QApplication
+    QWidget, QVBoxLayout, QHBoxLayout, QAbstractItemView,
+    QFileIconProvider, QInputDialog, QApplication, QLineEdit
 )
 from PyQt5.QtCore import Qt, pyqtSignal, QMimeData, QUrl, QSize
-from PyQt5.QtGui import QDrag, QPixmap
+from PyQt5.QtGui import QDrag
+
+from core.asset_catalog import get_asset_catalog
+from core.folder_listing import FileEntry, SORT_NAME, SORT_MTIME, SORT_SIZE, SORT_MODEL
+from core.folder_watcher import FolderWatcher
+from core.input_store import get_input_store
+from core.thumbnail_cache import get_thumbnail_cache
+from core.thumbnail_service import ThumbnailService
+from .project_tree_model import ProjectTreeModel
 
 # 尝试导入 QFluentWidgets 组件
 try:
     from qfluentwidgets import (
-        TreeWidget, RoundMenu, Action, FluentIcon,
-        ToolButton, SubtitleLabel, BodyLabel, MessageBox
+        TreeView, RoundMenu, Action, FluentIcon, ComboBox,
+        ToolButton, SubtitleLabel, BodyLabel, MessageBox, SearchLineEdit
     )
     FLUENT_AVAILABLE = True
 except ImportError:
     FLUENT_AVAILABLE = False
-    from PyQt5.QtWidgets import QTreeWidget as TreeWidget, QMenu, QPushButton, QLabel, QMessageBox
+    from PyQt5.QtWidgets import QTreeView as TreeView, QComboBox as ComboBox, QMenu, QPushButton, QLabel, QMessageBox
     print("警告: QFluentWidgets 未安装，将使用原生 PyQt5 组件")
 
 
@@ -36,11 +43,42 @@ class ProjectExplorer(QWidget):
     refresh_requested = pyqtSignal()
     file_drag_started = pyqtSignal(str)  # 文件拖拽开始
     
+    # 文件节点的缩略图尺寸（更紧凑的显示）
+    THUMBNAIL_SIZE = (24, 24)
+    
+    # 排序方式: (显示名称, 排序键, 是否倒序)
+    SORT_OPTIONS = [
+        ("名称", SORT_NAME, False),
+        ("修改时间", SORT_MTIME, True),
+        ("大小", SORT_SIZE, True),
+        ("模型", SORT_MODEL, False),
+    ]
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.current_project = None
         self.icon_provider = QFileIconProvider()
         
+        # 文件树模型：文件行随滚动按块取出，缩略图在后台生成、行可见时才请求
+        self.thumbnail_service = ThumbnailService(parent=self)
+        if FLUENT_AVAILABLE:
+            icons = {
+                'project': FluentIcon.FOLDER.icon(),
+                'images': FluentIcon.PHOTO.icon(),
+                'videos': FluentIcon.VIDEO.icon(),
+                'image': FluentIcon.PHOTO.icon(),
+                'video': FluentIcon.VIDEO.icon(),
+            }
+        else:
+            icons = {}
+        # 缩略图生成前视频显示 emoji
+        self.model = ProjectTreeModel(self.thumbnail_service, self.THUMBNAIL_SIZE, icons,
+                                      video_prefix='' if FLUENT_AVAILABLE else "🎬 ", parent=self)
+        
+        # 监视图集/视频集目录，文件变化时增量更新文件树
+        self.folder_watcher = FolderWatcher(parent=self)
+        self.folder_watcher.folder_changed.connect(self._on_folder_changed)
+        
         # 启用整个 widget 的拖拽接收
         self.setAcceptDrops(True)
         
@@ -67,6 +105,13 @@ class ProjectExplorer(QWidget):
         
         header_layout.addStretch()
         
+        # 排序方式（只调整顺序，不重建文件树）
+        self.sort_combo = ComboBox()
+        self.sort_combo.addItems([label for label, _, _ in self.SORT_OPTIONS])
+        self.sort_combo.setToolTip("排序方式")
+        self.sort_combo.currentIndexChanged.connect(self.on_sort_changed)
+        header_layout.addWidget(self.sort_combo)
+        
         # 刷新按钮
         if FLUENT_AVAILABLE:
             refresh_btn = ToolButton(FluentIcon.SYNC)
@@ -95,27 +140,38 @@ class ProjectExplorer(QWidget):
         
         layout.addWidget(header)
         
-        # 树形视图
-        self.tree = TreeWidget()
+        # 提示词搜索框（按回车在素材目录中搜索，清空后恢复文件树）
+        self.search_edit = SearchLineEdit() if FLUENT_AVAILABLE else QLineEdit()
+        self.search_edit.setPlaceholderText("搜索提示词")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.returnPressed.connect(self.search_assets)
+        self.search_edit.textChanged.connect(self.on_search_text_changed)
+        self.search_edit.hide()
+        layout.addWidget(self.search_edit)
+        
+        # 树形视图（所有行高度相同，视图只为可见行取数据）
+        self.tree = TreeView()
+        self.tree.setModel(self.model)
         self.tree.setHeaderHidden(True)
+        self.tree.setUniformRowHeights(True)
         self.tree.setContextMenuPolicy(Qt.CustomContextMenu)
         self.tree.customContextMenuRequested.connect(self.show_context_menu)
-        self.tree.itemDoubleClicked.connect(self.on_item_double_clicked)
+        self.tree.doubleClicked.connect(self.on_item_double_clicked)
         
         # 设置图标大小 - 使用较小的图标以节省空间
         self.tree.setIconSize(QSize(24, 24))
         
         # 树形视图启用拖拽
         self.tree.setDragEnabled(True)
-        if FLUENT_AVAILABLE:
-            from PyQt5.QtWidgets import QAbstractItemView
-            self.tree.setDragDropMode(QAbstractItemView.DragOnly)
-        else:
-            self.tree.setDragDropMode(TreeWidget.DragOnly)
+        self.tree.setDragDropMode(QAbstractItemView.DragOnly)
         
         # 连接拖拽开始信号
         self.tree.startDrag = self.start_drag
         
+        # 滚动、展开/折叠或列表变长后，最后一行接近可见区域时取出下一块文件行
+        self.tree.verticalScrollBar().valueChanged.connect(self._fetch_more_rows)
+        self.tree.verticalScrollBar().rangeChanged.connect(self._fetch_more_rows)
+        
         layout.addWidget(self.tree)
         
         # 空状态提示
@@ -140,223 +196,181 @@ class ProjectExplorer(QWidget):
     def set_project(self, project):
         """设置当前工程"""
         self.current_project = project
+        self.search_edit.blockSignals(True)
+        self.search_edit.clear()
+        self.search_edit.blockSignals(False)
         if project:
+            self.search_edit.show()
             self.load_project()
         else:
             self.show_empty_state()
     
     def show_empty_state(self):
         """显示空状态"""
+        self.folder_watcher.clear()
+        self.model.clear()
         self.tree.hide()
+        self.search_edit.hide()
+        self.empty_label.setText("未打开工程\n\n请创建或打开工程")
         self.empty_label.show()
     
     def load_project(self):
-        """加载工程文件结构"""
-        self.tree.clear()
+        """加载工程文件结构（文件行随滚动取出，缩略图在后台生成，先显示占位图标）"""
+        self.folder_watcher.clear()
         self.empty_label.hide()
         self.tree.show()
         
         if not self.current_project:
+            self.model.clear()
             return
         
-        # 添加根节点
-        root = QTreeWidgetItem(self.tree)
-        root.setText(0, self.current_project.name)
-        root.setData(0, Qt.UserRole, self.current_project.path)
-        if FLUENT_AVAILABLE:
-            root.setIcon(0, FluentIcon.FOLDER.icon())
-        root.setExpanded(True)
+        # 图集对应 inputs 文件夹，视频集对应 outputs 文件夹；一次 scandir 同时作为监视的快照
+        folders = []
+        for label, folder, is_video in (
+                ("图集" if FLUENT_AVAILABLE else "📁 图集", self.current_project.inputs_folder, False),
+                ("视频集" if FLUENT_AVAILABLE else "📁 视频集", self.current_project.outputs_folder, True)):
+            folders.append((label, folder, is_video, self.folder_watcher.watch(folder)))
         
-        # 添加 inputs 文件夹 (显示为图集)
-        inputs_item = QTreeWidgetItem(root)
-        if FLUENT_AVAILABLE:
-            inputs_item.setText(0, "图集")
-            inputs_item.setIcon(0, FluentIcon.PHOTO.icon())
-        else:
-            inputs_item.setText(0, "📁 图集")
-        inputs_item.setData(0, Qt.UserRole, self.current_project.inputs_folder)
-        inputs_item.setExpanded(True)  # 默认展开
-        self.load_folder(inputs_item, self.current_project.inputs_folder)
+        models = self._asset_models() if self.model.sort_key == SORT_MODEL else None
+        self.model.set_project(self.current_project.name, self.current_project.path, folders, models)
         
-        # 添加 outputs 文件夹 (显示为视频集)
-        outputs_item = QTreeWidgetItem(root)
-        if FLUENT_AVAILABLE:
-            outputs_item.setText(0, "视频集")
-            outputs_item.setIcon(0, FluentIcon.VIDEO.icon())
-        else:
-            outputs_item.setText(0, "📁 视频集")
-        outputs_item.setData(0, Qt.UserRole, self.current_project.outputs_folder)
-        outputs_item.setExpanded(True)  # 默认展开
-        self.load_folder(outputs_item, self.current_project.outputs_folder)
-    
-    def load_folder(self, parent_item, folder_path):
-        """加载文件夹内容"""
-        if not os.path.exists(folder_path):
+        # 默认展开工程和两个文件夹
+        for index in self.model.folder_indexes():
+            self.tree.expand(index)
+    
+    def _asset_models(self):
+        """素材目录中各文件的生成模型"""
+        try:
+            return get_asset_catalog(self.current_project.path).models()
+        except Exception as e:
+            print(f"读取素材模型失败: {e}")
+            return {}
+    
+    def on_sort_changed(self, index):
+        """切换排序方式"""
+        if not 0 <= index < len(self.SORT_OPTIONS):
+            return
+        _, sort_key, descending = self.SORT_OPTIONS[index]
+        models = self._asset_models() if sort_key == SORT_MODEL and self.current_project else None
+        self.model.sort_by(sort_key, descending, models)
+    
+    def on_search_text_changed(self, text):
+        """清空搜索词时恢复文件树"""
+        if not text.strip() and self.current_project:
+            self.load_project()
+    
+    def search_assets(self):
+        """在工程素材目录中按提示词搜索，结果平铺显示"""
+        query = self.search_edit.text().strip()
+        if not query or not self.current_project:
             return
-        
         try:
-            items = os.listdir(folder_path)
-            items.sort()
-            
-            # 判断是图集还是视频集
-            folder_name = parent_item.text(0)
-            is_image_folder = "图集" in folder_name
-            is_video_folder = "视频集" in folder_name
-            
-            # 定义支持的文件类型
-            image_extensions = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp')
-            video_extensions = ('.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv')
-            
-            for item_name in items:
-                item_path = os.path.join(folder_path, item_name)
-                
-                if os.path.isfile(item_path):
-                    ext_lower = item_path.lower()
-                    
-                    # 图集只显示图片文件
-                    if is_image_folder:
-                        if ext_lower.endswith(image_extensions):
-                            file_item = QTreeWidgetItem(parent_item)
-                            # 使用缩略图
-                            thumbnail = self.create_thumbnail(item_path)
-                            if thumbnail:
-                                from PyQt5.QtGui import QIcon
-                                file_item.setIcon(0, QIcon(thumbnail))
-                            elif FLUENT_AVAILABLE:
-                                file_item.setIcon(0, FluentIcon.PHOTO.icon())
-                            file_item.setText(0, item_name)
-                            file_item.setData(0, Qt.UserRole, item_path)
-                        # 跳过所有非图片文件
-                        
-                    # 视频集只显示视频文件
-                    elif is_video_folder:
-                        if ext_lower.endswith(video_extensions):
-                            file_item = QTreeWidgetItem(parent_item)
-                            # 使用视频预览图
-                            thumbnail = self.create_video_thumbnail(item_path)
-                            if thumbnail:
-                                from PyQt5.QtGui import QIcon
-                                file_item.setIcon(0, QIcon(thumbnail))
-                                file_item.setText(0, item_name)
-                            elif FLUENT_AVAILABLE:
-                                file_item.setIcon(0, FluentIcon.VIDEO.icon())
-                                file_item.setText(0, item_name)
-                            else:
-                                # 没有缩略图时显示视频emoji
-                                file_item.setText(0, f"🎬 {item_name}")
-                            file_item.setData(0, Qt.UserRole, item_path)
-                        # 跳过所有非视频文件
-                        
+            results = get_asset_catalog(self.current_project.path).search(query)
         except Exception as e:
-            print(f"加载文件夹失败: {e}")
+            print(f"搜索素材失败: {e}")
+            results = []
+        
+        entries = []
+        for asset in results:
+            if not os.path.exists(asset['file_path']):
+                continue
+            prompt = asset.get('actual_prompt') or asset.get('orig_prompt') or ''
+            entries.append(FileEntry(asset['file_path'], model=asset.get('model') or '',
+                                     tooltip=f"{asset.get('model') or ''}\n{prompt}".strip()))
+        self.model.set_search_results(entries)
+        self.tree.setVisible(bool(entries))
+        self.empty_label.setVisible(not entries)
+        if not entries:
+            self.empty_label.setText("没有匹配的素材")
+    
+    def _fetch_more_rows(self, *args):
+        """
+        文件夹已取出的最后一行接近可见区域时取出下一块
+        
+        QTreeView 只会为根节点自动调用 fetchMore，文件夹节点的子项在这里按滚动位置取出。
+        只在滚动条变化时检查（此时视图已完成布局，行的位置是准确的）。
+        """
+        limit = self.tree.viewport().height() * 2
+        parents = [index for index in self.model.folder_indexes() if self.tree.isExpanded(index)]
+        parents.append(self.tree.rootIndex())
+        for parent in parents:
+            if not self.model.canFetchMore(parent):
+                continue
+            count = self.model.rowCount(parent)
+            last = self.model.index(count - 1, 0, parent) if count else parent
+            rect = self.tree.visualRect(last)
+            if rect.isValid() and rect.top() < limit:
+                self.model.fetchMore(parent)
+    
+    def _on_folder_changed(self, folder, changes):
+        """按文件变化增量更新文件树（只插入/删除受影响的行）"""
+        self.model.apply_changes(folder, changes, self.folder_watcher.snapshot(folder))
     
     def create_thumbnail(self, image_path):
         """
-        创建图片缩略图
+        创建图片缩略图（从磁盘缓存读取，未缓存时按目标尺寸解码一次）
         
         Args:
             image_path: 图片文件路径
-            
+        
         Returns:
             QPixmap: 缩略图，失败返回 None
         """
         try:
-            pixmap = QPixmap(image_path)
-            if pixmap.isNull():
-                return None
-            
-            # 创建 24x24 的缩略图（更紧凑的显示）
-            thumbnail = pixmap.scaled(
-                24, 24,
-                Qt.KeepAspectRatio,
-                Qt.SmoothTransformation
-            )
-            return thumbnail
+            return get_thumbnail_cache().pixmap(image_path, self.THUMBNAIL_SIZE)
         except Exception as e:
             print(f"创建缩略图失败: {e}")
             return None
     
     def create_video_thumbnail(self, video_path):
         """
-        创建视频预览图（提取第一帧）
+        创建视频预览图（第一帧，从磁盘缓存读取，未缓存时才打开视频）
         
         Args:
             video_path: 视频文件路径
-            
+        
         Returns:
             QPixmap: 预览图，失败返回 None
         """
         try:
-            import cv2
-            import numpy as np
-            from PyQt5.QtGui import QImage
-            
-            # 打开视频文件
-            cap = cv2.VideoCapture(video_path)
-            
-            if not cap.isOpened():
-                return None
-            
-            # 读取第一帧
-            ret, frame = cap.read()
-            cap.release()
-            
-            if not ret or frame is None:
-                return None
-            
-            # 转换BGR到RGB
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            
-            # 转换为QImage
-            height, width, channel = frame_rgb.shape
-            bytes_per_line = 3 * width
-            q_image = QImage(frame_rgb.data, width, height, bytes_per_line, QImage.Format_RGB888)
-            
-            # 转换为QPixmap并缩放（更紧凑的显示）
-            pixmap = QPixmap.fromImage(q_image)
-            thumbnail = pixmap.scaled(
-                24, 24,
-                Qt.KeepAspectRatio,
-                Qt.SmoothTransformation
-            )
-            
-            return thumbnail
-            
-        except ImportError:
-            # 如果没有安装cv2，返回None
-            return None
-        except Exception as e:
+            return get_thumbnail_cache().pixmap(video_path, self.THUMBNAIL_SIZE)
+        except Exception:
             # 静默失败，不打印错误信息
             return None
     
     def refresh(self):
-        """刷新"""
+        """重新加载整个文件树（文件变化由文件夹监视增量更新，这里只用于手动刷新）"""
         if self.current_project:
             self.load_project()
         self.refresh_requested.emit()
     
-    def on_item_double_clicked(self, item, column):
+    def _rescan_project(self):
+        """本程序修改工程文件后立即更新文件树，不等待变化通知"""
+        for folder in self.folder_watcher.folders():
+            self.folder_watcher.rescan(folder)
+    
+    def on_item_double_clicked(self, index):
         """双击项目"""
-        file_path = item.data(0, Qt.UserRole)
+        file_path = index.data(Qt.UserRole)
         if file_path and os.path.isfile(file_path):
             self.file_selected.emit(file_path)
     
     def get_dragged_file_path(self):
         """获取正在拖拽的文件路径"""
-        item = self.tree.currentItem()
-        if item:
-            file_path = item.data(0, Qt.UserRole)
+        index = self.tree.currentIndex()
+        if index.isValid():
+            file_path = index.data(Qt.UserRole)
             if file_path and os.path.isfile(file_path):
                 return file_path
         return None
     
     def start_drag(self, supportedActions):
         """开始拖拽操作"""
-        item = self.tree.currentItem()
-        if not item:
+        index = self.tree.currentIndex()
+        if not index.isValid():
             return
         
-        file_path = item.data(0, Qt.UserRole)
+        file_path = index.data(Qt.UserRole)
         if not file_path or not os.path.isfile(file_path):
             return
         
@@ -437,7 +451,7 @@ class ProjectExplorer(QWidget):
                     failed_count += 1
         
         event.acceptProposedAction()
-        self.refresh()
+        self._rescan_project()
         
         # 批量导入时显示总结
         if is_batch:
@@ -500,10 +514,10 @@ class ProjectExplorer(QWidget):
         Args:
             file_path: 文件路径
             show_message: 是否显示消息提示
-            
+        
         Returns:
             'success': 导入成功
-            'skipped': 用户跳过
+            'skipped': 工程中已有相同内容的文件
             'failed': 导入失败
         """
         if not self.current_project:
@@ -535,23 +549,20 @@ class ProjectExplorer(QWidget):
             return 'failed'
         
         try:
-            file_name = os.path.basename(file_path)
-            dest_path = os.path.join(dest_folder, file_name)
+            # 按内容保存到工作区存储，工程内通过 reflink 或硬链接引用；同名不同内容时自动改名
+            dest_path, method = get_input_store().import_file(file_path, dest_folder)
+            folder_name = "图集" if ext in image_extensions else "视频集"
             
-            # 检查是否已存在
-            if os.path.exists(dest_path):
-                if not self._confirm("确认覆盖", f"文件 '{file_name}' 已存在，是否覆盖？"):
-                    return 'skipped'
-            
-            # 复制文件
-            shutil.copy2(file_path, dest_path)
+            if method == 'exists':
+                if show_message:
+                    self._show_info("已存在", f"{folder_name}中已有相同的{file_type}: {os.path.basename(dest_path)}")
+                return 'skipped'
             
             if show_message:
-                folder_name = "图集" if ext in image_extensions else "视频集"
                 self._show_success("导入成功", f"{file_type}文件已导入到 {folder_name}")
             
             return 'success'
-            
+        
         except Exception as e:
             if show_message:
                 self._show_error("导入失败", f"无法导入文件: {str(e)}")
@@ -559,11 +570,11 @@ class ProjectExplorer(QWidget):
     
     def show_context_menu(self, position):
         """显示右键菜单"""
-        item = self.tree.itemAt(position)
-        if not item:
+        index = self.tree.indexAt(position)
+        if not index.isValid():
             return
         
-        file_path = item.data(0, Qt.UserRole)
+        file_path = index.data(Qt.UserRole)
         if not file_path or not os.path.isfile(file_path):
             return
         
@@ -673,7 +684,7 @@ class ProjectExplorer(QWidget):
         # 执行重命名
         try:
             os.rename(file_path, new_path)
-            self.refresh()
+            self.folder_watcher.rescan(os.path.dirname(file_path))
             self._show_success("成功", f"文件已重命名为:\n{new_name_with_ext}")
         except Exception as e:
             self._show_error("错误", f"重命名失败: {str(e)}")
@@ -683,7 +694,7 @@ class ProjectExplorer(QWidget):
         if self._confirm("确认删除", f"确定要删除文件吗？\n\n{os.path.basename(file_path)}"):
             try:
                 os.remove(file_path)
-                self.refresh()
+                self.folder_watcher.rescan(os.path.dirname(file_path))
                 self._show_success("成功", "文件已删除")
             except Exception as e:
                 self._show_error("错误", f"删除失败: {str(e)}")
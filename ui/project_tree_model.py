@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+资源管理器的文件树模型
+只为已取出的行提供数据：文件夹的子项随滚动按块取出（canFetchMore/fetchMore），
+缩略图在视图第一次绘制该行时才请求，一万张图片的工程也不会一次创建上万个节点。
+排序只调整列表顺序并通知视图重新布局，不重建文件树。
+"""
+
+import os
+from collections import OrderedDict
+
+from PyQt5.QtCore import QAbstractItemModel, QModelIndex, Qt
+from PyQt5.QtGui import QIcon, QPixmap
+
+from config.settings import settings
+from core.folder_listing import FileEntry, FolderListing, IMAGE_EXTENSIONS, VIDEO_EXTENSIONS, SORT_NAME
+from core.thumbnail_service import ThumbnailService
+
+
+class _GroupNode:
+    """分组节点（工程根节点、图集、视频集）；文件夹节点的子项来自 listing"""
+    
+    def __init__(self, label, icon=None, path=None, parent=None, listing=None):
+        self.label = label
+        self.icon = icon
+        self.path = path
+        self.parent = parent
+        self.row = 0
+        self.children = []
+        self.listing = listing
+        self.fetched = 0  # 已取出（对视图可见）的文件数
+    
+    def add_child(self, node):
+        node.parent = self
+        node.row = len(self.children)
+        self.children.append(node)
+        return node
+
+
+class ProjectTreeModel(QAbstractItemModel):
+    """
+    工程文件树模型
+    
+    每个索引的 internalPointer 为其父节点；文件行不创建节点对象，直接对应 listing 中的条目。
+    """
+    
+    # 缓存的缩略图图标数量上限（超过后淘汰最久未显示的，再次显示时重新从磁盘缓存读取）
+    MAX_ICONS = 2000
+    
+    def __init__(self, thumbnail_service: ThumbnailService, thumbnail_size, icons=None,
+                 video_prefix='', parent=None):
+        """
+        Args:
+            thumbnail_service: 缩略图服务
+            thumbnail_size: 文件行的缩略图尺寸
+            icons: 占位图标 {'project', 'images', 'videos', 'image', 'video'}（可缺省）
+            video_prefix: 视频缩略图生成前名称前的标记
+        """
+        super().__init__(parent)
+        self.thumbnail_service = thumbnail_service
+        self.thumbnail_size = tuple(thumbnail_size)
+        self.icons = icons or {}
+        self.video_prefix = video_prefix
+        self.fetch_chunk = settings.EXPLORER_FETCH_CHUNK
+        self.sort_key = SORT_NAME
+        self.descending = False
+        self._root = _GroupNode('')
+        self._folders = {}  # 文件夹路径 -> 文件夹节点
+        self._thumbnails = OrderedDict()  # 文件路径 -> QIcon
+        self._requested = set()
+        self.thumbnail_service.thumbnail_ready.connect(self._on_thumbnail_ready)
+    
+    # ========== 内容 ==========
+    
+    def clear(self):
+        """清空文件树并取消未完成的缩略图请求"""
+        self.beginResetModel()
+        self._root = _GroupNode('')
+        self._folders = {}
+        self._requested.clear()
+        self.thumbnail_service.cancel_all()
+        self.endResetModel()
+    
+    def set_project(self, name, path, folders, models=None):
+        """
+        显示工程文件树
+        
+        Args:
+            name: 工程名称
+            path: 工程目录
+            folders: [(标签, 文件夹路径, 是否为视频集, 文件夹快照)]
+            models: 文件路径 -> 生成模型（按模型排序时使用）
+        """
+        self.beginResetModel()
+        self._requested.clear()
+        self.thumbnail_service.cancel_all()
+        self._root = _GroupNode('')
+        self._folders = {}
+        project = self._root.add_child(_GroupNode(name, self.icons.get('project'), path))
+        for label, folder, is_video, snapshot in folders:
+            listing = FolderListing(folder, VIDEO_EXTENSIONS if is_video else IMAGE_EXTENSIONS,
+                                    self.sort_key, self.descending)
+            listing.load(snapshot, models)
+            node = project.add_child(_GroupNode(label, self.icons.get('videos' if is_video else 'images'),
+                                                listing.folder, listing=listing))
+            self._folders[listing.folder] = node
+        self.endResetModel()
+    
+    def set_search_results(self, entries):
+        """平铺显示搜索结果（保持相关度顺序）"""
+        self.beginResetModel()
+        self._requested.clear()
+        self.thumbnail_service.cancel_all()
+        listing = FolderListing(sort_key=None)
+        listing.load_entries(entries)
+        self._root = _GroupNode('', listing=listing)
+        self._folders = {}
+        self.endResetModel()
+    
+    def folder_indexes(self):
+        """工程根节点和各文件夹节点的索引（用于默认展开）"""
+        indexes = []
+        for project in self._root.children:
+            project_index = self.createIndex(project.row, 0, self._root)
+            indexes.append(project_index)
+            indexes.extend(self.createIndex(node.row, 0, project) for node in project.children)
+        return indexes
+    
+    def file_count(self):
+        """列表中的文件总数（包括尚未取出的）"""
+        nodes = list(self._folders.values()) or [self._root]
+        return sum(len(node.listing) for node in nodes if node.listing is not None)
+    
+    # ========== 排序 ==========
+    
+    def sort_by(self, sort_key, descending=False, models=None):
+        """
+        按名称、修改时间、大小或模型排序（只调整顺序，不重建文件树）
+        
+        Args:
+            sort_key: SORT_KEYS 之一
+            descending: 是否倒序
+            models: 按模型排序时使用的最新模型信息
+        """
+        self.sort_key = sort_key
+        self.descending = descending
+        if not self._folders:
+            return
+        self.layoutAboutToBeChanged.emit()
+        # 记录已取出的文件对应的持久索引，排序后更新到新位置
+        persistent = self.persistentIndexList()
+        paths = [self._entry(index).path if self._entry(index) else None for index in persistent]
+        for node in self._folders.values():
+            if models is not None:
+                node.listing.set_models(models)
+            node.listing.sort(sort_key, descending)
+        new_indexes = []
+        for index, path in zip(persistent, paths):
+            if path is None:
+                new_indexes.append(index)
+                continue
+            node = index.internalPointer()
+            row = node.listing.index_of(path)
+            new_indexes.append(self.createIndex(row, index.column(), node) if 0 <= row < node.fetched
+                               else QModelIndex())
+        self.changePersistentIndexList(persistent, new_indexes)
+        self.layoutChanged.emit()
+    
+    # ========== 增量更新 ==========
+    
+    def apply_changes(self, folder, changes, snapshot):
+        """
+        按文件夹监视得到的变化更新列表，只通知受影响的行
+        
+        Args:
+            folder: 文件夹路径
+            changes: core.folder_watcher.FolderChanges
+            snapshot: 该文件夹最新的快照（提供新文件的大小和修改时间）
+        """
+        node = self._folders.get(folder)
+        if node is None:
+            # 搜索结果：只处理删除和重命名
+            node = self._root if self._root.listing is not None else None
+            if node is None:
+                return
+        
+        for name in changes.removed:
+            self._remove(node, os.path.join(folder, name))
+        for old_name, new_name in changes.renamed:
+            old_path = os.path.join(folder, old_name)
+            entry = node.listing.get(old_path)
+            self._remove(node, old_path)
+            if node is self._root:
+                # 搜索结果中重命名的文件移到末尾
+                if entry is not None:
+                    self._insert(node, FileEntry(os.path.join(folder, new_name), entry.size, entry.mtime,
+                                                 entry.model, entry.tooltip))
+                continue
+            # 沿用原缩略图
+            icon = self._thumbnails.pop(old_path, None)
+            if icon is not None:
+                self._thumbnails[os.path.join(folder, new_name)] = icon
+            self._add(node, folder, new_name, snapshot, entry.model if entry else '')
+        if node is not self._root:
+            for name in changes.added:
+                self._add(node, folder, name, snapshot)
+        for name in changes.modified:
+            path = os.path.join(folder, name)
+            entry = node.listing.get(path)
+            if entry is None:
+                continue
+            # 内容变化后重新生成缩略图（缓存按修改时间区分）
+            self._thumbnails.pop(path, None)
+            self._requested.discard(path)
+            if node is self._root:
+                self._emit_changed(node, path)
+                continue
+            self._remove(node, path)
+            self._add(node, folder, name, snapshot, entry.model)
+    
+    def _add(self, node, folder, name, snapshot, model=''):
+        if not node.listing.accepts(name) or name not in snapshot:
+            return
+        info = snapshot[name]
+        self._insert(node, FileEntry(os.path.join(folder, name), info[1], info[2], model))
+    
+    def _insert(self, node, entry):
+        if node.listing.get(entry.path) is not None:
+            return
+        visible = node.fetched == len(node.listing)
+        row = node.listing.insert(entry)
+        # 插入到已取出的范围内才通知视图，其余的随滚动取出
+        if visible or row < node.fetched:
+            parent = self._index_of_node(node)
+            self.beginInsertRows(parent, row, row)
+            node.fetched += 1
+            self.endInsertRows()
+    
+    def _remove(self, node, path):
+        row = node.listing.index_of(path)
+        if row < 0:
+            return
+        if row < node.fetched:
+            parent = self._index_of_node(node)
+            self.beginRemoveRows(parent, row, row)
+            node.listing.remove(path)
+            node.fetched -= 1
+            self.endRemoveRows()
+        else:
+            node.listing.remove(path)
+        self._requested.discard(path)
+    
+    def _emit_changed(self, node, path):
+        row = node.listing.index_of(path)
+        if 0 <= row < node.fetched:
+            index = self.createIndex(row, 0, node)
+            self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.DecorationRole])
+    
+    # ========== 缩略图 ==========
+    
+    def _thumbnail(self, entry):
+        """已生成的缩略图；未生成时请求（视图只为可见行取图标，因此按可见优先处理）"""
+        icon = self._thumbnails.get(entry.path)
+        if icon is not None:
+            self._thumbnails.move_to_end(entry.path)
+            return icon
+        if entry.path not in self._requested:
+            self._requested.add(entry.path)
+            self.thumbnail_service.request(entry.path, self.thumbnail_size, ThumbnailService.PRIORITY_VISIBLE)
+        return None
+    
+    def _on_thumbnail_ready(self, file_path, size, image):
+        """缩略图生成完成，通知对应的行重新绘制"""
+        if tuple(size) != self.thumbnail_size or file_path not in self._requested:
+            return
+        self._requested.discard(file_path)
+        self._thumbnails[file_path] = QIcon(QPixmap.fromImage(image))
+        while len(self._thumbnails) > self.MAX_ICONS:
+            self._thumbnails.popitem(last=False)
+        node = self._folders.get(os.path.dirname(file_path))
+        if node is None and self._root.listing is not None:
+            node = self._root
+        if node is not None:
+            self._emit_changed(node, file_path)
+    
+    # ========== QAbstractItemModel ==========
+    
+    def _index_of_node(self, node):
+        if node is self._root:
+            return QModelIndex()
+        return self.createIndex(node.row, 0, node.parent)
+    
+    def _node(self, index):
+        """索引对应的分组节点（文件行返回 None）"""
+        if not index.isValid():
+            return self._root
+        parent = index.internalPointer()
+        if parent.listing is not None:
+            return None
+        return parent.children[index.row()]
+    
+    def _entry(self, index):
+        """索引对应的文件（分组行返回 None）"""
+        if not index.isValid():
+            return None
+        parent = index.internalPointer()
+        if parent.listing is None or index.row() >= len(parent.listing):
+            return None
+        return parent.listing.entries[index.row()]
+    
+    def index(self, row, column, parent=QModelIndex()):
+        node = self._node(parent)
+        if node is None or column != 0 or row < 0 or row >= self.rowCount(parent):
+            return QModelIndex()
+        return self.createIndex(row, column, node)
+    
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        return self._index_of_node(index.internalPointer())
+    
+    def rowCount(self, parent=QModelIndex()):
+        node = self._node(parent)
+        if node is None:
+            return 0
+        return node.fetched if node.listing is not None else len(node.children)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+    
+    def hasChildren(self, parent=QModelIndex()):
+        node = self._node(parent)
+        if node is None:
+            return False
+        return bool(node.children) or (node.listing is not None and len(node.listing) > 0)
+    
+    def canFetchMore(self, parent):
+        node = self._node(parent)
+        return node is not None and node.listing is not None and node.fetched < len(node.listing)
+    
+    def fetchMore(self, parent):
+        """随滚动按块取出文件行"""
+        node = self._node(parent)
+        if node is None or node.listing is None:
+            return
+        count = min(self.fetch_chunk, len(node.listing) - node.fetched)
+        if count <= 0:
+            return
+        self.beginInsertRows(parent, node.fetched, node.fetched + count - 1)
+        node.fetched += count
+        self.endInsertRows()
+    
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if self._entry(index) is not None:
+            flags |= Qt.ItemIsDragEnabled
+        return flags
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self._entry(index)
+        if entry is None:
+            node = self._node(index)
+            if role == Qt.DisplayRole:
+                return node.label
+            if role == Qt.DecorationRole:
+                return node.icon
+            if role == Qt.UserRole:
+                return node.path
+            return None
+        
+        if role == Qt.DisplayRole:
+            if entry.is_video and self.video_prefix and entry.path not in self._thumbnails:
+                return self.video_prefix + entry.name
+            return entry.name
+        if role == Qt.DecorationRole:
+            icon = self._thumbnail(entry)
+            if icon is None:
+                icon = self.icons.get('video' if entry.is_video else 'image')
+            return icon
+        if role == Qt.UserRole:
+            return entry.path
+        if role == Qt.ToolTipRole:
+            return entry.tooltip or None
+        return None
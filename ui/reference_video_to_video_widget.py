@@ -7,6 +7,7 @@
 """
 
 import os
+import threading
 import time
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
@@ -27,6 +28,9 @@ except ImportError:
     FLUENT_AVAILABLE = False
 
 from .video_viewer import VideoViewerWidget
+from core.asset_catalog import catalog_asset
+from core.thumbnail_cache import get_thumbnail_cache
+from core.poll_cadence import PollCadence, format_seconds
 
 
 class DragDropVideoLabel(QLabel):
@@ -34,6 +38,9 @@ class DragDropVideoLabel(QLabel):
     
     video_dropped = pyqtSignal(str)  # 视频路径
     
+    # 缓存的缩略图尺寸，显示时再按控件大小缩放
+    THUMBNAIL_SIZE = (640, 640)
+    
     def __init__(self, text="", parent=None):
         super().__init__(text, parent)
         self.setAcceptDrops(True)
@@ -127,33 +134,9 @@ class DragDropVideoLabel(QLabel):
             """)
     
     def generate_video_thumbnail(self, video_path):
-        """生成视频缩略图（使用OpenCV提取第一帧）"""
+        """生成视频缩略图（第一帧，使用缩略图缓存，未缓存时才用 OpenCV 读取）"""
         try:
-            import cv2
-            from PyQt5.QtGui import QImage, QPixmap
-            
-            cap = cv2.VideoCapture(video_path)
-            if not cap.isOpened():
-                return None
-            
-            ret, frame = cap.read()
-            cap.release()
-            
-            if not ret or frame is None:
-                return None
-            
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            height, width, channel = frame_rgb.shape
-            bytes_per_line = 3 * width
-            q_image = QImage(frame_rgb.data, width, height, bytes_per_line, QImage.Format_RGB888)
-            pixmap = QPixmap.fromImage(q_image)
-            
-            if not pixmap.isNull():
-                return pixmap
-            return None
-            
-        except ImportError:
-            return None
+            return get_thumbnail_cache().pixmap(video_path, self.THUMBNAIL_SIZE)
         except Exception:
             return None
     
@@ -178,7 +161,7 @@ class ReferenceVideoWorker(QThread):
     task_submitted = pyqtSignal(str)
     
     def __init__(self, api_client, reference_videos, prompt, negative_prompt,
-                 size, duration, shot_type, audio, output_folder):
+                 size, duration, shot_type, audio, output_folder, duration_stats=None):
         super().__init__()
         self.api_client = api_client
         self.reference_videos = reference_videos
@@ -189,17 +172,32 @@ class ReferenceVideoWorker(QThread):
         self.shot_type = shot_type
         self.audio = audio
         self.output_folder = output_folder
+        self.duration_stats = duration_stats  # 同类任务历史耗时，用于安排轮询
+    
+    def _on_upload_progress(self, file_path, sent, total):
+        """上传进度回调（在上传线程中调用），百分比变化时汇总各文件进度"""
+        percent = int(sent * 100 / total) if total else 100
+        with self._upload_lock:
+            if percent == self._upload_percents.get(file_path):
+                return
+            self._upload_percents[file_path] = percent
+            parts = [
+                f"{os.path.basename(path)} {max(value, 0)}%"
+                for path, value in self._upload_percents.items()
+            ]
+        self.progress.emit("正在上传: " + "，".join(parts))
     
     def run(self):
         """执行生成任务"""
         try:
             self.progress.emit("正在上传参考视频...")
             
-            reference_video_urls = []
-            for video_path in self.reference_videos:
-                self.progress.emit(f"正在上传: {os.path.basename(video_path)}")
-                video_url = self.api_client.upload_video_and_get_url(video_path, "wan2.6-r2v")
-                reference_video_urls.append(video_url)
+            # 多个视频并发上传，已上传过且未过期的视频直接复用地址
+            self._upload_percents = {path: -1 for path in self.reference_videos}
+            self._upload_lock = threading.Lock()
+            reference_video_urls = self.api_client.upload_files(
+                self.reference_videos, "wan2.6-r2v", self._on_upload_progress
+            )
             
             self.progress.emit("正在提交任务...")
             
@@ -217,14 +215,14 @@ class ReferenceVideoWorker(QThread):
             self.progress.emit(f"任务已提交 (ID: {task_id})")
             self.task_submitted.emit(task_id)
             
-            max_retries = 180
-            retry_count = 0
+            cadence = PollCadence('video', self.duration_stats)
+            start_time = time.monotonic()
             
-            while retry_count < max_retries:
-                time.sleep(5)
-                retry_count += 1
+            while not cadence.is_expired(time.monotonic() - start_time):
+                time.sleep(cadence.next_delay(time.monotonic() - start_time))
                 
-                self.progress.emit(f"正在生成视频... ({retry_count}/{max_retries})")
+                elapsed = time.monotonic() - start_time
+                self.progress.emit(f"正在生成视频... ({cadence.progress_text(elapsed)})")
                 
                 task_result = self.api_client.query_task(task_id)
                 task_status = task_result['output'].get('task_status', '')
@@ -260,6 +258,7 @@ class ReferenceVideoWorker(QThread):
                     except Exception as e:
                         print(f"保存元数据失败: {e}")
                     
+                    catalog_asset(video_path, video_info)
                     self.finished.emit(video_path, video_info)
                     return
                     
@@ -273,7 +272,7 @@ class ReferenceVideoWorker(QThread):
                     self.error.emit("任务查询过期，请重试")
                     return
             
-            self.error.emit(f"生成超时（已等待{max_retries * 5}秒）")
+            self.error.emit(f"生成超时（已等待{format_seconds(time.monotonic() - start_time)}）")
             
         except Exception as e:
             self.error.emit(f"生成失败: {str(e)}")
@@ -860,7 +859,8 @@ class ReferenceVideoToVideoWidget(QWidget):
             resolution=size,
             negative_prompt=negative_prompt,
             prompt_extend=False,
-            input_file=valid_videos[0] if valid_videos else ""
+            input_file=valid_videos[0] if valid_videos else "",
+            duration=duration
         )
         
         self.worker = ReferenceVideoWorker(
@@ -872,7 +872,8 @@ class ReferenceVideoToVideoWidget(QWidget):
             duration,
             shot_type,
             audio,
-            output_folder
+            output_folder,
+            duration_stats=self.task_manager.get_duration_stats('wan2.6-r2v', size, duration)
         )
         self.worker.finished.connect(self.on_generate_finished)
         self.worker.error.connect(self.on_generate_error)
@@ -914,9 +915,6 @@ class ReferenceVideoToVideoWidget(QWidget):
         self.video_viewer.load_video(video_path)
         
         main_window = self.window()
-        if hasattr(main_window, 'project_explorer'):
-            main_window.project_explorer.refresh()
-        
         if hasattr(main_window, 'floating_task_list'):
             main_window.floating_task_list.refresh_tasks()
         
@@ -12,7 +12,7 @@ from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout,
     QTableWidgetItem, QHeaderView
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer
+from PyQt5.QtCore import Qt, pyqtSignal, QTimer
 from PyQt5.QtGui import QColor
 
 from qfluentwidgets import (
@@ -22,98 +22,13 @@ from qfluentwidgets import (
 )
 
 from core.task_manager import TaskManager
-from core.api_client import DashScopeClient
 from core.models import TaskStatus
+from core.project_manager import Project
+from core.poll_scheduler import get_poll_scheduler
+from core.poll_cadence import format_seconds
 from config.settings import settings
 
 
-class TaskMonitorThread(QThread):
-    """任务监控线程"""
-    
-    task_updated = pyqtSignal(str, dict)  # task_id, task_data
-    
-    def __init__(self, task_id, api_client, task_manager, output_folder=None):
-        super().__init__()
-        self.task_id = task_id
-        self.api_client = api_client
-        self.task_manager = task_manager
-        self.output_folder = output_folder or settings.OUTPUT_FOLDER
-        self.running = True
-    
-    def run(self):
-        """运行监控"""
-        while self.running:
-            try:
-                task = self.task_manager.get_task(self.task_id)
-                if not task or task.is_completed():
-                    break
-                
-                if not task.async_task_id:
-                    break
-                
-                # 查询任务状态
-                result = self.api_client.query_task(task.async_task_id)
-                task_data = result['output']
-                
-                # 更新任务状态
-                status = task_data['task_status']
-                message = task_data.get('message', '')
-                
-                updates = {
-                    'status': TaskStatus(status),
-                    'message': message
-                }
-                
-                # 如果任务成功
-                if status == 'SUCCEEDED':
-                    video_url = task_data.get('video_url')
-                    if video_url:
-                        # 检查任务是否已经有输出路径（说明已被其他地方下载）
-                        if task.output_path and os.path.exists(task.output_path):
-                            # 已经下载过，只更新状态
-                            updates['video_url'] = video_url
-                            updates['completed_at'] = datetime.now().isoformat()
-                        else:
-                            # 下载视频到指定输出文件夹
-                            output_path = os.path.join(
-                                self.output_folder,
-                                f"{self.task_id}.mp4"
-                            )
-                            try:
-                                downloaded_path = self.api_client.download_video(video_url, output_path)
-                                updates['output_path'] = downloaded_path
-                                updates['video_url'] = video_url
-                                updates['completed_at'] = datetime.now().isoformat()
-                            except Exception as e:
-                                print(f"下载视频失败: {e}")
-                                updates['error'] = str(e)
-                
-                elif status == 'FAILED':
-                    updates['error'] = message
-                    updates['error_code'] = task_data.get('code', 'UnknownError')
-                
-                # 更新任务
-                self.task_manager.update_task(self.task_id, **updates)
-                
-                # 发送更新信号
-                self.task_updated.emit(self.task_id, updates)
-                
-                # 如果完成则退出
-                if status in ['SUCCEEDED', 'FAILED']:
-                    break
-                
-                # 等待5秒
-                self.msleep(5000)
-                
-            except Exception as e:
-                print(f"监控任务 {self.task_id} 时出错: {e}")
-                self.msleep(5000)
-    
-    def stop(self):
-        """停止监控"""
-        self.running = False
-
-
 class TaskListWidget(QWidget):
     """任务列表组件 - 使用 QFluentWidgets 美化"""
     
@@ -123,15 +38,20 @@ class TaskListWidget(QWidget):
         super().__init__(parent)
         self.task_manager = task_manager
         self.project_manager = project_manager
-        self.api_client = DashScopeClient()
-        self.monitor_threads = {}  # task_id -> thread
+        # 所有任务共用一个轮询调度器，线程数不随任务数量增长
+        self.poll_scheduler = get_poll_scheduler(task_manager)
+        self.poll_scheduler.task_updated.connect(self._on_scheduler_task_updated)
+        self.poll_scheduler.task_finished.connect(self._on_scheduler_task_finished)
+        self.monitored_tasks = set()  # 由本组件发起监控的任务ID
+        # 分页显示：默认只显示最近的一页，点击"加载更多"后继续加载（包括归档）
+        self.page_limit = settings.TASK_PAGE_SIZE
+        self.include_archive = False
         
         self.setup_ui()
-        self.refresh_tasks()
         
-        # 定时刷新
+        # 定时刷新（只在显示时刷新，未显示前不加载任务分区）
         self.refresh_timer = QTimer()
-        self.refresh_timer.timeout.connect(self.refresh_tasks)
+        self.refresh_timer.timeout.connect(self._on_refresh_timer)
         self.refresh_timer.start(10000)  # 每10秒刷新
     
     def setup_ui(self):
@@ -183,6 +103,13 @@ class TaskListWidget(QWidget):
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
         
         card_layout.addWidget(self.table)
+        
+        # 加载更多按钮
+        self.more_btn = PushButton(FluentIcon.DOWN, "加载更多")
+        self.more_btn.clicked.connect(self.load_more_tasks)
+        self.more_btn.hide()
+        card_layout.addWidget(self.more_btn)
+        
         layout.addWidget(card)
     
     def _get_status_icon(self, status) -> FluentIcon:
@@ -218,16 +145,34 @@ class TaskListWidget(QWidget):
             return str_map.get(status, status)
         return status_map.get(status, status.value if hasattr(status, 'value') else str(status))
     
+    def showEvent(self, event):
+        """显示时刷新"""
+        super().showEvent(event)
+        self.refresh_tasks()
+    
+    def _on_refresh_timer(self):
+        """定时刷新"""
+        if self.isVisible():
+            self.refresh_tasks()
+    
     def refresh_tasks(self):
-        """刷新任务列表"""
-        tasks = self.task_manager.get_all_tasks()
-        
-        # 按创建时间倒序排列
-        tasks.sort(key=lambda t: t.created_at, reverse=True)
+        """刷新任务列表（只显示当前工程的任务）"""
+        # 多查一个判断是否还有更多（已按创建时间倒序排列）
+        tasks = self.task_manager.query_tasks(
+            limit=self.page_limit + 1, include_archive=self.include_archive
+        )
+        has_more = len(tasks) > self.page_limit
+        tasks = tasks[:self.page_limit]
+        if not has_more and not self.include_archive:
+            has_more = bool(self.task_manager.get_archive().months())
+        self.more_btn.setVisible(has_more)
         
         # 清空表格
         self.table.setRowCount(0)
         
+        # 同类任务的耗时分布每次刷新只统计一次
+        duration_stats = {}
+        
         # 填充数据
         for row, task in enumerate(tasks):
             self.table.insertRow(row)
@@ -252,6 +197,20 @@ class TaskListWidget(QWidget):
             status_layout.addWidget(status_label)
             status_layout.addStretch()
             
+            # 进行中的任务按同类任务历史耗时显示预计剩余时间
+            if not task.is_completed():
+                key = (task.model, task.resolution, task.duration)
+                if key not in duration_stats:
+                    duration_stats[key] = self.task_manager.get_duration_stats(*key)
+                remaining = self.task_manager.estimate_remaining(task, duration_stats[key])
+                if remaining is not None:
+                    status_label.setText(f"{status_text} · 约{format_seconds(remaining)}")
+                    stats = duration_stats[key].to_dict()
+                    status_widget.setToolTip(
+                        f"同类任务耗时: 中位数 {format_seconds(stats['p50'])}，"
+                        f"90% 在 {format_seconds(stats['p90'])} 内（{stats['count']} 个样本）"
+                    )
+            
             self.table.setCellWidget(row, 0, status_widget)
             
             # 任务ID
@@ -289,9 +248,15 @@ class TaskListWidget(QWidget):
         for row in range(self.table.rowCount()):
             self.table.setRowHeight(row, 44)
     
+    def load_more_tasks(self):
+        """加载下一页任务（当前工程的任务显示完后继续加载归档）"""
+        self.page_limit += settings.TASK_PAGE_SIZE
+        self.include_archive = True
+        self.refresh_tasks()
+    
     def start_monitoring_task(self, task_id):
         """开始监控任务"""
-        if task_id in self.monitor_threads:
+        if task_id in self.monitored_tasks:
             return
         
         # 确定输出文件夹
@@ -300,12 +265,36 @@ class TaskListWidget(QWidget):
             project = self.project_manager.get_current_project()
             output_folder = project.outputs_folder
         
-        thread = TaskMonitorThread(task_id, self.api_client, self.task_manager, output_folder)
-        thread.task_updated.connect(self.on_task_updated)
-        thread.finished.connect(lambda: self.on_monitoring_finished(task_id))
-        thread.start()
+        self.monitored_tasks.add(task_id)
+        self.poll_scheduler.add_task(task_id, output_folder)
+    
+    def resume_inflight_tasks(self):
+        """
+        恢复所有工程中已提交未结束的任务的监控
         
-        self.monitor_threads[task_id] = thread
+        只读取在途任务索引，不加载任何工程的任务数据；
+        结果下载到任务所属工程的视频集文件夹。
+        """
+        for task_id, entry in self.task_manager.get_inflight_entries().items():
+            if task_id in self.monitored_tasks:
+                continue
+            tasks_file = entry['tasks_file']
+            if os.path.abspath(tasks_file) == os.path.abspath(settings.TASKS_FILE):
+                output_folder = settings.OUTPUT_FOLDER
+            else:
+                output_folder = Project('', os.path.dirname(tasks_file)).outputs_folder
+            self.monitored_tasks.add(task_id)
+            self.poll_scheduler.add_task(task_id, output_folder)
+    
+    def _on_scheduler_task_updated(self, task_id, updates):
+        """调度器任务更新（只处理本组件监控的任务）"""
+        if task_id in self.monitored_tasks:
+            self.on_task_updated(task_id, updates)
+    
+    def _on_scheduler_task_finished(self, task_id):
+        """调度器任务结束（只处理本组件监控的任务）"""
+        if task_id in self.monitored_tasks:
+            self.on_monitoring_finished(task_id)
     
     def on_task_updated(self, task_id, updates):
         """任务更新回调"""
@@ -314,21 +303,14 @@ class TaskListWidget(QWidget):
     
     def on_monitoring_finished(self, task_id):
         """监控结束回调"""
-        if task_id in self.monitor_threads:
-            del self.monitor_threads[task_id]
+        self.monitored_tasks.discard(task_id)
+        # 下载的视频由资源管理器的文件夹监视自动显示，不再整体刷新
         self.refresh_tasks()
-        
-        # 刷新工程资源管理器（如果有工程）
-        if self.project_manager and self.project_manager.has_project():
-            # 通过 parent 窗口刷新资源管理器
-            main_window = self.window()
-            if hasattr(main_window, 'project_explorer'):
-                main_window.project_explorer.refresh()
     
     def closeEvent(self, event):
         """关闭事件"""
-        # 停止所有监控线程
-        for thread in self.monitor_threads.values():
-            thread.stop()
-            thread.wait()
+        # 停止本组件发起的监控
+        for task_id in list(self.monitored_tasks):
+            self.poll_scheduler.remove_task(task_id)
+        self.monitored_tasks.clear()
         event.accept()
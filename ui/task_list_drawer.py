@@ -154,6 +154,10 @@ class TaskListDrawer(QFrame):
         """开始监控任务"""
         self.task_list.start_monitoring_task(task_id)
     
+    def resume_inflight_tasks(self):
+        """恢复所有工程的在途任务监控"""
+        self.task_list.resume_inflight_tasks()
+    
     def show_drawer(self, parent_widget=None):
         """显示抽屉"""
         if parent_widget:
@@ -13,7 +13,12 @@ from PyQt5.QtWidgets import (
     QGridLayout, QSpinBox
 )
 from PyQt5.QtCore import Qt, pyqtSignal, QThread
-from PyQt5.QtGui import QPixmap
+
+from core.asset_catalog import catalog_asset
+from core.history_store import HistoryStore, MissingFileChecker
+from core.thumbnail_cache import get_thumbnail_cache
+from core.poll_cadence import PollCadence
+from config.settings import settings
 
 try:
     from qfluentwidgets import (
@@ -49,7 +54,6 @@ class TextToImageWorker(QThread):
     def run(self):
         """执行文生图任务"""
         try:
-            import requests
             import json
             import time
             from datetime import datetime
@@ -87,6 +91,7 @@ class TextToImageWorker(QThread):
                                 'negative_prompt': self.user_negative_prompt,
                                 'seed': img_result.get('seed', '')
                             }
+                            catalog_asset(output_path, prompt_info)
                             self.finished.emit(image_url, output_path, prompt_info)
                     
                     # 如果有失败的，发送警告
@@ -111,6 +116,7 @@ class TextToImageWorker(QThread):
                             'negative_prompt': self.user_negative_prompt,
                             'seed': seed
                         }
+                        catalog_asset(output_path, prompt_info)
                         self.finished.emit(image_url, output_path, prompt_info)
             else:
                 # 其他模型使用异步接口
@@ -148,6 +154,7 @@ class TextToImageWorker(QThread):
                                 'negative_prompt': self.user_negative_prompt,
                                 'seed': img_result.get('seed', '')
                             }
+                            catalog_asset(output_path, prompt_info)
                             self.finished.emit(image_url, output_path, prompt_info)
                     
                     # 如果有失败的，发送警告
@@ -172,6 +179,7 @@ class TextToImageWorker(QThread):
                             'negative_prompt': self.user_negative_prompt,
                             'seed': seed
                         }
+                        catalog_asset(output_path, prompt_info)
                         self.finished.emit(image_url, output_path, prompt_info)
             
         except Exception as e:
@@ -180,11 +188,10 @@ class TextToImageWorker(QThread):
     def submit_task(self):
         """提交异步生成任务"""
         try:
-            import requests
             import json
             
             # 所有模型都使用text2image接口（包括万相2.6）
-            url = 'https://dashscope.aliyuncs.com/api/v1/services/aigc/text2image/image-synthesis'
+            url = f'{self.api_client.base_url}/services/aigc/text2image/image-synthesis'
             headers = {
                 'Content-Type': 'application/json',
                 'Authorization': f'Bearer {self.api_client.api_key}',
@@ -238,7 +245,8 @@ class TextToImageWorker(QThread):
                 if self.seed is not None:
                     data["parameters"]["seed"] = self.seed
             
-            response = requests.post(url, headers=headers, json=data, timeout=30)
+            response = self.api_client.request('POST', url, endpoint='submit', model=self.model,
+                                               headers=headers, json=data)
             result = response.json()
             
             print(f"[DEBUG] API响应 - 模型: {self.model}")
@@ -265,14 +273,12 @@ class TextToImageWorker(QThread):
     def submit_task_sync(self):
         """提交同步生成任务（万相2.6和Z-Image专用）"""
         try:
-            import requests
-            
             # 判断模型类型
             is_wan26 = self.model == 'wan2.6-t2i'
             is_z_image = self.model == 'z-image-turbo'
             
             # 使用multimodal-generation同步接口
-            url = 'https://dashscope.aliyuncs.com/api/v1/services/aigc/multimodal-generation/generation'
+            url = f'{self.api_client.base_url}/services/aigc/multimodal-generation/generation'
             headers = {
                 'Content-Type': 'application/json',
                 'Authorization': f'Bearer {self.api_client.api_key}'
@@ -319,7 +325,8 @@ class TextToImageWorker(QThread):
                 data["parameters"]["seed"] = self.seed
             
             # 同步调用，可能需要较长时间
-            response = requests.post(url, headers=headers, json=data, timeout=120)
+            response = self.api_client.request('POST', url, endpoint='generation', model=self.model,
+                                               headers=headers, json=data)
             result = response.json()
             
             # 调试：打印完整响应以便排查
@@ -386,19 +393,19 @@ class TextToImageWorker(QThread):
     def poll_task_status(self, task_id):
         """轮询任务状态直到完成"""
         try:
-            import requests
             import time
             
-            url = f'https://dashscope.aliyuncs.com/api/v1/tasks/{task_id}'
+            url = f'{self.api_client.base_url}/tasks/{task_id}'
             headers = {
                 'Authorization': f'Bearer {self.api_client.api_key}'
             }
             
-            max_retries = 60  # 最多等待60次（约2分钟）
-            retry_count = 0
+            # 预计完成前稀疏查询，接近完成时密集查询，超出预期后退避
+            cadence = PollCadence('image')
+            start_time = time.monotonic()
             
-            while retry_count < max_retries:
-                response = requests.get(url, headers=headers, timeout=30)
+            while not cadence.is_expired(time.monotonic() - start_time):
+                response = self.api_client.request('GET', url, endpoint='query', headers=headers)
                 result = response.json()
                 
                 # 检查错误
@@ -461,9 +468,8 @@ class TextToImageWorker(QThread):
                         return None
                     
                     elif task_status in ['PENDING', 'RUNNING']:
-                        # 任务进行中，继续等待
-                        retry_count += 1
-                        time.sleep(2)  # 等待2秒后重试
+                        # 任务进行中，按轮询节奏等待后重试
+                        time.sleep(cadence.next_delay(time.monotonic() - start_time))
                         continue
                     
                     else:
@@ -611,18 +617,13 @@ class TextToImageWorker(QThread):
     def download_image(self, image_url, suffix=""):
         """下载生成的图片"""
         try:
-            import requests
             from datetime import datetime
             
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             filename = f"text2img_{timestamp}{suffix}.png"
             output_path = os.path.join(self.output_folder, filename)
             
-            img_response = requests.get(image_url, timeout=30)
-            with open(output_path, 'wb') as f:
-                f.write(img_response.content)
-            
-            return output_path
+            return self.api_client.download_file(image_url, output_path)
             
         except Exception as e:
             self.error.emit(f"下载图片失败: {str(e)}")
@@ -637,8 +638,11 @@ class ImageGalleryWidget(QWidget):
     def __init__(self, project_manager, parent=None):
         super().__init__(parent)
         self.project_manager = project_manager
-        self.images = []  # 存储字典：{'path': str, 'model': str, 'size': str, 'seed': str, 'orig_prompt': str, 'actual_prompt': str, 'negative_prompt': str}
-        self.history_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'text2image_history.json')  # 默认全局历史文件
+        self.images = []  # 当前显示的记录（从新到旧）：{'id', 'path', 'model', 'size', 'seed', 'orig_prompt', 'actual_prompt', 'negative_prompt'}
+        self.page_limit = settings.GALLERY_PAGE_SIZE  # 当前显示的数量，点击"加载更多"后增加
+        self.history = None
+        self._checker = None
+        self.history_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'text2image_history.jsonl')  # 默认全局历史文件
         self.setup_ui()
         self.load_history()  # 加载历史记录
     
@@ -646,11 +650,11 @@ class ImageGalleryWidget(QWidget):
         """设置工程上下文，更新历史记录文件路径"""
         if project and hasattr(project, 'path'):
             # 将历史记录文件保存到工程文件夹中
-            self.history_file = os.path.join(project.path, 'text2image_history.json')
+            self.history_file = os.path.join(project.path, 'text2image_history.jsonl')
             self.load_history()  # 重新加载该工程的历史记录
         else:
             # 没有工程时使用默认全局历史文件
-            self.history_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'text2image_history.json')
+            self.history_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'text2image_history.jsonl')
             self.load_history()  # 加载全局历史记录
     
     def setup_ui(self):
@@ -688,6 +692,12 @@ class ImageGalleryWidget(QWidget):
         
         scroll.setWidget(self.gallery_widget)
         layout.addWidget(scroll)
+        
+        # 加载更多（历史记录分页显示）
+        self.more_btn = QPushButton("加载更多")
+        self.more_btn.clicked.connect(self.load_more)
+        self.more_btn.hide()
+        layout.addWidget(self.more_btn)
     
     def add_image(self, image_path, model='', size='', seed='', orig_prompt='', actual_prompt='', negative_prompt=''):
         """添加图片到画廊"""
@@ -704,12 +714,19 @@ class ImageGalleryWidget(QWidget):
             'actual_prompt': actual_prompt,
             'negative_prompt': negative_prompt
         }
-        self.images.insert(0, image_info)  # 新图片添加到开头
-        self.save_history()  # 保存历史记录
+        self.history.append([image_info])  # 只追加一行
+        self.refresh_gallery()
+    
+    def load_more(self):
+        """显示下一页历史记录"""
+        self.page_limit += settings.GALLERY_PAGE_SIZE
         self.refresh_gallery()
     
     def refresh_gallery(self):
-        """刷新画廊显示"""
+        """刷新画廊显示（新图片在前，只显示前 page_limit 张）"""
+        self.images = self.history.page(0, self.page_limit)
+        self.more_btn.setVisible(self.history.count() > len(self.images))
+        
         # 清空现有布局（但不删除empty_label）
         while self.gallery_layout.count():
             item = self.gallery_layout.takeAt(0)
@@ -765,10 +782,9 @@ class ImageGalleryWidget(QWidget):
         
         # 图片标签
         image_label = QLabel()
-        pixmap = QPixmap(image_path)
-        if not pixmap.isNull():
-            # 缩放到固定大小
-            scaled_pixmap = pixmap.scaled(250, 250, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        # 从缩略图缓存读取固定大小的缩略图，不解码原图
+        scaled_pixmap = get_thumbnail_cache().pixmap(image_path, (250, 250))
+        if scaled_pixmap is not None:
             image_label.setPixmap(scaled_pixmap)
             image_label.setAlignment(Qt.AlignCenter)
             image_label.setStyleSheet("border: none;")
@@ -925,54 +941,30 @@ class ImageGalleryWidget(QWidget):
     
     def clear(self):
         """清空画廊"""
-        self.images.clear()
-        self.save_history()  # 保存更新
+        self.history.clear()
         self.refresh_gallery()
     
-    def save_history(self):
-        """保存历史记录到JSON文件"""
-        try:
-            import json
-            
-            # 确保目录存在
-            os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
-            
-            # 只保存存在的图片
-            valid_images = []
-            for img_info in self.images:
-                if os.path.exists(img_info['path']):
-                    valid_images.append(img_info)
-            
-            # 保存到文件
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(valid_images, f, ensure_ascii=False, indent=2)
-            
-        except Exception as e:
-            print(f"保存历史记录失败: {e}")
-    
     def load_history(self):
-        """从 JSON 文件加载历史记录"""
-        try:
-            import json
-            
-            if not os.path.exists(self.history_file):
-                return
-            
-            # 读取文件
-            with open(self.history_file, 'r', encoding='utf-8') as f:
-                loaded_images = json.load(f)
-            
-            # 只加载存在的图片
-            self.images = []
-            for img_info in loaded_images:
-                if os.path.exists(img_info.get('path', '')):
-                    self.images.append(img_info)
-            
-            # 刷新显示
+        """加载历史记录（图片是否存在由后台线程检查）"""
+        if self._checker is not None:
+            self._checker.cancel()
+        legacy_file = os.path.splitext(self.history_file)[0] + '.json'
+        self.history = HistoryStore(self.history_file, legacy_file)
+        self.page_limit = settings.GALLERY_PAGE_SIZE
+        self.refresh_gallery()
+        
+        history = self.history
+        self._checker = MissingFileChecker(history.page(), self)
+        self._checker.missing_found.connect(
+            lambda record_ids: self._on_missing_found(history, record_ids)
+        )
+        self._checker.finished.connect(self._checker.deleteLater)
+        self._checker.start()
+    
+    def _on_missing_found(self, history, record_ids):
+        """移除图片已被删除的记录"""
+        if history is self.history and history.remove(record_ids):
             self.refresh_gallery()
-            
-        except Exception as e:
-            print(f"加载历史记录失败: {e}")
 
 
 class TextToImageWidget(QWidget):
@@ -1529,11 +1521,6 @@ class TextToImageWidget(QWidget):
             self.generate_btn.setText("生成图片")
             self.status_label.setText(f"✅ 批量生成成功！共 {self.total_count} 张")
             
-            # 刷新资源管理器
-            main_window = self.window()
-            if hasattr(main_window, 'project_explorer'):
-                main_window.project_explorer.refresh()
-            
             # 只有单张时显示弹窗，批量生成不弹窗避免频繁打扰
             if self.total_count == 1:
                 QMessageBox.information(self, "成功", f"图片已生成并保存到:\n{output_path}")
@@ -1570,11 +1557,6 @@ class TextToImageWidget(QWidget):
         if self.completed_count >= self.total_count:
             self.generate_btn.setEnabled(True)
             self.generate_btn.setText("生成图片")
-            
-            # 刷新资源管理器
-            main_window = self.window()
-            if hasattr(main_window, 'project_explorer'):
-                main_window.project_explorer.refresh()
         
         # 显示详细错误弹窗
         if self.total_count == 1 or self.completed_count >= self.total_count:
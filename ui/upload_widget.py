@@ -12,9 +12,10 @@ from PyQt5.QtWidgets import (
     QFileDialog, QGroupBox, QFrame
 )
 from PyQt5.QtCore import Qt, pyqtSignal
-from PyQt5.QtGui import QPixmap, QDragEnterEvent, QDropEvent
+from PyQt5.QtGui import QDragEnterEvent, QDropEvent
 
 from config.settings import settings
+from core.image_loader import load_preview_pixmap
 
 try:
     from qfluentwidgets import (
@@ -297,9 +298,9 @@ class UploadWidget(QWidget):
             )
             return
         
-        # 保存路径和原始图片
+        # 保存路径和预览图（按预览上限解码，不保留完整分辨率的原图）
         self.current_image_path = file_path
-        self.original_pixmap = QPixmap(file_path)
+        self.original_pixmap = load_preview_pixmap(file_path)
         
         # 更新预览显示
         self.update_preview()
@@ -28,18 +28,27 @@ class RecentProjectCard(CardWidget if FLUENT_AVAILABLE else QFrame):
     
     project_clicked = pyqtSignal(str)
     
-    def __init__(self, project_name: str, project_path: str, parent=None):
+    def __init__(self, project_name: str, project_path: str, summary: dict = None, parent=None):
         super().__init__(parent)
         self.project_path = project_path
         self.project_name = project_name
+        self.summary = summary or {}
         self.setup_ui()
-        
+    
     def setup_ui(self):
         layout = QHBoxLayout(self)
         layout.setContentsMargins(16, 12, 16, 12)
         layout.setSpacing(12)
         
-        if FLUENT_AVAILABLE:
+        # 封面缩略图由后台校验时生成，保存在用户数据目录
+        cover = QPixmap(self.summary['cover']) if self.summary.get('cover') else QPixmap()
+        if not cover.isNull():
+            cover_label = QLabel()
+            cover_label.setFixedSize(40, 40)
+            cover_label.setAlignment(Qt.AlignCenter)
+            cover_label.setPixmap(cover.scaled(40, 40, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+            layout.addWidget(cover_label)
+        elif FLUENT_AVAILABLE:
             icon_widget = IconWidget(FluentIcon.FOLDER)
             icon_widget.setFixedSize(32, 32)
             layout.addWidget(icon_widget)
@@ -65,6 +74,11 @@ class RecentProjectCard(CardWidget if FLUENT_AVAILABLE else QFrame):
         info_layout.addWidget(path_label)
         layout.addLayout(info_layout, 1)
         
+        if 'image_count' in self.summary:
+            count_label = QLabel(f"{self.summary['image_count']} 图 · {self.summary.get('video_count', 0)} 视频")
+            count_label.setStyleSheet("font-size: 12px; color: rgba(255,255,255,0.6);")
+            layout.addWidget(count_label)
+        
         self.setFixedHeight(70)
         self.setCursor(Qt.PointingHandCursor)
         
@@ -277,15 +291,17 @@ class WelcomePage(QWidget):
         
         if projects:
             for project in projects[:5]:
+                summary = None
                 if isinstance(project, dict):
                     name = project.get('name', '未命名项目')
                     path = project.get('path', '')
+                    summary = project
                 elif isinstance(project, (list, tuple)) and len(project) >= 2:
                     name, path = project[0], project[1]
                 else:
                     continue
                 
-                card = RecentProjectCard(name, path)
+                card = RecentProjectCard(name, path, summary)
                 card.project_clicked.connect(self._on_recent_project_clicked)
                 self.recent_cards_layout.addWidget(card)
             